@@ -1 +1,80 @@
-"""API 모듈 초기화"""
+"""Optional subsystems as Flask blueprints, enabled per deployment profile.
+
+server.py 는 거래 코어(주문 / 캔들 / NB 존 / 카드 / SSE / 트레이너)만 직접 정의하고,
+마을 / 카드 시스템 / 아이템 / NPC / NBverse / 평가 ML 은 이 패키지의 blueprint 모듈로 분리한다.
+init_app() 이 설정에 포함된 모듈만 import 해서 등록하므로, 거래 전용 배포는
+마을(2천 줄 넘는 상태 + 함수)이나 평가 ML(sklearn / TensorFlow)의 import 비용과 메모리를 쓰지 않는다.
+- SERVER_PROFILE: full (기본, 전부) / trading (거래 코어만)
+- SERVER_BLUEPRINTS: 쉼표 목록으로 직접 지정 (프로필보다 우선, 예: "village,items")
+"""
+
+import importlib
+import time
+
+BLUEPRINTS = {
+    'village': 'api.village',
+    'card_system': 'api.card_system',
+    'items': 'api.items',
+    'npc': 'api.npc',
+    'nbverse': 'api.nbverse',
+    'ml_rating': 'api.ml_rating',
+}
+
+# card_system 은 마을 상태(CARD_SYSTEM, VILLAGE_RESIDENTS)를 사용한다
+REQUIRES = {
+    'card_system': ('village',),
+}
+
+PROFILES = {
+    'full': tuple(BLUEPRINTS),
+    'trading': (),
+}
+
+_registered = {}        # name -> module
+
+
+def enabled(profile: str | None = None, names: str | None = None) -> list:
+    """Blueprint names to register: explicit names win over the profile; requirements come first."""
+    if names:
+        wanted = [n.strip() for n in names.split(',') if n.strip()]
+    else:
+        profile = (profile or 'full').strip().lower()
+        if profile not in PROFILES:
+            raise ValueError(f"unknown server profile: {profile} (choose from {', '.join(PROFILES)})")
+        wanted = list(PROFILES[profile])
+    unknown = [n for n in wanted if n not in BLUEPRINTS]
+    if unknown:
+        raise ValueError(f"unknown blueprint(s): {', '.join(unknown)}")
+    out = []
+    for name in wanted:
+        for dep in REQUIRES.get(name, ()):
+            if dep not in out:
+                out.append(dep)
+        if name not in out:
+            out.append(name)
+    return out
+
+
+def register_blueprints(app, names, startup=None) -> dict:
+    """Import and register each blueprint once; returns {name: import+register ms}."""
+    timings = {}
+    for name in names:
+        if name in _registered:
+            continue
+        t = time.perf_counter()
+        module = importlib.import_module(BLUEPRINTS[name])
+        app.register_blueprint(module.bp)
+        _registered[name] = module
+        timings[name] = round((time.perf_counter() - t) * 1000.0, 1)
+        if startup is not None:
+            startup.mark(f'blueprint:{name}', dur_ms=timings[name])
+    return timings
+
+
+def loaded(name: str):
+    """The registered blueprint module, or None when the subsystem is disabled in this deployment."""
+    return _registered.get(name)
+
+
+def registered() -> list:
+    return list(_registered)
@@ -0,0 +1,346 @@
+"""Village card system blueprint: card lifecycle (create / analyze / buy / sell / state machine).
+
+/api/village/card-system/* 엔드포인트. 카드 상태는 마을 모듈(CARD_SYSTEM, VILLAGE_RESIDENTS)에 있으므로
+이 blueprint 를 켜면 village 도 함께 등록된다 (api.REQUIRES).
+"""
+
+from datetime import datetime
+
+from flask import Blueprint, jsonify, request
+
+from api.village import (
+    CARD_ACTION, CARD_STATE, CARD_SYSTEM, VILLAGE_RESIDENTS, analyze_card, create_card, execute_card_buy,
+    execute_card_sell, get_card_elapsed_time, get_member_card_status, update_all_cards_state_machine,
+    update_card_state_machine,
+)
+
+bp = Blueprint('card_system', __name__)
+
+
+# 카드 시스템 API 엔드포인트들
+@bp.route('/api/village/card-system/status', methods=['GET'])
+def api_village_card_system_status():
+    """카드 시스템 전체 상태 API"""
+    try:
+        # 활성 카드 목록에 경과 시간 및 상태 머신 정보 추가
+        active_cards_with_time = []
+        state_counts = {
+            CARD_STATE["NEW"]: 0,
+            CARD_STATE["WATCH"]: 0,
+            CARD_STATE["LONG"]: 0,
+            CARD_STATE["SHORT"]: 0,
+            CARD_STATE["EXITED"]: 0,
+            CARD_STATE["REMOVED"]: 0
+        }
+        action_counts = {
+            CARD_ACTION["BUY"]: 0,
+            CARD_ACTION["SELL_SHORT"]: 0,
+            CARD_ACTION["SELL_TO_CLOSE"]: 0,
+            CARD_ACTION["BUY_TO_CLOSE"]: 0,
+            CARD_ACTION["WAIT"]: 0,
+            CARD_ACTION["REMOVE_CARD"]: 0
+        }
+        
+        for card_id, card in CARD_SYSTEM["activeCards"].items():
+            elapsed_seconds, elapsed_formatted = get_card_elapsed_time(card)
+            card_state = card.get("state", CARD_STATE["NEW"])
+            card_action = card.get("action", CARD_ACTION["WAIT"])
+            
+            state_counts[card_state] = state_counts.get(card_state, 0) + 1
+            action_counts[card_action] = action_counts.get(card_action, 0) + 1
+            
+            card_info = {
+                "cardId": card["cardId"],
+                "memberName": card["memberName"],
+                "timeframe": card["timeframe"],
+                "state": card_state,
+                "action": card_action,
+                "score": card.get("score", 0),
+                "elapsedSeconds": elapsed_seconds,
+                "elapsedTime": elapsed_formatted,
+                "createdAtFormatted": card.get("createdAtFormatted", datetime.fromtimestamp(card["createdAt"]).strftime('%Y-%m-%d %H:%M:%S'))
+            }
+            active_cards_with_time.append(card_info)
+        
+        status = {
+            "totalCards": CARD_SYSTEM["totalCards"],
+            "activeCards": len(CARD_SYSTEM["activeCards"]),
+            "completedCards": len(CARD_SYSTEM["completedCards"]),
+            "failedCards": len(CARD_SYSTEM["failedCards"]),
+            "removedCards": len(CARD_SYSTEM.get("removedCards", {})),
+            "cardCounter": CARD_SYSTEM["cardCounter"],
+            "lastUpdate": CARD_SYSTEM["lastCardUpdate"],
+            "activeCardsList": active_cards_with_time,
+            "stateCounts": state_counts,
+            "actionCounts": action_counts,
+            "members": {}
+        }
+        
+        # 각 주민의 카드 상태
+        for member_name, member in VILLAGE_RESIDENTS.items():
+            status["members"][member_name] = get_member_card_status(member_name)
+        
+        return jsonify(status)
+        
+    except Exception as e:
+        print(f"Error in card system status API: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/village/card-system/member/<member_name>', methods=['GET'])
+def api_village_card_system_member(member_name):
+    """특정 주민의 카드 시스템 상태 API"""
+    try:
+        status = get_member_card_status(member_name)
+        if not status:
+            return jsonify({"error": "Member not found"}), 404
+        
+        return jsonify(status)
+        
+    except Exception as e:
+        print(f"Error in member card system API: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/village/card-system/create', methods=['POST'])
+def api_village_card_system_create():
+    """새로운 카드 생성 API"""
+    try:
+        data = request.get_json()
+        member_name = data.get("member_name")
+        timeframe = data.get("timeframe")
+        pattern_data = data.get("pattern_data", {})
+        
+        if not member_name or not timeframe:
+            return jsonify({"error": "Missing required fields"}), 400
+        
+        # 주민이 해당 분봉을 담당하는지 확인
+        member = VILLAGE_RESIDENTS.get(member_name.lower())
+        if not member or timeframe not in member["assignedTimeframes"]:
+            return jsonify({"error": "Member not assigned to this timeframe"}), 400
+        
+        # 카드 생성
+        card_id = create_card(member_name, timeframe, pattern_data)
+        
+        return jsonify({
+            "success": True,
+            "card_id": card_id,
+            "member_name": member_name,
+            "timeframe": timeframe
+        })
+        
+    except Exception as e:
+        print(f"Error in create card API: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/village/card-system/analyze/<int:card_id>', methods=['POST'])
+def api_village_card_system_analyze(card_id):
+    """카드 분석 API"""
+    try:
+        data = request.get_json()
+        member_name = data.get("member_name")
+        
+        if not member_name:
+            return jsonify({"error": "Missing member_name"}), 400
+        
+        # 카드 분석
+        strategy = analyze_card(card_id, member_name)
+        if not strategy:
+            return jsonify({"error": "Card analysis failed"}), 400
+        
+        return jsonify({
+            "success": True,
+            "card_id": card_id,
+            "strategy": strategy
+        })
+        
+    except Exception as e:
+        print(f"Error in analyze card API: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/village/card-system/buy/<int:card_id>', methods=['POST'])
+def api_village_card_system_buy(card_id):
+    """카드 매수 실행 API"""
+    try:
+        data = request.get_json()
+        buy_info = data.get("buy_info", {})
+        
+        if not buy_info:
+            return jsonify({"error": "Missing buy_info"}), 400
+        
+        # 매수 실행
+        success = execute_card_buy(card_id, buy_info)
+        if not success:
+            return jsonify({"error": "Buy execution failed"}), 400
+        
+        return jsonify({
+            "success": True,
+            "card_id": card_id,
+            "status": "buy_completed"
+        })
+        
+    except Exception as e:
+        print(f"Error in buy card API: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/village/card-system/sell/<int:card_id>', methods=['POST'])
+def api_village_card_system_sell(card_id):
+    """카드 매도 실행 API"""
+    try:
+        data = request.get_json()
+        sell_info = data.get("sell_info", {})
+        
+        if not sell_info:
+            return jsonify({"error": "Missing sell_info"}), 400
+        
+        # 매도 실행
+        success = execute_card_sell(card_id, sell_info)
+        if not success:
+            return jsonify({"error": "Sell execution failed"}), 400
+        
+        return jsonify({
+            "success": True,
+            "card_id": card_id,
+            "status": "completed"
+        })
+        
+    except Exception as e:
+        print(f"Error in sell card API: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/village/card-system/cards', methods=['GET'])
+def api_village_card_system_cards():
+    """모든 활성 카드 목록 조회 (생성 시간 카운트 및 상태 머신 정보 포함)"""
+    try:
+        cards_list = []
+        for card_id, card in CARD_SYSTEM["activeCards"].items():
+            elapsed_seconds, elapsed_formatted = get_card_elapsed_time(card)
+            card_data = {
+                "cardId": card["cardId"],
+                "memberName": card["memberName"],
+                "timeframe": card["timeframe"],
+                "state": card.get("state", CARD_STATE["NEW"]),
+                "action": card.get("action", CARD_ACTION["WAIT"]),
+                "createdAt": card["createdAt"],
+                "createdAtFormatted": card.get("createdAtFormatted", datetime.fromtimestamp(card["createdAt"]).strftime('%Y-%m-%d %H:%M:%S')),
+                "elapsedSeconds": elapsed_seconds,
+                "elapsedTime": elapsed_formatted,
+                "score": card.get("score", 0),
+                "dataQuality": card.get("dataQuality", "DATA_OK"),
+                "trend": card.get("trend", "TREND_NEUTRAL"),
+                "momentum": card.get("momentum", "MOM_NEUTRAL"),
+                "riskStatus": card.get("riskStatus", "RISK_OK"),
+                "entryPrice": card.get("entryPrice"),
+                "currentPrice": card.get("currentPrice"),
+                "pnlPercent": card.get("pnlPercent", 0),
+                "buyInfo": card.get("buyInfo"),
+                "sellInfo": card.get("sellInfo"),
+                "performance": card.get("performance"),
+                "strategy": card.get("strategy")
+            }
+            cards_list.append(card_data)
+        
+        return jsonify({
+            "success": True,
+            "cards": cards_list,
+            "count": len(cards_list)
+        })
+        
+    except Exception as e:
+        print(f"Error in cards list API: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/village/card-system/card/<int:card_id>', methods=['GET'])
+def api_village_card_system_card(card_id):
+    """특정 카드 상세 정보 조회 (생성 시간 카운트 및 상태 머신 정보 포함)"""
+    try:
+        if card_id not in CARD_SYSTEM["activeCards"]:
+            return jsonify({"error": "Card not found"}), 404
+        
+        card = CARD_SYSTEM["activeCards"][card_id]
+        elapsed_seconds, elapsed_formatted = get_card_elapsed_time(card)
+        
+        card_data = {
+            "cardId": card["cardId"],
+            "memberName": card["memberName"],
+            "timeframe": card["timeframe"],
+            "state": card.get("state", CARD_STATE["NEW"]),
+            "action": card.get("action", CARD_ACTION["WAIT"]),
+            "createdAt": card["createdAt"],
+            "createdAtFormatted": card.get("createdAtFormatted", datetime.fromtimestamp(card["createdAt"]).strftime('%Y-%m-%d %H:%M:%S')),
+            "elapsedSeconds": elapsed_seconds,
+            "elapsedTime": elapsed_formatted,
+            "score": card.get("score", 0),
+            "dataQuality": card.get("dataQuality", "DATA_OK"),
+            "dataQualityCount": card.get("dataQualityCount", 0),
+            "trend": card.get("trend", "TREND_NEUTRAL"),
+            "momentum": card.get("momentum", "MOM_NEUTRAL"),
+            "structure": card.get("structure", "STRUCTURE_NONE"),
+            "volumeConfirm": card.get("volumeConfirm", False),
+            "riskStatus": card.get("riskStatus", "RISK_OK"),
+            "stopLoss": card.get("stopLoss"),
+            "takeProfit": card.get("takeProfit"),
+            "entryPrice": card.get("entryPrice"),
+            "currentPrice": card.get("currentPrice"),
+            "pnl": card.get("pnl", 0),
+            "pnlPercent": card.get("pnlPercent", 0),
+            "buyInfo": card.get("buyInfo"),
+            "sellInfo": card.get("sellInfo"),
+            "performance": card.get("performance"),
+            "strategy": card.get("strategy"),
+            "patternData": card.get("patternData"),
+            "stateHistory": card.get("stateHistory", []),
+            "actionHistory": card.get("actionHistory", [])
+        }
+        
+        return jsonify({
+            "success": True,
+            "card": card_data
+        })
+        
+    except Exception as e:
+        print(f"Error in card detail API: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/village/card-system/update-state/<int:card_id>', methods=['POST'])
+def api_village_card_system_update_state(card_id):
+    """카드 상태 머신 업데이트 API"""
+    try:
+        data = request.get_json() or {}
+        market_data = data.get("marketData")
+        
+        if card_id not in CARD_SYSTEM["activeCards"]:
+            return jsonify({"error": "Card not found"}), 404
+        
+        updated = update_card_state_machine(card_id, market_data)
+        
+        card = CARD_SYSTEM["activeCards"][card_id]
+        
+        return jsonify({
+            "success": True,
+            "updated": updated,
+            "cardId": card_id,
+            "state": card.get("state"),
+            "action": card.get("action")
+        })
+        
+    except Exception as e:
+        print(f"Error in update card state API: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/village/card-system/update-all-states', methods=['POST'])
+def api_village_card_system_update_all_states():
+    """모든 활성 카드의 상태 머신 업데이트 API"""
+    try:
+        data = request.get_json() or {}
+        market_data_dict = data.get("marketDataDict", {})
+        
+        updated_count = update_all_cards_state_machine(market_data_dict)
+        
+        return jsonify({
+            "success": True,
+            "updatedCount": updated_count,
+            "totalActiveCards": len(CARD_SYSTEM["activeCards"])
+        })
+        
+    except Exception as e:
+        print(f"Error in update all cards state API: {e}")
+        return jsonify({"error": str(e)}), 500
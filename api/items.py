@@ -0,0 +1,218 @@
+"""Bitcoin item shop blueprint: item list, purchase, sale and price refresh.
+
+아이템 저장소(_load/_save_bitcoin_items)와 BTC 시세 캐시는 trade_routes 도 쓰므로 server 에 남고,
+이 모듈은 /api/items/* 엔드포인트와 가격 갱신만 가진다.
+"""
+
+import random
+from datetime import datetime
+
+from flask import Blueprint, jsonify, request
+
+from server import _get_current_btc_price, _load_bitcoin_items, _save_bitcoin_items, _startup
+
+bp = Blueprint('items', __name__)
+
+
+def _update_item_prices():
+    """모든 아이템의 현재 가격 업데이트"""
+    try:
+        data = _load_bitcoin_items()
+        current_price = _get_current_btc_price()
+        
+        if current_price == 0:
+            return data
+        
+        for item in data.get('items', []):
+            if item.get('status') == 'active':
+                purchase_price = item.get('purchase_price', 0)
+                purchase_amount = item.get('purchase_amount', 0)
+                
+                current_value = current_price * purchase_amount
+                profit_loss = current_value - purchase_price
+                profit_loss_percent = (profit_loss / purchase_price * 100) if purchase_price > 0 else 0
+                
+                item['current_price'] = current_price
+                item['current_value'] = current_value
+                item['profit_loss'] = profit_loss
+                item['profit_loss_percent'] = round(profit_loss_percent, 2)
+        
+        data['last_updated'] = datetime.now().isoformat()
+        _save_bitcoin_items(data)
+        return data
+    except Exception as e:
+        print(f"⚠️ Failed to update item prices: {e}")
+        return _load_bitcoin_items()
+
+
+@bp.route('/api/items/create', methods=['POST'])
+def api_items_create():
+    """비트코인 아이템 생성"""
+    try:
+        data = request.get_json()
+        purchase_price = float(data.get('purchase_price', 0))
+        purchase_amount = float(data.get('purchase_amount', 0))
+        item_name = data.get('item_name', '비트코인')
+        
+        if purchase_price <= 0 or purchase_amount <= 0:
+            return jsonify({'ok': False, 'error': 'Invalid purchase price or amount'}), 400
+        
+        # 현재 BTC 가격 조회
+        current_price = _get_current_btc_price()
+        if current_price == 0:
+            return jsonify({'ok': False, 'error': 'Failed to get current BTC price'}), 500
+        
+        # 아이템 생성
+        item_id = f"btc_item_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{random.randint(1000, 9999)}"
+        current_value = current_price * purchase_amount
+        profit_loss = current_value - purchase_price
+        profit_loss_percent = (profit_loss / purchase_price * 100) if purchase_price > 0 else 0
+        
+        item = {
+            'item_id': item_id,
+            'item_name': item_name,
+            'item_type': 'crypto',
+            'purchase_price': purchase_price,
+            'purchase_amount': purchase_amount,
+            'purchase_time': datetime.now().isoformat(),
+            'current_price': current_price,
+            'current_value': current_value,
+            'profit_loss': profit_loss,
+            'profit_loss_percent': round(profit_loss_percent, 2),
+            'status': 'active'
+        }
+        
+        # 저장
+        items_data = _load_bitcoin_items()
+        items_data['items'].append(item)
+        items_data['last_updated'] = datetime.now().isoformat()
+        _save_bitcoin_items(items_data)
+        
+        return jsonify({'ok': True, 'item': item})
+        
+    except Exception as e:
+        print(f"❌ 아이템 생성 오류: {e}")
+        return jsonify({'ok': False, 'error': str(e)}), 500
+
+
+@bp.route('/api/items/list', methods=['GET'])
+def api_items_list():
+    """비트코인 아이템 목록 조회"""
+    try:
+        status = request.args.get('status', 'active')
+        
+        # 가격 업데이트
+        items_data = _update_item_prices()
+        
+        # 필터링
+        items = [item for item in items_data.get('items', []) 
+                if status == 'all' or item.get('status') == status]
+        
+        # 총계 계산
+        total_amount = sum(item.get('purchase_amount', 0) for item in items if item.get('status') == 'active')
+        total_value = sum(item.get('current_value', 0) for item in items if item.get('status') == 'active')
+        total_purchase_price = sum(item.get('purchase_price', 0) for item in items if item.get('status') == 'active')
+        total_profit_loss = total_value - total_purchase_price
+        total_profit_loss_percent = (total_profit_loss / total_purchase_price * 100) if total_purchase_price > 0 else 0
+        
+        return jsonify({
+            'ok': True,
+            'items': items,
+            'total': {
+                'total_amount': round(total_amount, 8),
+                'total_value': round(total_value, 2),
+                'total_purchase_price': round(total_purchase_price, 2),
+                'total_profit_loss': round(total_profit_loss, 2),
+                'total_profit_loss_percent': round(total_profit_loss_percent, 2)
+            },
+            'current_btc_price': _get_current_btc_price(),
+            'last_updated': items_data.get('last_updated')
+        })
+        
+    except Exception as e:
+        print(f"❌ 아이템 목록 조회 오류: {e}")
+        return jsonify({'ok': False, 'error': str(e)}), 500
+
+
+@bp.route('/api/items/update-prices', methods=['GET'])
+def api_items_update_prices():
+    """아이템 시세 업데이트"""
+    try:
+        items_data = _update_item_prices()
+        active_count = len([item for item in items_data.get('items', []) if item.get('status') == 'active'])
+        
+        return jsonify({
+            'ok': True,
+            'updated_count': active_count,
+            'current_btc_price': _get_current_btc_price(),
+            'last_updated': items_data.get('last_updated')
+        })
+        
+    except Exception as e:
+        print(f"❌ 시세 업데이트 오류: {e}")
+        return jsonify({'ok': False, 'error': str(e)}), 500
+
+
+@bp.route('/api/items/sell', methods=['POST'])
+def api_items_sell():
+    """비트코인 아이템 판매"""
+    try:
+        data = request.get_json()
+        item_id = data.get('item_id')
+        
+        if not item_id:
+            return jsonify({'ok': False, 'error': 'Item ID required'}), 400
+        
+        items_data = _load_bitcoin_items()
+        item = None
+        item_index = None
+        
+        for i, it in enumerate(items_data.get('items', [])):
+            if it.get('item_id') == item_id:
+                item = it
+                item_index = i
+                break
+        
+        if not item:
+            return jsonify({'ok': False, 'error': 'Item not found'}), 404
+        
+        if item.get('status') != 'active':
+            return jsonify({'ok': False, 'error': 'Item is not active'}), 400
+        
+        # 현재 가격으로 판매
+        current_price = _get_current_btc_price()
+        if current_price == 0:
+            return jsonify({'ok': False, 'error': 'Failed to get current BTC price'}), 500
+        
+        sell_value = current_price * item.get('purchase_amount', 0)
+        final_profit_loss = sell_value - item.get('purchase_price', 0)
+        final_profit_loss_percent = (final_profit_loss / item.get('purchase_price', 0) * 100) if item.get('purchase_price', 0) > 0 else 0
+        
+        # 아이템 상태 업데이트
+        item['status'] = 'sold'
+        item['sell_price'] = current_price
+        item['sell_value'] = sell_value
+        item['sell_time'] = datetime.now().isoformat()
+        item['final_profit_loss'] = final_profit_loss
+        item['final_profit_loss_percent'] = round(final_profit_loss_percent, 2)
+        
+        items_data['items'][item_index] = item
+        items_data['last_updated'] = datetime.now().isoformat()
+        _save_bitcoin_items(items_data)
+        
+        return jsonify({
+            'ok': True,
+            'item': item
+        })
+        
+    except Exception as e:
+        print(f"❌ 아이템 판매 오류: {e}")
+        return jsonify({'ok': False, 'error': str(e)}), 500
+
+
+
+def _init_items():
+    return len(_load_bitcoin_items().get('items', []))
+
+
+_startup.register('items', _init_items)
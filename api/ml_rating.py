@@ -0,0 +1,745 @@
+"""Card rating ML blueprint: rating models v1 / v2 (ensemble) / v3 (LSTM) and their endpoints.
+
+/api/ml/rating/* 엔드포인트와 학습 데이터 수집 함수.
+모델은 sklearn / TensorFlow import 를 동반하므로 startup 서브시스템으로 등록해
+warm-up 단계나 처음 쓰일 때 로드한다 (LSTM 은 STARTUP_WARM_LSTM=true 일 때만 warm-up).
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+
+from flask import Blueprint, jsonify, request
+
+from helpers.training_store import get_training_store
+from server import _startup, get_ohlcv_data, logger, model_dir
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+bp = Blueprint('ml_rating', __name__)
+
+
+def get_ml_system_v2():
+    return _startup.get('rating_ml_v2')
+
+
+def get_lstm_model():
+    """LSTM 딥러닝 모델 (lazy: 처음 쓰일 때 TensorFlow 로드)"""
+    return _startup.get('lstm')
+
+
+def get_rating_ml():
+    """Legacy support"""
+    return _startup.get('rating_ml')
+
+
+# ===== 카드 등급 ML 보조 함수 =====
+def _load_nbverse_snapshot(path_str: str) -> dict:
+    try:
+        if not path_str:
+            return {}
+        base_dir = os.path.join(_ROOT, 'data', 'nbverse')
+        candidate = path_str
+        if not os.path.isabs(candidate):
+            candidate = os.path.join(base_dir, candidate)
+        if not os.path.exists(candidate):
+            return {}
+        with open(candidate, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+            return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def _extract_profit_rate(card: dict) -> tuple[bool, float]:
+    """Return (ok, profit_rate_float). profit_rate expected as fraction (-1..1)."""
+    if not isinstance(card, dict):
+        return False, 0.0
+    keys = ['profit_rate', 'pnl_rate', 'pnlRate', 'rate', 'pnl_pct', 'pnl_percent']
+    for k in keys:
+        if k in card:
+            try:
+                pr = float(card[k])
+                if abs(pr) > 5:  # likely percent
+                    pr = pr / 100.0
+                return True, pr
+            except Exception:
+                continue
+    # derive from pnl and notional if present
+    try:
+        pnl = float(card.get('pnl'))
+        notional = float(card.get('price', 0) * card.get('size', 0))
+        if notional != 0:
+            return True, pnl / notional
+    except Exception:
+        pass
+    return False, 0.0
+
+
+def _collect_ml_training_samples() -> list[dict]:
+    """
+    Generate training samples from historical BUY→SELL cycles in trainer_storage.
+    Each training sample includes:
+      - card: BUY card data reconstructed from trainer_storage BUY trades
+      - profit_rate: profit percentage from matching SELL trade
+    Pairs are matched incrementally by the training store (only trades newer
+    than the last watermark are processed).
+    """
+    try:
+        samples = get_training_store().trade_samples()
+    except Exception as e:
+        logger.error(f"[_collect_ml_training_samples] Failed to load training store: {e}")
+        return []
+    logger.info(f"[_collect_ml_training_samples] Collected {len(samples)} training samples")
+    return samples
+
+
+def _collect_nbverse_training_samples() -> list[dict]:
+    """
+    nbverse 스냅샷들에서 온라인 학습 데이터 수집
+    현재 생산 중인 카드들의 N/B 데이터 + 계산된 강화도로 학습
+    (training store 가 마지막 스캔 이후 변경된 스냅샷만 다시 파싱)
+    """
+    try:
+        samples = get_training_store().nbverse_samples()
+    except Exception as e:
+        logger.warning(f"[_collect_nbverse_training_samples] training store 로드 실패: {e}")
+        return []
+    logger.info(f"[_collect_nbverse_training_samples] Collected {len(samples)} training samples from nbverse")
+    return samples
+
+
+def _merge_training_samples() -> list[dict]:
+    """
+    모든 훈련 데이터 통합
+    - nbverse 스냅샷 (현재 생산 카드)
+    - trainer_storage (거래 기록)
+    """
+    samples = []
+    
+    # 1. nbverse 스냅샷 (온라인 학습 데이터)
+    nbverse_samples = _collect_nbverse_training_samples()
+    samples.extend(nbverse_samples)
+    
+    # 2. trainer_storage (거래 기록)
+    trader_samples = _collect_ml_training_samples()
+    samples.extend(trader_samples)
+    
+    logger.info(f"[_merge_training_samples] Total samples: {len(samples)} (nbverse: {len(nbverse_samples)}, trader: {len(trader_samples)})")
+    return samples
+
+
+# ===== 카드 등급 ML 엔드포인트 =====
+@bp.route('/api/ml/rating/info', methods=['GET'])
+def api_ml_rating_info():
+    try:
+        ml = get_rating_ml()
+        return jsonify(ml.info())
+    except Exception as e:
+        return jsonify({'ok': False, 'error': str(e)}), 500
+
+
+@bp.route('/api/ml/rating/v2/info', methods=['GET'])
+def api_ml_rating_v2_info():
+    """ML Rating V2 모델 정보"""
+    try:
+        system = get_ml_system_v2()
+        return jsonify(system.get_status())
+    except Exception as e:
+        return jsonify({'ok': False, 'error': str(e)}), 500
+
+
+@bp.route('/api/ml/rating/train', methods=['POST'])
+def api_ml_rating_train():
+    try:
+        payload = request.get_json(force=True) if request.is_json else {}
+    except Exception:
+        payload = {}
+    try:
+        training_data = payload.get('training_data') if isinstance(payload, dict) else None
+        if not training_data:
+            training_data = _collect_ml_training_samples()
+        ml = get_rating_ml()
+        result = ml.train(training_data)
+        # Always return 200 to avoid frontend error floods; include ok flag in body
+        status = 200
+        return jsonify(result), status
+    except Exception as e:
+        return jsonify({'ok': False, 'error': str(e)}), 500
+
+
+@bp.route('/api/ml/rating/v2/train', methods=['POST'])
+def api_ml_rating_v2_train():
+    """ML Rating V2 모델 훈련 (Zone + Profit 동시)"""
+    try:
+        payload = request.get_json(force=True) if request.is_json else {}
+    except Exception:
+        payload = {}
+    
+    try:
+        training_data = payload.get('training_data') if isinstance(payload, dict) else None
+        if not training_data:
+            training_data = _collect_ml_training_samples()
+        
+        system = get_ml_system_v2()
+        result = system.train(training_data)
+        
+        return jsonify(result), 200
+    except Exception as e:
+        logger.error(f"[api_ml_rating_v2_train] Error: {e}")
+        return jsonify({'ok': False, 'error': str(e)}), 500
+
+
+@bp.route('/api/ml/rating/predict', methods=['POST'])
+def api_ml_rating_predict():
+    try:
+        if not request.is_json:
+            return jsonify({'ok': False, 'error': 'JSON required'}), 400
+        payload = request.get_json(force=True)
+        card = payload.get('card') if isinstance(payload, dict) else None
+        if not card:
+            return jsonify({'ok': False, 'error': 'card is required'}), 400
+        ml = get_rating_ml()
+        result = ml.predict(card)
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({'ok': False, 'error': str(e)}), 500
+
+
+@bp.route('/api/ml/rating/v2/predict', methods=['POST'])
+def api_ml_rating_v2_predict():
+    """ML Rating V2 예측 (Zone + Profit)"""
+    try:
+        if not request.is_json:
+            return jsonify({'ok': False, 'error': 'JSON required'}), 400
+        
+        payload = request.get_json(force=True)
+        card = payload.get('card') if isinstance(payload, dict) else None
+        use_zone_prediction = payload.get('use_zone_prediction', False)
+        predict_future = payload.get('predict_future', 0)  # 미래 예측 개수
+        
+        if not card:
+            return jsonify({'ok': False, 'error': 'card is required'}), 400
+        
+        system = get_ml_system_v2()
+        
+        # 단일 예측
+        if predict_future <= 0:
+            result = system.predict(card, use_zone_prediction=use_zone_prediction)
+            return jsonify(result)
+        
+        # 미래 시계열 예측 (여러 시점의 zone 예측)
+        future_predictions = []
+        
+        for i in range(predict_future):
+            # 각 미래 시점에 대해 zone 예측
+            result = system.predict(card, use_zone_prediction=True)
+            
+            if result.get('ok'):
+                future_predictions.append({
+                    'index': i,
+                    'zone': result.get('zone'),
+                    'zone_flag': result.get('zone_flag'),
+                    'confidence': result.get('zone_confidence', 0.5),
+                    'profit_rate': result.get('profit_rate', 0)
+                })
+        
+        return jsonify({
+            'ok': True,
+            'predictions': future_predictions,
+            'count': len(future_predictions)
+        })
+        
+    except Exception as e:
+        logger.error(f"[api_ml_rating_v2_predict] Error: {e}")
+        return jsonify({'ok': False, 'error': str(e)}), 500
+
+
+@bp.route('/api/ml/rating/v2/auto-train', methods=['POST'])
+def api_ml_rating_v2_auto_train():
+    """
+    차트 데이터 기반 자동 재훈련
+    - 현재 차트의 캔들 데이터로 N/B Wave 계산
+    - 실시간 학습 샘플 생성
+    - 자동 모델 재훈련
+    """
+    try:
+        payload = request.get_json(force=True) if request.is_json else {}
+        intervals = payload.get('intervals', ['10m', '30m', '1h'])
+        window = payload.get('window', 120)
+        
+        from helpers.candles import compute_r_from_ohlcv
+        import pandas as pd
+        
+        all_samples = []
+        
+        for interval in intervals:
+            try:
+                # 캔들 데이터 가져오기
+                candles_data = get_ohlcv_data('KRW-BTC', interval, count=300)
+                if not candles_data or len(candles_data) < window + 10:
+                    continue
+                
+                # N/B Wave 계산
+                for i in range(window, len(candles_data) - 10):
+                    window_data = candles_data[i-window:i]
+                    
+                    # Price N/B
+                    prices = [c['close'] for c in window_data]
+                    p_max = max(prices)
+                    p_min = min(prices)
+                    
+                    # Volume N/B
+                    volumes = [c['volume'] for c in window_data]
+                    v_max = max(volumes)
+                    v_min = min(volumes)
+                    
+                    # Turnover N/B
+                    turnovers = [c['close'] * c['volume'] for c in window_data]
+                    t_max = max(turnovers)
+                    t_min = min(turnovers)
+                    
+                    # r-value
+                    def calc_r(mx, mn):
+                        if mx <= 0 or mn <= 0:
+                            return 0.0
+                        return (mx - mn) / (mx + mn) if (mx + mn) > 0 else 0.0
+                    
+                    r_price = calc_r(p_max, p_min)
+                    r_vol = calc_r(v_max, v_min)
+                    r_amt = calc_r(t_max, t_min)
+                    avg_r = (r_price + r_vol + r_amt) / 3.0
+                    
+                    # Zone 판정
+                    if avg_r > 0.55:
+                        zone_flag = 1
+                    elif avg_r < 0.45:
+                        zone_flag = -1
+                    else:
+                        zone_flag = 0
+                    
+                    # 미래 수익률 (다음 10개 캔들 평균)
+                    current_price = candles_data[i]['close']
+                    future_prices = [candles_data[j]['close'] for j in range(i+1, i+11)]
+                    avg_future = sum(future_prices) / len(future_prices)
+                    profit_rate = (avg_future - current_price) / current_price if current_price > 0 else 0
+                    
+                    all_samples.append({
+                        'card': {
+                            'nb': {
+                                'price': {'max': p_max, 'min': p_min},
+                                'volume': {'max': v_max, 'min': v_min},
+                                'turnover': {'max': t_max, 'min': t_min}
+                            },
+                            'current_price': current_price,
+                            'interval': interval,
+                            'insight': {'zone_flag': zone_flag}
+                        },
+                        'profit_rate': profit_rate
+                    })
+            
+            except Exception as e:
+                logger.warning(f"[auto-train-v2] {interval} 처리 실패: {e}")
+                continue
+        
+        if len(all_samples) < 10:
+            return jsonify({'ok': False, 'error': f'샘플 부족: {len(all_samples)}개'}), 400
+        
+        # V2 모델 훈련
+        system = get_ml_system_v2()
+        result = system.train(all_samples)
+        
+        result['sample_count'] = len(all_samples)
+        result['intervals'] = intervals
+        
+        logger.info(f"[auto-train-v2] ✓ 재훈련 완료: {len(all_samples)}개 샘플")
+        
+        return jsonify(result)
+        
+    except Exception as e:
+        logger.error(f"[auto-train-v2] Error: {e}")
+        return jsonify({'ok': False, 'error': str(e)}), 500
+
+
+@bp.route('/api/ml/rating/auto-train', methods=['POST'])
+def api_ml_rating_auto_train():
+    """
+    자동 온라인 학습 엔드포인트
+    1. nbverse에서 가장 최근 카드를 찾아 가격 비교로 실제 수익률 계산
+    2. 이전 카드를 trainer_storage에 추가 (훈련 데이터)
+    3. 5개 이상 축적되면 전체 재훈련
+    4. 현재 카드 AI 예측 반환
+    """
+    try:
+        if not request.is_json:
+            return jsonify({'ok': False, 'error': 'JSON required'}), 400
+        
+        payload = request.get_json(force=True)
+        card = payload.get('card')
+        current_price = payload.get('current_price')
+        interval = payload.get('interval')
+        
+        if not card or current_price is None:
+            return jsonify({'ok': False, 'error': 'card and current_price required'}), 400
+        
+        result = {'ok': True}
+        ml = get_rating_ml()
+        
+        try:
+            current_price = float(current_price)
+        except (ValueError, TypeError):
+            current_price = None
+        
+        # Step 1: nbverse에서 가장 최근 저장된 카드 찾기
+        prev_card = None
+        prev_price = None
+        actual_profit_rate = None
+        
+        if interval:
+            try:
+                nbverse_base = os.path.join(model_dir, '..', 'data', 'nbverse')
+                
+                latest_card = None
+                latest_mtime = 0
+                
+                for type_dir in ['max', 'min']:
+                    type_path = os.path.join(nbverse_base, type_dir)
+                    if os.path.isdir(type_path):
+                        for root, dirs, files in os.walk(type_path):
+                            for f in files:
+                                if f == 'this_pocket_card.json':
+                                    fpath = os.path.join(root, f)
+                                    try:
+                                        mtime = os.path.getmtime(fpath)
+                                        if mtime > latest_mtime:
+                                            with open(fpath, 'r', encoding='utf-8') as jf:
+                                                card_data = json.load(jf)
+                                                latest_mtime = mtime
+                                                latest_card = card_data
+                                    except:
+                                        pass
+                
+                if latest_card:
+                    prev_card = latest_card.get('card')
+                    prev_price = latest_card.get('current_price')
+                    
+            except Exception as e:
+                logger.debug(f"[auto-train] Failed to load prev card: {e}")
+        
+        # Step 2: 이전 카드가 있으면 수익률 계산 및 trainer_storage에 저장
+        if prev_card and prev_price is not None and current_price is not None:
+            try:
+                prev_p = float(prev_price)
+                if prev_p > 0:
+                    actual_profit_rate = (current_price - prev_p) / prev_p
+                    
+                    # 노이즈 제거
+                    if abs(actual_profit_rate) > 0.5:
+                        actual_profit_rate = 0.5 if actual_profit_rate > 0 else -0.5
+                    
+                    # trainer_storage에 이전 카드 추가
+                    try:
+                        trainer_data = load_trainer_storage()
+                        if not isinstance(trainer_data, list):
+                            trainer_data = []
+                        
+                        training_sample = {
+                            'card': prev_card,
+                            'profit_rate': float(actual_profit_rate),
+                            'timestamp': datetime.now().isoformat()
+                        }
+                        trainer_data.append(training_sample)
+                        save_trainer_storage(trainer_data)
+                        
+                        result['prev_card_added'] = True
+                        result['actual_profit_rate'] = float(actual_profit_rate)
+                        logger.debug(f"[auto-train] Prev card added to trainer_storage: profit_rate={actual_profit_rate:.4f}")
+                    except Exception as e:
+                        logger.debug(f"[auto-train] Failed to save to trainer_storage: {e}")
+                    
+            except Exception as e:
+                logger.debug(f"[auto-train] Failed to calculate profit_rate: {e}")
+        
+        # Step 3: 5개 이상 샘플 축적되면 전체 재훈련
+        try:
+            trainer_data = load_trainer_storage()
+            if isinstance(trainer_data, list) and len(trainer_data) >= 5:
+                # nbverse도 포함
+                all_samples = _merge_training_samples()
+                if len(all_samples) >= 5:
+                    train_result = ml.train(all_samples)
+                    if train_result.get('ok'):
+                        result['full_retrain'] = {
+                            'train_count': train_result.get('train_count'),
+                            'mae': float(train_result.get('mae', 0))
+                        }
+                        logger.info(f"[auto-train] Full retrain: {train_result.get('train_count')} samples, MAE={train_result.get('mae'):.2f}")
+        except Exception as e:
+            logger.debug(f"[auto-train] Retrain check failed: {e}")
+        
+        # Step 4: 현재 카드로 AI 예측
+        try:
+            ai_prediction = ml.predict(card)
+            if ai_prediction.get('ok'):
+                result['current_prediction'] = {
+                    'enhancement': ai_prediction.get('enhancement'),
+                    'grade': ai_prediction.get('grade'),
+                    'method': ai_prediction.get('method')
+                }
+        except Exception as e:
+            logger.debug(f"[auto-train] Predict failed: {e}")
+        
+        return jsonify(result)
+    
+    except Exception as e:
+        logger.error(f"[api_ml_rating_auto_train] Error: {e}")
+        return jsonify({'ok': False, 'error': str(e)}), 500
+
+
+# ===== ML Rating V3 API (LSTM 딥러닝) =====
+
+@bp.route('/api/ml/rating/v3/info', methods=['GET'])
+def api_ml_rating_v3_info():
+    """LSTM 딥러닝 모델 정보"""
+    try:
+        lstm_model = get_lstm_model()
+        
+        info = {
+            "ok": True,
+            "model_type": "LSTM",
+            "model_loaded": lstm_model.model is not None,
+            "sequence_length": lstm_model.sequence_length,
+            "prediction_horizon": lstm_model.prediction_horizon,
+            "meta": lstm_model.meta
+        }
+        
+        return jsonify(info)
+    except Exception as e:
+        logger.error(f"[api_ml_rating_v3_info] Error: {e}")
+        return jsonify({'ok': False, 'error': str(e)}), 500
+
+
+@bp.route('/api/ml/rating/v3/train', methods=['POST'])
+def api_ml_rating_v3_train():
+    """LSTM 딥러닝 모델 훈련"""
+    try:
+        payload = request.get_json(force=True) if request.is_json else {}
+        intervals = payload.get('intervals', ['10m', '30m', '1h'])
+        window = payload.get('window', 120)
+        stream = bool(payload.get('stream', False))
+        
+        from helpers.candles import compute_r_from_ohlcv
+        
+        all_samples = []
+        
+        for interval in intervals:
+            try:
+                # 캔들 데이터 가져오기 (충분히 많이)
+                candles_data = get_ohlcv_data('KRW-BTC', interval, count=500)
+                if not candles_data or len(candles_data) < window + 50:
+                    continue
+                
+                # 시계열 샘플 생성
+                for i in range(window, len(candles_data) - 10):
+                    window_data = candles_data[i-window:i]
+                    
+                    # N/B Wave 계산
+                    prices = [c['close'] for c in window_data]
+                    p_max = max(prices)
+                    p_min = min(prices)
+                    
+                    volumes = [c['volume'] for c in window_data]
+                    v_max = max(volumes)
+                    v_min = min(volumes)
+                    
+                    turnovers = [c['close'] * c['volume'] for c in window_data]
+                    t_max = max(turnovers)
+                    t_min = min(turnovers)
+                    
+                    def calc_r(mx, mn):
+                        if mx <= 0 or mn <= 0:
+                            return 0.0
+                        return (mx - mn) / (mx + mn) if (mx + mn) > 0 else 0.0
+                    
+                    r_price = calc_r(p_max, p_min)
+                    r_vol = calc_r(v_max, v_min)
+                    r_amt = calc_r(t_max, t_min)
+                    avg_r = (r_price + r_vol + r_amt) / 3.0
+                    
+                    # Zone 판정
+                    if avg_r > 0.55:
+                        zone_flag = 1
+                    elif avg_r < 0.45:
+                        zone_flag = -1
+                    else:
+                        zone_flag = 0
+                    
+                    current_price = candles_data[i]['close']
+                    
+                    all_samples.append({
+                        'card': {
+                            'nb': {
+                                'price': {'max': p_max, 'min': p_min},
+                                'volume': {'max': v_max, 'min': v_min},
+                                'turnover': {'max': t_max, 'min': t_min}
+                            },
+                            'current_price': current_price,
+                            'interval': interval,
+                            'insight': {'zone_flag': zone_flag}
+                        }
+                    })
+            
+            except Exception as e:
+                logger.warning(f"[v3-train] {interval} 처리 실패: {e}")
+                continue
+        
+        if len(all_samples) < 50:
+            return jsonify({'ok': False, 'error': f'샘플 부족 (최소 50개 필요): {len(all_samples)}개'}), 400
+        
+        # LSTM 모델 훈련
+        lstm_model = get_lstm_model()
+        result = lstm_model.train(all_samples, stream=stream)
+        
+        result['sample_count'] = len(all_samples)
+        result['intervals'] = intervals
+        
+        logger.info(f"[v3-train] ✓ LSTM 훈련 완료: {len(all_samples)}개 샘플")
+        
+        return jsonify(result)
+        
+    except Exception as e:
+        logger.error(f"[api_ml_rating_v3_train] Error: {e}")
+        return jsonify({'ok': False, 'error': str(e)}), 500
+
+
+@bp.route('/api/ml/rating/v3/predict', methods=['POST'])
+def api_ml_rating_v3_predict():
+    """LSTM 딥러닝 예측 (Zone + 가격 동시) - Blue/Orange 구간 판정"""
+    try:
+        if not request.is_json:
+            return jsonify({'ok': False, 'error': 'JSON required'}), 400
+        
+        payload = request.get_json(force=True)
+        interval = payload.get('interval', 'minute10')
+        
+        # 최근 캔들 데이터 수집 (충분한 데이터 확보)
+        candles_data = get_ohlcv_data('KRW-BTC', interval, count=150)
+        
+        if not candles_data or len(candles_data) < 50:
+            logger.warning(f"[v3-predict] 캔들 데이터 부족: {len(candles_data) if candles_data else 0}개")
+            return jsonify({
+                'ok': False, 
+                'error': f'캔들 데이터 부족: {len(candles_data) if candles_data else 0}개',
+                'zone': 'UNKNOWN',
+                'zone_flag': 0,
+                'confidence': 0.0
+            }), 400
+        
+        # 최근 데이터로 현재 Zone 판정 (Blue/Orange)
+        window = 50  # 최근 50개 캔들로 판정
+        recent_data = candles_data[-window:]
+        
+        try:
+            # N/B Wave 계산
+            prices = [float(c['close']) for c in recent_data if c['close'] > 0]
+            volumes = [float(c['volume']) for c in recent_data if c['volume'] > 0]
+            turnovers = [float(c['close'] * c['volume']) for c in recent_data]
+            
+            if not prices or not volumes:
+                raise ValueError("가격 또는 거래량 데이터 없음")
+            
+            p_max = max(prices)
+            p_min = min(prices)
+            v_max = max(volumes)
+            v_min = min(volumes)
+            t_max = max(turnovers)
+            t_min = min(turnovers)
+            
+            def calc_r(mx, mn):
+                """R값 계산: 변동성 지표"""
+                if mx <= 0 or mn <= 0:
+                    return 0.0
+                total = mx + mn
+                if total <= 0:
+                    return 0.0
+                return float((mx - mn) / total)
+            
+            # R값 계산
+            r_price = calc_r(p_max, p_min)
+            r_vol = calc_r(v_max, v_min)
+            r_amt = calc_r(t_max, t_min)
+            avg_r = (r_price + r_vol + r_amt) / 3.0
+            
+            # Zone 판정 (Blue: 변동성 낮음, Orange: 변동성 높음)
+            if avg_r < 0.35:
+                zone = 'BLUE'
+                zone_flag = 1
+                confidence = 0.9
+            elif avg_r > 0.65:
+                zone = 'ORANGE'
+                zone_flag = -1
+                confidence = 0.9
+            else:
+                zone = 'NEUTRAL'
+                zone_flag = 0
+                confidence = 0.5
+            
+            current_price = float(candles_data[-1]['close'])
+            
+            # 결과 생성 (float32 → float 변환)
+            result = {
+                'ok': True,
+                'interval': str(interval),
+                'zone': zone,
+                'zone_flag': int(zone_flag),
+                'r_price': float(r_price),
+                'r_volume': float(r_vol),
+                'r_amount': float(r_amt),
+                'avg_r': float(avg_r),
+                'confidence': float(confidence),
+                'current_price': current_price,
+                'price_range': {
+                    'max': float(p_max),
+                    'min': float(p_min),
+                    'range': float(p_max - p_min)
+                },
+                'timestamp': int(time.time())
+            }
+            
+            logger.info(f"[v3-predict] Zone={zone}, avg_r={avg_r:.3f}, confidence={confidence:.2f}")
+            return jsonify(result), 200
+            
+        except Exception as calc_err:
+            logger.error(f"[v3-predict] 계산 오류: {calc_err}")
+            return jsonify({
+                'ok': False,
+                'error': f'계산 오류: {str(calc_err)}',
+                'zone': 'ERROR'
+            }), 500
+        
+    except Exception as e:
+        logger.error(f"[api_ml_rating_v3_predict] 에러: {e}")
+        import traceback
+        logger.error(traceback.format_exc())
+        return jsonify({'ok': False, 'error': str(e), 'zone': 'ERROR'}), 500
+
+
+def _init_rating_ml():
+    from helpers.rating_ml import get_rating_ml as _get_rating_ml
+    return _get_rating_ml()
+
+
+def _init_rating_ml_v2():
+    from rating_ml_v2 import get_ml_system_v2 as _get_ml_system_v2
+    return _get_ml_system_v2()
+
+
+def _init_lstm():
+    from rating_ml_v3 import get_lstm_model as _get_lstm_model
+    return _get_lstm_model()
+
+
+_startup.register('rating_ml', _init_rating_ml)
+_startup.register('rating_ml_v2', _init_rating_ml_v2)
+_startup.register('lstm', _init_lstm, warm=os.getenv('STARTUP_WARM_LSTM', 'false').lower() == 'true')
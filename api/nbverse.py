@@ -0,0 +1,768 @@
+"""NBverse blueprint: NBverse card values, card storage and search.
+
+/api/nbverse/* 엔드포인트와 data/nbverse 카드 파일 탐색 함수.
+카드 차트의 N/B 통계(_compute_nb_stats)는 /api/cards/chart 가 쓰므로 server 에 남는다.
+"""
+
+import json
+import math
+import os
+from datetime import datetime
+
+from flask import Blueprint, jsonify, request
+
+from helpers.response_cache import cached_response
+from server import (
+    _bar_from_query, _compute_nb_stats, _compute_r_from_ohlcv, get_candles, load_config, load_nb_params, logger,
+    state,
+)
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+bp = Blueprint('nbverse', __name__)
+
+
+def _nbverse_card_saves() -> bool:
+    return str(request.args.get('save', 'false')).lower() in ('1', 'true', 'yes')
+
+
+@bp.route('/api/nbverse/card', methods=['GET'])
+@cached_response(_bar_from_query(), when=lambda: not _nbverse_card_saves())  # save=true persists: always run
+def api_nbverse_card():
+    """Compute current NBverse card values and persist price-based MAX/MIN.
+    Query: interval, count(optional), save(optional=true/false)
+    """
+    try:
+        cfg = load_config()
+        try:
+            window = int(load_nb_params().get('window', 50))
+        except Exception:
+            window = 50
+        interval = request.args.get('interval') or (state.get('candle') or cfg.candle)
+        count = int(request.args.get('count') or max(400, window * 3))
+        save_flag = _nbverse_card_saves()
+        df = get_candles(cfg.market, interval, count=count)
+        # 빈 데이터 방어
+        if df is None or len(df) == 0:
+            return jsonify({'ok': True, 'interval': interval, 'window': window, 'market': cfg.market, 'current_price': None, 'chart': [], 'nb': {'price': {'values': [], 'max': None, 'min': None}, 'volume': {'values': [], 'max': None, 'min': None}, 'turnover': {'values': [], 'max': None, 'min': None}}})
+        # Chart payload compatible with frontend
+        chart = []
+        try:
+            for idx, row in df.iterrows():
+                chart.append({
+                    'time': int(idx.timestamp()*1000),
+                    'open': float(row['open']),
+                    'high': float(row['high']),
+                    'low': float(row['low']),
+                    'close': float(row['close']),
+                    'volume': float(row['volume']) if 'volume' in row else 0.0,
+                })
+        except Exception:
+            chart = []
+        stats = _compute_nb_stats(df, window)
+        current_price = float(df['close'].astype(float).iloc[-1]) if len(df) else None
+        result = {
+            'ok': True,
+            'interval': interval,
+            'window': window,
+            'market': cfg.market,
+            'current_price': current_price,
+            'chart': chart,
+            'nb': stats,
+        }
+        # Persist price-based NBverse (오류는 결과에 포함하고 계속 진행)
+        # DISABLED: NBverse auto-save is now disabled
+        # try:
+        #     if save_flag and stats.get('price') and stats['price'].get('max') is not None and stats['price'].get('min') is not None:
+        #         meta = _save_nbverse_price(stats['price']['max'], stats['price']['min'], interval, current_price, chart, stats['price']['values'])
+        #         result['save'] = meta
+        # except Exception as e:
+        #     result['save_error'] = str(e)
+        return jsonify(result)
+    except Exception as e:
+        # 200으로 응답해 프론트가 캐시/폴백을 쓰도록 유도
+        return jsonify({'ok': False, 'error': str(e), 'interval': request.args.get('interval'), 'chart': [], 'nb': {}})
+
+
+@bp.route('/api/nbverse/zone', methods=['GET'])
+def api_nbverse_zone():
+    """Return current N/B zone status for the given interval.
+    Query: interval (optional, defaults to config.candle)
+    Response: {ok: bool, current_zone: 'BLUE'|'ORANGE'|'NONE', zone_count: int}
+    """
+    try:
+        cfg = load_config()
+        interval = request.args.get('interval') or (state.get('candle') or cfg.candle)
+        count = int(request.args.get('count') or 300)
+        try:
+            window = int(load_nb_params().get('window', 50))
+        except Exception:
+            window = 50
+        
+        # Get thresholds
+        try:
+            HIGH = float(os.getenv('NB_HIGH', '0.55'))
+            LOW = float(os.getenv('NB_LOW', '0.45'))
+        except Exception:
+            HIGH, LOW = 0.55, 0.45
+        
+        # Get candles and compute current r value
+        df = get_candles(cfg.market, interval, count=count)
+        if len(df) < window:
+            return jsonify({
+                'ok': True,
+                'interval': interval,
+                'current_zone': 'NONE',
+                'zone_count': 0,
+                'note': 'Insufficient data'
+            })
+        
+        # Compute r_series
+        r_series = _compute_r_from_ohlcv(df, window).astype(float)
+        rv = float(r_series.iloc[-1]) if len(r_series) else 0.5
+        
+        # Determine current zone
+        if rv >= HIGH:
+            current_zone = 'ORANGE'
+        elif rv <= LOW:
+            current_zone = 'BLUE'
+        else:
+            current_zone = 'NONE'
+        
+        # Count consecutive zone occurrences from the end
+        zone_count = 1
+        for i in range(len(r_series) - 2, -1, -1):
+            r_val = float(r_series.iloc[i])
+            if current_zone == 'ORANGE' and r_val >= HIGH:
+                zone_count += 1
+            elif current_zone == 'BLUE' and r_val <= LOW:
+                zone_count += 1
+            elif current_zone == 'NONE':
+                break
+            else:
+                break
+        
+        return jsonify({
+            'ok': True,
+            'interval': interval,
+            'current_zone': current_zone,
+            'zone_count': zone_count,
+            'r': float(rv),
+            'high': float(HIGH),
+            'low': float(LOW)
+        })
+    except Exception as e:
+        return jsonify({'ok': False, 'error': str(e)}), 500
+
+
+@bp.route('/api/nbverse/save', methods=['POST'])
+def api_nbverse_save():
+    """Save current card data to NBverse.
+    Body: {interval, timestamp, current_price, current_volume, current_turnover, nb, chart, 
+           card_rating, nb_zone, ml_trust, realized_pnl, nb_wave}
+    Stores full chart (not just count) so UI can restore exactly.
+    Saves to paths based on N/B max and min values.
+    """
+    try:
+        if not request.is_json:
+            return jsonify({'ok': False, 'error': 'JSON required'}), 400
+        
+        payload = request.get_json(force=True)
+        interval = str(payload.get('interval', 'minute10'))
+        timestamp = str(payload.get('timestamp', datetime.now().isoformat()))
+        current_price = float(payload.get('current_price', 0))
+        current_volume = float(payload.get('current_volume', 0))
+        current_turnover = float(payload.get('current_turnover', 0))
+        nb_data = payload.get('nb', {})
+        chart_data = payload.get('chart', [])
+        
+        # Additional card info
+        card_rating = payload.get('card_rating', {})  # {code, league, group, super, enhancement, color}
+        nb_zone = payload.get('nb_zone', {})  # {zone, zone_flag, zone_conf, dist_high, dist_low, etc.}
+        ml_trust = payload.get('ml_trust', {})  # {grade, enhancement, trust_score, etc.}
+        realized_pnl = payload.get('realized_pnl', {})  # {avg, max}
+        nb_wave = payload.get('nb_wave', {})  # {r, w, ema_diff, pct_blue, pct_orange, etc.}
+        
+        # Build insight object from nb_zone for ML training compatibility
+        insight = {
+            'zone': nb_zone.get('zone', ''),
+            'zone_flag': nb_zone.get('zone_flag', 0),
+            'zone_conf': nb_zone.get('zone_conf', 0.0),
+            'dist_high': nb_zone.get('dist_high', 0.0),
+            'dist_low': nb_zone.get('dist_low', 0.0),
+            'r': nb_wave.get('r', 0.0),
+            'w': nb_wave.get('w', 0.0),
+            'ema_diff': nb_wave.get('ema_diff', 0.0),
+            'pct_blue': nb_wave.get('pct_blue', 0.0),
+            'pct_orange': nb_wave.get('pct_orange', 0.0)
+        }
+        
+        # Save record (include full chart and all metadata)
+        record = {
+            'interval': interval,
+            'timestamp': timestamp,
+            'saved_at': datetime.now().isoformat(),
+            'current_price': current_price,
+            'current_volume': current_volume,
+            'current_turnover': current_turnover,
+            'nb': nb_data,
+            'chart': chart_data,
+            'chart_count': len(chart_data),
+            'card_rating': card_rating,
+            'nb_zone': nb_zone,
+            'insight': insight,  # Add insight for ML training
+            'ml_trust': ml_trust,
+            'realized_pnl': realized_pnl,
+            'nb_wave': nb_wave,
+            'version': 'nbverse.save.v5'
+        }
+        
+        # Helper function to create path from N/B value
+        def create_nb_path(nb_value):
+            """Convert N/B value to directory path structure.
+            Example: 8.488212244897959 -> 8/4/8/8/2/1/2/2/4/4/8/9/7/9/5/9
+            Example: 12.69311836734694 -> 12/6/9/3/1/1/8/3/6/7/3/4/6/9/4
+            """
+            nb_str = str(nb_value)
+            
+            # Split into integer and decimal parts
+            if '.' in nb_str:
+                int_part, dec_part = nb_str.split('.', 1)
+            else:
+                int_part, dec_part = nb_str, ''
+            
+            # Remove negative sign if present
+            int_part = int_part.replace('-', '')
+            dec_part = dec_part.replace('-', '')
+            
+            # Create path: integer part as-is, then each decimal digit separately
+            path_parts = [int_part] + list(dec_part)
+            return os.path.join(*path_parts)
+        
+        base_dir = os.path.join(_ROOT, 'data', 'nbverse')
+        saved_paths = []
+        
+        # Extract N/B max and min values
+        price_nb = nb_data.get('price', {})
+        nb_max = price_nb.get('max')
+        nb_min = price_nb.get('min')
+        
+        # Save to N/B max path
+        if nb_max is not None:
+            try:
+                max_path_dir = os.path.join(base_dir, 'max', create_nb_path(nb_max))
+                os.makedirs(max_path_dir, exist_ok=True)
+                max_save_file = os.path.join(max_path_dir, 'this_pocket_card.json')
+                
+                with open(max_save_file, 'w', encoding='utf-8') as f:
+                    json.dump(record, f, ensure_ascii=False, indent=2)
+                
+                saved_paths.append(max_save_file)
+                logger.info(f'✅ NBverse 카드 저장 (MAX): {interval} at {max_save_file}')
+            except Exception as e:
+                logger.error(f'❌ NBverse MAX 경로 저장 실패: {str(e)}')
+        
+        # Save to N/B min path
+        if nb_min is not None:
+            try:
+                min_path_dir = os.path.join(base_dir, 'min', create_nb_path(nb_min))
+                os.makedirs(min_path_dir, exist_ok=True)
+                min_save_file = os.path.join(min_path_dir, 'this_pocket_card.json')
+                
+                with open(min_save_file, 'w', encoding='utf-8') as f:
+                    json.dump(record, f, ensure_ascii=False, indent=2)
+                
+                saved_paths.append(min_save_file)
+                logger.info(f'✅ NBverse 카드 저장 (MIN): {interval} at {min_save_file}')
+            except Exception as e:
+                logger.error(f'❌ NBverse MIN 경로 저장 실패: {str(e)}')
+        
+        # Fallback: save with timestamp if no N/B values
+        if not saved_paths:
+            ts = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+            fallback_file = os.path.join(base_dir, f'card_{interval}_{ts}.json')
+            os.makedirs(base_dir, exist_ok=True)
+            
+            with open(fallback_file, 'w', encoding='utf-8') as f:
+                json.dump(record, f, ensure_ascii=False, indent=2)
+            
+            saved_paths.append(fallback_file)
+            logger.info(f'✅ NBverse 카드 저장 (FALLBACK): {interval} at {fallback_file}')
+        
+        return jsonify({
+            'ok': True,
+            'saved': True,
+            'paths': saved_paths,
+            'count': len(saved_paths),
+            'interval': interval,
+            'timestamp': timestamp,
+            'nb_max': nb_max,
+            'nb_min': nb_min
+        })
+    except Exception as e:
+        logger.error(f'❌ NBverse 저장 오류: {str(e)}')
+        return jsonify({'ok': False, 'error': str(e)}), 500
+
+
+@bp.route('/api/nbverse/load', methods=['GET'])
+def api_nbverse_load():
+    """Load a saved NBverse snapshot and normalize for UI.
+    Query: path (absolute or relative under data/nbverse)
+    Response: {ok, interval, timestamp, price:[], volume:[], nb:{...}, chart_count}
+    """
+    try:
+        raw_path = request.args.get('path')
+        if not raw_path:
+            return jsonify({'ok': False, 'error': 'path is required'}), 400
+
+        base_dir = os.path.join(_ROOT, 'data', 'nbverse')
+        os.makedirs(base_dir, exist_ok=True)
+
+        # Resolve absolute path safely within base_dir
+        candidate = raw_path
+        if not os.path.isabs(candidate):
+            candidate = os.path.join(base_dir, candidate)
+        abs_path = os.path.abspath(candidate)
+        base_abs = os.path.abspath(base_dir)
+        # Prevent path traversal
+        if os.path.commonpath([abs_path, base_abs]) != base_abs:
+            return jsonify({'ok': False, 'error': 'invalid path'}), 400
+        if not os.path.exists(abs_path):
+            # Graceful fallback: return empty payload instead of 404 to avoid frontend spam
+            return jsonify({
+                'ok': False,
+                'error': 'not found',
+                'path': raw_path,
+                'data': [],
+                'price': [],
+                'volume': [],
+                'chart_count': 0
+            })
+
+        with open(abs_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        chart = data.get('chart') or []
+        price_vals = []
+        volume_vals = []
+        for c in chart:
+            try:
+                # support various candle shapes
+                close = c.get('close', c.get('c', c.get('price')))
+                vol = c.get('volume', c.get('v', c.get('qty', 0)))
+                price_vals.append(float(close) if close is not None else None)
+                volume_vals.append(float(vol) if vol is not None else 0.0)
+            except Exception:
+                price_vals.append(None)
+                volume_vals.append(0.0)
+
+        resp = {
+            'ok': True,
+            'interval': data.get('interval'),
+            'timestamp': data.get('timestamp'),
+            'chart_count': len(chart),
+            'price': price_vals,
+            'volume': volume_vals,
+            'nb': data.get('nb') or {}
+        }
+        return jsonify(resp)
+    except Exception as e:
+        return jsonify({'ok': False, 'error': str(e)}), 500
+
+
+@bp.route('/api/nbverse/load_by_nb', methods=['GET'])
+def api_nbverse_load_by_nb():
+    """Load a saved NBverse card by N/B value (max or min).
+    Query: nb_value (e.g., 8.488212244897959 or 12.69311836734694), type (max or min, default: max)
+    Response: {ok, interval, timestamp, price:[], volume:[], nb:{...}, chart_count, path}
+    """
+    try:
+        nb_value = request.args.get('nb_value')
+        nb_type = request.args.get('type', 'max')  # 'max' or 'min'
+        
+        if not nb_value:
+            return jsonify({'ok': False, 'error': 'nb_value is required'}), 400
+        
+        if nb_type not in ['max', 'min']:
+            return jsonify({'ok': False, 'error': 'type must be "max" or "min"'}), 400
+        
+        # Convert N/B value to path structure
+        base_dir = os.path.join(_ROOT, 'data', 'nbverse')
+        card_file = _find_nbverse_card_by_nb(base_dir, nb_value, nb_type, float(request.args.get('eps', 1e-9)))
+        
+        if card_file is None:
+            return jsonify({
+                'ok': False,
+                'error': 'card not found',
+                'nb_value': nb_value,
+                'type': nb_type,
+                'hint': 'Try with reduced decimals (e.g., 14.8352) or adjust eps'
+            }), 404
+        
+        with open(card_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        price_vals, volume_vals = _extract_chart_data(data.get('chart') or [])
+        
+        resp = {
+            'ok': True,
+            'interval': data.get('interval'),
+            'timestamp': data.get('timestamp'),
+            'saved_at': data.get('saved_at'),
+            'chart_count': len(data.get('chart') or []),
+            'price': price_vals,
+            'volume': volume_vals,
+            'nb': data.get('nb') or {},
+            'current_price': data.get('current_price'),
+            'current_volume': data.get('current_volume'),
+            'current_turnover': data.get('current_turnover'),
+            'path': card_file,
+            'nb_value': nb_value
+        }
+        logger.info(f'✅ NBverse 카드 로드 (N/B={nb_value}): {card_file}')
+        return jsonify(resp)
+    except Exception as e:
+        logger.error(f'❌ NBverse 로드 오류 (N/B={request.args.get("nb_value")}): {str(e)}')
+        return jsonify({'ok': False, 'error': str(e)}), 500
+
+
+@bp.route('/api/nbverse/search', methods=['GET'])
+def api_nbverse_search():
+    """Search NBverse cards with flexible criteria
+    
+    Query params:
+    - type: 'max' or 'min' (default: both)
+    - interval: 'minute1', 'minute3', etc. (filter by interval)
+    - price_min: minimum nb.price.max or nb.price.min value
+    - price_max: maximum nb.price.max or nb.price.min value
+    - current_price_min: minimum current_price
+    - current_price_max: maximum current_price
+    - limit: max results (default: 100, max: 500)
+    - offset: skip results (default: 0)
+    - sort: 'timestamp' or 'price' or 'nb_price' (default: timestamp)
+    - order: 'asc' or 'desc' (default: desc)
+    """
+    try:
+        # Parse query params
+        search_params = {
+            'type': request.args.get('type'),
+            'interval': request.args.get('interval'),
+            'price_min': request.args.get('price_min', type=float),
+            'price_max': request.args.get('price_max', type=float),
+            'current_price_min': request.args.get('current_price_min', type=float),
+            'current_price_max': request.args.get('current_price_max', type=float),
+            'limit': min(int(request.args.get('limit', 100)), 500),
+            'offset': int(request.args.get('offset', 0)),
+            'sort': request.args.get('sort', 'timestamp'),
+            'order': request.args.get('order', 'desc')
+        }
+        
+        base_dir = os.path.join(_ROOT, 'data', 'nbverse')
+        results, stats = _search_nbverse_cards(base_dir, search_params)
+        
+        # Apply pagination
+        total = len(results)
+        paginated = results[search_params['offset']:search_params['offset'] + search_params['limit']]
+        
+        logger.info(f'✅ NBverse 검색 완료: 스캔 {stats["scanned"]}개, 매칭 {total}개, 반환 {len(paginated)}개')
+        return jsonify({
+            "ok": True,
+            "results": paginated,
+            "total": total,
+            "limit": search_params['limit'],
+            "offset": search_params['offset'],
+            "returned": len(paginated),
+            "stats": stats
+        })
+    
+    except Exception as e:
+        logger.error(f'❌ NBverse 검색 오류: {str(e)}')
+        return jsonify({
+            "ok": False,
+            "error": str(e)
+        }), 500
+
+
+@bp.route('/api/nbverse/file', methods=['GET'])
+def api_nbverse_file():
+    """Load NBverse card file by relative path
+    
+    Query params:
+    - path: relative path from nbverse root (e.g., 'max/0/4/9/8/.../this_pocket_card.json')
+    """
+    try:
+        path = request.args.get('path')
+        if not path:
+            return jsonify({'ok': False, 'error': 'path parameter is required'}), 400
+        
+        base_dir = os.path.join(_ROOT, 'data', 'nbverse')
+        
+        # Validate and get absolute file path
+        abs_file_path, error = _validate_nbverse_path(path, base_dir)
+        if error:
+            return jsonify({'ok': False, 'error': error}), 400 if 'Invalid' in error else 404
+        
+        # Load file data
+        data = _load_nbverse_file(abs_file_path)
+        
+        logger.info(f'✅ NBverse 파일 로드: {path}')
+        return jsonify({
+            'ok': True,
+            'path': path,
+            'data': data
+        })
+    
+    except json.JSONDecodeError as e:
+        logger.error(f'❌ NBverse JSON 파싱 오류: {str(e)}')
+        return jsonify({'ok': False, 'error': 'Invalid JSON format'}), 400
+    except Exception as e:
+        logger.error(f'❌ NBverse 파일 로드 오류: {str(e)}')
+        return jsonify({'ok': False, 'error': str(e)}), 500
+
+
+# ===== NBverse Helper Functions =====
+
+def _find_nbverse_card_by_nb(base_dir, nb_value, nb_type, eps=1e-9):
+    """Find NBverse card file by N/B value with tolerance"""
+    nb_str = str(nb_value)
+    if '.' in nb_str:
+        int_part, dec_part = nb_str.split('.', 1)
+    else:
+        int_part, dec_part = nb_str, ''
+
+    int_part = int_part.replace('-', '')
+    dec_part = dec_part.replace('-', '')
+
+    path_parts = [int_part] + list(dec_part)
+    nb_path = os.path.join(*path_parts) if path_parts else int_part
+
+    card_file = os.path.join(base_dir, nb_type, nb_path, 'this_pocket_card.json')
+
+    # Exact path attempt
+    if os.path.exists(card_file):
+        return card_file
+
+    # Fallback: search with tolerance
+    try:
+        target_val = float(nb_value)
+    except Exception:
+        return None
+
+    if math.isnan(target_val):
+        return None
+
+    # Search in narrower scope first
+    prefix_parts = [int_part]
+    if dec_part:
+        prefix_parts += list(dec_part[:4])
+    search_root = os.path.join(base_dir, nb_type, *prefix_parts)
+
+    candidates = _find_card_candidates(search_root)
+    
+    # If no candidates, broaden search
+    if not candidates:
+        broader_root = os.path.join(base_dir, nb_type, int_part)
+        candidates = _find_card_candidates(broader_root)
+
+    # Find matching card within tolerance
+    for fpath in candidates:
+        try:
+            with open(fpath, 'r', encoding='utf-8') as fp:
+                j = json.load(fp)
+            v = j.get('nb', {}).get('price', {}).get(nb_type)
+            if v is not None and abs(float(v) - target_val) <= eps:
+                return fpath
+        except Exception:
+            continue
+
+    return None
+
+
+def _find_card_candidates(search_root):
+    """Find all this_pocket_card.json files under search_root"""
+    candidates = []
+    if os.path.isdir(search_root):
+        for root, dirs, files in os.walk(search_root):
+            if 'this_pocket_card.json' in files:
+                candidates.append(os.path.join(root, 'this_pocket_card.json'))
+    return candidates
+
+
+def _extract_chart_data(chart):
+    """Extract price and volume arrays from chart data"""
+    price_vals = []
+    volume_vals = []
+    for c in chart:
+        try:
+            close = c.get('close', c.get('c', c.get('price')))
+            vol = c.get('volume', c.get('v', c.get('qty', 0)))
+            price_vals.append(float(close) if close is not None else None)
+            volume_vals.append(float(vol) if vol is not None else 0.0)
+        except Exception:
+            price_vals.append(None)
+            volume_vals.append(0.0)
+    return price_vals, volume_vals
+
+
+def _search_nbverse_cards(base_dir, params):
+    """Search NBverse cards with filters and sorting"""
+    # Determine types to search
+    types_to_search = []
+    if params['type'] == 'max':
+        types_to_search = ['max']
+    elif params['type'] == 'min':
+        types_to_search = ['min']
+    else:
+        types_to_search = ['max', 'min']
+    
+    results = []
+    stats = {
+        'scanned': 0,
+        'matched': 0,
+        'filtered': 0,
+        'by_type': {'max': 0, 'min': 0},
+        'by_interval': {}
+    }
+    
+    # Walk through NBverse directories
+    for nb_type_dir in types_to_search:
+        type_path = os.path.join(base_dir, nb_type_dir)
+        if not os.path.exists(type_path):
+            continue
+        
+        # Walk recursively through all subdirectories
+        for root, dirs, files in os.walk(type_path):
+            if 'this_pocket_card.json' not in files:
+                continue
+            
+            stats['scanned'] += 1
+            card_path = os.path.join(root, 'this_pocket_card.json')
+            card_data = _load_and_filter_card(card_path, nb_type_dir, base_dir, params)
+            
+            if card_data:
+                results.append(card_data)
+                stats['matched'] += 1
+                stats['by_type'][nb_type_dir] += 1
+                
+                # Count by interval
+                interval = card_data.get('interval', 'unknown')
+                stats['by_interval'][interval] = stats['by_interval'].get(interval, 0) + 1
+            else:
+                stats['filtered'] += 1
+    
+    # Sort results
+    _sort_results(results, params['sort'], params['order'])
+    
+    return results, stats
+
+
+def _load_and_filter_card(card_path, nb_type_dir, base_dir, params):
+    """Load card and apply filters"""
+    try:
+        with open(card_path, 'r', encoding='utf-8') as f:
+            card = json.load(f)
+        
+        # Extract path relative to nbverse base
+        rel_path = os.path.relpath(card_path, base_dir).replace('\\', '/')
+        
+        # Apply interval filter
+        if params['interval'] and card.get('interval') != params['interval']:
+            return None
+        
+        # Get nb_price value
+        nb_price = card.get('nb', {}).get('price', {})
+        nb_price_val = nb_price.get(nb_type_dir)
+        
+        # Apply nb_price filters
+        if params['price_min'] is not None and (nb_price_val is None or nb_price_val < params['price_min']):
+            return None
+        if params['price_max'] is not None and (nb_price_val is None or nb_price_val > params['price_max']):
+            return None
+        
+        # Apply current_price filters
+        current_price = card.get('current_price')
+        if params['current_price_min'] is not None and (current_price is None or current_price < params['current_price_min']):
+            return None
+        if params['current_price_max'] is not None and (current_price is None or current_price > params['current_price_max']):
+            return None
+        
+        # Build result
+        return {
+            "type": nb_type_dir,
+            "path": rel_path,
+            "interval": card.get('interval'),
+            "timestamp": card.get('timestamp'),
+            "saved_at": card.get('saved_at'),
+            "current_price": current_price,
+            "current_volume": card.get('current_volume'),
+            "nb_price": nb_price_val,
+            "nb_price_max": nb_price.get('max'),
+            "nb_price_min": nb_price.get('min')
+        }
+    
+    except Exception:
+        return None
+
+
+def _sort_results(results, sort_by, order):
+    """Sort results in place"""
+    reverse = (order == 'desc')
+    
+    if sort_by == 'timestamp':
+        results.sort(key=lambda x: x.get('timestamp', ''), reverse=reverse)
+    elif sort_by == 'price':
+        results.sort(key=lambda x: x.get('current_price') or 0, reverse=reverse)
+    elif sort_by == 'nb_price':
+        results.sort(key=lambda x: x.get('nb_price') or 0, reverse=reverse)
+
+
+def _validate_nbverse_path(path, base_dir):
+    """Validate NBverse file path and return absolute path
+    
+    Returns:
+        tuple: (abs_file_path, error_message)
+        - If valid: (absolute_path, None)
+        - If invalid: (None, error_message)
+    """
+    # Security: prevent path traversal attacks
+    if '..' in path or path.startswith('/') or path.startswith('\\'):
+        return None, 'Invalid path: Path traversal detected'
+    
+    # Normalize path separators
+    normalized_path = path.replace('/', os.sep).replace('\\', os.sep)
+    file_path = os.path.join(base_dir, normalized_path)
+    
+    # Get absolute paths for security check
+    abs_file_path = os.path.abspath(file_path)
+    abs_base_dir = os.path.abspath(base_dir)
+    
+    # Verify file is within nbverse directory
+    if not abs_file_path.startswith(abs_base_dir):
+        return None, 'Invalid path: Outside allowed directory'
+    
+    # Check file exists
+    if not os.path.exists(abs_file_path):
+        return None, 'File not found'
+    
+    # Check it's a file (not directory)
+    if not os.path.isfile(abs_file_path):
+        return None, 'Invalid path: Not a file'
+    
+    return abs_file_path, None
+
+
+def _load_nbverse_file(file_path):
+    """Load and parse NBverse JSON file
+    
+    Args:
+        file_path: Absolute path to JSON file
+        
+    Returns:
+        dict: Parsed JSON data
+        
+    Raises:
+        json.JSONDecodeError: If file is not valid JSON
+        IOError: If file cannot be read
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,218 @@
+"""NPC / narrative blueprint: narrative log, council state, left-panel log and NPC chatter.
+
+/api/narrative/add, /api/council/state, /api/leftpanel/log, /api/npc/generate.
+NPC 메시지 저장소(_npc_add)와 존 평판은 거래 루프도 갱신하므로 server 에 남는다.
+"""
+
+import json
+import os
+import random
+import time
+import uuid
+
+import pandas as pd
+import requests
+from flask import Blueprint, jsonify, request
+
+from server import (
+    _council_state, _make_insight, _narrative_store_path, _nb_coin_counter, _npc_add, _resolve_config,
+    _update_zone_reputation, _zone_reputation, gateway_upbit, get_candles, load_config, load_nb_params, state,
+)
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+bp = Blueprint('npc', __name__)
+
+
+@bp.route('/api/narrative/add', methods=['POST'])
+def api_narrative_add():
+    try:
+        payload = request.get_json(force=True) if request.is_json else request.form.to_dict()
+        text = str(payload.get('text') or '')
+        zone = str(payload.get('zone') or '').upper()
+        # simple sentiment mapping: if explicit negative, penalize; else small nudge
+        negative = bool(payload.get('negative') or ('negative' in text.lower()) or ('risk' in text.lower()) or ('lock' in text.lower()))
+        delta = float(payload.get('delta') or (-0.3 if negative else 0.1))
+        row = _update_zone_reputation(zone, delta, note=(payload.get('title') or text[:120]))
+        # persist narrative
+        obj = {
+            'id': str(uuid.uuid4()),
+            'ts': int(time.time()*1000),
+            'zone': zone,
+            'text': text,
+            'delta': delta,
+            'rep_after': float(row.get('score', 0.0)),
+        }
+        try:
+            with open(_narrative_store_path(), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(obj, ensure_ascii=False) + '\n')
+        except Exception:
+            pass
+        # broadcast a brief NPC line
+        _npc_add({'text': f"Narrative updated: {zone} reputation {row.get('score',0.0):.2f}.", 'ts': obj['ts']})
+        return jsonify({'ok': True, 'reputation': _zone_reputation, 'saved': obj})
+    except Exception as e:
+        return jsonify({'ok': False, 'error': str(e)}), 500
+
+@bp.route('/api/council/state')
+def api_council_state():
+    try:
+        return jsonify({ 'ok': True, 'state': _council_state })
+    except Exception as e:
+        return jsonify({ 'ok': False, 'error': str(e) }), 500
+
+
+@bp.route('/api/leftpanel/log', methods=['POST'])
+def api_leftpanel_log():
+    try:
+        payload = request.get_json(force=True) if request.is_json else request.form.to_dict()
+    except Exception:
+        payload = {}
+    try:
+        base_dir = os.path.abspath(os.path.join(_ROOT, '..', 'bot.v.0.1', 'log'))
+        os.makedirs(base_dir, exist_ok=True)
+        log_path = os.path.join(base_dir, 'left_panel.log')
+        rec = json.dumps({
+            'tf': payload.get('tf'),
+            'text': payload.get('text'),
+            'ts': int(payload.get('ts') or 0),
+            'mode': payload.get('mode'),
+            'type': payload.get('type') or 'status'
+        }, ensure_ascii=False)
+        with open(log_path, 'a', encoding='utf-8') as f:
+            f.write(rec + '\n')
+        with open(log_path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        if len(lines) > 100:
+            with open(log_path, 'w', encoding='utf-8') as f:
+                f.writelines(lines[-100:])
+        return jsonify({'ok': True})
+    except Exception as e:
+        return jsonify({'ok': False, 'error': str(e)}), 500
+
+@bp.route('/api/npc/generate', methods=['POST'])
+def api_npc_generate():
+    """Generate N random NPC dialogue messages based on current narrative/state.
+    Body: { n?: int, interval?: string }
+    Writes unique messages to data/npc_messages.jsonl and returns the new ones.
+    """
+    try:
+        payload = request.get_json(force=True) if request.is_json else {}
+        try:
+            n = max(1, min(50, int(payload.get('n', 10))))
+        except Exception:
+            n = 10
+        try:
+            iv = str(payload.get('interval')) if payload.get('interval') else (state.get('candle') or load_config().candle)
+        except Exception:
+            iv = state.get('candle') or load_config().candle
+        # lightweight insight snapshot (avoid calling Flask handlers directly)
+        cfg = _resolve_config()
+        try:
+            df = get_candles(cfg.market, iv, count=max(120, cfg.ema_slow + 5))
+        except Exception:
+            df = pd.DataFrame()
+        try:
+            window = int(load_nb_params().get('window', 50))
+        except Exception:
+            window = 50
+        try:
+            ins = _make_insight(df, window, cfg.ema_fast, cfg.ema_slow, iv, None) or {}
+        except Exception:
+            ins = {}
+        zone = str(ins.get('zone') or '').upper() if ins else None
+        # approximate slope per bar (bp) if possible
+        slope = None
+        try:
+            closes = df['close'].astype(float).tail(max(20, min(120, window)))
+            if len(closes) >= 5:
+                import numpy as _np
+                y = _np.log(closes.replace(0, _np.nan)).bfill().ffill().values
+                x = _np.arange(len(y), dtype=float)
+                b1 = _np.polyfit(x, y, 1)[0]
+                slope = float(b1)  # per-bar log slope (approx bp/bar after scale)
+        except Exception:
+            slope = None
+        flip = None  # optional: can be added later
+        # templates
+        personas = ['Analyst','Scout','Guardian','Elder']
+        frames = [
+            "{p}({iv}): {zone} with slope {s} bp/bar. Flip ETA: {f} bars.",
+            "{p}({iv}): I favor {act} while momentum holds. {guard}",
+            "{p}({iv}): Feasibility → BUY={can_buy} SELL={can_sell}. coin={coin} buyable={buy}",
+            "{p}({iv}): If conditions soften, I will stand down and wait for better alignment."
+        ]
+        # feasibility snapshot
+        coin = int(_nb_coin_counter.get(iv, 0))
+        # buyable via KRW balance and order_krw(coin price)
+        try:
+            price_per_coin = int(getattr(cfg, 'order_krw', 5100))
+        except Exception:
+            price_per_coin = 5100
+        avail_krw = 0.0
+        try:
+            upbit = None
+            if (not cfg.paper) and cfg.access_key and cfg.secret_key:
+                upbit = gateway_upbit(cfg.access_key, cfg.secret_key)
+            if upbit:
+                avail_krw = float(upbit.get_balance('KRW') or 0.0)
+        except Exception:
+            avail_krw = 0.0
+        try:
+            buy = int(avail_krw // max(1, price_per_coin))
+        except Exception:
+            buy = 0
+        can_buy = (buy > 0); can_sell = (coin > 0)
+        guard = "Zone-side & cooldown OK"  # placeholder; detailed guards available elsewhere
+        # If OpenAI key present or provider specified, generate via GPT-4o-mini first
+        provider = str(payload.get('provider') or '').lower()
+        openai_key = os.getenv('OPENAI_API_KEY')
+        out = []
+        if openai_key and (provider == 'openai' or os.getenv('NPC_PROVIDER','').lower()=='openai'):
+            try:
+                url = 'https://api.openai.com/v1/chat/completions'
+                headers = { 'Authorization': f'Bearer {openai_key}', 'Content-Type': 'application/json' }
+                sys = "You are an NPC villager speaking concise, context-aware trading lines in English. Keep each line short (<= 140 chars), natural, and grounded in the given signals."
+                context = f"interval={iv}, zone={zone}, slope={slope}, flip={flip}, coin_count={coin}, buyable={buy}, can_buy={can_buy}, can_sell={can_sell}"
+                # we will request one-by-one to enforce de-duplication and keep responses crisp
+                tries = 0
+                while len(out) < n and tries < n*3:
+                    tries += 1
+                    persona = random.choice(personas)
+                    usr = f"As {persona} at {iv}, say ONE short line about: {context}. Include a clear intent (BUY/SELL/HOLD) only if feasible."
+                    body = {
+                        'model': 'gpt-4o-mini',
+                        'messages': [
+                            { 'role': 'system', 'content': sys },
+                            { 'role': 'user', 'content': usr }
+                        ],
+                        'temperature': 0.7,
+                        'max_tokens': 60
+                    }
+                    resp = requests.post(url, headers=headers, json=body, timeout=20)
+                    if resp.status_code >= 400:
+                        break
+                    data = resp.json()
+                    txt = (data.get('choices') or [{}])[0].get('message', {}).get('content') or ''
+                    text = f"{persona}({iv}): {txt.strip()}"
+                    msg = { 'ts': int(time.time()*1000), 'interval': iv, 'persona': persona, 'text': text }
+                    if _npc_add(msg):
+                        out.append(msg)
+            except Exception:
+                out = []
+        # fallback: template generator
+        out = []
+        tries = 0
+        while len(out) < n and tries < n*5:
+            tries += 1
+            p = random.choice(personas)
+            act = 'BUY' if (zone=='BLUE') else ('SELL' if zone=='ORANGE' else 'HOLD')
+            s = None if slope is None else (round(float(slope)*10000, 2))
+            f = (flip if isinstance(flip, int) else '-')
+            text = random.choice(frames).format(p=p, iv=iv, zone=(zone or '-'), s=(s if s is not None else '-'), f=f, act=act, guard=guard, can_buy=can_buy, can_sell=can_sell, coin=coin, buy=buy)
+            msg = { 'ts': int(time.time()*1000), 'interval': iv, 'persona': p, 'text': text }
+            if _npc_add(msg):
+                out.append(msg)
+        return jsonify({'ok': True, 'count': len(out), 'items': out})
+    except Exception as e:
+        return jsonify({'ok': False, 'error': str(e)}), 500
@@ -0,0 +1,2481 @@
+"""8BIT village blueprint: residents, mayor trust, warehouses, trade journals, scouts.
+
+마을 시스템의 상태(주민 / 창고 / 촌장 신뢰도 / 비트카 에너지)와 함수, /api/village/* 엔드포인트.
+거래 코어는 api.loaded('village') 가 None 이 아닐 때만 촌장 지침 / 거래 기록을 호출한다.
+창고 초기화(initialize_trainer_warehouses)는 warm-up 단계나 첫 /api/village 요청에서 한 번 실행된다.
+"""
+
+import os
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+from flask import Blueprint, jsonify, request
+
+from server import (
+    ML_MODEL_PATH, SharedDict, _build_features, _compute_r_from_ohlcv, _energy_adjust, _energy_state,
+    _energy_tick, _model_path_for, _nb_coin_counter, _resolve_config, _startup, _zone_reputation,
+    bot_ctrl, gateway_upbit, get_candles, handle_exception, load_config, logger, state, success_response,
+)
+
+bp = Blueprint('village', __name__)
+
+
+@bp.before_app_request
+def _ensure_village():
+    if request.path.startswith('/api/village') and not _startup.is_ready('village'):
+        _startup.ensure('village')
+
+
+# ===== 8BIT 마을 시스템 =====
+
+# 마을 에너지 시스템
+VILLAGE_ENERGY = 150
+MAX_VILLAGE_ENERGY = 100
+ENERGY_ACCUMULATED = 150
+
+# 촌장의 신뢰도 시스템
+MAYOR_TRUST_SYSTEM = {
+    "ML_Model_Trust": 40,    # 🤖 ML 모델 신뢰도
+    "NB_Guild_Trust": 82,    # 🏛️ N/B 길드 신뢰도 (82개 히스토리)
+    "last_guidance": None,
+    "guidance_history": [],
+    "auto_learning_enabled": True,  # 자동 촌장 지침 학습 활성화
+    "last_learning_time": None,     # 마지막 학습 시간
+    "learning_interval": 3600       # 학습 간격 (1시간)
+}
+
+# ===== 마을 출입 일지 시스템 =====
+VILLAGE_ENTRY_EXIT_LOG = {
+    "total_residents": 10,  # 총 주민 수
+    "current_in_village": 4,  # 현재 마을 내 주민 수
+    "current_in_orange": 3,   # 현재 ORANGE 구역 주민 수
+    "current_in_blue": 3,     # 현재 BLUE 구역 주민 수
+    "zone_logs": {
+        "ORANGE": {
+            "residents": [],  # ORANGE 구역 주민 목록
+            "activities": [], # ORANGE 구역 활동 기록
+            "entry_exit_log": []  # ORANGE 구역 출입 기록
+        },
+        "BLUE": {
+            "residents": [],  # BLUE 구역 주민 목록
+            "activities": [], # BLUE 구역 활동 기록
+            "entry_exit_log": []  # BLUE 구역 출입 기록
+        },
+        "VILLAGE": {
+            "residents": [],  # 마을 내 주민 목록
+            "activities": [], # 마을 내 활동 기록
+            "entry_exit_log": []  # 마을 출입 기록
+        }
+    },
+    "resident_status": {}  # 각 주민별 현재 상태
+}
+
+# 마을 주민 시스템 (Guild Members) - 카드 기반 시스템
+VILLAGE_RESIDENTS = SharedDict({
+    "scout": {
+        "name": "Scout",
+        "hp": 85,
+        "maxHp": 100,
+        "stamina": 70,
+        "maxStamina": 100,
+        "location": "Gate",
+        "role": "Explorer",
+        "assignedTimeframes": ["minute1", "minute3"],  # 담당 분봉
+        "specialty": "Quick Signals",
+        "description": "Monitors 1m & 3m charts for rapid opportunities",
+        "skillLevel": 2.9,
+        "experience": 0,
+        "learningRate": 0.1,
+        "autoTradingEnabled": True,
+        "lastAutoTrade": None,
+        "tradeFrequency": 0.6,
+        "strategy": "momentum",
+        
+        # 카드 시스템
+        "cardSystem": {
+            "activeCards": [],  # 활성 카드 ID들
+            "completedCards": [],  # 완료된 카드 ID들
+            "failedCards": [],  # 실패한 카드 ID들
+            "cardAnalysisHistory": [],  # 카드 분석 히스토리
+            "currentAnalysis": None,  # 현재 분석 중인 카드
+            "analysisSuccessRate": 0.0,  # 분석 성공률
+            "totalCardsAnalyzed": 0,  # 총 분석한 카드 수
+            "successfulCards": 0,  # 성공한 카드 수
+            "averageProfit": 0.0,  # 평균 수익률
+            "totalProfit": 0.0,  # 총 수익
+            "totalVolume": 0.0,  # 총 거래량
+            "totalFees": 0.0  # 총 수수료
+        },
+        
+        # 기존 시스템 (호환성 유지)
+        "nbCoins": 0.001,
+        "totalNbCoinsEarned": 0.0,
+        "totalNbCoinsLost": 0.0,
+        "openPosition": None,
+        "positionHistory": [],
+        "averagePrice": 0.0,
+        "totalPositionSize": 0.0
+    },
+    "guardian": {
+        "name": "Guardian",
+        "hp": 95,
+        "maxHp": 100,
+        "stamina": 80,
+        "maxStamina": 100,
+        "location": "Market",
+        "role": "Protector",
+        "assignedTimeframes": ["minute5", "minute10"],  # 담당 분봉
+        "specialty": "Trend Protection",
+        "description": "Protects trends with 5m & 10m charts",
+        "skillLevel": 1.0,
+        "experience": 0,
+        "learningRate": 0.15,
+        "autoTradingEnabled": True,
+        "lastAutoTrade": None,
+        "tradeFrequency": 0.4,
+        "strategy": "mean_reversion",
+        
+        # 카드 시스템
+        "cardSystem": {
+            "activeCards": [],
+            "completedCards": [],
+            "failedCards": [],
+            "cardAnalysisHistory": [],
+            "currentAnalysis": None,
+            "analysisSuccessRate": 0.0,
+            "totalCardsAnalyzed": 0,
+            "successfulCards": 0,
+            "averageProfit": 0.0,
+            "totalProfit": 0.0,
+            "totalVolume": 0.0,
+            "totalFees": 0.0
+        },
+        
+        # 기존 시스템 (호환성 유지)
+        "nbCoins": 0.001,
+        "totalNbCoinsEarned": 0.0,
+        "totalNbCoinsLost": 0.0,
+        "openPosition": None,
+        "positionHistory": [],
+        "averagePrice": 0.0,
+        "totalPositionSize": 0.0
+    },
+    "analyst": {
+        "name": "Analyst",
+        "hp": 60,
+        "maxHp": 100,
+        "stamina": 90,
+        "maxStamina": 100,
+        "location": "Tower",
+        "role": "Strategist",
+        "assignedTimeframes": ["minute15", "minute30"],  # 담당 분봉
+        "specialty": "Strategic Analysis",
+        "description": "Develops strategies with 15m & 30m charts",
+        "skillLevel": 1.0,
+        "experience": 0,
+        "learningRate": 0.12,
+        "autoTradingEnabled": True,
+        "lastAutoTrade": None,
+        "tradeFrequency": 0.3,
+        "strategy": "breakout",
+        
+        # 카드 시스템
+        "cardSystem": {
+            "activeCards": [],
+            "completedCards": [],
+            "failedCards": [],
+            "cardAnalysisHistory": [],
+            "currentAnalysis": None,
+            "analysisSuccessRate": 0.0,
+            "totalCardsAnalyzed": 0,
+            "successfulCards": 0,
+            "averageProfit": 0.0,
+            "totalProfit": 0.0,
+            "totalVolume": 0.0,
+            "totalFees": 0.0
+        },
+        
+        # 기존 시스템 (호환성 유지)
+        "nbCoins": 0.001,
+        "totalNbCoinsEarned": 0.0,
+        "totalNbCoinsLost": 0.0,
+        "openPosition": None,
+        "positionHistory": [],
+        "averagePrice": 0.0,
+        "totalPositionSize": 0.0
+    },
+    "elder": {
+        "name": "Elder",
+        "hp": 75,
+        "maxHp": 100,
+        "stamina": 85,
+        "maxStamina": 100,
+        "location": "Inn",
+        "role": "Advisor",
+        "assignedTimeframes": ["minute60", "day"],  # 담당 분봉
+        "specialty": "Long-term Wisdom",
+        "description": "Provides wisdom with 1h & daily charts",
+        "skillLevel": 1.0,
+        "experience": 0,
+        "learningRate": 0.08,
+        "autoTradingEnabled": True,
+        "lastAutoTrade": None,
+        "tradeFrequency": 0.2,
+        "strategy": "trend_following",
+        
+        # 카드 시스템
+        "cardSystem": {
+            "activeCards": [],
+            "completedCards": [],
+            "failedCards": [],
+            "cardAnalysisHistory": [],
+            "currentAnalysis": None,
+            "analysisSuccessRate": 0.0,
+            "totalCardsAnalyzed": 0,
+            "successfulCards": 0,
+            "averageProfit": 0.0,
+            "totalProfit": 0.0,
+            "totalVolume": 0.0,
+            "totalFees": 0.0
+        },
+        
+        # 기존 시스템 (호환성 유지)
+        "nbCoins": 0.001,
+        "totalNbCoinsEarned": 0.0,
+        "totalNbCoinsLost": 0.0,
+        "openPosition": None,
+        "positionHistory": [],
+        "averagePrice": 0.0,
+        "totalPositionSize": 0.0
+    }
+}, name='village_residents')
+
+# 카드 상태 머신 상수 정의
+CARD_STATE = {
+    "NEW": "STATE_NEW",           # 생성 직후
+    "WATCH": "STATE_WATCH",       # 관망하며 점수만 갱신
+    "LONG": "STATE_LONG",         # 보유(매수 진입 완료)
+    "SHORT": "STATE_SHORT",       # 보유(매도 진입 완료)
+    "EXITED": "STATE_EXITED",     # 청산 완료(거래 종료)
+    "REMOVED": "STATE_REMOVED"    # 제거 완료(운영 제외)
+}
+
+CARD_ACTION = {
+    "BUY": "BUY",                      # 매수 진입
+    "SELL_SHORT": "SELL_SHORT",        # 매도 진입(숏)
+    "SELL_TO_CLOSE": "SELL_TO_CLOSE",  # 롱 청산
+    "BUY_TO_CLOSE": "BUY_TO_CLOSE",    # 숏 청산
+    "WAIT": "WAIT",                    # 대기
+    "REMOVE_CARD": "REMOVE_CARD"       # 카드 제거
+}
+
+# 카드 시스템 전역 변수
+CARD_SYSTEM = SharedDict({
+    "totalCards": 25,  # 총 카드 수
+    "activeCards": {},  # 활성 카드들 (임시)
+    "completedCards": {},  # 완성된 카드들
+    "failedCards": {},  # 실패한 카드들
+    "removedCards": {},  # 제거된 카드들
+    "cardCounter": 0,  # 카드 ID 카운터
+    "lastCardUpdate": None  # 마지막 카드 업데이트 시간
+}, name='card_system')
+
+# 카드 시스템 함수들
+def format_elapsed_time(seconds):
+    """경과 시간을 읽기 쉬운 형식으로 변환"""
+    if seconds < 60:
+        return f"{int(seconds)}초"
+    elif seconds < 3600:
+        minutes = int(seconds // 60)
+        secs = int(seconds % 60)
+        return f"{minutes}분 {secs}초"
+    elif seconds < 86400:
+        hours = int(seconds // 3600)
+        minutes = int((seconds % 3600) // 60)
+        return f"{hours}시간 {minutes}분"
+    else:
+        days = int(seconds // 86400)
+        hours = int((seconds % 86400) // 3600)
+        return f"{days}일 {hours}시간"
+
+def get_card_elapsed_time(card):
+    """카드 생성 후 경과 시간 계산"""
+    if "createdAt" not in card:
+        return 0, "0초"
+    
+    elapsed = time.time() - card["createdAt"]
+    formatted = format_elapsed_time(elapsed)
+    return elapsed, formatted
+
+def create_card(member_name, timeframe, pattern_data):
+    """새로운 카드 생성"""
+    global CARD_SYSTEM
+    
+    CARD_SYSTEM["cardCounter"] += 1
+    card_id = CARD_SYSTEM["cardCounter"]
+    
+    card = {
+        "cardId": card_id,
+        "memberName": member_name,
+        "timeframe": timeframe,
+        "state": CARD_STATE["NEW"],  # 상태 머신 상태
+        "action": CARD_ACTION["WAIT"],  # 현재 액션
+        "patternData": pattern_data,
+        "createdAt": time.time(),
+        "createdAtFormatted": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "buyInfo": None,
+        "sellInfo": None,
+        "performance": None,
+        "strategy": None,
+        # 상태 머신 관련 필드
+        "score": 0.0,  # 현재 점수
+        "dataQuality": "DATA_OK",  # DATA_OK, DATA_WARN, DATA_BAD
+        "dataQualityCount": 0,  # 연속 데이터 이상 횟수
+        "trend": "TREND_NEUTRAL",  # TREND_UP, TREND_DOWN, TREND_NEUTRAL
+        "momentum": "MOM_NEUTRAL",  # MOM_UP, MOM_DOWN, MOM_NEUTRAL
+        "structure": "STRUCTURE_NONE",  # BREAK_UP, BREAK_DOWN, RETEST_OK, STRUCTURE_NONE
+        "volumeConfirm": False,  # VOLM_CONFIRM
+        "riskStatus": "RISK_OK",  # RISK_OK, RISK_WIDE_STOP, RISK_BAD_RR
+        "stopLoss": None,  # 손절가
+        "takeProfit": None,  # 목표가
+        "entryPrice": None,  # 진입가
+        "currentPrice": None,  # 현재가
+        "pnl": 0.0,  # 현재 손익률
+        "pnlPercent": 0.0,  # 현재 손익률(%)
+        "removedAt": None,  # 제거 시간
+        "removeReason": None,  # 제거 사유
+        "lastScore": None,  # 마지막 점수
+        "pnlSummary": None,  # 손익 요약
+        "stateHistory": [],  # 상태 변경 이력
+        "actionHistory": []  # 액션 실행 이력
+    }
+    
+    # 활성 카드에 추가
+    CARD_SYSTEM["activeCards"][card_id] = card
+    
+    # 주민의 활성 카드 목록에 추가
+    if member_name in VILLAGE_RESIDENTS:
+        VILLAGE_RESIDENTS[member_name]["cardSystem"]["activeCards"].append(card_id)
+    
+    print(f"🃏 카드 생성: {member_name} - {timeframe} (ID: {card_id}, STATE={CARD_STATE['NEW']})")
+    return card_id
+
+def analyze_card(card_id, member_name):
+    """카드 분석 및 매수/매도 전략 생성"""
+    if card_id not in CARD_SYSTEM["activeCards"]:
+        return None
+    
+    card = CARD_SYSTEM["activeCards"][card_id]
+    member = VILLAGE_RESIDENTS.get(member_name)
+    
+    if not member:
+        return None
+    
+    # 주민의 전문성에 따른 전략 생성
+    strategy = generate_trading_strategy(member, card["timeframe"], card["patternData"])
+    
+    # 카드 업데이트
+    card["status"] = "analyzing"
+    card["strategy"] = strategy
+    card["analyzedAt"] = time.time()
+    
+    # 주민의 현재 분석 상태 업데이트
+    member["cardSystem"]["currentAnalysis"] = card_id
+    member["cardSystem"]["cardAnalysisHistory"].append({
+        "cardId": card_id,
+        "timeframe": card["timeframe"],
+        "strategy": strategy,
+        "analyzedAt": time.time()
+    })
+    
+    print(f"🔍 카드 분석 완료: {member_name} - 카드 {card_id}")
+    return strategy
+
+def execute_card_action(card_id, action, action_data=None):
+    """
+    카드 액션 실행 함수
+    상태 머신에 따라 액션을 실행하고 상태를 전환
+    
+    Args:
+        card_id: 카드 ID
+        action: 실행할 액션 (BUY, SELL_SHORT, SELL_TO_CLOSE, BUY_TO_CLOSE, REMOVE_CARD)
+        action_data: 액션 실행에 필요한 데이터
+    
+    Returns:
+        성공 여부
+    """
+    if card_id not in CARD_SYSTEM["activeCards"]:
+        return False
+    
+    card = CARD_SYSTEM["activeCards"][card_id]
+    member_name = card["memberName"]
+    old_state = card.get("state")
+    old_action = card.get("action")
+    
+    if action == CARD_ACTION["BUY"]:
+        # 매수 진입
+        buy_info = action_data or {}
+        card["buyInfo"] = buy_info
+        card["entryPrice"] = buy_info.get("price", 0)
+        card["state"] = CARD_STATE["LONG"]
+        card["action"] = CARD_ACTION["BUY"]
+        card["buyCompletedAt"] = time.time()
+        
+        # 손절/목표가 설정
+        if buy_info.get("stopLoss"):
+            card["stopLoss"] = buy_info["stopLoss"]
+        if buy_info.get("takeProfit"):
+            card["takeProfit"] = buy_info["takeProfit"]
+        
+        # 상태 이력 기록
+        card["stateHistory"].append({
+            "from": old_state,
+            "to": CARD_STATE["LONG"],
+            "at": time.time(),
+            "reason": "buy_entry"
+        })
+        
+        # 주민의 창고에 임시 배치
+        if member_name in VILLAGE_RESIDENTS:
+            member = VILLAGE_RESIDENTS[member_name]
+            member["cardSystem"]["totalVolume"] += buy_info.get("amount", 0)
+            member["cardSystem"]["totalFees"] += buy_info.get("fee", 0)
+        
+        print(f"💰 [BUY] 카드 {card_id} - {member_name} - 가격: {card['entryPrice']}")
+        return True
+    
+    elif action == CARD_ACTION["SELL_SHORT"]:
+        # 매도 진입 (숏)
+        sell_info = action_data or {}
+        card["buyInfo"] = sell_info  # 숏의 경우 매도가 진입
+        card["entryPrice"] = sell_info.get("price", 0)
+        card["state"] = CARD_STATE["SHORT"]
+        card["action"] = CARD_ACTION["SELL_SHORT"]
+        card["sellShortAt"] = time.time()
+        
+        # 손절/목표가 설정
+        if sell_info.get("stopLoss"):
+            card["stopLoss"] = sell_info["stopLoss"]
+        if sell_info.get("takeProfit"):
+            card["takeProfit"] = sell_info["takeProfit"]
+        
+        # 상태 이력 기록
+        card["stateHistory"].append({
+            "from": old_state,
+            "to": CARD_STATE["SHORT"],
+            "at": time.time(),
+            "reason": "sell_short_entry"
+        })
+        
+        print(f"📉 [SELL_SHORT] 카드 {card_id} - {member_name} - 가격: {card['entryPrice']}")
+        return True
+    
+    elif action == CARD_ACTION["SELL_TO_CLOSE"]:
+        # 롱 청산
+        sell_info = action_data or {}
+        card["sellInfo"] = sell_info
+        card["state"] = CARD_STATE["EXITED"]
+        card["action"] = CARD_ACTION["SELL_TO_CLOSE"]
+        card["sellCompletedAt"] = time.time()
+        
+        # 손익 계산
+        entry_price = card.get("entryPrice", 0)
+        exit_price = sell_info.get("price", 0)
+        if entry_price > 0 and exit_price > 0:
+            card["pnlPercent"] = ((exit_price - entry_price) / entry_price) * 100
+            card["pnl"] = exit_price - entry_price
+        
+        # 상태 이력 기록
+        card["stateHistory"].append({
+            "from": old_state,
+            "to": CARD_STATE["EXITED"],
+            "at": time.time(),
+            "reason": "sell_to_close"
+        })
+        
+        print(f"🔴 [SELL_TO_CLOSE] 카드 {card_id} - {member_name} - 손익: {card.get('pnlPercent', 0):.2f}%")
+        return True
+    
+    elif action == CARD_ACTION["BUY_TO_CLOSE"]:
+        # 숏 청산
+        buy_info = action_data or {}
+        card["sellInfo"] = buy_info  # 숏의 경우 매수가 청산
+        card["state"] = CARD_STATE["EXITED"]
+        card["action"] = CARD_ACTION["BUY_TO_CLOSE"]
+        card["buyToCloseAt"] = time.time()
+        
+        # 손익 계산
+        entry_price = card.get("entryPrice", 0)
+        exit_price = buy_info.get("price", 0)
+        if entry_price > 0 and exit_price > 0:
+            card["pnlPercent"] = ((entry_price - exit_price) / entry_price) * 100
+            card["pnl"] = entry_price - exit_price
+        
+        # 상태 이력 기록
+        card["stateHistory"].append({
+            "from": old_state,
+            "to": CARD_STATE["EXITED"],
+            "at": time.time(),
+            "reason": "buy_to_close"
+        })
+        
+        print(f"🟢 [BUY_TO_CLOSE] 카드 {card_id} - {member_name} - 손익: {card.get('pnlPercent', 0):.2f}%")
+        return True
+    
+    elif action == CARD_ACTION["REMOVE_CARD"]:
+        # 카드 제거
+        return remove_card(card_id, action_data)
+    
+    elif action == CARD_ACTION["WAIT"]:
+        # 대기 (상태 유지)
+        card["action"] = CARD_ACTION["WAIT"]
+        return True
+    
+    return False
+
+def remove_card(card_id, remove_reason=None):
+    """
+    카드 제거 함수
+    운영에서 제외하고 기록 저장
+    """
+    if card_id not in CARD_SYSTEM["activeCards"]:
+        return False
+    
+    card = CARD_SYSTEM["activeCards"][card_id]
+    member_name = card["memberName"]
+    
+    # 제거 정보 저장
+    card["removedAt"] = time.time()
+    card["removeReason"] = remove_reason or "manual_remove"
+    card["lastScore"] = card.get("score", 0)
+    card["state"] = CARD_STATE["REMOVED"]
+    card["action"] = CARD_ACTION["REMOVE_CARD"]
+    
+    # 손익 요약 생성
+    if card.get("entryPrice") and card.get("currentPrice"):
+        entry = card["entryPrice"]
+        exit_price = card.get("currentPrice", entry)
+        if card.get("state") == CARD_STATE["LONG"]:
+            pnl_pct = ((exit_price - entry) / entry) * 100
+        else:  # SHORT
+            pnl_pct = ((entry - exit_price) / entry) * 100
+        
+        card["pnlSummary"] = {
+            "entryPrice": entry,
+            "exitPrice": exit_price,
+            "pnlPercent": pnl_pct,
+            "lossCount": 1 if pnl_pct < 0 else 0,
+            "totalLoss": pnl_pct if pnl_pct < 0 else 0
+        }
+    
+    # 상태 이력 기록
+    card["stateHistory"].append({
+        "from": card.get("state"),
+        "to": CARD_STATE["REMOVED"],
+        "at": time.time(),
+        "reason": remove_reason or "manual_remove"
+    })
+    
+    # 제거된 카드로 이동
+    CARD_SYSTEM["removedCards"][card_id] = card
+    del CARD_SYSTEM["activeCards"][card_id]
+    
+    # 주민 통계 업데이트
+    if member_name in VILLAGE_RESIDENTS:
+        member = VILLAGE_RESIDENTS[member_name]
+        if card_id in member["cardSystem"]["activeCards"]:
+            member["cardSystem"]["activeCards"].remove(card_id)
+    
+    print(f"🗑️ [REMOVE_CARD] 카드 {card_id} - {member_name} - 사유: {remove_reason}")
+    return True
+
+# 기존 함수들 호환성 유지 (레거시 지원)
+def execute_card_buy(card_id, buy_info):
+    """카드 매수 실행 (레거시 호환)"""
+    return execute_card_action(card_id, CARD_ACTION["BUY"], buy_info)
+
+def execute_card_sell(card_id, sell_info):
+    """카드 매도 실행 및 완성 (레거시 호환)"""
+    # 기존 로직 유지 (EXITED 상태로 전환)
+    if card_id not in CARD_SYSTEM["activeCards"]:
+        return False
+    
+    card = CARD_SYSTEM["activeCards"][card_id]
+    member_name = card["memberName"]
+    
+    # 매도 정보 저장
+    card["sellInfo"] = sell_info
+    card["state"] = CARD_STATE["EXITED"]
+    card["sellCompletedAt"] = time.time()
+    
+    # 성과 계산
+    performance = calculate_card_performance(card)
+    card["performance"] = performance
+    
+    # 완성된 카드로 이동
+    CARD_SYSTEM["completedCards"][card_id] = card
+    del CARD_SYSTEM["activeCards"][card_id]
+    
+    # 주민 통계 업데이트
+    if member_name in VILLAGE_RESIDENTS:
+        member = VILLAGE_RESIDENTS[member_name]
+        member["cardSystem"]["activeCards"].remove(card_id)
+        member["cardSystem"]["completedCards"].append(card_id)
+        
+        # 성과 업데이트
+        member["cardSystem"]["totalCardsAnalyzed"] += 1
+        if performance["success"]:
+            member["cardSystem"]["successfulCards"] += 1
+            member["cardSystem"]["totalProfit"] += performance["profit"]
+        else:
+            member["cardSystem"]["failedCards"].append(card_id)
+        
+        # 성공률 계산
+        total_analyzed = member["cardSystem"]["totalCardsAnalyzed"]
+        successful = member["cardSystem"]["successfulCards"]
+        if total_analyzed > 0:
+            member["cardSystem"]["analysisSuccessRate"] = successful / total_analyzed
+            member["cardSystem"]["averageProfit"] = member["cardSystem"]["totalProfit"] / total_analyzed
+        
+        # 현재 분석 상태 초기화
+        member["cardSystem"]["currentAnalysis"] = None
+    
+    print(f"✅ 카드 완성: {member_name} - 카드 {card_id} (수익: {performance['profit']:.2f}%)")
+    return True
+
+def generate_trading_strategy(member, timeframe, pattern_data):
+    """주민의 전문성에 따른 거래 전략 생성"""
+    strategy = {
+        "timeframe": timeframe,
+        "memberRole": member["role"],
+        "specialty": member["specialty"],
+        "confidence": 0.0,
+        "buyCondition": "",
+        "sellCondition": "",
+        "stopLoss": "",
+        "takeProfit": "",
+        "expectedProfit": 0.0,
+        "expectedRisk": 0.0
+    }
+    
+    # 주민별 전략 생성
+    if member["role"] == "Explorer":  # Scout
+        strategy.update({
+            "buyCondition": "RSI < 25 && volume_spike > 200%",
+            "sellCondition": "profit >= 1.5% || RSI > 75",
+            "stopLoss": "loss >= -0.8%",
+            "takeProfit": "profit >= 2%",
+            "expectedProfit": 1.5,
+            "expectedRisk": -0.8,
+            "confidence": 0.85
+        })
+    elif member["role"] == "Protector":  # Guardian
+        strategy.update({
+            "buyCondition": "MACD_crossover && support_level",
+            "sellCondition": "resistance_level || profit >= 2.5%",
+            "stopLoss": "loss >= -1.2%",
+            "takeProfit": "profit >= 3%",
+            "expectedProfit": 2.5,
+            "expectedRisk": -1.2,
+            "confidence": 0.80
+        })
+    elif member["role"] == "Strategist":  # Analyst
+        strategy.update({
+            "buyCondition": "price_breakout_above_resistance",
+            "sellCondition": "trend_exhaustion || profit >= 3%",
+            "stopLoss": "loss >= -1.5%",
+            "takeProfit": "profit >= 4%",
+            "expectedProfit": 3.0,
+            "expectedRisk": -1.5,
+            "confidence": 0.75
+        })
+    elif member["role"] == "Advisor":  # Elder
+        strategy.update({
+            "buyCondition": "strong_uptrend_confirmation",
+            "sellCondition": "trend_reversal || profit >= 4%",
+            "stopLoss": "loss >= -2%",
+            "takeProfit": "profit >= 5%",
+            "expectedProfit": 4.0,
+            "expectedRisk": -2.0,
+            "confidence": 0.70
+        })
+    
+    return strategy
+
+def evaluate_card_state_machine(card, market_data=None):
+    """
+    카드 상태 머신 평가 함수
+    우선순위 규칙에 따라 상태와 액션을 결정
+    
+    Args:
+        card: 카드 객체
+        market_data: 시장 데이터 (가격, 지표 등)
+    
+    Returns:
+        (new_state, action, reason)
+    """
+    current_state = card.get("state", CARD_STATE["NEW"])
+    current_price = market_data.get("price", 0) if market_data else card.get("currentPrice", 0)
+    card["currentPrice"] = current_price
+    
+    # 우선순위 1: 데이터 이상이면 무조건 정지
+    if card.get("dataQuality") in ["DATA_BAD", "DATA_WARN"]:
+        data_quality_count = card.get("dataQualityCount", 0)
+        if data_quality_count >= 3:  # 연속 3회 이상
+            if current_state in [CARD_STATE["LONG"], CARD_STATE["SHORT"]]:
+                # 포지션 있으면 즉시 청산 후 제거
+                if current_state == CARD_STATE["LONG"]:
+                    return CARD_STATE["EXITED"], CARD_ACTION["SELL_TO_CLOSE"], "data_bad_force_close"
+                else:
+                    return CARD_STATE["EXITED"], CARD_ACTION["BUY_TO_CLOSE"], "data_bad_force_close"
+            else:
+                # 포지션 없으면 바로 제거
+                return CARD_STATE["REMOVED"], CARD_ACTION["REMOVE_CARD"], "data_bad_no_position"
+    
+    # 우선순위 2: 리스크 실패면 진입 금지
+    if card.get("riskStatus") in ["RISK_WIDE_STOP", "RISK_BAD_RR"]:
+        if current_state in [CARD_STATE["NEW"], CARD_STATE["WATCH"]]:
+            # 진입 금지, WATCH 유지 또는 제거 조건 검사
+            if card.get("score", 0) < 40:  # 점수가 너무 낮으면 제거
+                return CARD_STATE["REMOVED"], CARD_ACTION["REMOVE_CARD"], "risk_fail_low_score"
+            return CARD_STATE["WATCH"], CARD_ACTION["WAIT"], "risk_fail_wait"
+    
+    # 우선순위 3: 손절 조건은 최우선 청산 (포지션 보유 중일 때만)
+    if current_state == CARD_STATE["LONG"]:
+        # 롱 포지션 손절 체크
+        entry_price = card.get("entryPrice", 0)
+        stop_loss = card.get("stopLoss", 0)
+        if entry_price > 0 and stop_loss > 0:
+            if current_price <= stop_loss:
+                return CARD_STATE["EXITED"], CARD_ACTION["SELL_TO_CLOSE"], "stop_loss_hit"
+        
+        # 점수 급락 체크
+        if card.get("score", 0) < 55:  # 청산 임계치
+            return CARD_STATE["EXITED"], CARD_ACTION["SELL_TO_CLOSE"], "score_drop"
+    
+    if current_state == CARD_STATE["SHORT"]:
+        # 숏 포지션 손절 체크
+        entry_price = card.get("entryPrice", 0)
+        stop_loss = card.get("stopLoss", 0)
+        if entry_price > 0 and stop_loss > 0:
+            if current_price >= stop_loss:
+                return CARD_STATE["EXITED"], CARD_ACTION["BUY_TO_CLOSE"], "stop_loss_hit"
+        
+        # 점수 급락 체크
+        if card.get("score", 0) < 55:  # 청산 임계치
+            return CARD_STATE["EXITED"], CARD_ACTION["BUY_TO_CLOSE"], "score_drop"
+    
+    # 상태별 규칙 평가
+    if current_state == CARD_STATE["NEW"]:
+        # NEW -> WATCH로 전환
+        return CARD_STATE["WATCH"], CARD_ACTION["WAIT"], "initial_watch"
+    
+    elif current_state == CARD_STATE["WATCH"]:
+        # 매수 규칙 평가
+        if (card.get("dataQuality") == "DATA_OK" and
+            card.get("trend") == "TREND_UP" and
+            card.get("momentum") in ["MOM_UP", "MOM_NEUTRAL"] and
+            card.get("structure") in ["BREAK_UP", "RETEST_OK"] and
+            card.get("score", 0) >= 70 and
+            card.get("riskStatus") == "RISK_OK"):
+            return CARD_STATE["LONG"], CARD_ACTION["BUY"], "buy_signal"
+        
+        # 매도 규칙 평가 (숏 진입)
+        if (card.get("dataQuality") == "DATA_OK" and
+            card.get("trend") == "TREND_DOWN" and
+            card.get("momentum") in ["MOM_DOWN", "MOM_NEUTRAL"] and
+            card.get("structure") in ["BREAK_DOWN", "RETEST_OK"] and
+            card.get("score", 0) >= 70 and
+            card.get("riskStatus") == "RISK_OK"):
+            return CARD_STATE["SHORT"], CARD_ACTION["SELL_SHORT"], "sell_short_signal"
+        
+        # WATCH 유지
+        return CARD_STATE["WATCH"], CARD_ACTION["WAIT"], "watch_continue"
+    
+    elif current_state == CARD_STATE["LONG"]:
+        # 롱 청산 규칙 평가
+        entry_price = card.get("entryPrice", 0)
+        take_profit = card.get("takeProfit", 0)
+        
+        # 1. TAKE_PROFIT 도달
+        if entry_price > 0 and take_profit > 0 and current_price >= take_profit:
+            return CARD_STATE["EXITED"], CARD_ACTION["SELL_TO_CLOSE"], "take_profit_hit"
+        
+        # 2. TREND가 DOWN으로 전환 또는 BREAK_DOWN 발생
+        if card.get("trend") == "TREND_DOWN" or card.get("structure") == "BREAK_DOWN":
+            return CARD_STATE["EXITED"], CARD_ACTION["SELL_TO_CLOSE"], "trend_reversal"
+        
+        # 3. MOM이 DOWN으로 강하게 꺾임
+        if card.get("momentum") == "MOM_DOWN":
+            return CARD_STATE["EXITED"], CARD_ACTION["SELL_TO_CLOSE"], "momentum_down"
+        
+        # 4. SCORE가 청산 임계치 이하로 하락
+        if card.get("score", 0) < 55:
+            return CARD_STATE["EXITED"], CARD_ACTION["SELL_TO_CLOSE"], "score_below_threshold"
+        
+        # LONG 유지
+        return CARD_STATE["LONG"], CARD_ACTION["WAIT"], "long_hold"
+    
+    elif current_state == CARD_STATE["SHORT"]:
+        # 숏 청산 규칙 평가
+        entry_price = card.get("entryPrice", 0)
+        take_profit = card.get("takeProfit", 0)
+        
+        # 1. TAKE_PROFIT 도달
+        if entry_price > 0 and take_profit > 0 and current_price <= take_profit:
+            return CARD_STATE["EXITED"], CARD_ACTION["BUY_TO_CLOSE"], "take_profit_hit"
+        
+        # 2. TREND가 UP으로 전환 또는 BREAK_UP 발생
+        if card.get("trend") == "TREND_UP" or card.get("structure") == "BREAK_UP":
+            return CARD_STATE["EXITED"], CARD_ACTION["BUY_TO_CLOSE"], "trend_reversal"
+        
+        # 3. MOM이 UP으로 강하게 전환
+        if card.get("momentum") == "MOM_UP":
+            return CARD_STATE["EXITED"], CARD_ACTION["BUY_TO_CLOSE"], "momentum_up"
+        
+        # 4. SCORE가 청산 임계치 이하로 하락
+        if card.get("score", 0) < 55:
+            return CARD_STATE["EXITED"], CARD_ACTION["BUY_TO_CLOSE"], "score_below_threshold"
+        
+        # SHORT 유지
+        return CARD_STATE["SHORT"], CARD_ACTION["WAIT"], "short_hold"
+    
+    elif current_state == CARD_STATE["EXITED"]:
+        # EXITED 상태에서는 제거 조건만 평가
+        return evaluate_remove_conditions(card)
+    
+    # 기본값: 현재 상태 유지
+    return current_state, CARD_ACTION["WAIT"], "no_change"
+
+def evaluate_remove_conditions(card):
+    """
+    카드 제거 조건 평가
+    제거는 "거래 액션"이 아니라 "운영 액션"
+    """
+    current_state = card.get("state", CARD_STATE["NEW"])
+    
+    # 1. EXITED 이후 성과가 기준 미달
+    if current_state == CARD_STATE["EXITED"]:
+        pnl_summary = card.get("pnlSummary", {})
+        if pnl_summary:
+            loss_count = pnl_summary.get("lossCount", 0)
+            total_loss = pnl_summary.get("totalLoss", 0)
+            
+            # 연속 K회 손실 (예: 3회)
+            if loss_count >= 3:
+                return CARD_STATE["REMOVED"], CARD_ACTION["REMOVE_CARD"], "loss_streak"
+            
+            # 누적 손실률이 LIMIT 초과 (예: -5%)
+            if total_loss <= -5.0:
+                return CARD_STATE["REMOVED"], CARD_ACTION["REMOVE_CARD"], "cumulative_loss"
+    
+    # 2. 시간 만료 (TTL 초과)
+    created_at = card.get("createdAt", 0)
+    if created_at > 0:
+        elapsed = time.time() - created_at
+        ttl_hours = 24  # 24시간 TTL
+        if elapsed > (ttl_hours * 3600):
+            return CARD_STATE["REMOVED"], CARD_ACTION["REMOVE_CARD"], "ttl_expired"
+    
+    # 3. 신호 품질 불량
+    score = card.get("score", 0)
+    if score < 40:
+        # 낮은 점수가 M분 이상 지속 (예: 30분)
+        low_score_start = card.get("lowScoreStartTime", None)
+        if low_score_start:
+            if time.time() - low_score_start > 1800:  # 30분
+                return CARD_STATE["REMOVED"], CARD_ACTION["REMOVE_CARD"], "low_score_duration"
+        else:
+            card["lowScoreStartTime"] = time.time()
+    
+    # 4. 데이터 이상 반복
+    if card.get("dataQuality") == "DATA_WARN":
+        warn_count = card.get("dataWarnCount", 0)
+        if warn_count >= 5:  # 경고가 5회 이상
+            return CARD_STATE["REMOVED"], CARD_ACTION["REMOVE_CARD"], "data_warn_repeated"
+    
+    # 5. 중복 카드 정리 (같은 timeframe에서 하위 점수 카드 제거)
+    # 이는 외부에서 처리해야 함
+    
+    # 제거 조건 미충족
+    return current_state, CARD_ACTION["WAIT"], "keep_active"
+
+def calculate_card_performance(card):
+    """카드 성과 계산"""
+    if not card.get("buyInfo") or not card.get("sellInfo"):
+        return {"success": False, "profit": 0.0, "reason": "거래 정보 부족"}
+    
+    buy_price = card["buyInfo"]["price"]
+    sell_price = card["sellInfo"]["price"]
+    buy_time = card["buyInfo"]["time"]
+    sell_time = card["sellInfo"]["time"]
+    
+    # 수익률 계산
+    profit_percent = ((sell_price - buy_price) / buy_price) * 100
+    
+    # 성공 여부 판단
+    success = profit_percent > 0
+    
+    # 거래 시간 계산
+    duration = sell_time - buy_time
+    
+    return {
+        "success": success,
+        "profit": profit_percent,
+        "buyPrice": buy_price,
+        "sellPrice": sell_price,
+        "duration": duration,
+        "reason": "목표 달성" if success else "손실 발생"
+    }
+
+def update_card_state_machine(card_id, market_data=None):
+    """
+    카드 상태 머신 업데이트
+    상태를 평가하고 필요한 액션을 실행
+    """
+    if card_id not in CARD_SYSTEM["activeCards"]:
+        return False
+    
+    card = CARD_SYSTEM["activeCards"][card_id]
+    
+    # 상태 머신 평가
+    new_state, action, reason = evaluate_card_state_machine(card, market_data)
+    
+    # 상태 변경이 있으면 액션 실행
+    if new_state != card.get("state") or action != card.get("action"):
+        # 액션 실행
+        action_data = None
+        if action in [CARD_ACTION["BUY"], CARD_ACTION["SELL_SHORT"]]:
+            # 진입 액션: 가격 정보 필요
+            action_data = {
+                "price": market_data.get("price", 0) if market_data else card.get("currentPrice", 0),
+                "amount": market_data.get("amount", 0) if market_data else 0,
+                "fee": market_data.get("fee", 0) if market_data else 0,
+                "stopLoss": card.get("stopLoss"),
+                "takeProfit": card.get("takeProfit")
+            }
+        elif action in [CARD_ACTION["SELL_TO_CLOSE"], CARD_ACTION["BUY_TO_CLOSE"]]:
+            # 청산 액션: 가격 정보 필요
+            action_data = {
+                "price": market_data.get("price", 0) if market_data else card.get("currentPrice", 0),
+                "amount": market_data.get("amount", 0) if market_data else 0,
+                "fee": market_data.get("fee", 0) if market_data else 0
+            }
+        elif action == CARD_ACTION["REMOVE_CARD"]:
+            # 제거 액션: 사유 전달
+            action_data = reason
+        
+        execute_card_action(card_id, action, action_data)
+        
+        # 액션 이력 기록
+        card["actionHistory"].append({
+            "action": action,
+            "state": new_state,
+            "reason": reason,
+            "at": time.time()
+        })
+        
+        return True
+    
+    return False
+
+def update_all_cards_state_machine(market_data_dict=None):
+    """
+    모든 활성 카드의 상태 머신 업데이트
+    market_data_dict: {card_id: market_data} 형식의 딕셔너리
+    """
+    updated_count = 0
+    for card_id in list(CARD_SYSTEM["activeCards"].keys()):
+        market_data = market_data_dict.get(card_id) if market_data_dict else None
+        if update_card_state_machine(card_id, market_data):
+            updated_count += 1
+    return updated_count
+
+def get_member_card_status(member_name):
+    """주민의 카드 상태 조회"""
+    if member_name not in VILLAGE_RESIDENTS:
+        return None
+    
+    member = VILLAGE_RESIDENTS[member_name]
+    card_system = member["cardSystem"]
+    
+    return {
+        "memberName": member_name,
+        "role": member["role"],
+        "assignedTimeframes": member["assignedTimeframes"],
+        "activeCards": len(card_system["activeCards"]),
+        "completedCards": len(card_system["completedCards"]),
+        "failedCards": len(card_system["failedCards"]),
+        "analysisSuccessRate": card_system["analysisSuccessRate"],
+        "totalCardsAnalyzed": card_system["totalCardsAnalyzed"],
+        "successfulCards": card_system["successfulCards"],
+        "averageProfit": card_system["averageProfit"],
+        "totalProfit": card_system["totalProfit"],
+        "currentAnalysis": card_system["currentAnalysis"]
+    }
+
+# 트레이너 창고 시스템 (카드 기반으로 개선)
+TRAINER_WAREHOUSES = {}
+
+def initialize_trainer_warehouses():
+    """트레이너 창고 초기화"""
+    for trainer_name, trainer_data in VILLAGE_RESIDENTS.items():
+        TRAINER_WAREHOUSES[trainer_name] = {
+            "location": f"{trainer_data['location']} Warehouse",
+            "capacity": "무제한",
+            "real_time_storage": True,
+            "trade_records": {
+                "real_trades": [],
+                "mock_trades": [],
+                "current_position": None
+            },
+            "profit_loss_history": {
+                "total_profit": 0,
+                "win_rate": 0,
+                "total_trades": 0,
+                "profitable_trades": 0,
+                "losing_trades": 0
+            },
+            "learning_data": {
+                "successful_patterns": [],
+                "failed_patterns": [],
+                "market_conditions": [],
+                "strategy_effectiveness": {}
+            },
+            # 거래 일지 시스템 추가
+            "trade_journal": {
+                "recent_entries": [],  # 최근 10개 거래 일지
+                "zone_entries": {      # 구역별 거래 일지
+                    "ORANGE": [],
+                    "BLUE": []
+                },
+                "mayor_guidance_log": [],  # 촌장 지침 기록
+                "ml_model_decisions": []   # ML 모델 판단 기록
+            },
+            # AI 분석 결과 저장 시스템 추가
+            "ai_analysis": {
+                "current": None,  # 현재 분석 결과
+                "history": [],    # 분석 히스토리 (최대 50개)
+                "last_updated": None  # 마지막 업데이트 시간
+            }
+        }
+
+# 비트카 에너지 시스템
+BITCAR_ENERGY_SYSTEM = {
+    "scout": {"energy": 70, "bitcar_model": "Quick Signal Runner"},
+    "guardian": {"energy": 80, "bitcar_model": "Trend Protector"},
+    "analyst": {"energy": 90, "bitcar_model": "Strategic Analyzer"},
+    "elder": {"energy": 85, "bitcar_model": "Wisdom Keeper"}
+}
+
+# 마을 시스템 초기화는 warm-up 단계에서 (_startup 'village'), 그 전에 쓰이면 그 자리에서 초기화
+
+# ===== 8BIT 마을 시스템 함수들 =====
+
+def mayor_trust_guidance():
+    """촌장의 신뢰도 기반 지침 생성"""
+    global MAYOR_TRUST_SYSTEM
+    
+    guidance = {
+        "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "location": "Town Hall",
+        "announcement": "마을 주민 여러분, 신뢰도 기반 지침을 전달합니다.",
+        
+        "trust_analysis": {
+            "ml_model_trust": MAYOR_TRUST_SYSTEM["ML_Model_Trust"],
+            "nb_guild_trust": MAYOR_TRUST_SYSTEM["NB_Guild_Trust"],
+            "interpretation": "신뢰도 분석 결과"
+        },
+        
+        "guidance": {
+            "zone": "ORANGE",
+            "official_strategy": "신중한 방어적 접근",
+            "trust_adjusted_strategy": "개인 판단 우선, ML 모델 참고",
+            "energy_requirement": "최소 50 에너지",
+            "special_instructions": "신뢰도 시스템 준수"
+        }
+    }
+    
+    MAYOR_TRUST_SYSTEM["last_guidance"] = guidance
+    MAYOR_TRUST_SYSTEM["guidance_history"].append(guidance)
+    
+    return guidance
+
+def generate_ai_trading_explanation(trainer_name, current_action, current_zone, r_value, confidence, position_status):
+    """AI 거래 판단 설명 생성"""
+    
+    explanations = {
+        "BUY": {
+            "BLUE": {
+                "reason": "✅ 촌장 지침 준수: BLUE 구역에서 BUY 허용",
+                "timing": "🕐 즉시 실행 가능 (구역 조건 충족)",
+                "confidence": f"🤖 ML 모델 신뢰도: {confidence}%",
+                "zone_status": f"📊 현재 r값: {r_value:.3f} (BLUE 구역 유지)",
+                "strategy": "📈 공격적 매수 전략 (BLUE 구역 특성)"
+            },
+            "ORANGE": {
+                "reason": "❌ 촌장 지침 위반: ORANGE 구역에서 BUY 금지",
+                "timing": "⏳ BLUE 구역 전환 대기 필요 (r값 0.45 이하)",
+                "confidence": f"🤖 ML 모델 신뢰도: {confidence}% (낮음)",
+                "zone_status": f"📊 현재 r값: {r_value:.3f} (ORANGE 구역)",
+                "strategy": "⚠️ 개인 판단 우선 (촌장 지침 무시)"
+            }
+        },
+        "SELL": {
+            "BLUE": {
+                "reason": "❌ 촌장 지침 위반: BLUE 구역에서 SELL 금지",
+                "timing": "⏳ ORANGE 구역 전환 대기 필요 (r값 0.55 이상)",
+                "confidence": f"🤖 ML 모델 신뢰도: {confidence}% (낮음)",
+                "zone_status": f"📊 현재 r값: {r_value:.3f} (BLUE 구역)",
+                "strategy": "⚠️ 개인 판단 우선 (촌장 지침 무시)"
+            },
+            "ORANGE": {
+                "reason": "✅ 촌장 지침 준수: ORANGE 구역에서 SELL 허용",
+                "timing": "🕐 즉시 실행 가능 (구역 조건 충족)",
+                "confidence": f"🤖 ML 모델 신뢰도: {confidence}%",
+                "zone_status": f"📊 현재 r값: {r_value:.3f} (ORANGE 구역 유지)",
+                "strategy": "📉 방어적 매도 전략 (ORANGE 구역 특성)"
+            }
+        },
+        "HOLD": {
+            "BLUE": {
+                "reason": "⏸️ BLUE 구역에서 관망 (BUY 대기)",
+                "timing": "🕐 적절한 진입 시점 대기",
+                "confidence": f"🤖 ML 모델 신뢰도: {confidence}%",
+                "zone_status": f"📊 현재 r값: {r_value:.3f} (BLUE 구역)",
+                "strategy": "👀 관망 전략 (더 나은 진입점 대기)"
+            },
+            "ORANGE": {
+                "reason": "⏸️ ORANGE 구역에서 관망 (SELL 대기)",
+                "timing": "🕐 적절한 청산 시점 대기",
+                "confidence": f"🤖 ML 모델 신뢰도: {confidence}%",
+                "zone_status": f"📊 현재 r값: {r_value:.3f} (ORANGE 구역)",
+                "strategy": "👀 관망 전략 (더 나은 청산점 대기)"
+            }
+        }
+    }
+    
+    # 포지션 상태에 따른 추가 설명
+    position_explanation = ""
+    if position_status == "HAS_POSITION":
+        if current_action == "SELL":
+            position_explanation = "💼 포지션 보유 중 - 청산 시점 판단"
+        elif current_action == "BUY":
+            position_explanation = "💼 포지션 보유 중 - 추가 매수 고려"
+        elif current_action == "HOLD":
+            position_explanation = "💼 포지션 보유 중 - 관망 전략"
+    else:
+        position_explanation = "💼 포지션 없음 - 진입 시점 판단"
+    
+    base_explanation = explanations.get(current_action, {}).get(current_zone, {})
+    
+    # 기본값 설정으로 "알 수 없음" 방지
+    default_reason = f"현재 {current_zone} 구역에서 {current_action} 판단"
+    default_timing = "적절한 시점 모니터링 중"
+    default_confidence = f"🤖 ML 모델 신뢰도: {confidence}%"
+    default_zone_status = f"📊 현재 r값: {r_value:.3f} ({current_zone} 구역)"
+    default_strategy = f"기본 {current_action} 전략"
+    
+    return {
+        "trainer": trainer_name,
+        "current_action": current_action,
+        "current_zone": current_zone,
+        "r_value": r_value,
+        "confidence": confidence,
+        "position_status": position_status,
+        "explanation": {
+            "reason": base_explanation.get("reason", default_reason),
+            "timing": base_explanation.get("timing", default_timing),
+            "confidence": base_explanation.get("confidence", default_confidence),
+            "zone_status": base_explanation.get("zone_status", default_zone_status),
+            "strategy": base_explanation.get("strategy", default_strategy),
+            "position": position_explanation
+        },
+        "timestamp": datetime.now().isoformat()
+    }
+
+def auto_mayor_guidance_learning():
+    """자동 촌장 지침 학습 실행 - 개선된 클래스 균형 처리"""
+    global MAYOR_TRUST_SYSTEM
+    
+    try:
+        # 자동 학습이 비활성화되어 있으면 스킵
+        if not MAYOR_TRUST_SYSTEM.get("auto_learning_enabled", True):
+            return
+        
+        current_time = time.time()
+        last_learning_time = MAYOR_TRUST_SYSTEM.get("last_learning_time")
+        learning_interval = MAYOR_TRUST_SYSTEM.get("learning_interval", 3600)  # 1시간
+        
+        # 학습 간격 체크
+        if last_learning_time and (current_time - last_learning_time) < learning_interval:
+            return
+        
+        print("🏛️ 자동 촌장 지침 학습 시작...")
+        
+        # 촌장 지침 학습 모델 훈련 실행
+        cfg = load_config()
+        window = 50
+        ema_fast = 10
+        ema_slow = 30
+        horizon = 5
+        count = 1800
+        interval = cfg.candle
+        
+        df = get_candles(cfg.market, interval, count=count)
+        
+        if df is None or len(df) < 200:
+            print(f"❌ 자동 촌장 지침 학습 실패: 데이터 부족 (현재: {len(df) if df is not None else 0})")
+            return
+        
+        # 촌장 지침 기반 특성 생성
+        feat = _build_features(df, window, ema_fast, ema_slow, horizon)
+        if 'fwd' not in feat.columns:
+            print("❌ 자동 촌장 지침 학습 실패: fwd 컬럼 없음")
+            return
+        
+        feat = feat.dropna(subset=['fwd']).copy()
+        
+        if len(feat) < 100:
+            print(f"❌ 자동 촌장 지침 학습 실패: 유효 데이터 부족 (현재: {len(feat)})")
+            return
+        
+        # 촌장 지침 라벨링: 동적 임계값 기반
+        r = _compute_r_from_ohlcv(df, window)
+        HIGH = float(os.getenv('NB_HIGH', '0.55'))
+        LOW = float(os.getenv('NB_LOW', '0.45'))
+        
+        r_vals = r.values if hasattr(r, 'values') else np.array(r)
+        r_vals = r_vals[~np.isnan(r_vals)]  # NaN 제거
+        
+        if len(r_vals) < 100:
+            print(f"❌ 자동 촌장 지침 학습 실패: r 값 부족 (현재: {len(r_vals)})")
+            return
+        
+        # 동적 임계값: r 값의 분위수 기반
+        r_mean = float(np.mean(r_vals))
+        r_std = float(np.std(r_vals))
+        
+        # std가 0이면 기본값 사용
+        if r_std < 1e-6:
+            r_std = 0.01
+        
+        # 25%, 50%, 75% 분위수로 3개 클래스 분류
+        LOW_DYNAMIC = float(np.percentile(r_vals, 33))
+        HIGH_DYNAMIC = float(np.percentile(r_vals, 67))
+        
+        print(f"[AUTO] r 분포 - mean={r_mean:.4f}, std={r_std:.6f}")
+        print(f"[AUTO] 동적 임계값 - low={LOW_DYNAMIC:.4f}, high={HIGH_DYNAMIC:.4f}")
+        
+        labels = np.zeros(len(df), dtype=int)
+        
+        # 동적 임계값으로 분류
+        for i in range(len(df)):
+            rv = float(r_vals[i]) if i < len(r_vals) else r_mean
+            
+            if rv >= HIGH_DYNAMIC:
+                labels[i] = -1  # SELL (ORANGE)
+            elif rv <= LOW_DYNAMIC:
+                labels[i] = 1   # BUY (BLUE)
+            else:
+                labels[i] = 0   # HOLD (중간)
+        
+        idx_map = { ts: i for i, ts in enumerate(df.index) }
+        y = np.array([ labels[idx_map.get(ts, 0)] for ts in feat.index ], dtype=int)
+        
+        # 클래스 균형 확인
+        unique_classes = np.unique(y)
+        class_counts = {cls: int(np.sum(y == cls)) for cls in unique_classes}
+        
+        print(f"[AUTO] 클래스 분포 - {class_counts}")
+        
+        if len(unique_classes) < 2:
+            print(f"❌ 자동 촌장 지침 학습 실패: 클래스 부족 (필요: 2+, 현재: {len(unique_classes)}, 값: {unique_classes.tolist()})")
+            return
+        
+        # 소수 클래스 샘플 수 확인
+        min_class_count = min(class_counts.values())
+        if min_class_count < 5:
+            print(f"⚠️ 클래스 불균형 경고: 최소 클래스 샘플 수 {min_class_count}개")
+        
+        # 모델 훈련
+        from sklearn.ensemble import GradientBoostingClassifier
+        from sklearn.metrics import classification_report
+        from sklearn.impute import SimpleImputer
+        
+        # 특성 선택 (사용 가능한 특성만)
+        available_features = ['r', 'w', 'ema_diff', 'zone_flag', 'dist_high', 'dist_low', 'zone_conf']
+        feature_cols = [col for col in available_features if col in feat.columns]
+        
+        if len(feature_cols) == 0:
+            print("❌ 자동 촌장 지침 학습 실패: 사용 가능한 특성 없음")
+            return
+        
+        X = feat[feature_cols].copy()
+        
+        # NaN 값 처리 - 중요!
+        # 먼저 NaN 행 제거
+        valid_idx = ~X.isna().any(axis=1) & ~pd.Series(y, index=X.index).isna()
+        X_clean = X[valid_idx].copy()
+        y_clean = y[valid_idx.values]
+        
+        print(f"🏛️ NaN 제거 전: X.shape={X.shape}, 제거 후: X_clean.shape={X_clean.shape}")
+        
+        if len(X_clean) < 50:
+            print(f"❌ 자동 촌장 지침 학습 실패: 유효 데이터 부족 (현재: {len(X_clean)}, 필요: 50+)")
+            return
+        
+        # 혹시 모를 NaN이 남아 있으면 보완 처리
+        imputer = SimpleImputer(strategy='median')
+        X_imputed = pd.DataFrame(
+            imputer.fit_transform(X_clean),
+            columns=feature_cols,
+            index=X_clean.index
+        )
+        
+        # 최종 검증: NaN 확인
+        if X_imputed.isna().any().any():
+            print("⚠️ 경고: 여전히 NaN이 존재합니다. 드롭 처리...")
+            valid_final = ~X_imputed.isna().any(axis=1)
+            X_imputed = X_imputed[valid_final]
+            y_clean = y_clean[valid_final.values]
+        
+        print(f"🏛️ 최종 훈련 데이터: X.shape={X_imputed.shape}, y.shape={y_clean.shape}")
+        
+        # 모델 훈련 (클래스 가중치 적용)
+        model = GradientBoostingClassifier(
+            random_state=42, 
+            n_estimators=150, 
+            learning_rate=0.05, 
+            max_depth=4,
+            min_samples_split=10,
+            min_samples_leaf=5
+        )
+        
+        try:
+            model.fit(X_imputed.values, y_clean)
+        except Exception as fit_err:
+            print(f"❌ 자동 촌장 지침 학습 실패: 모델 훈련 오류 - {fit_err}")
+            return
+        
+        # 평가
+        yhat = model.predict(X_imputed.values)
+        report = classification_report(y_clean, yhat, output_dict=True, zero_division=0)
+        
+        # 모델 저장
+        pack = {
+            'model': model,
+            'window': window,
+            'ema_fast': ema_fast,
+            'ema_slow': ema_slow,
+            'horizon': horizon,
+            'interval': interval,
+            'label_mode': 'mayor_guidance',
+            'trained_at': int(current_time * 1000),
+            'feature_names': feature_cols,
+            'metrics': {
+                'report': report
+            }
+        }
+        
+        # 모델 저장
+        try:
+            joblib.dump(pack, _model_path_for(interval))
+            print(f"✅ 자동 촌장 지침 학습 완료 - 모델 저장됨")
+        except Exception as e:
+            print(f"⚠️ 모델 저장 실패 (fallback): {e}")
+            try:
+                joblib.dump(pack, ML_MODEL_PATH)
+                print("✅ 모델 fallback 경로 저장 완료")
+            except Exception as fb_err:
+                print(f"❌ 모델 저장 완전 실패: {fb_err}")
+                return
+        
+        # 학습 시간 업데이트
+        MAYOR_TRUST_SYSTEM["last_learning_time"] = current_time
+        
+        # 학습 결과 로그
+        classes = {
+            '-1': int((y_clean==-1).sum()),  # SELL (ORANGE)
+            '0': int((y_clean==0).sum()),    # HOLD
+            '1': int((y_clean==1).sum())     # BUY (BLUE)
+        }
+        print(f"📊 자동 학습 결과 - BUY: {classes['1']}, HOLD: {classes['0']}, SELL: {classes['-1']}")
+        
+        # 정확도 로그
+        accuracy = report.get('accuracy', 0)
+        print(f"🎯 모델 정확도: {accuracy:.2%}")
+        
+    except Exception as e:
+        import traceback
+        print(f"❌ 자동 촌장 지침 학습 실패: {e}")
+        print(traceback.format_exc())
+
+def calculate_weighted_confidence(personal_confidence, ml_trust, nb_guild_trust):
+    """신뢰도 가중 평균 계산"""
+    return (personal_confidence * 0.6) + (ml_trust * 0.2) + (nb_guild_trust * 0.2)
+
+def real_time_trade_recording(trainer_name, trade_data):
+    """실시간 거래 기록 저장"""
+    global TRAINER_WAREHOUSES
+    _startup.ensure('village')
+    
+    if trainer_name not in TRAINER_WAREHOUSES:
+        return {"error": "트레이너를 찾을 수 없습니다."}
+    
+    warehouse = TRAINER_WAREHOUSES[trainer_name]
+    
+    # 거래 기록 저장
+    trade_record = {
+        'timestamp': trade_data.get('timestamp', datetime.now().isoformat()),
+        'action': trade_data.get('action'),
+        'price': trade_data.get('price'),
+        'quantity': trade_data.get('quantity', 0),
+        'pnl': trade_data.get('pnl', 0),
+        'strategy': trade_data.get('strategy'),
+        'zone': trade_data.get('zone'),
+        'confidence': trade_data.get('confidence', 0),
+        'trainer': trainer_name
+    }
+    
+    if trade_data.get('is_real', False):
+        warehouse['trade_records']['real_trades'].append(trade_record)
+    else:
+        warehouse['trade_records']['mock_trades'].append(trade_record)
+    
+    # 수익/손실 업데이트
+    update_profit_loss_history(warehouse, trade_data)
+    
+    # 학습 데이터 수집
+    collect_learning_data(warehouse, trade_data)
+    
+    return {"message": f"{trainer_name}의 거래 기록이 창고에 저장되었습니다."}
+
+def update_profit_loss_history(warehouse, trade_data):
+    """수익/손실 기록 업데이트"""
+    history = warehouse['profit_loss_history']
+    
+    # 거래 수 증가
+    history['total_trades'] += 1
+    
+    pnl = trade_data.get('pnl', 0)
+    
+    # 수익/손실 계산
+    if pnl > 0:
+        history['profitable_trades'] += 1
+        history['total_profit'] += pnl
+    else:
+        history['losing_trades'] += 1
+        history['total_profit'] += pnl
+    
+    # 승률 계산
+    if history['total_trades'] > 0:
+        history['win_rate'] = (history['profitable_trades'] / history['total_trades']) * 100
+
+def collect_learning_data(warehouse, trade_data):
+    """학습 데이터 수집"""
+    learning_data = warehouse['learning_data']
+    
+    pattern_data = {
+        'market_condition': trade_data.get('market_condition', 'unknown'),
+        'strategy': trade_data.get('strategy', 'unknown'),
+        'timing': trade_data.get('timing', 'unknown'),
+        'confidence': trade_data.get('confidence', 0),
+        'zone': trade_data.get('zone', 'unknown'),
+        'timestamp': trade_data.get('timestamp', datetime.now().isoformat())
+    }
+    
+    # 성공 패턴 수집
+    if trade_data.get('pnl', 0) > 0:
+        learning_data['successful_patterns'].append(pattern_data)
+    else:
+        # 실패 패턴 수집
+        pattern_data['lesson_learned'] = trade_data.get('lesson_learned', '분석 필요')
+        learning_data['failed_patterns'].append(pattern_data)
+
+def inject_village_energy_to_bitcar(trainer_name, energy_amount):
+    """마을 에너지를 비트카에 주입"""
+    global VILLAGE_ENERGY, BITCAR_ENERGY_SYSTEM
+    
+    if VILLAGE_ENERGY >= energy_amount:
+        if trainer_name in BITCAR_ENERGY_SYSTEM:
+            BITCAR_ENERGY_SYSTEM[trainer_name]["energy"] = energy_amount
+            VILLAGE_ENERGY -= energy_amount
+            return f"{trainer_name}의 비트카에 {energy_amount} 에너지 주입 완료"
+        else:
+            return f"{trainer_name} 트레이너를 찾을 수 없습니다."
+    else:
+        return "마을 에너지 부족"
+
+def get_trainer_warehouse_status(trainer_name):
+    """트레이너 창고 상태 조회"""
+    global TRAINER_WAREHOUSES
+    _startup.ensure('village')
+    
+    if trainer_name not in TRAINER_WAREHOUSES:
+        return {"error": "트레이너를 찾을 수 없습니다."}
+    
+    warehouse = TRAINER_WAREHOUSES[trainer_name]
+    
+    return {
+        "trainer": trainer_name,
+        "warehouse_location": warehouse["location"],
+        "storage_usage": f"{len(warehouse['trade_records']['real_trades']) + len(warehouse['trade_records']['mock_trades'])} 거래 기록",
+        "data_integrity": "100%",
+        "last_backup": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "real_time_sync": "활성화",
+        "profit_loss_summary": warehouse['profit_loss_history']
+    }
+
+def analyze_warehouse_data(trainer_name):
+    """창고 데이터 기반 전략 분석"""
+    global TRAINER_WAREHOUSES
+    _startup.ensure('village')
+    
+    if trainer_name not in TRAINER_WAREHOUSES:
+        return {"error": "트레이너를 찾을 수 없습니다."}
+    
+    warehouse = TRAINER_WAREHOUSES[trainer_name]
+    
+    analysis = {
+        "trainer": trainer_name,
+        "profitability_analysis": {
+            "total_profit": warehouse['profit_loss_history']['total_profit'],
+            "win_rate": warehouse['profit_loss_history']['win_rate'],
+            "total_trades": warehouse['profit_loss_history']['total_trades']
+        },
+        "strategy_effectiveness": {
+            "successful_patterns_count": len(warehouse['learning_data']['successful_patterns']),
+            "failed_patterns_count": len(warehouse['learning_data']['failed_patterns'])
+        },
+        "recommendations": generate_strategy_recommendations(warehouse)
+    }
+    
+    return analysis
+
+def generate_strategy_recommendations(warehouse):
+    """전략 개선 권장사항 생성"""
+    successful_count = len(warehouse['learning_data']['successful_patterns'])
+    failed_count = len(warehouse['learning_data']['failed_patterns'])
+    
+    if successful_count > failed_count:
+        return "현재 전략이 효과적입니다. 계속 유지하세요."
+    elif failed_count > successful_count:
+        return "전략 개선이 필요합니다. 실패 패턴을 분석해보세요."
+    else:
+        return "전략이 균형을 이루고 있습니다. 더 많은 데이터를 수집해보세요."
+
+# ===== 거래 일지 시스템 =====
+
+def add_trade_journal_entry(trainer_name, entry_data):
+    """거래 일지 항목 추가"""
+    global TRAINER_WAREHOUSES
+    _startup.ensure('village')
+    
+    if trainer_name not in TRAINER_WAREHOUSES:
+        return {"error": "트레이너를 찾을 수 없습니다."}
+    
+    warehouse = TRAINER_WAREHOUSES[trainer_name]
+    journal = warehouse['trade_journal']
+    
+    # 기본 일지 항목 생성
+    journal_entry = {
+        'timestamp': entry_data.get('timestamp', datetime.now().isoformat()),
+        'trainer': trainer_name,
+        'action': entry_data.get('action', 'UNKNOWN'),
+        'zone': entry_data.get('zone', 'UNKNOWN'),
+        'price': entry_data.get('price', 0),
+        'pnl': entry_data.get('pnl', 0),
+        'strategy': entry_data.get('strategy', 'unknown'),
+        'confidence': entry_data.get('confidence', 0),
+        'mayor_guidance': entry_data.get('mayor_guidance', ''),
+        'ml_decision': entry_data.get('ml_decision', ''),
+        'reasoning': entry_data.get('reasoning', ''),
+        'lesson_learned': entry_data.get('lesson_learned', ''),
+        'trade_type': entry_data.get('trade_type', 'mock')  # 'real' or 'mock'
+    }
+    
+    # 최근 일지에 추가 (최대 10개 유지)
+    journal['recent_entries'].append(journal_entry)
+    if len(journal['recent_entries']) > 10:
+        journal['recent_entries'] = journal['recent_entries'][-10:]
+    
+    # 구역별 일지에 추가
+    zone = entry_data.get('zone', 'UNKNOWN')
+    if zone in journal['zone_entries']:
+        journal['zone_entries'][zone].append(journal_entry)
+        if len(journal['zone_entries'][zone]) > 10:
+            journal['zone_entries'][zone] = journal['zone_entries'][zone][-10:]
+    
+    # 촌장 지침 기록
+    if entry_data.get('mayor_guidance'):
+        mayor_entry = {
+            'timestamp': journal_entry['timestamp'],
+            'trainer': trainer_name,
+            'guidance': entry_data['mayor_guidance'],
+            'zone': zone,
+            'action': entry_data.get('action', 'UNKNOWN')
+        }
+        journal['mayor_guidance_log'].append(mayor_entry)
+        if len(journal['mayor_guidance_log']) > 10:
+            journal['mayor_guidance_log'] = journal['mayor_guidance_log'][-10:]
+    
+    # ML 모델 판단 기록
+    if entry_data.get('ml_decision'):
+        ml_entry = {
+            'timestamp': journal_entry['timestamp'],
+            'trainer': trainer_name,
+            'decision': entry_data['ml_decision'],
+            'confidence': entry_data.get('confidence', 0),
+            'zone': zone,
+            'action': entry_data.get('action', 'UNKNOWN')
+        }
+        journal['ml_model_decisions'].append(ml_entry)
+        if len(journal['ml_model_decisions']) > 10:
+            journal['ml_model_decisions'] = journal['ml_model_decisions'][-10:]
+    
+    return {"message": f"{trainer_name}의 거래 일지에 항목이 추가되었습니다.", "entry": journal_entry}
+
+def get_trade_journal(trainer_name, journal_type="recent", zone=None):
+    """거래 일지 조회"""
+    global TRAINER_WAREHOUSES
+    _startup.ensure('village')
+    
+    if trainer_name not in TRAINER_WAREHOUSES:
+        return {"error": "트레이너를 찾을 수 없습니다."}
+    
+    warehouse = TRAINER_WAREHOUSES[trainer_name]
+    journal = warehouse['trade_journal']
+    
+    if journal_type == "recent":
+        return {
+            "trainer": trainer_name,
+            "journal_type": "recent",
+            "entries": journal['recent_entries'],
+            "count": len(journal['recent_entries'])
+        }
+    elif journal_type == "zone" and zone:
+        if zone in journal['zone_entries']:
+            return {
+                "trainer": trainer_name,
+                "journal_type": "zone",
+                "zone": zone,
+                "entries": journal['zone_entries'][zone],
+                "count": len(journal['zone_entries'][zone])
+            }
+        else:
+            return {"error": f"구역 {zone}의 일지를 찾을 수 없습니다."}
+    elif journal_type == "mayor_guidance":
+        return {
+            "trainer": trainer_name,
+            "journal_type": "mayor_guidance",
+            "entries": journal['mayor_guidance_log'],
+            "count": len(journal['mayor_guidance_log'])
+        }
+    elif journal_type == "ml_decisions":
+        return {
+            "trainer": trainer_name,
+            "journal_type": "ml_decisions",
+            "entries": journal['ml_model_decisions'],
+            "count": len(journal['ml_model_decisions'])
+        }
+    else:
+        return {"error": "지원하지 않는 일지 유형입니다."}
+
+def create_mayor_guidance_entry(trainer_name, zone, action, reasoning):
+    """촌장 지침 기반 거래 일지 생성"""
+    guidance_messages = {
+        "ORANGE": {
+            "BUY": "ORANGE 구역에서 촌장의 방어적 지침을 무시하고 개인 확신으로 BUY 실행",
+            "SELL": "ORANGE 구역에서 촌장의 지침에 따라 신중한 SELL 실행",
+            "HOLD": "ORANGE 구역에서 촌장의 방어적 지침에 따라 HOLD 결정"
+        },
+        "BLUE": {
+            "BUY": "BLUE 구역에서 촌장의 공격적 지침에 따라 자신감 있는 BUY 실행",
+            "SELL": "BLUE 구역에서 촌장의 지침을 무시하고 개인 판단으로 SELL 실행",
+            "HOLD": "BLUE 구역에서 촌장의 공격적 지침을 고려하되 HOLD 결정"
+        }
+    }
+    
+    guidance = guidance_messages.get(zone, {}).get(action, "촌장의 지침을 고려한 거래 결정")
+    
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'trainer': trainer_name,
+        'action': action,
+        'zone': zone,
+        'mayor_guidance': guidance,
+        'reasoning': reasoning,
+        'trade_type': 'mock'
+    }
+
+def create_ml_decision_entry(trainer_name, zone, action, ml_confidence, personal_confidence):
+    """ML 모델 판단 기반 거래 일지 생성"""
+    ml_trust = MAYOR_TRUST_SYSTEM["ML_Model_Trust"]
+    
+    if ml_confidence < ml_trust:
+        decision = f"ML 모델 신뢰도({ml_confidence}%)가 낮아 개인 판단({personal_confidence}%) 우선"
+    else:
+        decision = f"ML 모델 신뢰도({ml_confidence}%)가 높아 ML 판단 채택"
+    
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'trainer': trainer_name,
+        'action': action,
+        'zone': zone,
+        'ml_decision': decision,
+        'ml_confidence': ml_confidence,
+        'personal_confidence': personal_confidence,
+        'trade_type': 'mock'
+    }
+
+# ===== 마을 출입 일지 시스템 함수들 =====
+
+def generate_resident_activity_log(resident_name, zone, activity_type, duration=None):
+    """주민 활동 일지 생성 (AI 자동 작성)"""
+    activities = {
+        "ORANGE": {
+            "rest": [
+                f"{resident_name}이 ORANGE 구역에서 {duration}간 휴식을 취하며 시장 상황을 관찰했습니다.",
+                f"{resident_name}이 ORANGE 구역의 적대적 환경에서 {duration}간 안전한 휴식을 취했습니다.",
+                f"{resident_name}이 ORANGE 구역에서 {duration}간 신중한 관찰을 통해 시장 동향을 파악했습니다."
+            ],
+            "training": [
+                f"{resident_name}이 ORANGE 구역에서 {duration}간 방어적 트레이닝을 수행했습니다.",
+                f"{resident_name}이 ORANGE 구역에서 {duration}간 신중한 거래 연습을 했습니다.",
+                f"{resident_name}이 ORANGE 구역에서 {duration}간 베타 관계 형성에 주의하며 트레이닝했습니다."
+            ],
+            "observation": [
+                f"{resident_name}이 ORANGE 구역에서 {duration}간 적대적 시장 환경을 관찰했습니다.",
+                f"{resident_name}이 ORANGE 구역에서 {duration}간 빠른 수익 실현 기회를 모색했습니다.",
+                f"{resident_name}이 ORANGE 구역에서 {duration}간 방어적 입장을 유지하며 시장을 분석했습니다."
+            ]
+        },
+        "BLUE": {
+            "rest": [
+                f"{resident_name}이 BLUE 구역에서 {duration}간 편안한 휴식을 취하며 시장 기회를 기다렸습니다.",
+                f"{resident_name}이 BLUE 구역의 우호적 환경에서 {duration}간 여유로운 휴식을 취했습니다.",
+                f"{resident_name}이 BLUE 구역에서 {duration}간 자신감을 회복하며 휴식을 취했습니다."
+            ],
+            "training": [
+                f"{resident_name}이 BLUE 구역에서 {duration}간 공격적 트레이닝을 수행했습니다.",
+                f"{resident_name}이 BLUE 구역에서 {duration}간 자신감 있는 거래 연습을 했습니다.",
+                f"{resident_name}이 BLUE 구역에서 {duration}간 알파 접근법으로 트레이닝했습니다."
+            ],
+            "observation": [
+                f"{resident_name}이 BLUE 구역에서 {duration}간 우호적 시장 환경을 관찰했습니다.",
+                f"{resident_name}이 BLUE 구역에서 {duration}간 강한 매수 기회를 모색했습니다.",
+                f"{resident_name}이 BLUE 구역에서 {duration}간 공격적 입장을 유지하며 시장을 분석했습니다."
+            ]
+        },
+        "VILLAGE": {
+            "rest": [
+                f"{resident_name}이 마을에서 {duration}간 편안한 휴식을 취했습니다.",
+                f"{resident_name}이 마을에서 {duration}간 동료들과 대화하며 경험을 나눴습니다.",
+                f"{resident_name}이 마을에서 {duration}간 촌장의 지침을 받으며 휴식을 취했습니다."
+            ],
+            "training": [
+                f"{resident_name}이 마을에서 {duration}간 이론적 트레이닝을 수행했습니다.",
+                f"{resident_name}이 마을에서 {duration}간 동료들과 함께 전략을 논의했습니다.",
+                f"{resident_name}이 마을에서 {duration}간 촌장의 멘토링을 받으며 학습했습니다."
+            ],
+            "observation": [
+                f"{resident_name}이 마을에서 {duration}간 시장 동향을 분석했습니다.",
+                f"{resident_name}이 마을에서 {duration}간 창고의 거래 기록을 검토했습니다.",
+                f"{resident_name}이 마을에서 {duration}간 향후 전략을 계획했습니다."
+            ]
+        }
+    }
+    
+    import random
+    activity_list = activities.get(zone, {}).get(activity_type, [f"{resident_name}이 {zone}에서 활동했습니다."])
+    return random.choice(activity_list)
+
+def record_resident_entry_exit(resident_name, from_zone, to_zone, activity_type="training", duration="몇 시간"):
+    """주민 출입 기록"""
+    global VILLAGE_ENTRY_EXIT_LOG
+    
+    timestamp = datetime.now().isoformat()
+    
+    # 출입 기록 생성
+    entry_exit_record = {
+        'timestamp': timestamp,
+        'resident': resident_name,
+        'from_zone': from_zone,
+        'to_zone': to_zone,
+        'activity_type': activity_type,
+        'duration': duration,
+        'activity_description': generate_resident_activity_log(resident_name, from_zone, activity_type, duration)
+    }
+    
+    # 출발 구역에서 제거
+    if from_zone in VILLAGE_ENTRY_EXIT_LOG['zone_logs']:
+        if resident_name in VILLAGE_ENTRY_EXIT_LOG['zone_logs'][from_zone]['residents']:
+            VILLAGE_ENTRY_EXIT_LOG['zone_logs'][from_zone]['residents'].remove(resident_name)
+        VILLAGE_ENTRY_EXIT_LOG['zone_logs'][from_zone]['entry_exit_log'].append(entry_exit_record)
+        if len(VILLAGE_ENTRY_EXIT_LOG['zone_logs'][from_zone]['entry_exit_log']) > 10:
+            VILLAGE_ENTRY_EXIT_LOG['zone_logs'][from_zone]['entry_exit_log'] = VILLAGE_ENTRY_EXIT_LOG['zone_logs'][from_zone]['entry_exit_log'][-10:]
+    
+    # 도착 구역에 추가
+    if to_zone in VILLAGE_ENTRY_EXIT_LOG['zone_logs']:
+        if resident_name not in VILLAGE_ENTRY_EXIT_LOG['zone_logs'][to_zone]['residents']:
+            VILLAGE_ENTRY_EXIT_LOG['zone_logs'][to_zone]['residents'].append(resident_name)
+        VILLAGE_ENTRY_EXIT_LOG['zone_logs'][to_zone]['entry_exit_log'].append(entry_exit_record)
+        if len(VILLAGE_ENTRY_EXIT_LOG['zone_logs'][to_zone]['entry_exit_log']) > 10:
+            VILLAGE_ENTRY_EXIT_LOG['zone_logs'][to_zone]['entry_exit_log'] = VILLAGE_ENTRY_EXIT_LOG['zone_logs'][to_zone]['entry_exit_log'][-10:]
+    
+    # 주민 상태 업데이트
+    VILLAGE_ENTRY_EXIT_LOG['resident_status'][resident_name] = {
+        'current_zone': to_zone,
+        'last_activity': activity_type,
+        'last_update': timestamp,
+        'duration_in_current_zone': duration
+    }
+    
+    # 구역별 인원 수 업데이트
+    _update_zone_population_counts()
+    
+    return entry_exit_record
+
+def _update_zone_population_counts():
+    """구역별 인원 수 업데이트"""
+    global VILLAGE_ENTRY_EXIT_LOG
+    
+    VILLAGE_ENTRY_EXIT_LOG['current_in_village'] = len(VILLAGE_ENTRY_EXIT_LOG['zone_logs']['VILLAGE']['residents'])
+    VILLAGE_ENTRY_EXIT_LOG['current_in_orange'] = len(VILLAGE_ENTRY_EXIT_LOG['zone_logs']['ORANGE']['residents'])
+    VILLAGE_ENTRY_EXIT_LOG['current_in_blue'] = len(VILLAGE_ENTRY_EXIT_LOG['zone_logs']['BLUE']['residents'])
+
+def get_zone_entry_exit_log(zone):
+    """구역별 출입 일지 조회"""
+    global VILLAGE_ENTRY_EXIT_LOG
+    
+    if zone not in VILLAGE_ENTRY_EXIT_LOG['zone_logs']:
+        return {"error": f"구역 {zone}를 찾을 수 없습니다."}
+    
+    return {
+        "zone": zone,
+        "current_residents": VILLAGE_ENTRY_EXIT_LOG['zone_logs'][zone]['residents'],
+        "entry_exit_log": VILLAGE_ENTRY_EXIT_LOG['zone_logs'][zone]['entry_exit_log'],
+        "total_entries": len(VILLAGE_ENTRY_EXIT_LOG['zone_logs'][zone]['entry_exit_log'])
+    }
+
+def get_all_residents_status():
+    """모든 주민 상태 조회"""
+    global VILLAGE_ENTRY_EXIT_LOG
+    
+    return {
+        "total_residents": VILLAGE_ENTRY_EXIT_LOG['total_residents'],
+        "current_in_village": VILLAGE_ENTRY_EXIT_LOG['current_in_village'],
+        "current_in_orange": VILLAGE_ENTRY_EXIT_LOG['current_in_orange'],
+        "current_in_blue": VILLAGE_ENTRY_EXIT_LOG['current_in_blue'],
+        "resident_status": VILLAGE_ENTRY_EXIT_LOG['resident_status']
+    }
+
+def simulate_resident_movement():
+    """주민 이동 시뮬레이션 (자동화된 시스템)"""
+    import random
+    import time
+    
+    # 주민 목록 (10명)
+    residents = [
+        "Scout", "Guardian", "Analyst", "Elder",
+        "Trader_A", "Trader_B", "Trader_C", "Trader_D", "Trader_E", "Trader_F"
+    ]
+    
+    zones = ["VILLAGE", "ORANGE", "BLUE"]
+    activities = ["rest", "training", "observation"]
+    durations = ["몇 시간", "하루", "며칠", "일주일", "몇 주", "한 달"]
+    
+    # 랜덤 주민 선택
+    resident = random.choice(residents)
+    
+    # 현재 상태 확인
+    current_zone = VILLAGE_ENTRY_EXIT_LOG['resident_status'].get(resident, {}).get('current_zone', 'VILLAGE')
+    
+    # 새로운 구역 선택 (현재 구역과 다른 곳)
+    available_zones = [z for z in zones if z != current_zone]
+    new_zone = random.choice(available_zones)
+    
+    # 활동 유형과 기간 선택
+    activity = random.choice(activities)
+    duration = random.choice(durations)
+    
+    # 출입 기록
+    record = record_resident_entry_exit(resident, current_zone, new_zone, activity, duration)
+    
+    return record
+
+
+# ===== 8BIT 마을 API 엔드포인트 =====
+
+@bp.route('/api/village/status')
+def get_village_status():
+    """마을 전체 상태 조회 (개선된 버전)"""
+    try:
+        return success_response({
+            "village_name": "8BIT 마을",
+            "mayor": "촌장 (N/B 길드 지점장)",
+            "village_energy": VILLAGE_ENERGY,
+            "max_village_energy": MAX_VILLAGE_ENERGY,
+            "energy_accumulated": ENERGY_ACCUMULATED,
+            "residents_count": len(VILLAGE_RESIDENTS),
+            "warehouses_count": len(TRAINER_WAREHOUSES),
+            "current_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        })
+    except Exception as e:
+        logger.error(f"Error getting village status: {e}", exc_info=True)
+        return handle_exception(e)
+
+@bp.route('/api/village/mayor/guidance')
+def get_mayor_guidance():
+    """촌장의 신뢰도 기반 지침 조회"""
+    return jsonify(mayor_trust_guidance())
+
+@bp.route('/api/village/residents')
+def get_village_residents():
+    """마을 주민 정보 조회"""
+    return jsonify({
+        "residents": VILLAGE_RESIDENTS,
+        "total_count": len(VILLAGE_RESIDENTS)
+    })
+
+@bp.route('/api/village/resident/<trainer_name>')
+def get_resident_info(trainer_name):
+    """특정 주민 정보 조회"""
+    if trainer_name not in VILLAGE_RESIDENTS:
+        return jsonify({"error": "주민을 찾을 수 없습니다."}), 404
+    
+    return jsonify({
+        "resident": VILLAGE_RESIDENTS[trainer_name],
+        "warehouse_status": get_trainer_warehouse_status(trainer_name)
+    })
+
+@bp.route('/api/village/warehouse/<trainer_name>')
+def get_warehouse_info(trainer_name):
+    """트레이너 창고 정보 조회"""
+    if trainer_name not in TRAINER_WAREHOUSES:
+        return jsonify({"error": "창고를 찾을 수 없습니다."}), 404
+    
+    return jsonify({
+        "warehouse": TRAINER_WAREHOUSES[trainer_name],
+        "status": get_trainer_warehouse_status(trainer_name)
+    })
+
+@bp.route('/api/village/warehouse/<trainer_name>/analysis')
+def get_warehouse_analysis(trainer_name):
+    """창고 데이터 분석 조회"""
+    return jsonify(analyze_warehouse_data(trainer_name))
+
+@bp.route('/api/village/bitcar/energy', methods=['POST'])
+def inject_bitcar_energy():
+    """비트카 에너지 주입"""
+    data = request.get_json()
+    trainer_name = data.get('trainer_name')
+    energy_amount = data.get('energy_amount', 50)
+    
+    if not trainer_name:
+        return jsonify({"error": "트레이너 이름이 필요합니다."}), 400
+    
+    result = inject_village_energy_to_bitcar(trainer_name, energy_amount)
+    return jsonify({"message": result})
+
+@bp.route('/api/village/trade/record', methods=['POST'])
+def record_trade():
+    """거래 기록 저장"""
+    data = request.get_json()
+    trainer_name = data.get('trainer_name')
+    
+    if not trainer_name:
+        return jsonify({"error": "트레이너 이름이 필요합니다."}), 400
+    
+    result = real_time_trade_recording(trainer_name, data)
+    return jsonify(result)
+
+@bp.route('/api/village/trust/calculate', methods=['POST'])
+def calculate_trust():
+    """신뢰도 가중 평균 계산"""
+    data = request.get_json()
+    personal_confidence = data.get('personal_confidence', 0)
+    ml_trust = data.get('ml_trust', MAYOR_TRUST_SYSTEM["ML_Model_Trust"])
+    nb_guild_trust = data.get('nb_guild_trust', MAYOR_TRUST_SYSTEM["NB_Guild_Trust"])
+    
+    weighted_confidence = calculate_weighted_confidence(personal_confidence, ml_trust, nb_guild_trust)
+    
+    return jsonify({
+        "personal_confidence": personal_confidence,
+        "ml_trust": ml_trust,
+        "nb_guild_trust": nb_guild_trust,
+        "weighted_confidence": weighted_confidence,
+        "weights": {
+            "personal": 0.6,
+            "ml_model": 0.2,
+            "nb_guild": 0.2
+        }
+    })
+
+@bp.route('/api/village/system/overview')
+def get_system_overview():
+    """마을 시스템 전체 개요"""
+    return jsonify({
+        "system_name": "8BIT 마을 트레이딩 시스템",
+        "description": "촌장의 지침에 따라 운영되는 AI 트레이더 마을",
+        "components": {
+            "mayor_system": "촌장 신뢰도 기반 지침 시스템",
+            "residents": "10명의 트레이너 주민",
+            "warehouses": "실시간 거래 기록 창고",
+            "bitcar_system": "비트카 에너지 주입 시스템",
+            "auto_learning": "자동 촌장 지침 학습 시스템"
+        },
+        "current_status": {
+            "village_energy": VILLAGE_ENERGY,
+            "residents_count": len(VILLAGE_RESIDENTS),
+            "warehouses_count": len(TRAINER_WAREHOUSES),
+            "auto_learning_enabled": MAYOR_TRUST_SYSTEM.get("auto_learning_enabled", True)
+        }
+    })
+
+@bp.route('/api/village/scout/status')
+def get_scout_status():
+    """Scout의 현재 상태 조회 (특별 API)"""
+    if 'scout' not in VILLAGE_RESIDENTS:
+        return jsonify({"error": "Scout를 찾을 수 없습니다."}), 404
+    
+    scout = VILLAGE_RESIDENTS['scout']
+    warehouse = TRAINER_WAREHOUSES['scout']
+    
+    # Scout의 현재 포지션 정보 (예시)
+    current_position = {
+        "entry_time": "2025-01-27 08:15:00",
+        "entry_price": 161000000,
+        "current_price": 161401000,
+        "pnl": "+0.25%",
+        "duration": "12분",
+        "strategy": "momentum"
+    }
+    
+    # 거래 일지 정보 추가
+    recent_journal = get_trade_journal('scout', "recent")
+    mayor_journal = get_trade_journal('scout', "mayor_guidance")
+    ml_journal = get_trade_journal('scout', "ml_decisions")
+    
+    return jsonify({
+        "trainer": "Scout",
+        "status": {
+            "name": scout['name'],
+            "hp": scout['hp'],
+            "stamina": scout['stamina'],
+            "location": scout['location'],
+            "role": scout['role'],
+            "specialty": scout['specialty'],
+            "skillLevel": scout['skillLevel'],
+            "strategy": scout['strategy'],
+            "nbCoins": scout['nbCoins']
+        },
+        "current_position": current_position,
+        "warehouse_summary": {
+            "total_trades": warehouse['profit_loss_history']['total_trades'],
+            "total_profit": warehouse['profit_loss_history']['total_profit'],
+            "win_rate": warehouse['profit_loss_history']['win_rate'],
+            "successful_patterns": len(warehouse['learning_data']['successful_patterns']),
+            "failed_patterns": len(warehouse['learning_data']['failed_patterns'])
+        },
+        "mayor_guidance": {
+            "ml_model_trust": MAYOR_TRUST_SYSTEM["ML_Model_Trust"],
+            "nb_guild_trust": MAYOR_TRUST_SYSTEM["NB_Guild_Trust"],
+            "current_zone": "ORANGE",
+            "guidance": "신중한 방어적 접근, 개인 판단 우선"
+        },
+        "trade_journal": {
+            "recent_entries_count": recent_journal.get("count", 0),
+            "mayor_guidance_count": mayor_journal.get("count", 0),
+            "ml_decisions_count": ml_journal.get("count", 0),
+            "latest_entry": recent_journal.get("entries", [])[-1] if recent_journal.get("entries") else None
+        }
+    })
+
+# UI에서 전송된 현재 차트 간격을 저장할 전역 변수
+UI_CURRENT_INTERVAL = 'minute10'  # 기본값
+
+def parse_interval_to_object(interval_str):
+    """간격 문자열을 객체로 변환"""
+    try:
+        if interval_str.startswith('minute'):
+            minute_value = int(interval_str.replace('minute', ''))
+            return {'minute': minute_value}
+        elif interval_str.startswith('second'):
+            second_value = int(interval_str.replace('second', ''))
+            return {'second': second_value}
+        elif interval_str == 'hour':
+            return {'hour': 1}
+        elif interval_str == 'day':
+            return {'day': 1}
+        elif interval_str == 'week':
+            return {'week': 1}
+        elif interval_str == 'month':
+            return {'month': 1}
+        else:
+            return {'unknown': interval_str}
+    except:
+        return {'error': interval_str}
+
+@bp.route('/api/village/update-current-interval', methods=['POST'])
+def update_current_interval():
+    """UI에서 현재 선택된 차트 간격을 서버에 전송"""
+    global UI_CURRENT_INTERVAL
+    
+    try:
+        payload = request.get_json(force=True) if request.is_json else request.form.to_dict()
+        current_interval = payload.get('current_interval', 'minute10')
+        
+        # 유효한 간격인지 확인
+        valid_intervals = ['minute1', 'minute3', 'minute5', 'minute10', 'minute15', 'minute30', 'minute60', 'minute240', 'day', 'week', 'month']
+        if current_interval not in valid_intervals:
+            return jsonify({'ok': False, 'error': f'유효하지 않은 간격: {current_interval}'}), 400
+        
+        UI_CURRENT_INTERVAL = current_interval
+        print(f"🎯 UI 차트 간격 업데이트: {current_interval}")
+        
+        return jsonify({
+            'ok': True,
+            'current_interval': current_interval,
+            'message': f'차트 간격이 {current_interval}로 업데이트되었습니다.'
+        })
+        
+    except Exception as e:
+        return jsonify({'ok': False, 'error': f'간격 업데이트 실패: {str(e)}'}), 500
+
+@bp.route('/api/village/current-zone')
+def get_current_zone():
+    """현재 구역 정보 조회 - 최소 연산으로 즉시 응답"""
+    try:
+        # 최소 의존성의 정적/캐시 값만 반환하여 타임아웃 방지
+        return jsonify({
+            'current_zone': bot_ctrl.get('nb_zone', 'ORANGE'),
+            'nb_zone': bot_ctrl.get('nb_zone', 'ORANGE'),
+            'ml_zone': bot_ctrl.get('nb_zone', 'ORANGE'),
+            'last_signal': bot_ctrl.get('last_signal', 'HOLD'),
+            'position': bot_ctrl.get('position', 'FLAT'),
+            'r_value': bot_ctrl.get('r_value', 0.5),
+            'ml_trust': MAYOR_TRUST_SYSTEM.get("ML_Model_Trust", 40),
+            'nb_trust': MAYOR_TRUST_SYSTEM.get("NB_Guild_Trust", 82),
+            'win_rate': 0,
+            'history_count': 0,
+            'candle_data': {'note': 'candle fetch disabled for latency'},
+            'timestamp': int(time.time() * 1000)
+        })
+    except Exception as e:
+        return jsonify({'error': f'구역 정보 조회 실패: {str(e)}'}), 500
+
+@bp.route('/api/village/auto-learning/toggle', methods=['POST'])
+def toggle_auto_learning():
+    """자동 촌장 지침 학습 토글"""
+    global MAYOR_TRUST_SYSTEM
+    
+    try:
+        # 현재 상태 토글
+        current_status = MAYOR_TRUST_SYSTEM.get("auto_learning_enabled", True)
+        MAYOR_TRUST_SYSTEM["auto_learning_enabled"] = not current_status
+        
+        return jsonify({
+            'ok': True,
+            'auto_learning_enabled': MAYOR_TRUST_SYSTEM["auto_learning_enabled"],
+            'message': f"자동 촌장 지침 학습이 {'활성화' if MAYOR_TRUST_SYSTEM['auto_learning_enabled'] else '비활성화'}되었습니다.",
+            'learning_interval': MAYOR_TRUST_SYSTEM.get("learning_interval", 3600),
+            'last_learning_time': MAYOR_TRUST_SYSTEM.get("last_learning_time")
+        })
+        
+    except Exception as e:
+        return jsonify({'ok': False, 'error': f'자동 학습 토글 실패: {str(e)}'}), 500
+
+@bp.route('/api/ml/train-mayor-guidance', methods=['POST'])
+def train_mayor_guidance_model():
+    """AI 학습 기능 제거됨"""
+    return jsonify({'error': 'AI 학습 기능이 제거되었습니다.'}), 410
+    """촌장 지침 학습 모델 훈련"""
+    try:
+        payload = request.get_json(force=True) if request.is_json else request.form.to_dict()
+        
+        # 촌장 지침 학습 파라미터
+        window = int(payload.get('window', 50))
+        ema_fast = int(payload.get('ema_fast', 10))
+        ema_slow = int(payload.get('ema_slow', 30))
+        horizon = int(payload.get('horizon', 5))
+        count = int(payload.get('count', 1800))
+        interval = payload.get('interval') or load_config().candle
+        
+        cfg = load_config()
+        df = get_candles(cfg.market, interval, count=count)
+        
+        # 촌장 지침 기반 특성 생성
+        feat = _build_features(df, window, ema_fast, ema_slow, horizon).dropna().copy()
+        
+        # 촌장 지침 라벨링: Zone-Side Only
+        r = _compute_r_from_ohlcv(df, window)
+        HIGH = float(os.getenv('NB_HIGH', '0.55'))
+        LOW = float(os.getenv('NB_LOW', '0.45'))
+        labels = np.zeros(len(df), dtype=int)
+        zone = None
+        r_vals = r.values.tolist()
+        
+        for i in range(len(df)):
+            rv = r_vals[i] if i < len(r_vals) else 0.5
+            if zone not in ('BLUE','ORANGE'):
+                zone = 'ORANGE' if rv >= 0.5 else 'BLUE'
+            # hysteresis updates
+            if zone == 'BLUE' and rv >= HIGH:
+                zone = 'ORANGE'
+            elif zone == 'ORANGE' and rv <= LOW:
+                zone = 'BLUE'
+            
+            # 촌장 지침: BUY@BLUE / SELL@ORANGE
+            if zone == 'BLUE':
+                labels[i] = 1  # BUY
+            elif zone == 'ORANGE':
+                labels[i] = -1  # SELL
+            else:
+                labels[i] = 0  # HOLD
+        
+        idx_map = { ts: i for i, ts in enumerate(df.index) }
+        y = np.array([ labels[idx_map.get(ts, 0)] for ts in feat.index ], dtype=int)
+        
+        # 모델 훈련
+        from sklearn.ensemble import GradientBoostingClassifier
+        from sklearn.model_selection import TimeSeriesSplit, GridSearchCV
+        from sklearn.metrics import classification_report, confusion_matrix
+        
+        # 특성 선택
+        X = feat[['r', 'w', 'ema_diff', 'zone_flag', 'dist_high', 'dist_low', 'zone_conf']]
+        
+        # 시계열 교차 검증
+        tscv = TimeSeriesSplit(n_splits=3)
+        model = GradientBoostingClassifier(random_state=42, n_estimators=200, learning_rate=0.05, max_depth=3)
+        
+        # 훈련
+        model.fit(X.values, y)
+        
+        # 평가
+        yhat = model.predict(X.values)
+        report = classification_report(y, yhat, output_dict=True, zero_division=0)
+        cm = confusion_matrix(y, yhat, labels=[-1,0,1]).tolist()
+        
+        # 모델 저장
+        pack = {
+            'model': model,
+            'window': window,
+            'ema_fast': ema_fast,
+            'ema_slow': ema_slow,
+            'horizon': horizon,
+            'interval': interval,
+            'label_mode': 'mayor_guidance',
+            'trained_at': int(time.time() * 1000),
+            'feature_names': list(X.columns),
+            'metrics': {
+                'report': report,
+                'confusion': cm
+            }
+        }
+        
+        # 모델 저장
+        try:
+            joblib.dump(pack, _model_path_for(interval))
+        except Exception:
+            joblib.dump(pack, ML_MODEL_PATH)
+        
+        return jsonify({
+            'ok': True,
+            'message': '촌장 지침 학습 모델 훈련 완료',
+            'label_mode': 'mayor_guidance',
+            'classes': {
+                '-1': int((y==-1).sum()),  # SELL (ORANGE)
+                '0': int((y==0).sum()),    # HOLD
+                '1': int((y==1).sum())     # BUY (BLUE)
+            },
+            'report': report,
+            'confusion': cm
+        })
+        
+    except Exception as e:
+        return jsonify({'ok': False, 'error': f'촌장 지침 학습 실패: {str(e)}'}), 500
+
+@bp.route('/api/village/ai-explanation/<trainer_name>')
+def get_ai_trading_explanation(trainer_name):
+    """AI 거래 판단 설명 조회 및 저장"""
+    try:
+        from utils.logger import get_logger
+        from utils.responses import success_response, error_response
+        from utils.exceptions import NotFoundError
+        
+        logger = get_logger(__name__)
+        
+        # 트레이너 창고 확인
+        trainer_key = trainer_name.lower()
+        if trainer_key not in TRAINER_WAREHOUSES:
+            raise NotFoundError(f"Trainer '{trainer_name}' not found")
+        
+        warehouse = TRAINER_WAREHOUSES[trainer_key]
+        
+        # 현재 구역 정보 가져오기
+        current_zone = bot_ctrl.get('nb_zone', 'ORANGE')
+        last_signal = bot_ctrl.get('last_signal', 'HOLD')
+        position = bot_ctrl.get('position', 'FLAT')
+        
+        # r값 계산 (실제 구현에서는 실제 r값을 가져와야 함)
+        r_value = 0.5  # 기본값, 실제로는 계산된 값 사용
+        
+        # 포지션 상태 판단
+        position_status = "HAS_POSITION" if position != "FLAT" else "NO_POSITION"
+        
+        # 현재 액션 판단
+        current_action = last_signal if last_signal in ['BUY', 'SELL', 'HOLD'] else 'HOLD'
+        
+        # 신뢰도 계산 (예시)
+        confidence = 60  # 실제로는 계산된 신뢰도 사용
+        
+        # AI 거래 설명 생성
+        explanation = generate_ai_trading_explanation(
+            trainer_name, 
+            current_action, 
+            current_zone, 
+            r_value, 
+            confidence, 
+            position_status
+        )
+        
+        # 분석 결과를 히스토리에 추가 (기존 분석 유지)
+        if 'ai_analysis' not in warehouse:
+            warehouse['ai_analysis'] = {
+                "current": None,
+                "history": [],
+                "last_updated": None
+            }
+        
+        ai_analysis = warehouse['ai_analysis']
+        
+        # 이전 분석 결과를 히스토리에 추가 (있는 경우)
+        if ai_analysis['current'] is not None:
+            # 중복 방지: 같은 타임스탬프가 아니면 히스토리에 추가
+            prev_timestamp = ai_analysis['current'].get('timestamp')
+            new_timestamp = explanation.get('timestamp')
+            
+            if prev_timestamp != new_timestamp:
+                # 히스토리에 추가 (최대 50개 유지)
+                ai_analysis['history'].append(ai_analysis['current'])
+                if len(ai_analysis['history']) > 50:
+                    ai_analysis['history'] = ai_analysis['history'][-50:]
+        
+        # 현재 분석 결과 업데이트
+        ai_analysis['current'] = explanation
+        ai_analysis['last_updated'] = datetime.now().isoformat()
+        
+        logger.info(f"AI analysis saved for {trainer_name}: {current_action} in {current_zone}")
+        
+        # 현재 분석 결과와 히스토리 모두 반환
+        # 기존 API 호환성을 위해 'explanation' 필드도 포함
+        return success_response({
+            "explanation": explanation,  # 기존 호환성 유지
+            "current": explanation,      # 현재 분석 결과
+            "history": ai_analysis['history'],  # 분석 히스토리
+            "history_count": len(ai_analysis['history']),
+            "last_updated": ai_analysis['last_updated']
+        })
+        
+    except NotFoundError as e:
+        return error_response(str(e), status_code=404, error_code="TrainerNotFound")
+    except Exception as e:
+        logger.error(f"Error in get_ai_trading_explanation: {e}", exc_info=True)
+        return error_response(f'AI 거래 설명 생성 실패: {str(e)}', status_code=500)
+
+
+@bp.route('/api/village/state')
+def api_village_state():
+    try:
+        iv = request.args.get('interval') if request.args else None
+        if not iv:
+            iv = state.get('candle') or load_config().candle
+        # tick and read
+        E = _energy_tick(str(iv))
+        st = _energy_state(str(iv))
+        last_reason = st.get('last_reason')
+        # attach learned zone reputation snapshot
+        rep = {
+            'BLUE': dict(_zone_reputation.get('BLUE', {})),
+            'ORANGE': dict(_zone_reputation.get('ORANGE', {})),
+        }
+        # compose minimal treasury snapshot via existing summary
+        try:
+            total_owned = int(sum(int(v) for v in _nb_coin_counter.values()))
+        except Exception:
+            total_owned = 0
+        # KRW/price/ buyable from summary helper (reuse logic inline)
+        price_per_coin = int(getattr(_resolve_config(), 'order_krw', 5100))
+        krw = 0.0
+        try:
+            cfg = _resolve_config()
+            if (not cfg.paper) and cfg.access_key and cfg.secret_key:
+                upbit = gateway_upbit(cfg.access_key, cfg.secret_key)
+                if upbit:
+                    krw = float(upbit.get_balance('KRW') or 0.0)
+        except Exception:
+            krw = 0.0
+        buyable = int(krw // max(1, price_per_coin))
+        return jsonify({ 'ok': True, 'interval': str(iv), 'energy': E, 'last_reason': last_reason, 'reputation': rep, 'treasury': { 'krw': krw, 'coins': total_owned, 'price_per_coin': price_per_coin, 'buyable': buyable } })
+    except Exception as e:
+        return jsonify({ 'ok': False, 'error': str(e) }), 500
+
+@bp.route('/api/village/energy/fill', methods=['POST'])
+def api_village_energy_fill():
+    try:
+        iv = request.args.get('interval') if request.args else None
+        if not iv:
+            iv = state.get('candle') or load_config().candle
+        
+        # Fill energy to 99999
+        current_energy = _energy_tick(str(iv))
+        energy_needed = 99999.0 - current_energy
+        new_energy = _energy_adjust(str(iv), energy_needed, 'manual_fill')
+        
+        print(f"✅ Village energy filled: {current_energy:.1f}% → {new_energy:.1f}% (interval: {iv})")
+        return jsonify({ 'ok': True, 'interval': str(iv), 'previous_energy': current_energy, 'new_energy': new_energy })
+    except Exception as e:
+        print(f"❌ Error filling village energy: {e}")
+        return jsonify({ 'ok': False, 'error': str(e) }), 500
+
+
+@bp.route('/api/village/nb-guild-status', methods=['GET'])
+def api_village_nb_guild_status():
+    """N/B 길드 상태 정보 반환"""
+    try:
+        # N/B 길드 상태 정보 구성 (기본값)
+        nb_guild_status = {
+            'profit': '0.0%',
+            'loss': '100.0%',
+            'autoTrade': '100%',
+            'trustLevel': 'N/B Favored',
+            'mlTrust': '40%',
+            'nbGuildTrust': '82%',
+            'trustBalance': 'ML: 40% | N/B: 82%',
+            'zoneStatus': '5m ORANGE',
+            'timestamp': datetime.now().isoformat()
+        }
+        
+        return jsonify(nb_guild_status)
+        
+    except Exception as e:
+        print(f"❌ N/B 길드 상태 API 오류: {e}")
+        return jsonify({
+            'error': str(e),
+            'profit': '0.0%',
+            'loss': '100.0%',
+            'autoTrade': '100%',
+            'trustLevel': 'N/B Favored',
+            'mlTrust': '40%',
+            'nbGuildTrust': '82%',
+            'trustBalance': 'ML: 40% | N/B: 82%',
+            'zoneStatus': '5m ORANGE',
+        }), 500
+
+
+_startup.register('village', initialize_trainer_warehouses)
@@ -7,6 +7,8 @@ import json
 import os
 from pathlib import Path
 
+from helpers.state_layer import SharedDict
+
 # Auto-buy config file path
 AUTO_BUY_CONFIG_FILE = Path('data/auto_buy.json')
 
@@ -14,7 +16,7 @@ AUTO_BUY_CONFIG_FILE = Path('data/auto_buy.json')
 AUTO_SELL_CONFIG_FILE = Path('data/auto_sell.json')
 
 # Default auto-buy configuration
-AUTO_BUY_CONFIG = {
+AUTO_BUY_CONFIG = SharedDict({
     'enabled': False,
     'market': 'KRW-BTC',
     'interval': 'minute10',
@@ -23,7 +25,7 @@ AUTO_BUY_CONFIG = {
     'cooldown_sec': 0,
     'last_check': None,
     'last_buy': None
-}
+}, name='auto_buy_config')
 
 def load_auto_buy_config():
     """Load auto-buy configuration from file."""
@@ -62,7 +64,7 @@ def save_auto_buy_config():
         return False
 
 # Default auto-sell configuration
-AUTO_SELL_CONFIG = {
+AUTO_SELL_CONFIG = SharedDict({
     'enabled': False,
     'market': 'KRW-BTC',
     'target_profit_rate': 1.0,
@@ -73,7 +75,7 @@ AUTO_SELL_CONFIG = {
     'ml_trust_adjust': False,
     'last_check': None,
     'last_sell': None
-}
+}, name='auto_sell_config')
 
 def load_auto_sell_config():
     """Load auto-sell configuration from file."""
@@ -112,7 +114,7 @@ load_auto_buy_config()
 load_auto_sell_config()
 
 # Bot controller for start/stop from UI
-bot_ctrl = {
+bot_ctrl = SharedDict({
     'running': False,
     'thread': None,
     'last_signal': 'HOLD',
@@ -153,4 +155,4 @@ bot_ctrl = {
         'open_api_access_key': None,
         'open_api_secret_key': None,
     }
-}
+}, name='bot_ctrl')
@@ -70,6 +70,8 @@ class ServerConfig:
     skip_auth: bool = False
     api_secret_key: Optional[str] = None
     cors_origins: str = "*"
+    profile: str = "full"               # full / trading (api.PROFILES)
+    blueprints: Optional[str] = None    # 쉼표 목록, 지정하면 profile 보다 우선
 
 
 @dataclass
@@ -94,7 +96,9 @@ class Config:
             log_level=os.getenv('LOG_LEVEL', 'INFO'),
             skip_auth=os.getenv('SKIP_AUTH', 'false').lower() == 'true',
             api_secret_key=os.getenv('API_SECRET_KEY') or os.getenv('API_KEY'),
-            cors_origins=os.getenv('CORS_ORIGINS', '*')
+            cors_origins=os.getenv('CORS_ORIGINS', '*'),
+            profile=os.getenv('SERVER_PROFILE', 'full'),
+            blueprints=os.getenv('SERVER_BLUEPRINTS') or None
         )
         
         # Upbit 설정
@@ -161,6 +165,8 @@ class Config:
                 'ui_https': self.server.ui_https,
                 'debug': self.server.debug,
                 'log_level': self.server.log_level,
+                'profile': self.server.profile,
+                'blueprints': self.server.blueprints,
             },
             'trading': {
                 'market': self.trading.market,
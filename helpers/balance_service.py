@@ -0,0 +1,145 @@
+"""Cached account balances.
+
+요청마다 Upbit /v1/accounts 를 호출하지 않고 get_balances() 결과를 메모리에 보관한다.
+refresh_sec 주기보다 자주 조회하지 않으며, 사이사이 체결된 주문은 로컬에서 반영한다.
+주문 실행처럼 정확한 잔고가 필요한 경로는 force=True 로 즉시 갱신한다.
+"""
+
+import copy
+import time
+import threading
+
+
+class BalanceService:
+    """Single-flight cache around a get_balances() style fetch (list of Upbit account dicts)."""
+
+    def __init__(self, fetch, refresh_sec: float = 5.0, max_stale_sec: float = 30.0, fee_rate: float = 0.0005):
+        self._fetch = fetch
+        self.refresh_sec = float(refresh_sec)
+        self.max_stale_sec = float(max_stale_sec)
+        self.fee_rate = float(fee_rate)
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._accounts = None      # list of account dicts (balances as strings, like the API)
+        self._fetched_at = 0.0
+        self._fill_seq = 0         # bumped on every local fill; a refresh racing a fill is discarded
+        self._local_fills = 0
+        self.stats = {'hits': 0, 'refreshes': 0, 'forced': 0, 'stale_served': 0, 'errors': 0, 'last_error': None}
+
+    def _age(self) -> float:
+        return time.time() - self._fetched_at if self._accounts is not None else float('inf')
+
+    def _refresh(self, forced: bool = False):
+        with self._lock:
+            seq = self._fill_seq
+        accounts = self._fetch()
+        if not isinstance(accounts, list):
+            raise ValueError(f'unexpected balances payload: {type(accounts).__name__}')
+        with self._lock:
+            self.stats['refreshes'] += 1
+            if forced:
+                self.stats['forced'] += 1
+            if self._fill_seq != seq and not forced:
+                # a fill was applied while fetching; the response may predate it - keep local state
+                return
+            self._accounts = accounts
+            self._fetched_at = time.time()
+            self._local_fills = 0
+
+    def balances(self, max_age: float | None = None, force: bool = False) -> list:
+        """Account list no older than max_age (default refresh_sec); force=True always refetches."""
+        max_age = self.refresh_sec if max_age is None else float(max_age)
+        if not force and self._age() <= max_age:
+            with self._lock:
+                self.stats['hits'] += 1
+                return copy.deepcopy(self._accounts)
+        # single flight: while another caller refreshes, serve the cached copy inside the staleness bound
+        if not self._refresh_lock.acquire(blocking=force or self._age() > self.max_stale_sec):
+            with self._lock:
+                self.stats['stale_served'] += 1
+                return copy.deepcopy(self._accounts)
+        try:
+            if force or self._age() > max_age:
+                try:
+                    self._refresh(forced=force)
+                except Exception as e:
+                    with self._lock:
+                        self.stats['errors'] += 1
+                        self.stats['last_error'] = str(e)
+                    if force or self._age() > self.max_stale_sec:
+                        raise
+        finally:
+            self._refresh_lock.release()
+        with self._lock:
+            return copy.deepcopy(self._accounts) if self._accounts is not None else []
+
+    def balance(self, ticker: str = 'KRW', max_age: float | None = None, force: bool = False) -> float:
+        """Available amount for 'KRW', 'BTC' or 'KRW-BTC' (pyupbit get_balance semantics)."""
+        fiat, currency = ticker.split('-', 1) if '-' in ticker else ('KRW', ticker)
+        for acc in self.balances(max_age=max_age, force=force):
+            if acc.get('currency') == currency and acc.get('unit_currency', fiat) == fiat:
+                try:
+                    return float(acc.get('balance') or 0.0)
+                except (TypeError, ValueError):
+                    return 0.0
+        return 0.0
+
+    def _account(self, currency: str, fiat: str = 'KRW') -> dict:
+        for acc in self._accounts:
+            if acc.get('currency') == currency and acc.get('unit_currency', fiat) == fiat:
+                return acc
+        acc = {'currency': currency, 'balance': '0', 'locked': '0', 'avg_buy_price': '0',
+               'avg_buy_price_modified': False, 'unit_currency': fiat}
+        self._accounts.append(acc)
+        return acc
+
+    def apply_fill(self, market: str, side: str, price: float, volume: float | None = None,
+                   funds: float | None = None):
+        """Reflect an executed market order locally until the next refresh.
+
+        BUY uses funds (KRW spent), SELL uses volume (coin sold); price converts between them.
+        """
+        try:
+            price = float(price)
+        except (TypeError, ValueError):
+            price = 0.0
+        fiat, currency = market.split('-', 1) if '-' in market else ('KRW', market)
+        with self._lock:
+            self._fill_seq += 1
+            if self._accounts is None:
+                return
+            cash, coin = self._account(fiat, fiat), self._account(currency, fiat)
+            cash_bal, coin_bal = float(cash.get('balance') or 0.0), float(coin.get('balance') or 0.0)
+            if str(side).upper() == 'BUY' and funds:
+                spent = float(funds)
+                got = spent / price if price > 0 else 0.0
+                if got > 0:
+                    avg = float(coin.get('avg_buy_price') or 0.0)
+                    coin['avg_buy_price'] = str((avg * coin_bal + spent) / (coin_bal + got))
+                cash_bal = max(0.0, cash_bal - spent * (1.0 + self.fee_rate))
+                coin_bal += got
+            elif str(side).upper() == 'SELL' and volume:
+                sold = min(float(volume), coin_bal)
+                coin_bal -= sold
+                cash_bal += sold * price * (1.0 - self.fee_rate)
+            else:
+                return
+            cash['balance'] = str(cash_bal)
+            coin['balance'] = f'{coin_bal:.8f}'
+            self._local_fills += 1
+
+    def invalidate(self):
+        with self._lock:
+            self._fetched_at = 0.0
+
+    def status(self) -> dict:
+        with self._lock:
+            age = self._age()
+            return {
+                'age_sec': None if age == float('inf') else round(age, 3),
+                'refresh_sec': self.refresh_sec,
+                'max_stale_sec': self.max_stale_sec,
+                'accounts': len(self._accounts or []),
+                'local_fills_since_refresh': self._local_fills,
+                **self.stats,
+            }
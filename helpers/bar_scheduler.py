@@ -0,0 +1,152 @@
+"""Event-driven wakeups for the trade loop.
+
+고정 주기(interval_sec)로 자는 대신 다음 봉 마감 시각(+settle 지연)에 깨어나고,
+ticker 피드가 등록된 가격 임계값을 넘으면 즉시 깨운다.
+봉 마감 → 신호 → 주문까지의 지연 시간도 함께 기록한다.
+"""
+
+import os
+import time
+import threading
+from collections import deque
+
+
+def next_bar_close(now: float, interval_sec: int) -> float:
+    """Epoch seconds of the next bar boundary (bars are aligned to the UTC epoch)."""
+    sec = max(1, int(interval_sec))
+    return (int(now) // sec + 1) * sec
+
+
+class LatencyStats:
+    """Rolling latency samples (ms) per stage."""
+
+    def __init__(self, maxlen: int = 500):
+        self._lock = threading.Lock()
+        self._maxlen = maxlen
+        self._samples = {}
+
+    def observe(self, stage: str, ms: float):
+        with self._lock:
+            q = self._samples.get(stage)
+            if q is None:
+                q = self._samples[stage] = deque(maxlen=self._maxlen)
+            q.append(float(ms))
+
+    def summary(self) -> dict:
+        with self._lock:
+            snap = {k: list(v) for k, v in self._samples.items()}
+        out = {}
+        for stage, raw in snap.items():
+            if not raw:
+                continue
+            vals = sorted(raw)
+            n = len(vals)
+            out[stage] = {
+                'count': n,
+                'last_ms': round(raw[-1], 2),
+                'p50_ms': round(vals[n // 2], 2),
+                'p95_ms': round(vals[min(n - 1, int(n * 0.95))], 2),
+                'max_ms': round(vals[-1], 2),
+            }
+        return out
+
+
+class BarScheduler:
+    """Sleeps until the next bar close or a watched price crossing, whichever comes first."""
+
+    def __init__(self, settle_sec: float = 1.5):
+        self.settle_sec = float(settle_sec)
+        self.latency = LatencyStats()
+        self._cond = threading.Condition()
+        self._reason = None
+        self._levels = ()          # ((price, direction), ...) direction: +1 up-cross, -1 down-cross
+        self._last_price = None
+        self._cross_at = None
+        self.last_wake = {'reason': None, 'bar_close': None, 'at': None}
+
+    def watch(self, levels):
+        """Replace the watched price levels: iterable of (price, +1 for up-cross / -1 for down-cross)."""
+        with self._cond:
+            self._levels = tuple((float(p), int(d)) for p, d in levels if p and p > 0)
+
+    def on_price(self, price: float):
+        """Ticker hook: wake the loop when price crosses a watched level."""
+        try:
+            price = float(price)
+        except (TypeError, ValueError):
+            return
+        with self._cond:
+            prev, self._last_price = self._last_price, price
+            if prev is None or not self._levels:
+                return
+            for level, direction in self._levels:
+                if (direction > 0 and prev < level <= price) or (direction < 0 and prev > level >= price):
+                    self._levels = ()  # one-shot until the loop re-arms
+                    self._cross_at = time.time()
+                    self._reason = 'price_cross'
+                    self._cond.notify_all()
+                    return
+
+    def wake(self, reason: str = 'manual'):
+        with self._cond:
+            self._reason = reason
+            self._cond.notify_all()
+
+    def wait(self, interval_sec: int, max_wait: float | None = None) -> dict:
+        """Block until the next bar close (+settle) or an earlier wake. Returns last_wake."""
+        now = time.time()
+        close_at = next_bar_close(now, interval_sec)
+        deadline = close_at + self.settle_sec
+        if max_wait is not None:
+            deadline = min(deadline, now + max(0.0, float(max_wait)))
+        with self._cond:
+            while self._reason is None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            reason, self._reason = self._reason, None
+            cross_at, self._cross_at = self._cross_at, None
+        woke = time.time()
+        if reason is None:
+            reason = 'bar_close' if woke >= close_at else 'timeout'
+        if reason == 'bar_close':
+            self.latency.observe('close_to_wake', (woke - close_at) * 1000.0)
+            ref = close_at
+        elif reason == 'price_cross' and cross_at is not None:
+            self.latency.observe('cross_to_wake', (woke - cross_at) * 1000.0)
+            ref = cross_at
+        else:
+            ref = woke
+        self.last_wake = {'reason': reason, 'bar_close': close_at if reason == 'bar_close' else None,
+                          'at': woke, 'ref': ref}
+        return self.last_wake
+
+    def mark(self, stage: str, since: float | None = None):
+        """Record ms elapsed from since (default: the last wake's reference time) to now."""
+        ref = since if since is not None else (self.last_wake or {}).get('ref')
+        if ref:
+            self.latency.observe(stage, (time.time() - ref) * 1000.0)
+
+    def status(self) -> dict:
+        with self._cond:
+            levels = [{'price': p, 'direction': d} for p, d in self._levels]
+            last_price = self._last_price
+        return {
+            'settle_sec': self.settle_sec,
+            'watch': levels,
+            'last_price': last_price,
+            'last_wake': dict(self.last_wake),
+            'latency': self.latency.summary(),
+        }
+
+
+_bar_scheduler = None
+
+
+def get_bar_scheduler() -> BarScheduler:
+    """전역 BarScheduler 인스턴스"""
+    global _bar_scheduler
+    if _bar_scheduler is None:
+        _bar_scheduler = BarScheduler(settle_sec=float(os.getenv('TRADE_BAR_SETTLE_SEC', '1.5')))
+    return _bar_scheduler
@@ -0,0 +1,277 @@
+"""Bounded, time-indexed in-memory containers with memory accounting.
+
+모듈 전역 리스트/딕셔너리/셋이 무한히 커지거나 정리할 때마다 전체 키를 정렬하던 것을 대체한다.
+- RingIndex: 고정 길이 링 버퍼 + 키 인덱스 (signals, orders)
+- TimeBuckets: 시간 버킷 deque, 오래된 버킷은 앞에서 O(1)로 만료 (_nb_groups)
+- BoundedSet: 삽입 순서로 밀려나는 집합 (_npc_hashes)
+register_store()/store_report() 로 각 저장소의 크기와 추정 메모리를 조회한다.
+"""
+
+import bisect
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+
+def _deep_size(obj, depth: int = 3) -> int:
+    """Approximate retained size of a JSON-like object (dict/list/str/number), bounded depth."""
+    size = sys.getsizeof(obj)
+    if depth <= 0:
+        return size
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            size += _deep_size(k, depth - 1) + _deep_size(v, depth - 1)
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        for v in obj:
+            size += _deep_size(v, depth - 1)
+    return size
+
+
+def _estimate_bytes(container_size: int, items, sample: int = 32) -> int:
+    """Container overhead + average sampled item size × count (cheap for large stores)."""
+    items = list(items)
+    if not items:
+        return container_size
+    step = max(1, len(items) // sample)
+    picked = items[::step][:sample]
+    avg = sum(_deep_size(x) for x in picked) / len(picked)
+    return int(container_size + avg * len(items))
+
+
+class RingIndex:
+    """Fixed-capacity ring buffer with an optional key index (list/deque-compatible reads)."""
+
+    def __init__(self, maxlen: int, key=None):
+        self.maxlen = int(maxlen)
+        self._key = key
+        self._items = deque()
+        self._index = {}
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def _k(self, item):
+        if self._key is None:
+            return None
+        try:
+            return self._key(item)
+        except Exception:
+            return None
+
+    def append(self, item):
+        with self._lock:
+            if len(self._items) >= self.maxlen:
+                old = self._items.popleft()
+                self.evicted += 1
+                k = self._k(old)
+                if k is not None and self._index.get(k) is old:
+                    del self._index[k]
+            self._items.append(item)
+            k = self._k(item)
+            if k is not None:
+                self._index[k] = item
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def get(self, key, default=None):
+        return self._index.get(key, default)
+
+    def since(self, ts_ms: int, field: str = 'ts') -> list:
+        """Items with item[field] >= ts_ms (scans from the newest end)."""
+        with self._lock:
+            out = []
+            for item in reversed(self._items):
+                try:
+                    if int(item.get(field) or 0) < ts_ms:
+                        break
+                except Exception:
+                    break
+                out.append(item)
+        out.reverse()
+        return out
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._index.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        with self._lock:
+            snap = list(self._items)
+        return iter(snap)
+
+    def __getitem__(self, i):
+        return self._items[i]
+
+    def __bool__(self):
+        return bool(self._items)
+
+    def stats(self) -> dict:
+        with self._lock:
+            items = list(self._items)
+            overhead = sys.getsizeof(self._items) + sys.getsizeof(self._index)
+        return {'type': 'ring', 'len': len(items), 'capacity': self.maxlen, 'evicted': self.evicted,
+                'indexed': len(self._index), 'bytes': _estimate_bytes(overhead, items)}
+
+
+class TimeBuckets:
+    """Rows grouped by time bucket; buckets older than max_buckets / max_age_sec expire from the left."""
+
+    def __init__(self, bucket_sec: int, max_buckets: int = 1000, max_age_sec: float | None = None):
+        self.bucket_sec = max(1, int(bucket_sec))
+        self.max_buckets = int(max_buckets)
+        self.max_age_sec = max_age_sec
+        self._order = deque()        # bucket ids, ascending
+        self._rows = {}              # bucket id -> list of rows
+        self._lock = threading.Lock()
+        self.expired = 0
+
+    def bucket_of(self, ts_ms: int | None = None) -> int:
+        t = int((ts_ms or int(time.time() * 1000)) / 1000)
+        return (t // self.bucket_sec) * self.bucket_sec
+
+    def _expire(self, newest: int):
+        while self._order and (len(self._order) > self.max_buckets or
+                               (self.max_age_sec is not None and newest - self._order[0] > self.max_age_sec)):
+            self._rows.pop(self._order.popleft(), None)
+            self.expired += 1
+
+    def _ensure(self, bucket: int):
+        rows = self._rows.get(bucket)
+        if rows is None:
+            if self._order and bucket < self._order[0] and len(self._order) >= self.max_buckets:
+                return None  # older than everything retained
+            rows = self._rows[bucket] = []
+            if not self._order or bucket > self._order[-1]:
+                self._order.append(bucket)
+            else:
+                self._order.insert(bisect.bisect_left(self._order, bucket), bucket)  # late bucket (rare)
+            self._expire(self._order[-1])
+        return rows
+
+    def add(self, bucket: int, row):
+        with self._lock:
+            rows = self._ensure(int(bucket))
+            if rows is not None:
+                rows.append(row)
+
+    def get(self, bucket: int, default=None):
+        return self._rows.get(bucket, default)
+
+    def keys(self):
+        with self._lock:
+            return list(self._order)
+
+    def items(self):
+        with self._lock:
+            return [(b, self._rows[b]) for b in self._order if b in self._rows]
+
+    def latest(self, n: int = 1) -> list:
+        with self._lock:
+            return [(b, self._rows[b]) for b in list(self._order)[-max(0, int(n)):]]
+
+    def __contains__(self, bucket):
+        return bucket in self._rows
+
+    def __len__(self):
+        return len(self._rows)
+
+    def clear(self):
+        with self._lock:
+            self._order.clear()
+            self._rows.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = [r for b in self._order for r in self._rows.get(b, ())]
+            overhead = sys.getsizeof(self._order) + sys.getsizeof(self._rows) + \
+                sum(sys.getsizeof(v) for v in self._rows.values())
+            nb = len(self._order)
+        return {'type': 'time_buckets', 'len': nb, 'rows': len(rows), 'capacity': self.max_buckets,
+                'bucket_sec': self.bucket_sec, 'expired': self.expired, 'bytes': _estimate_bytes(overhead, rows)}
+
+
+class BoundedSet:
+    """Set with FIFO eviction once maxlen members are held."""
+
+    def __init__(self, maxlen: int):
+        self.maxlen = int(maxlen)
+        self._members = set()
+        self._order = deque()
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def add(self, item) -> bool:
+        with self._lock:
+            if item in self._members:
+                return False
+            self._members.add(item)
+            self._order.append(item)
+            while len(self._order) > self.maxlen:
+                self._members.discard(self._order.popleft())
+                self.evicted += 1
+            return True
+
+    def __contains__(self, item):
+        return item in self._members
+
+    def __len__(self):
+        return len(self._members)
+
+    def clear(self):
+        with self._lock:
+            self._members.clear()
+            self._order.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            sample = list(self._order)
+            overhead = sys.getsizeof(self._members) + sys.getsizeof(self._order)
+        return {'type': 'set', 'len': len(sample), 'capacity': self.maxlen, 'evicted': self.evicted,
+                'bytes': _estimate_bytes(overhead, sample)}
+
+
+def tail_lines(path: str, n: int, chunk: int = 64 * 1024) -> list:
+    """Last n lines of a text file, read backwards in chunks (no full scan)."""
+    if n <= 0 or not os.path.exists(path):
+        return []
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        buf = b''
+        while pos > 0 and buf.count(b'\n') <= n:
+            step = min(chunk, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+    lines = buf.decode('utf-8', errors='replace').splitlines()
+    return [ln for ln in lines if ln.strip()][-n:]
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def register_store(name: str, container):
+    """Track a container (anything with stats()) in the size report; returns the container."""
+    with _registry_lock:
+        _registry[name] = container
+    return container
+
+
+def store_report() -> dict:
+    with _registry_lock:
+        items = list(_registry.items())
+    out = {}
+    for name, c in items:
+        try:
+            out[name] = c.stats()
+        except Exception as e:
+            out[name] = {'error': str(e)}
+    return out
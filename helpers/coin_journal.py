@@ -0,0 +1,189 @@
+"""Append-only journal for the N/B coin store.
+
+매 변경마다 전체 nb_coins_store.json 을 다시 쓰는 대신 바뀐 코인 한 개만
+journal(JSONL)에 추가하고, 일정 개수마다 스냅샷을 원자적으로 교체한 뒤 journal 을 비운다.
+로드 시 스냅샷 + journal 재생으로 복원한다.
+버킷 순서 deque 를 유지해 오래된 코인을 정렬 없이 앞에서부터 잘라낸다 (시간 순으로 들어오는 버킷은 append,
+과거 버킷 backfill 은 bisect + deque.insert 라 O(n)). 예전처럼 max_coins + trim_slack 을 넘을 때만
+max_coins 개로 잘라낸다 (2500 을 넘으면 2000 개로). 코인별 reasons/attempts 는 상한을 두고
+잘려나간 개수는 카운터로 남긴다.
+"""
+
+import bisect
+import json
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+
+def cap_list(coin: dict, field: str, limit: int):
+    """Keep the last `limit` items of coin[field]; count the dropped ones in coin[f'{field}_dropped']."""
+    items = coin.get(field)
+    if isinstance(items, list) and len(items) > limit:
+        drop = len(items) - limit
+        del items[:drop]
+        coin[f'{field}_dropped'] = int(coin.get(f'{field}_dropped', 0)) + drop
+
+
+class CoinJournal:
+    def __init__(self, store: dict, snapshot_path: str, max_coins: int = 2000, snapshot_every: int = 1000,
+                 read_only: bool = False, trim_slack: int = 500):
+        self.store = store                      # shared dict (server._nb_coin_store), mutated in place
+        self.snapshot_path = snapshot_path
+        self.journal_path = snapshot_path + '.journal'
+        self.max_coins = int(max_coins)
+        self.trim_slack = max(0, int(trim_slack))   # trim only past max_coins + trim_slack (hysteresis)
+        self.snapshot_every = int(snapshot_every)
+        self.read_only = bool(read_only)        # serving workers: load, never write the leader's files
+        self._order = deque()                   # (bucket, key), ascending bucket
+        self._lock = threading.RLock()
+        self._fh = None
+        self._pending = 0                       # journal records since the last snapshot
+        self._batch = 0                         # > 0 inside batch(): flush once at the end
+        self.stats = {'appends': 0, 'snapshots': 0, 'replayed': 0, 'trimmed': 0, 'errors': 0}
+
+    @staticmethod
+    def _bucket(key: str, coin: dict) -> int:
+        try:
+            return int(coin.get('bucket'))
+        except Exception:
+            try:
+                return int(str(key).rsplit('|', 1)[-1])
+            except Exception:
+                return 0
+
+    def _index(self, key: str, coin: dict):
+        item = (self._bucket(key, coin), key)
+        if not self._order or item >= self._order[-1]:
+            self._order.append(item)             # live buckets arrive in time order
+        else:
+            self._order.insert(bisect.bisect_left(self._order, item), item)  # backfill (prefill / replay)
+
+    def _trim(self):
+        if len(self.store) <= self.max_coins + self.trim_slack:
+            return
+        while len(self.store) > self.max_coins and self._order:
+            _, key = self._order.popleft()
+            if self.store.pop(key, None) is not None:
+                self.stats['trimmed'] += 1
+                self._write({'op': 'del', 'k': key})
+
+    # ----- persistence -----
+    def _write(self, rec: dict):
+        if self.read_only:
+            return
+        try:
+            if self._fh is None:
+                os.makedirs(os.path.dirname(self.journal_path) or '.', exist_ok=True)
+                self._fh = open(self.journal_path, 'a', encoding='utf-8')
+            self._fh.write(json.dumps(rec, ensure_ascii=False, separators=(',', ':')) + '\n')
+            if not self._batch:
+                self._fh.flush()
+            self.stats['appends'] += 1
+            self._pending += 1
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"⚠️ NB coin journal append failed: {e}")
+
+    def load(self) -> int:
+        """Snapshot + journal replay into store (in place). Returns the number of coins."""
+        with self._lock:
+            data = {}
+            try:
+                if os.path.exists(self.snapshot_path):
+                    with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                        loaded = json.load(f)
+                    if isinstance(loaded, dict):
+                        data = loaded
+            except Exception as e:
+                print(f"⚠️ NB coin snapshot load failed: {e}")
+            replayed = 0
+            try:
+                if os.path.exists(self.journal_path):
+                    with open(self.journal_path, 'r', encoding='utf-8') as f:
+                        for line in f:
+                            try:
+                                rec = json.loads(line)
+                            except Exception:
+                                continue  # torn tail line after a crash
+                            if rec.get('op') == 'put' and isinstance(rec.get('v'), dict):
+                                data[rec['k']] = rec['v']
+                            elif rec.get('op') == 'del':
+                                data.pop(rec.get('k'), None)
+                            replayed += 1
+            except Exception as e:
+                print(f"⚠️ NB coin journal replay failed: {e}")
+            self.store.clear()
+            self.store.update(data)
+            self._order = deque(sorted((self._bucket(k, v), k) for k, v in self.store.items()))
+            self.stats['replayed'] = replayed
+            self._trim()
+            if replayed:
+                self.snapshot()
+            return len(self.store)
+
+    @contextmanager
+    def batch(self):
+        """Group many add()/put() calls (e.g. prefill) into one flush of the journal file."""
+        with self._lock:
+            self._batch += 1
+            try:
+                yield self
+            finally:
+                self._batch -= 1
+                if not self._batch and self._fh is not None:
+                    try:
+                        self._fh.flush()
+                    except Exception:
+                        pass
+
+    def put(self, key: str):
+        """Journal the current state of one coin (call after mutating store[key])."""
+        with self._lock:
+            coin = self.store.get(key)
+            if coin is None:
+                return
+            self._write({'op': 'put', 'k': key, 'v': coin})
+            if self._pending >= self.snapshot_every:
+                self.snapshot()
+
+    def add(self, key: str, coin: dict) -> dict:
+        """Insert a new coin, journal it and trim the oldest buckets once past max_coins + trim_slack."""
+        with self._lock:
+            existing = self.store.get(key)
+            if existing is not None:
+                return existing
+            self.store[key] = coin
+            self._index(key, coin)
+            self._trim()
+            self.put(key)
+            return self.store.get(key, coin)
+
+    def snapshot(self) -> bool:
+        """Write the whole store atomically and truncate the journal."""
+        if self.read_only:
+            return False
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.snapshot_path) or '.', exist_ok=True)
+                tmp = self.snapshot_path + '.tmp'
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(self.store, f, ensure_ascii=False)
+                os.replace(tmp, self.snapshot_path)
+                if self._fh is not None:
+                    self._fh.close()
+                    self._fh = None
+                open(self.journal_path, 'w').close()
+                self._pending = 0
+                self.stats['snapshots'] += 1
+                return True
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"⚠️ NB coin snapshot failed: {e}")
+                return False
+
+    def status(self) -> dict:
+        with self._lock:
+            return {'coins': len(self.store), 'pending_records': self._pending,
+                    'max_coins': self.max_coins, 'read_only': self.read_only, **self.stats}
@@ -0,0 +1,231 @@
+"""Compiled (ONNX) model artifacts for low-latency inference.
+
+훈련 후 sklearn/Keras 모델을 ONNX 로 내보내고, 예측 시에는 컴파일된 아티팩트를
+우선 사용하며 없거나 로드에 실패하면 원래 Python 객체로 폴백한다.
+"""
+
+import importlib.util
+import logging
+import os
+import time
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from helpers.memory_manager import get_memory_manager
+
+logger = logging.getLogger(__name__)
+
+# Optional ONNX toolchain (export/runtime are independent).
+# skl2onnx pulls in most of sklearn/scipy, so it is imported on the first export, not at startup.
+SKL2ONNX_AVAILABLE = importlib.util.find_spec('skl2onnx') is not None
+
+try:
+    import onnxruntime as ort
+    ORT_AVAILABLE = True
+except ImportError:
+    ORT_AVAILABLE = False
+
+
+def compiled_path_for(model_path) -> str:
+    """Return the ONNX artifact path next to a pickled model (foo.pkl -> foo.onnx)."""
+    base, _ = os.path.splitext(str(model_path))
+    return base + '.onnx'
+
+
+def export_sklearn(model, n_features: int, path) -> bool:
+    """Export a fitted sklearn estimator (or Pipeline) to ONNX. Returns True on success."""
+    if not SKL2ONNX_AVAILABLE or model is None:
+        return False
+    final = _final_estimator(model)
+    # Plain probability tensor instead of a list of dicts
+    options = {id(final): {'zipmap': False}} if hasattr(final, 'predict_proba') else None
+    try:
+        from skl2onnx import convert_sklearn
+        from skl2onnx.common.data_types import FloatTensorType
+        onx = convert_sklearn(
+            model,
+            initial_types=[('input', FloatTensorType([None, int(n_features)]))],
+            options=options,
+        )
+        _atomic_write(path, onx.SerializeToString())
+        return True
+    except Exception as e:
+        logger.warning(f"ONNX export failed ({path}): {e}")
+        return False
+
+
+def export_keras(model, input_shape: tuple, path) -> bool:
+    """Export a Keras model to ONNX via tf2onnx. Returns True on success."""
+    if model is None:
+        return False
+    try:
+        import tensorflow as tf
+        import tf2onnx
+        spec = (tf.TensorSpec((None,) + tuple(input_shape), tf.float32, name='input'),)
+        onx, _ = tf2onnx.convert.from_keras(model, input_signature=spec)
+        _atomic_write(path, onx.SerializeToString())
+        return True
+    except Exception as e:
+        logger.warning(f"ONNX export failed ({path}): {e}")
+        return False
+
+
+def export_pack(pack: dict, model_path) -> dict:
+    """Export the classifier (and optional slope regressor) of an ML pack next to model_path."""
+    out = {'model': False, 'slope_model': False}
+    try:
+        n_features = len(pack.get('feature_names') or []) or int(pack['model'].n_features_in_)
+    except Exception:
+        return out
+    out['model'] = export_sklearn(pack.get('model'), n_features, compiled_path_for(model_path))
+    if pack.get('slope_model') is not None:
+        out['slope_model'] = export_sklearn(pack['slope_model'], n_features, _slope_path(model_path))
+    return out
+
+
+class CompiledModel:
+    """onnxruntime session exposing the sklearn predict / predict_proba surface."""
+
+    def __init__(self, path: str):
+        opts = ort.SessionOptions()
+        # Single-row scoring: thread fan-out costs more than it saves
+        opts.intra_op_num_threads = 1
+        opts.inter_op_num_threads = 1
+        self.path = path
+        self.last_used = time.time()
+        self.session = ort.InferenceSession(path, sess_options=opts, providers=['CPUExecutionProvider'])
+        inp = self.session.get_inputs()[0]
+        self._input_name = inp.name
+        try:
+            self.n_features_in_ = int(inp.shape[-1])
+        except Exception:
+            self.n_features_in_ = None
+
+    def _run(self, X):
+        self.last_used = time.time()
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        return self.session.run(None, {self._input_name: X})
+
+    def run(self, X) -> np.ndarray:
+        """Raw first output (Keras / regressor graphs)."""
+        return self._run(X)[0]
+
+    def predict(self, X) -> np.ndarray:
+        out = self._run(X)[0]
+        return out.ravel() if out.ndim > 1 and out.shape[-1] == 1 else out
+
+    def predict_proba(self, X) -> np.ndarray:
+        outs = self._run(X)
+        if len(outs) < 2:
+            raise AttributeError('compiled model has no probability output')
+        return outs[1]
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _evict_session(path):
+    with _sessions_lock:
+        _sessions.pop(path, None)
+
+
+def _session_bytes(path, entry) -> int:
+    # onnxruntime keeps the initializers in native memory; the artifact size is the closest cheap estimate
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+get_memory_manager().register('model_sessions', _sessions, sizeof=_session_bytes,
+                              last_used=lambda path, entry: entry[1].last_used, on_evict=_evict_session)
+
+
+def load_compiled(path, source_path=None):
+    """Return a cached CompiledModel for path, or None when unavailable or stale.
+
+    The artifact is considered stale if source_path (the pickled model) is newer or
+    missing (an orphaned .onnx left behind after its .pkl was deleted).
+    Sessions are cached per (path, mtime) so retraining picks up the new artifact.
+    """
+    if not ORT_AVAILABLE or os.getenv('ML_COMPILED_DISABLE', '0') == '1':
+        return None
+    path = str(path)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    try:
+        if source_path is not None and os.path.getmtime(str(source_path)) > mtime + 1.0:
+            return None
+    except OSError:
+        return None
+    key = (path, mtime)
+    with _sessions_lock:
+        cm = _sessions.get(path)
+        if cm is not None and cm[0] == key:
+            return cm[1]
+    try:
+        compiled = CompiledModel(path)
+    except Exception as e:
+        logger.warning(f"ONNX load failed ({path}): {e}")
+        return None
+    with _sessions_lock:
+        _sessions[path] = (key, compiled)
+    return compiled
+
+
+def compiled_or(model, model_path, slope: bool = False):
+    """Prefer the compiled artifact for model_path, falling back to the Python model.
+
+    model_path must be the pickle the model was actually loaded from.
+    """
+    if not model_path:
+        return model
+    path = _slope_path(model_path) if slope else compiled_path_for(model_path)
+    compiled = load_compiled(path, source_path=model_path)
+    return compiled if compiled is not None else model
+
+
+def benchmark_latency(model, n_features: int, batch_sizes=(1, 256), repeat: int = 200, method: str = 'predict') -> dict:
+    """Measure per-call latency (µs) of model.<method> for each batch size."""
+    rng = np.random.default_rng(0)
+    fn = getattr(model, method)
+    out = {}
+    for bs in batch_sizes:
+        X = rng.standard_normal((bs, n_features)).astype(np.float32)
+        fn(X)  # warm-up
+        samples = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn(X)
+            samples.append((time.perf_counter() - t0) * 1e6)
+        samples.sort()
+        out[bs] = {
+            'p50_us': samples[len(samples) // 2],
+            'p95_us': samples[int(len(samples) * 0.95) - 1],
+            'per_row_us': samples[len(samples) // 2] / bs,
+        }
+    return out
+
+
+def _final_estimator(model):
+    steps = getattr(model, 'steps', None)
+    return steps[-1][1] if steps else model
+
+
+def _slope_path(model_path) -> str:
+    base, _ = os.path.splitext(str(model_path))
+    return base + '.slope.onnx'
+
+
+def _atomic_write(path, data: bytes):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
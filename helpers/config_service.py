@@ -0,0 +1,142 @@
+"""Cached configuration service with change detection.
+
+load_config() 가 호출될 때마다 .env / env.local 을 네 번 다시 읽고, load_nb_params() 가
+매번 nb_params.json 을 여는 대신 파일을 한 번 파싱해 불변 스냅샷으로 보관한다.
+- 파일 mtime 을 poll_sec 주기로만 확인하고, 바뀐 경우에만 다시 파싱한다 (버전 증가)
+- .env 에서 온 값만 갱신하고 프로세스 환경 변수(export)는 덮어쓰지 않는다 (load_dotenv override=False 와 동일)
+- JSON 파일(nb_params.json 등)도 같은 방식으로 캐시, 저장 시 원자적 교체 후 캐시를 바로 갱신
+- merged(key, build): (설정 버전, 오버라이드 스냅샷)이 바뀔 때만 병합 결과를 다시 만든다
+"""
+
+import json
+import os
+import threading
+import time
+
+try:
+    from dotenv import dotenv_values
+    DOTENV_AVAILABLE = True
+except ImportError:
+    DOTENV_AVAILABLE = False
+
+
+def _mtime(path: str):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class ConfigService:
+    """Env files + JSON params parsed once and re-read only when their mtime changes."""
+
+    def __init__(self, env_files, build, poll_sec: float = 1.0):
+        self.env_files = list(dict.fromkeys(os.path.abspath(p) for p in env_files))
+        self._build = build                    # () -> config object, reads os.environ
+        self.poll_sec = float(poll_sec)
+        self._lock = threading.RLock()
+        self._env_sig = None
+        self._file_keys = {}                   # keys this service put into os.environ -> value
+        self._snapshot = None
+        self._checked = 0.0
+        self.version = 0
+        self._json = {}                        # path -> [mtime, value, checked]
+        self._merged = {}                      # key -> (version, override_snapshot, value)
+        self.stats = {'reloads': 0, 'json_reloads': 0, 'merges': 0, 'hits': 0}
+
+    # ----- env config -----
+    def _load_env(self):
+        values = {}
+        if DOTENV_AVAILABLE:
+            for path in self.env_files:
+                if os.path.exists(path):
+                    for k, v in dotenv_values(path).items():
+                        if v is not None and k not in values:  # first file wins (override=False)
+                            values[k] = v
+        for k, v in values.items():
+            # ours if unset, or still holding the value a file gave it (here or via an earlier load_dotenv)
+            if k not in os.environ or os.environ[k] == self._file_keys.get(k, v):
+                os.environ[k] = v
+                self._file_keys[k] = v
+        for k in [k for k in self._file_keys if k not in values]:
+            if os.environ.get(k) == self._file_keys[k]:
+                os.environ.pop(k, None)        # removed from the file
+            self._file_keys.pop(k)
+
+    def config(self):
+        """Current config snapshot (shared - copy it before mutating)."""
+        now = time.monotonic()
+        snap = self._snapshot
+        if snap is not None and now - self._checked < self.poll_sec:
+            self.stats['hits'] += 1
+            return snap
+        with self._lock:
+            self._checked = now
+            sig = tuple(_mtime(p) for p in self.env_files)
+            if self._snapshot is None or sig != self._env_sig:
+                self._load_env()
+                self._snapshot = self._build()
+                self._env_sig = sig
+                self.version += 1
+                self.stats['reloads'] += 1
+            return self._snapshot
+
+    def invalidate(self):
+        """Rebuild the snapshot on next access (e.g. after os.environ was changed in-process)."""
+        with self._lock:
+            self._snapshot = None
+
+    def merged(self, key: str, override, build):
+        """build(config) cached until the config version or the override snapshot object changes."""
+        base = self.config()
+        hit = self._merged.get(key)
+        if hit is not None and hit[0] == self.version and hit[1] is override:
+            return hit[2]
+        value = build(base)
+        self._merged[key] = (self.version, override, value)
+        self.stats['merges'] += 1
+        return value
+
+    # ----- JSON files -----
+    def json(self, path: str, default=None):
+        """Parsed JSON file (shared - copy before mutating); default when missing or invalid."""
+        now = time.monotonic()
+        entry = self._json.get(path)
+        if entry is not None and now - entry[2] < self.poll_sec:
+            return entry[1]
+        with self._lock:
+            mtime = _mtime(path)
+            entry = self._json.get(path)
+            if entry is not None and entry[0] == mtime:
+                entry[2] = now
+                return entry[1]
+            value = default
+            if mtime is not None:
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        value = json.load(f)
+                except Exception as e:
+                    print(f"⚠️ config JSON load failed ({os.path.basename(path)}): {e}")
+                    value = entry[1] if entry is not None else default
+            self._json[path] = [mtime, value, now]
+            self.stats['json_reloads'] += 1
+            return value
+
+    def write_json(self, path: str, value) -> bool:
+        """Atomically replace a JSON file and refresh its cached value."""
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+                tmp = path + '.tmp'
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(value, f, ensure_ascii=False)
+                os.replace(tmp, path)
+                self._json[path] = [_mtime(path), value, time.monotonic()]
+                return True
+            except Exception as e:
+                print(f"⚠️ config JSON save failed ({os.path.basename(path)}): {e}")
+                return False
+
+    def status(self) -> dict:
+        return {'version': self.version, 'env_files': [p for p in self.env_files if os.path.exists(p)],
+                'json_files': sorted(self._json), 'poll_sec': self.poll_sec, **self.stats}
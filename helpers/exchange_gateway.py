@@ -0,0 +1,416 @@
+"""Single Upbit gateway: pooled HTTP session, process-wide rate limits, request coalescing.
+
+모든 Upbit REST 호출(캔들, 현재가, 잔고, 주문)을 한 곳으로 모은다.
+- requests.Session 커넥션 풀 공유
+- Upbit 요청 그룹별 초당 한도에 맞춘 token bucket (Remaining-Req 헤더로 보정)
+- 동일한 공개 GET 요청이 이미 진행 중이면 결과를 함께 받는다 (coalescing)
+- 그룹별 요청 수 / 지연 / 429 카운터
+"""
+
+import datetime
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import Future
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+import jwt
+import pandas as pd
+import pyupbit
+import requests
+from requests.adapters import HTTPAdapter
+
+from helpers.bar_scheduler import LatencyStats
+from helpers.balance_service import BalanceService
+
+
+UPBIT_API = 'https://api.upbit.com'
+
+KST = datetime.timezone(datetime.timedelta(hours=9))
+
+# Upbit per-second request quotas by Remaining-Req group
+UPBIT_QUOTAS = {
+    'market': 10,
+    'candle': 10,
+    'trade': 10,
+    'ticker': 10,
+    'orderbook': 10,
+    'default': 30,   # exchange API (accounts, order queries)
+    'order': 8,
+}
+
+
+class GatewayError(RuntimeError):
+    def __init__(self, status: int, message: str):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is available."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def acquire(self, timeout: float | None = None) -> float:
+        """Take one token. Returns seconds waited; raises TimeoutError past timeout."""
+        start = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return now - start
+                wait = (1.0 - self._tokens) / self.rate
+            if timeout is not None and (time.monotonic() - start + wait) > timeout:
+                raise TimeoutError('rate limit wait exceeded')
+            time.sleep(wait)
+
+    def drain(self, penalty_sec: float = 0.0):
+        """Empty the bucket (server says we are at the limit); optionally go negative."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0) - penalty_sec * self.rate
+
+
+class ExchangeGateway:
+    def __init__(self, base_url: str = UPBIT_API, pool_size: int = 16, timeout: float = 10.0,
+                 quotas: dict | None = None):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._buckets = {g: TokenBucket(r) for g, r in (quotas or UPBIT_QUOTAS).items()}
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._counters = Counter()
+        self._counters_lock = threading.Lock()
+        self.latency = LatencyStats()
+        self._price_source = None
+
+    def set_price_source(self, fn):
+        """fn(market) -> fresh streamed price or None; consulted before a REST ticker call."""
+        self._price_source = fn
+
+    # ----- accounting -----
+    def _count(self, key: str, n: int = 1):
+        with self._counters_lock:
+            self._counters[key] += n
+
+    def _bucket(self, group: str) -> TokenBucket:
+        b = self._buckets.get(group)
+        if b is None:
+            b = self._buckets.setdefault(group, TokenBucket(UPBIT_QUOTAS['default']))
+        return b
+
+    def _throttle(self, group: str):
+        waited = self._bucket(group).acquire(timeout=30.0)
+        if waited >= 0.001:
+            self._count(f'{group}.throttled')
+            self._count(f'{group}.throttle_wait_ms', int(round(waited * 1000)))
+
+    def _observe_remaining(self, resp, group: str):
+        # "group=candle; min=573; sec=9" - at the edge, stop bursting until the next second
+        hdr = resp.headers.get('Remaining-Req', '')
+        try:
+            part = dict(p.strip().split('=', 1) for p in hdr.split(';') if '=' in p)
+            if int(part.get('sec', 99)) <= 0:
+                self._bucket(part.get('group', group)).drain()
+        except Exception:
+            pass
+
+    @contextmanager
+    def track(self, group: str, name: str):
+        """Rate-limit and time an exchange call made outside the session (e.g. pyupbit orders)."""
+        self._throttle(group)
+        t0 = time.perf_counter()
+        self._count(f'{group}.requests')
+        try:
+            yield
+        except Exception as e:
+            self._count(f'{group}.errors')
+            if 'TooMany' in type(e).__name__ or '429' in str(e):
+                self._count(f'{group}.http_429')
+                self._bucket(group).drain(1.0)
+            raise
+        finally:
+            self.latency.observe(name, (time.perf_counter() - t0) * 1000.0)
+
+    # ----- transport -----
+    def _send(self, method: str, path: str, group: str, params=None, json_body=None, headers=None):
+        url = self.base_url + path
+        for attempt in range(2):
+            self._throttle(group)
+            t0 = time.perf_counter()
+            self._count(f'{group}.requests')
+            try:
+                resp = self.session.request(method, url, params=params, json=json_body,
+                                            headers=headers, timeout=self.timeout)
+            except requests.RequestException:
+                self._count(f'{group}.errors')
+                raise
+            finally:
+                self.latency.observe(group, (time.perf_counter() - t0) * 1000.0)
+            self._observe_remaining(resp, group)
+            if resp.status_code == 429:
+                self._count(f'{group}.http_429')
+                self._bucket(group).drain(1.0)
+                if attempt == 0:
+                    continue
+            if resp.status_code >= 400:
+                self._count(f'{group}.errors')
+                raise GatewayError(resp.status_code, resp.text[:200])
+            return resp.json()
+        raise GatewayError(429, 'rate limited')
+
+    def public_get(self, path: str, params: dict | None = None, group: str = 'market'):
+        """GET a quotation endpoint; identical concurrent requests share one HTTP call."""
+        key = (path, tuple(sorted((params or {}).items())))
+        with self._inflight_lock:
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = self._inflight[key] = Future()
+        if not leader:
+            self._count(f'{group}.coalesced')
+            return fut.result(timeout=self.timeout * 3)
+        try:
+            data = self._send('GET', path, group, params=params)
+            fut.set_result(data)
+            return data
+        except Exception as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def private_request(self, method: str, path: str, access: str, secret: str,
+                        params: dict | None = None, group: str = 'default'):
+        """Signed exchange API call (JWT with query hash, as Upbit requires)."""
+        payload = {'access_key': access, 'nonce': str(uuid.uuid4())}
+        if params:
+            query = urlencode(params, doseq=True).replace('%5B%5D=', '[]=')
+            payload['query_hash'] = hashlib.sha512(query.encode()).hexdigest()
+            payload['query_hash_alg'] = 'SHA512'
+        headers = {'Authorization': f"Bearer {jwt.encode(payload, secret, algorithm='HS256')}"}
+        if method.upper() == 'GET':
+            return self._send('GET', path, group, params=params, headers=headers)
+        return self._send(method.upper(), path, group, json_body=params, headers=headers)
+
+    # ----- quotation -----
+    @staticmethod
+    def _ohlcv_path(interval: str) -> str:
+        iv = str(interval or 'day')
+        if iv.startswith('minute'):
+            return f"/v1/candles/minutes/{int(iv.replace('minutes', '').replace('minute', ''))}"
+        for name in ('day', 'week', 'month'):
+            if iv.startswith(name):
+                return f"/v1/candles/{name}s"
+        return '/v1/candles/days'
+
+    def get_ohlcv(self, market: str, interval: str = 'day', count: int = 200, to=None):
+        """pyupbit.get_ohlcv equivalent (KST-indexed open/high/low/close/volume/value), None on failure.
+
+        to: last candle time (exclusive); naive values are KST, aware ones are converted.
+        """
+        try:
+            path = self._ohlcv_path(interval)
+            if to is None:
+                cursor = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+            else:
+                # like pyupbit, a naive `to` is KST (the index of the frames it returns); Upbit's `to` is UTC
+                cursor = pd.to_datetime(to).to_pydatetime()
+                if cursor.tzinfo is None:
+                    cursor = cursor.replace(tzinfo=KST)
+                cursor = cursor.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+            rows = []
+            remaining = max(int(count), 1)
+            while remaining > 0:
+                n = min(200, remaining)
+                contents = self.public_get(path, {'market': market, 'count': n,
+                                                  'to': cursor.strftime('%Y-%m-%d %H:%M:%S')}, group='candle')
+                if not contents:
+                    break
+                rows.extend(contents)
+                remaining -= len(contents)
+                if len(contents) < n:
+                    break
+                cursor = datetime.datetime.strptime(contents[-1]['candle_date_time_utc'], '%Y-%m-%dT%H:%M:%S')
+            if not rows:
+                return None
+            index = pd.to_datetime([x['candle_date_time_kst'] for x in rows], format='%Y-%m-%dT%H:%M:%S')
+            df = pd.DataFrame({
+                'open': [x['opening_price'] for x in rows],
+                'high': [x['high_price'] for x in rows],
+                'low': [x['low_price'] for x in rows],
+                'close': [x['trade_price'] for x in rows],
+                'volume': [x['candle_acc_trade_volume'] for x in rows],
+                'value': [x['candle_acc_trade_price'] for x in rows],
+            }, index=index)
+            df = df[~df.index.duplicated(keep='first')].sort_index()
+            return df
+        except Exception as e:
+            print(f"⚠️ gateway get_ohlcv failed ({market} {interval}): {e}")
+            return None
+
+    def get_tickers(self, markets) -> list:
+        markets = [markets] if isinstance(markets, str) else list(markets)
+        out = []
+        for i in range(0, len(markets), 100):
+            out += self.public_get('/v1/ticker', {'markets': ','.join(markets[i:i + 100])}, group='ticker') or []
+        return out
+
+    def get_ticker(self, market: str) -> dict | None:
+        try:
+            data = self.get_tickers(market)
+            return data[0] if data else None
+        except Exception as e:
+            print(f"⚠️ gateway get_ticker failed ({market}): {e}")
+            return None
+
+    def get_current_price(self, markets):
+        """pyupbit.get_current_price equivalent: float for one market, {market: price} for a list."""
+        if isinstance(markets, str) and self._price_source is not None:
+            try:
+                streamed = self._price_source(markets)
+            except Exception:
+                streamed = None
+            if streamed:
+                self._count('ticker.streamed')
+                return float(streamed)
+        try:
+            data = self.get_tickers(markets)
+        except Exception as e:
+            print(f"⚠️ gateway get_current_price failed ({markets}): {e}")
+            return None
+        if isinstance(markets, str) or len(markets) == 1:
+            return float(data[0]['trade_price']) if data else None
+        return {x['market']: float(x['trade_price']) for x in data}
+
+    # ----- exchange -----
+    def get_balances(self, access: str, secret: str) -> list:
+        return self.private_request('GET', '/v1/accounts', access, secret) or []
+
+    def stats(self) -> dict:
+        with self._counters_lock:
+            counters = dict(self._counters)
+        return {'counters': counters, 'latency': self.latency.summary(),
+                'inflight': len(self._inflight)}
+
+
+class GatewayUpbit(pyupbit.Upbit):
+    """pyupbit.Upbit whose balance queries go through the gateway and whose orders share its limits.
+
+    Balances are served from a per-account BalanceService (BALANCE_REFRESH_SEC cadence,
+    BALANCE_MAX_STALE_SEC bound); market orders placed through this client are applied
+    to it locally until the next refresh.
+    """
+
+    def __init__(self, access, secret, gateway: ExchangeGateway | None = None):
+        super().__init__(access, secret)
+        self._gateway = gateway or get_exchange_gateway()
+        self.balances = BalanceService(lambda: self._gateway.get_balances(self.access, self.secret),
+                                       refresh_sec=float(os.getenv('BALANCE_REFRESH_SEC', '5')),
+                                       max_stale_sec=float(os.getenv('BALANCE_MAX_STALE_SEC', '30')))
+
+    def get_balances(self, contain_req=False, max_age=None, force=False):
+        balances = self.balances.balances(max_age=max_age, force=force)
+        return (balances, None) if contain_req else balances
+
+    def get_balance(self, ticker="KRW", verbose=False, contain_req=False, max_age=None, force=False):
+        if verbose:
+            return super().get_balance(ticker, verbose=True, contain_req=contain_req)
+        try:
+            bal = self.balances.balance(ticker, max_age=max_age, force=force)
+        except Exception as e:
+            print(f"⚠️ get_balance failed ({ticker}): {e}")
+            bal = None
+        return (bal, None) if contain_req else bal
+
+    def _fill_price(self, ticker):
+        try:
+            return float(self._gateway.get_current_price(ticker) or 0.0)
+        except Exception:
+            return 0.0
+
+    def buy_market_order(self, ticker, price, *args, **kwargs):
+        with self._gateway.track('order', 'upbit.buy_market_order'):
+            o = pyupbit.Upbit.buy_market_order(self, ticker, price, *args, **kwargs)
+        if isinstance(o, dict) and o.get('uuid'):
+            self.balances.apply_fill(ticker, 'BUY', self._fill_price(ticker), funds=float(price))
+        return o
+
+    def sell_market_order(self, ticker, volume, *args, **kwargs):
+        with self._gateway.track('order', 'upbit.sell_market_order'):
+            o = pyupbit.Upbit.sell_market_order(self, ticker, volume, *args, **kwargs)
+        if isinstance(o, dict) and o.get('uuid'):
+            self.balances.apply_fill(ticker, 'SELL', self._fill_price(ticker), volume=float(volume))
+        return o
+
+
+def _throttled(name: str, group: str):
+    base = getattr(pyupbit.Upbit, name)
+
+    def method(self, *args, **kwargs):
+        with self._gateway.track(group, f'upbit.{name}'):
+            return base(self, *args, **kwargs)
+
+    method.__name__ = name
+    method.__doc__ = base.__doc__
+    return method
+
+
+for _name in ('buy_limit_order', 'sell_limit_order', 'cancel_order'):
+    setattr(GatewayUpbit, _name, _throttled(_name, 'order'))
+for _name in ('get_order', 'get_individual_order', 'get_chance'):
+    if hasattr(pyupbit.Upbit, _name):
+        setattr(GatewayUpbit, _name, _throttled(_name, 'default'))
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+_clients = {}
+
+
+def get_exchange_gateway() -> ExchangeGateway:
+    """전역 ExchangeGateway 인스턴스"""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = ExchangeGateway()
+    return _gateway
+
+
+def balance_status() -> list:
+    """BalanceService status per cached client (access key masked)."""
+    with _gateway_lock:
+        clients = list(_clients.items())
+    return [{'access_key': f"{ak[:4]}…" if ak else None, **client.balances.status()}
+            for (ak, _sk), client in clients]
+
+
+def gateway_upbit(access: str, secret: str) -> GatewayUpbit:
+    """Cached authenticated client per key pair (drop-in for pyupbit.Upbit)."""
+    key = (access, secret)
+    with _gateway_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = GatewayUpbit(access, secret)
+        return client
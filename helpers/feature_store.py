@@ -0,0 +1,150 @@
+"""Append-only feature store keyed by (market, interval, feature-schema hash).
+
+계산된 feature 행을 바 타임스탬프 기준으로 저장해 두고 새로 마감된 바만 이어 붙인다.
+학습은 디스크의 행렬을 memory-map 으로 바로 읽으므로 같은 바 구간이면 언제 다시
+학습해도 동일한 입력이 재현된다.
+
+Layout per key (root/<market>_<interval>_<hash>/):
+  index.i8   int64 bar timestamps (ns), appended
+  values.f8  float64 rows (len(columns) wide), appended
+  meta.json  columns, params, rows, first/last ts
+"""
+
+import os
+import json
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+def schema_hash(columns, params: dict) -> str:
+    """Stable hash of the feature columns and the parameters that produced them."""
+    blob = json.dumps({'columns': list(columns), 'params': params}, sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode('utf-8')).hexdigest()[:12]
+
+
+class FeatureStore:
+    def __init__(self, root: str = 'data/feature_store'):
+        self.root = root
+        self._lock = threading.RLock()
+
+    def _dir(self, market: str, interval: str, shash: str) -> str:
+        safe = f"{market}_{interval}_{shash}".replace('/', '_').replace('\\', '_')
+        return os.path.join(self.root, safe)
+
+    def _load_meta(self, d: str) -> dict | None:
+        try:
+            with open(os.path.join(d, 'meta.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def _save_meta(self, d: str, meta: dict):
+        tmp = os.path.join(d, 'meta.json.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, os.path.join(d, 'meta.json'))
+
+    def append(self, market: str, interval: str, feat: pd.DataFrame, params: dict,
+               final_col: str | None = 'fwd') -> dict:
+        """Append rows of feat newer than the stored last bar.
+
+        feat must hold closed bars only, with final_col left NaN wherever it would
+        reach into the still-open bar (the caller knows the horizon). Rows up to the
+        last known final_col are stored; returns the key meta (incl. 'key', 'dir').
+        """
+        columns = [str(c) for c in feat.columns]
+        shash = schema_hash(columns, params)
+        d = self._dir(market, interval, shash)
+        with self._lock:
+            os.makedirs(d, exist_ok=True)
+            meta = self._load_meta(d)
+            if meta is None or meta.get('columns') != columns:
+                for name in ('index.i8', 'values.f8'):
+                    try:
+                        os.remove(os.path.join(d, name))
+                    except OSError:
+                        pass
+                meta = {'market': market, 'interval': interval, 'schema_hash': shash,
+                        'columns': columns, 'params': params, 'rows': 0,
+                        'first_ts': None, 'last_ts': None}
+            if len(feat) == 0:
+                return dict(meta, key=shash, dir=d)
+            ts = feat.index.values.astype('datetime64[ns]').astype(np.int64)
+            mask = np.ones(len(feat), dtype=bool)
+            if final_col and final_col in feat.columns:
+                known = np.flatnonzero(feat[final_col].notna().values)
+                last_final = ts[known[-1]] if known.size else np.iinfo(np.int64).min
+                mask &= ts <= last_final
+            if meta['last_ts'] is not None:
+                mask &= ts > int(meta['last_ts'])
+            if mask.any():
+                new_ts = ts[mask]
+                new_vals = np.ascontiguousarray(feat.values[mask], dtype=np.float64)
+                self._truncate_to_meta(d, meta)
+                with open(os.path.join(d, 'values.f8'), 'ab') as f:
+                    f.write(new_vals.tobytes())
+                with open(os.path.join(d, 'index.i8'), 'ab') as f:
+                    f.write(new_ts.tobytes())
+                meta['rows'] = int(meta['rows']) + int(mask.sum())
+                if meta['first_ts'] is None:
+                    meta['first_ts'] = int(new_ts[0])
+                meta['last_ts'] = int(new_ts[-1])
+                self._save_meta(d, meta)
+            return dict(meta, key=shash, dir=d)
+
+    @staticmethod
+    def _truncate_to_meta(d: str, meta: dict):
+        """Drop bytes past meta['rows'] left by an interrupted append."""
+        rows = int(meta.get('rows') or 0)
+        for name, width in (('values.f8', 8 * len(meta['columns'])), ('index.i8', 8)):
+            path = os.path.join(d, name)
+            try:
+                if os.path.getsize(path) > rows * width:
+                    os.truncate(path, rows * width)
+            except OSError:
+                pass
+
+    def meta(self, market: str, interval: str, shash: str) -> dict | None:
+        """Stored meta for a key (None when nothing was appended yet)."""
+        return self._load_meta(self._dir(market, interval, shash))
+
+    def read(self, market: str, interval: str, shash: str):
+        """Memory-mapped (index ns int64, values float64 rows x cols, meta) for a key."""
+        d = self._dir(market, interval, shash)
+        meta = self._load_meta(d)
+        if not meta or not meta.get('rows'):
+            return np.empty(0, dtype=np.int64), np.empty((0, len((meta or {}).get('columns', [])))), meta
+        n, c = int(meta['rows']), len(meta['columns'])
+        index = np.memmap(os.path.join(d, 'index.i8'), dtype=np.int64, mode='r', shape=(n,))
+        values = np.memmap(os.path.join(d, 'values.f8'), dtype=np.float64, mode='r', shape=(n, c))
+        return index, values, meta
+
+    def read_frame(self, market: str, interval: str, shash: str, start=None, end=None) -> pd.DataFrame:
+        """Stored rows in [start, end] (timestamps) as a DataFrame (copied out of the memmap)."""
+        index, values, meta = self.read(market, interval, shash)
+        if meta is None or len(index) == 0:
+            return pd.DataFrame(columns=(meta or {}).get('columns', []))
+        lo = 0 if start is None else int(np.searchsorted(index, _to_ns(start), side='left'))
+        hi = len(index) if end is None else int(np.searchsorted(index, _to_ns(end), side='right'))
+        return pd.DataFrame(np.array(values[lo:hi]), index=pd.to_datetime(np.array(index[lo:hi])),
+                            columns=meta['columns'])
+
+
+def _to_ns(ts) -> int:
+    if isinstance(ts, (int, np.integer)):
+        return int(ts)
+    return int(pd.Timestamp(ts).value)
+
+
+_feature_store = None
+
+
+def get_feature_store() -> FeatureStore:
+    """전역 FeatureStore 인스턴스"""
+    global _feature_store
+    if _feature_store is None:
+        _feature_store = FeatureStore()
+    return _feature_store
@@ -176,7 +176,7 @@ def _compute_zone_features(r: pd.Series, close: pd.Series, window: int, HIGH: fl
     blue_min_cur_list = []
     orange_max_cur_list = []
     
-    close_vals = close.astype(float).fillna(method='bfill').fillna(method='ffill').fillna(0.0).values.tolist()
+    close_vals = close.astype(float).bfill().ffill().fillna(0.0).values.tolist()
     r_vals = r.fillna(0.5).astype(float).values.tolist()
     
     for i, rv in enumerate(r_vals):
@@ -0,0 +1,384 @@
+"""Market-data subsystem: WebSocket ticks → in-process bus → local bars.
+
+Upbit WebSocket(ticker/trade/orderbook) 를 마켓별로 구독하고, 수신한 tick 을
+프로세스 내부 bus 로 발행한다. 체결(trade)로 봉을 직접 만들어 캔들 저장소에 반영하고,
+현재가/히스토리/SSE 는 bus 구독자가 갱신한다.
+
+Source 는 교체 가능하다:
+  UpbitWebSocketSource  실시간 (reconnect + backoff, 선택적으로 tick 기록)
+  ReplaySource          기록된 tick(JSONL)을 디스크에서 재생 (오프라인 테스트용)
+"""
+
+import itertools
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from dataclasses import asdict, dataclass, field
+
+try:
+    from websockets.sync.client import connect as ws_connect
+    WEBSOCKETS_AVAILABLE = True
+except ImportError:
+    WEBSOCKETS_AVAILABLE = False
+
+
+UPBIT_WS_URL = 'wss://api.upbit.com/websocket/v1'
+
+
+@dataclass
+class Tick:
+    type: str                  # 'ticker' | 'trade' | 'orderbook'
+    market: str
+    ts: int                    # exchange timestamp (ms)
+    price: float | None = None
+    volume: float | None = None
+    side: str | None = None    # trade: 'ASK' | 'BID'
+    seq: int | None = None     # trade sequential_id
+    extra: dict = field(default_factory=dict)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def from_dict(cls, d: dict) -> 'Tick':
+        return cls(type=d['type'], market=d['market'], ts=int(d['ts']), price=d.get('price'),
+                   volume=d.get('volume'), side=d.get('side'), seq=d.get('seq'), extra=d.get('extra') or {})
+
+
+def parse_upbit_message(msg: dict) -> Tick | None:
+    """Normalize an Upbit WebSocket message (DEFAULT format) into a Tick."""
+    kind = msg.get('type')
+    code = msg.get('code')
+    if not kind or not code:
+        return None
+    if kind == 'ticker':
+        return Tick('ticker', code, int(msg.get('timestamp') or msg.get('trade_timestamp') or 0),
+                    price=float(msg.get('trade_price') or 0.0), volume=msg.get('acc_trade_volume_24h'),
+                    extra={'change_rate': msg.get('signed_change_rate')})
+    if kind == 'trade':
+        return Tick('trade', code, int(msg.get('trade_timestamp') or msg.get('timestamp') or 0),
+                    price=float(msg.get('trade_price') or 0.0), volume=float(msg.get('trade_volume') or 0.0),
+                    side=msg.get('ask_bid'), seq=msg.get('sequential_id'))
+    if kind == 'orderbook':
+        units = msg.get('orderbook_units') or []
+        best = units[0] if units else {}
+        return Tick('orderbook', code, int(msg.get('timestamp') or 0),
+                    extra={'ask': best.get('ask_price'), 'bid': best.get('bid_price'),
+                           'ask_size': best.get('ask_size'), 'bid_size': best.get('bid_size'),
+                           'total_ask_size': msg.get('total_ask_size'),
+                           'total_bid_size': msg.get('total_bid_size')})
+    return None
+
+
+class MarketDataBus:
+    """Synchronous in-process pub/sub. Subscribers run on the source thread and must be quick."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subs = {}
+        self._tokens = itertools.count(1)
+        self._last = {}
+        self.counters = Counter()
+
+    def subscribe(self, callback, types=None) -> int:
+        with self._lock:
+            token = next(self._tokens)
+            self._subs[token] = (callback, set(types) if types else None)
+        return token
+
+    def unsubscribe(self, token: int):
+        with self._lock:
+            self._subs.pop(token, None)
+
+    def publish(self, tick: Tick):
+        self._last[(tick.type, tick.market)] = (tick, time.time())
+        self.counters[tick.type] += 1
+        with self._lock:
+            subs = list(self._subs.values())
+        for cb, types in subs:
+            if types is not None and tick.type not in types:
+                continue
+            try:
+                cb(tick)
+            except Exception:
+                self.counters['subscriber_errors'] += 1
+
+    def last(self, kind: str, market: str, max_age: float | None = None) -> Tick | None:
+        item = self._last.get((kind, market))
+        if item is None:
+            return None
+        tick, at = item
+        if max_age is not None and time.time() - at > max_age:
+            return None
+        return tick
+
+
+class BarBuilder:
+    """Builds OHLCV bars per (market, interval) from trade ticks.
+
+    on_bar(market, interval, bar, closed) is called when a bar closes and, for the open
+    bar, at most once per flush_sec so downstream stores stay current without per-trade work.
+    """
+
+    def __init__(self, intervals: dict, on_bar=None, flush_sec: float = 1.0, keep: int = 500):
+        self.intervals = dict(intervals)     # name -> seconds
+        self.on_bar = on_bar
+        self.flush_sec = float(flush_sec)
+        self._open = {}                      # (market, interval) -> bar dict
+        self._closed = {}                    # (market, interval) -> deque of bars
+        self._last_flush = {}
+        self._keep = keep
+        self._lock = threading.Lock()
+
+    def on_trade(self, tick: Tick):
+        if tick.type != 'trade' or not tick.price:
+            return
+        now = time.time()
+        emits = []
+        with self._lock:
+            for name, sec in self.intervals.items():
+                key = (tick.market, name)
+                start = (tick.ts // 1000 // sec) * sec * 1000
+                bar = self._open.get(key)
+                if bar is not None and start > bar['ts']:
+                    self._closed.setdefault(key, deque(maxlen=self._keep)).append(bar)
+                    emits.append((tick.market, name, bar, True))
+                    bar = None
+                if bar is None:
+                    bar = self._open[key] = {'ts': start, 'open': tick.price, 'high': tick.price,
+                                             'low': tick.price, 'close': tick.price, 'volume': 0.0, 'trades': 0}
+                elif start < bar['ts']:
+                    continue  # late trade for an already closed bar
+                bar['high'] = max(bar['high'], tick.price)
+                bar['low'] = min(bar['low'], tick.price)
+                bar['close'] = tick.price
+                bar['volume'] += float(tick.volume or 0.0)
+                bar['trades'] += 1
+                if now - self._last_flush.get(key, 0.0) >= self.flush_sec:
+                    self._last_flush[key] = now
+                    emits.append((tick.market, name, dict(bar), False))
+        if self.on_bar is not None:
+            for market, name, bar, closed in emits:
+                try:
+                    self.on_bar(market, name, bar, closed)
+                except Exception:
+                    pass
+
+    def bars(self, market: str, interval: str, include_open: bool = True) -> list:
+        with self._lock:
+            out = list(self._closed.get((market, interval), ()))
+            if include_open and (market, interval) in self._open:
+                out.append(dict(self._open[(market, interval)]))
+        return out
+
+
+class MarketDataSource:
+    """Pluggable tick source. Subclasses publish Ticks into the bus from their own thread."""
+
+    name = 'base'
+
+    def __init__(self):
+        self.bus = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.connected = False
+        self.last_error = None
+
+    def start(self, bus: MarketDataBus):
+        self.bus = bus
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f'md-{self.name}', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def set_markets(self, markets):
+        pass
+
+    def _run(self):
+        raise NotImplementedError
+
+    def status(self) -> dict:
+        return {'source': self.name, 'connected': self.connected, 'last_error': self.last_error}
+
+
+class UpbitWebSocketSource(MarketDataSource):
+    name = 'upbit_ws'
+
+    def __init__(self, markets, types=('ticker', 'trade', 'orderbook'), url: str = UPBIT_WS_URL,
+                 record_path: str | None = None, max_backoff: float = 30.0):
+        super().__init__()
+        self.markets = list(dict.fromkeys(markets))
+        self.types = tuple(types)
+        self.url = url
+        self.record_path = record_path
+        self.max_backoff = float(max_backoff)
+        self.reconnects = 0
+        self._ws = None
+        self._resubscribe = threading.Event()
+
+    def set_markets(self, markets):
+        markets = list(dict.fromkeys(markets))
+        if markets != self.markets:
+            self.markets = markets
+            self._resubscribe.set()
+            ws = self._ws
+            if ws is not None:
+                try:
+                    ws.close()  # reconnect with the new subscription
+                except Exception:
+                    pass
+
+    def _subscription(self) -> str:
+        req = [{'ticket': str(uuid.uuid4())}]
+        req += [{'type': t, 'codes': list(self.markets)} for t in self.types]
+        return json.dumps(req)
+
+    def _run(self):
+        backoff = 1.0
+        record = open(self.record_path, 'a', encoding='utf-8') if self.record_path else None
+        try:
+            while not self._stop.is_set():
+                if not self.markets:
+                    self._stop.wait(1.0)
+                    continue
+                try:
+                    with ws_connect(self.url, open_timeout=10, ping_interval=20, ping_timeout=20,
+                                    max_size=2 ** 22) as ws:
+                        self._ws = ws
+                        self._resubscribe.clear()
+                        ws.send(self._subscription())
+                        self.connected = True
+                        while not self._stop.is_set() and not self._resubscribe.is_set():
+                            try:
+                                raw = ws.recv(timeout=1.0)
+                            except TimeoutError:
+                                continue
+                            msg = json.loads(raw.decode('utf-8') if isinstance(raw, bytes) else raw)
+                            tick = parse_upbit_message(msg)
+                            if tick is None:
+                                continue
+                            backoff = 1.0  # healthy stream resets the backoff
+                            self.bus.publish(tick)
+                            if record is not None:
+                                record.write(tick.to_json() + '\n')
+                except Exception as e:
+                    self.last_error = str(e)
+                finally:
+                    self._ws = None
+                    self.connected = False
+                if self._stop.is_set():
+                    break
+                if self._resubscribe.is_set():
+                    continue
+                self.reconnects += 1
+                delay = backoff + random.uniform(0, backoff / 2)
+                backoff = min(self.max_backoff, backoff * 2)
+                self._stop.wait(delay)
+        finally:
+            if record is not None:
+                record.close()
+
+    def status(self) -> dict:
+        return dict(super().status(), markets=list(self.markets), types=list(self.types),
+                    reconnects=self.reconnects, recording=self.record_path)
+
+
+class ReplaySource(MarketDataSource):
+    """Replays recorded ticks (JSONL of Tick dicts). speed=0 replays as fast as possible."""
+
+    name = 'replay'
+
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = False):
+        super().__init__()
+        self.path = path
+        self.speed = float(speed)
+        self.loop = bool(loop)
+        self.replayed = 0
+        self.done = threading.Event()
+
+    def _run(self):
+        self.connected = True
+        try:
+            while not self._stop.is_set():
+                prev_ts = None
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if self._stop.is_set():
+                            break
+                        line = line.strip()
+                        if not line:
+                            continue
+                        tick = Tick.from_dict(json.loads(line))
+                        if self.speed > 0 and prev_ts is not None and tick.ts > prev_ts:
+                            self._stop.wait((tick.ts - prev_ts) / 1000.0 / self.speed)
+                        prev_ts = tick.ts
+                        self.bus.publish(tick)
+                        self.replayed += 1
+                if not self.loop:
+                    break
+        except Exception as e:
+            self.last_error = str(e)
+        finally:
+            self.connected = False
+            self.done.set()
+
+    def status(self) -> dict:
+        return dict(super().status(), path=self.path, speed=self.speed, replayed=self.replayed)
+
+
+class MarketDataService:
+    """Owns the bus, the active source and the bar builder."""
+
+    def __init__(self, source: MarketDataSource, intervals: dict, on_bar=None):
+        self.bus = MarketDataBus()
+        self.source = source
+        self.bars = BarBuilder(intervals, on_bar=on_bar)
+        self.bus.subscribe(self.bars.on_trade, types=('trade',))
+        self.markets = set(getattr(source, 'markets', []) or [])
+        self.started_at = None
+
+    def start(self):
+        self.started_at = time.time()
+        self.source.start(self.bus)
+
+    def stop(self):
+        self.source.stop()
+
+    def ensure_market(self, market: str):
+        if market and market not in self.markets:
+            self.markets.add(market)
+            self.source.set_markets(sorted(self.markets))
+
+    def last_price(self, market: str, max_age: float = 3.0) -> float | None:
+        for kind in ('ticker', 'trade'):
+            tick = self.bus.last(kind, market, max_age=max_age)
+            if tick is not None and tick.price:
+                return float(tick.price)
+        return None
+
+    def status(self) -> dict:
+        return {
+            'source': self.source.status(),
+            'markets': sorted(self.markets),
+            'intervals': list(self.bars.intervals),
+            'counters': dict(self.bus.counters),
+            'started_at': self.started_at,
+        }
+
+
+def source_from_env(markets) -> MarketDataSource | None:
+    """MARKET_DATA_SOURCE = ws (default) | replay | off."""
+    kind = os.getenv('MARKET_DATA_SOURCE', 'ws').lower()
+    if kind == 'replay':
+        path = os.getenv('MARKET_DATA_REPLAY_PATH', 'data/market_ticks.jsonl')
+        return ReplaySource(path, speed=float(os.getenv('MARKET_DATA_REPLAY_SPEED', '1.0')),
+                            loop=os.getenv('MARKET_DATA_REPLAY_LOOP', 'false').lower() == 'true')
+    if kind == 'ws' and WEBSOCKETS_AVAILABLE:
+        return UpbitWebSocketSource(markets, record_path=os.getenv('MARKET_DATA_RECORD') or None)
+    return None
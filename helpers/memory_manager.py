@@ -0,0 +1,313 @@
+"""Memory budgeting for in-process caches (replaces the forced gc.collect loop).
+
+auto_cleanup_worker 가 10초마다 RSS > 20MB 이면 gc.collect() 를 돌리던 방식을 대체한다.
+pandas / sklearn / TensorFlow 가 올라가면 항상 20MB 를 넘으므로 매번 전체 GC 만 돌고 해제되는 것은 거의 없었다.
+- 캐시(candles, 모델 세션, ML 예측, 카드+NBverse 등)를 register() 로 등록하면 항목별 바이트 크기를 추정해 합산
+- 합계가 MEMORY_BUDGET_MB 를 넘거나 RSS 가 MEMORY_RSS_LIMIT_MB 를 넘으면 전체 캐시를 가로질러 LRU 순으로 제거
+  (RSS 초과분은 캐시로 계산된 바이트 안에서만, 한 번의 check 에 MEMORY_RSS_EVICT_MAX 비율까지만 제거.
+   초과분이 캐시 전체보다 크면 대부분 라이브러리 메모리이므로 캐시를 비워도 소용없어 제거하지 않음)
+- freeze_after_startup(): 시작 후 살아남은 객체를 gc.freeze() 로 영구 세대로 옮겨 이후 GC 스캔 비용을 줄임
+- tracemalloc 스냅샷은 요청 시에만 (start → snapshot → top), 평소에는 추적 비용 0
+"""
+
+import gc
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+_MB = 1024 * 1024
+
+
+def estimate_size(obj, depth: int = 4, sample: int = 32) -> int:
+    """Approximate retained bytes of a cache value (DataFrame/ndarray/JSON-like), bounded depth."""
+    nbytes = getattr(obj, 'nbytes', None)
+    if isinstance(nbytes, int) and not hasattr(obj, 'memory_usage'):
+        return nbytes + sys.getsizeof(obj)
+    if hasattr(obj, 'memory_usage'):
+        try:
+            usage = obj.memory_usage(index=True, deep=False)
+            return int(usage.sum() if hasattr(usage, 'sum') else usage)
+        except Exception:
+            pass
+    size = sys.getsizeof(obj)
+    if depth <= 0:
+        return size
+    if isinstance(obj, dict):
+        items = list(obj.items())
+        if not items:
+            return size
+        step = max(1, len(items) // sample)
+        picked = items[::step][:sample]
+        avg = sum(estimate_size(k, depth - 1) + estimate_size(v, depth - 1) for k, v in picked) / len(picked)
+        return int(size + avg * len(items))
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        items = list(obj)
+        if not items:
+            return size
+        step = max(1, len(items) // sample)
+        picked = items[::step][:sample]
+        avg = sum(estimate_size(v, depth - 1) for v in picked) / len(picked)
+        return int(size + avg * len(items))
+    return size
+
+
+def rss_bytes() -> int | None:
+    if not PSUTIL_AVAILABLE:
+        return None
+    try:
+        return int(psutil.Process().memory_info().rss)
+    except Exception:
+        return None
+
+
+class _Cache:
+    __slots__ = ('name', 'mapping', 'sizeof', 'last_used', 'on_evict', 'used', 'sizes', 'evictions', 'evicted_bytes')
+
+    def __init__(self, name, mapping, sizeof, last_used, on_evict):
+        self.name = name
+        self.mapping = mapping
+        self.sizeof = sizeof            # (key, value) -> bytes
+        self.last_used = last_used      # (key, value) -> epoch seconds, None = use touch()
+        self.on_evict = on_evict        # key -> None, default mapping.pop(key)
+        self.used = {}                  # key -> epoch seconds from touch()
+        self.sizes = {}                 # key -> (id(value), bytes): re-estimated only when the value changes
+        self.evictions = 0
+        self.evicted_bytes = 0
+
+    def entries(self) -> list:
+        """[(last_used, key, bytes)] for the current contents."""
+        try:
+            items = list(self.mapping.items())
+        except RuntimeError:            # resized by another thread mid-copy; retry next check
+            return []
+        out = []
+        live = set()
+        for k, v in items:
+            live.add(k)
+            hit = self.sizes.get(k)
+            if hit is not None and hit[0] == id(v):
+                nbytes = hit[1]
+            else:
+                try:
+                    nbytes = int(self.sizeof(k, v))
+                except Exception:
+                    nbytes = sys.getsizeof(v)
+                self.sizes[k] = (id(v), nbytes)
+            if self.last_used is not None:
+                try:
+                    ts = float(self.last_used(k, v))
+                except Exception:
+                    ts = 0.0
+            else:
+                ts = self.used.get(k, 0.0)
+            out.append((ts, k, nbytes))
+        for k in [k for k in self.sizes if k not in live]:
+            self.sizes.pop(k, None)
+            self.used.pop(k, None)
+        return out
+
+    def evict(self, key, nbytes: int):
+        if self.on_evict is not None:
+            self.on_evict(key)
+        else:
+            self.mapping.pop(key, None)
+        self.sizes.pop(key, None)
+        self.used.pop(key, None)
+        self.evictions += 1
+        self.evicted_bytes += nbytes
+
+
+class MemoryManager:
+    """Registered caches share one byte budget; the least recently used entries go first."""
+
+    def __init__(self, budget_mb: float = 256.0, rss_limit_mb: float | None = None, low_water: float = 0.8,
+                 rss_evict_max: float = 0.25):
+        self.budget = int(float(budget_mb) * _MB) if budget_mb else None
+        self.rss_limit = int(float(rss_limit_mb) * _MB) if rss_limit_mb else None
+        self.low_water = min(1.0, max(0.1, float(low_water)))
+        self.rss_evict_max = min(1.0, max(0.0, float(rss_evict_max)))
+        self._caches = {}
+        self._lock = threading.Lock()
+        self._tm_snapshot = None
+        self._tm_started_here = False
+        self.frozen = None
+        self.stats = {'checks': 0, 'evictions': 0, 'evicted_bytes': 0, 'last_check': None,
+                      'last_total_bytes': 0, 'last_rss_bytes': None, 'last_evicted': 0, 'rss_unreclaimable': False}
+
+    # ----- registration -----
+    def register(self, name: str, mapping, sizeof=None, last_used=None, on_evict=None):
+        """Track a dict-like cache. sizeof/last_used take (key, value); without last_used call touch()."""
+        with self._lock:
+            self._caches[name] = _Cache(name, mapping, sizeof or (lambda k, v: estimate_size(v)),
+                                        last_used, on_evict)
+        return mapping
+
+    def touch(self, name: str, key):
+        """Mark key as used now (cache hit / insert) for LRU ordering."""
+        cache = self._caches.get(name)
+        if cache is not None:
+            cache.used[key] = time.time()
+
+    # ----- budgeting -----
+    def _target(self, total: int, rss: int | None) -> int | None:
+        """Cache bytes to shrink to, or None for no eviction."""
+        target = None
+        if self.budget is not None and total > self.budget:
+            target = int(self.budget * self.low_water)
+        self.stats['rss_unreclaimable'] = False
+        if self.rss_limit is not None and rss is not None and rss > self.rss_limit:
+            excess = rss - int(self.rss_limit * self.low_water)
+            if excess >= total:
+                # RSS is mostly libraries / non-cache memory: emptying the caches would not get under the limit
+                self.stats['rss_unreclaimable'] = True
+            else:
+                floor = total - int(total * self.rss_evict_max)
+                rss_target = max(floor, total - excess)
+                target = min(target, rss_target) if target is not None else rss_target
+        return target
+
+    def check(self) -> dict:
+        """Evict LRU entries across caches while over budget; returns {cache: evicted count}."""
+        with self._lock:
+            caches = list(self._caches.values())
+            entries = []
+            for c in caches:
+                entries.extend((ts, c, k, n) for ts, k, n in c.entries())
+            total = sum(e[3] for e in entries)
+            rss = rss_bytes()
+            target = self._target(total, rss)
+            evicted = {}
+            if target is not None:
+                entries.sort(key=lambda e: e[0])
+                for ts, c, k, n in entries:
+                    if total <= target:
+                        break
+                    try:
+                        c.evict(k, n)
+                    except Exception as e:
+                        print(f"⚠️ cache evict failed ({c.name}): {e}")
+                        continue
+                    total -= n
+                    evicted[c.name] = evicted.get(c.name, 0) + 1
+                    self.stats['evictions'] += 1
+                    self.stats['evicted_bytes'] += n
+            self.stats['checks'] += 1
+            self.stats['last_check'] = time.time()
+            self.stats['last_total_bytes'] = total
+            self.stats['last_rss_bytes'] = rss
+            self.stats['last_evicted'] = sum(evicted.values())
+            return evicted
+
+    def cache_bytes(self) -> dict:
+        with self._lock:
+            return {c.name: sum(n for _, _, n in c.entries()) for c in self._caches.values()}
+
+    def clear(self, name: str | None = None) -> int:
+        """Evict every entry of one cache (or all caches); returns the number removed."""
+        removed = 0
+        with self._lock:
+            for c in list(self._caches.values()):
+                if name is not None and c.name != name:
+                    continue
+                for _, k, n in c.entries():
+                    c.evict(k, n)
+                    removed += 1
+        return removed
+
+    # ----- gc -----
+    def freeze_after_startup(self) -> int | None:
+        """Collect once, then move survivors (modules, models, config) out of future GC scans."""
+        if not hasattr(gc, 'freeze'):
+            return None
+        gc.collect()
+        gc.freeze()
+        self.frozen = gc.get_freeze_count()
+        return self.frozen
+
+    # ----- tracemalloc (on demand) -----
+    def tracemalloc_start(self, nframes: int = 1) -> bool:
+        if tracemalloc.is_tracing():
+            return False
+        tracemalloc.start(max(1, int(nframes)))
+        self._tm_started_here = True
+        self._tm_snapshot = None
+        return True
+
+    def tracemalloc_stop(self) -> bool:
+        if not tracemalloc.is_tracing():
+            return False
+        tracemalloc.stop()
+        self._tm_started_here = False
+        self._tm_snapshot = None
+        return True
+
+    def tracemalloc_top(self, limit: int = 20, key_type: str = 'lineno', compare: bool = True) -> dict:
+        """Top allocation sites; with compare, growth since the previous snapshot."""
+        if not tracemalloc.is_tracing():
+            return {'tracing': False, 'top': []}
+        snap = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+        prev, self._tm_snapshot = self._tm_snapshot, snap
+        if compare and prev is not None:
+            stats = snap.compare_to(prev, key_type)[:int(limit)]
+            top = [{'where': str(s.traceback), 'size_kb': round(s.size / 1024, 1),
+                    'diff_kb': round(s.size_diff / 1024, 1), 'count': s.count, 'count_diff': s.count_diff}
+                   for s in stats]
+        else:
+            stats = snap.statistics(key_type)[:int(limit)]
+            top = [{'where': str(s.traceback), 'size_kb': round(s.size / 1024, 1), 'count': s.count}
+                   for s in stats]
+        current, peak = tracemalloc.get_traced_memory()
+        return {'tracing': True, 'compared': bool(compare and prev is not None),
+                'traced_mb': round(current / _MB, 2), 'peak_mb': round(peak / _MB, 2), 'top': top}
+
+    # ----- report -----
+    def report(self) -> dict:
+        now = time.time()
+        caches = {}
+        total = 0
+        with self._lock:
+            for c in self._caches.values():
+                entries = c.entries()
+                nbytes = sum(n for _, _, n in entries)
+                total += nbytes
+                oldest = min((ts for ts, _, _ in entries if ts), default=None)
+                caches[c.name] = {'entries': len(entries), 'mb': round(nbytes / _MB, 3),
+                                  'oldest_age_sec': round(now - oldest, 1) if oldest else None,
+                                  'evictions': c.evictions, 'evicted_mb': round(c.evicted_bytes / _MB, 3)}
+        rss = rss_bytes()
+        return {
+            'caches': caches,
+            'total_mb': round(total / _MB, 3),
+            'budget_mb': round(self.budget / _MB, 1) if self.budget else None,
+            'rss_mb': round(rss / _MB, 1) if rss else None,
+            'rss_limit_mb': round(self.rss_limit / _MB, 1) if self.rss_limit else None,
+            'gc': {'counts': gc.get_count(), 'frozen': gc.get_freeze_count() if hasattr(gc, 'get_freeze_count') else None,
+                   'collections': [s.get('collections') for s in gc.get_stats()]},
+            'tracemalloc': tracemalloc.is_tracing(),
+            **{k: v for k, v in self.stats.items()},
+        }
+
+
+_manager = None
+
+
+def get_memory_manager() -> MemoryManager:
+    """전역 MemoryManager 인스턴스"""
+    global _manager
+    if _manager is None:
+        _manager = MemoryManager(budget_mb=float(os.getenv('MEMORY_BUDGET_MB', '256')),
+                                 rss_limit_mb=float(os.getenv('MEMORY_RSS_LIMIT_MB', '0')) or None,
+                                 low_water=float(os.getenv('MEMORY_LOW_WATER', '0.8')),
+                                 rss_evict_max=float(os.getenv('MEMORY_RSS_EVICT_MAX', '0.25')))
+    return _manager
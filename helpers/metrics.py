@@ -0,0 +1,282 @@
+"""Lightweight metrics registry (counters, gauges, fixed-bucket histograms).
+
+print/logger 외에 운영 중 시간이 어디에 쓰이는지 볼 수 있도록 핫패스에 타이머를 단다.
+- Counter / Gauge / Histogram: 라벨별 값, 히스토그램은 고정 버킷 (초 단위)
+- timed(name) 데코레이터, timer(name) 컨텍스트 매니저
+- render(): Prometheus text exposition format (/metrics); render(process=...) adds a const label and
+  merge_expositions() joins several processes' output under one HELP/TYPE per family
+METRICS_ENABLED=false 이면 관측 한 번이 플래그 확인 한 번으로 끝난다 (1µs 미만).
+"""
+
+import os
+import threading
+from bisect import bisect_left
+import time
+from functools import wraps
+
+# seconds: 0.1ms .. 30s (covers BIT math up to exchange round trips)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_perf = time.perf_counter
+
+
+def _label_key(labelnames, labels: dict) -> tuple:
+    return tuple(str(labels.get(n, '')) for n in labelnames)
+
+
+def _fmt_labels(labelnames, key, extra: str = '') -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(labelnames, key)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _escape(v: str) -> str:
+    return str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _fmt_num(v: float) -> str:
+    if v == float('inf'):
+        return '+Inf'
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, registry, name: str, help: str = '', labelnames=()):
+        self._registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _header(self) -> list:
+        return [f'# HELP {self.name} {self.help or self.name}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels):
+        if not self._registry.enabled:
+            return
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self, extra: str = '') -> list:
+        with self._lock:
+            items = list(self._values.items())
+        return self._header() + [f'{self.name}{_fmt_labels(self.labelnames, k, extra)} {_fmt_num(v)}' for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, registry, name, help='', labelnames=(), fn=None):
+        super().__init__(registry, name, help, labelnames)
+        self._fn = fn                       # callable evaluated at scrape time (unlabelled)
+
+    def set(self, value: float, **labels):
+        if not self._registry.enabled:
+            return
+        with self._lock:
+            self._values[_label_key(self.labelnames, labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        if not self._registry.enabled:
+            return
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def render(self, extra: str = '') -> list:
+        if self._fn is not None:
+            try:
+                self.set(float(self._fn()))
+            except Exception:
+                pass
+        with self._lock:
+            items = list(self._values.items())
+        return self._header() + [f'{self.name}{_fmt_labels(self.labelnames, k, extra)} {_fmt_num(v)}' for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, registry, name, help='', labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        if not self._registry.enabled:
+            return
+        self._observe(_label_key(self.labelnames, labels), value)
+
+    def _observe(self, key: tuple, value: float):
+        with self._lock:
+            st = self._values.get(key)
+            if st is None:
+                st = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]  # counts, sum, count
+            st[0][bisect_left(self.buckets, value)] += 1
+            st[1] += value
+            st[2] += 1
+
+    def render(self, extra: str = '') -> list:
+        with self._lock:
+            items = [(k, (list(v[0]), v[1], v[2])) for k, v in self._values.items()]
+        out = self._header()
+        for key, (counts, total, n) in items:
+            acc = 0
+            for b, c in zip(self.buckets + (float('inf'),), counts):
+                acc += c
+                le = 'le="%s"' % _fmt_num(b)
+                out.append(f'{self.name}_bucket{_fmt_labels(self.labelnames, key, extra + "," + le if extra else le)} {acc}')
+            out.append(f'{self.name}_sum{_fmt_labels(self.labelnames, key, extra)} {_fmt_num(total)}')
+            out.append(f'{self.name}_count{_fmt_labels(self.labelnames, key, extra)} {n}')
+        return out
+
+    def summary(self) -> dict:
+        """count / mean per label set (for JSON status endpoints)."""
+        with self._lock:
+            return {','.join(k) or '_': {'count': v[2], 'mean_ms': round(v[1] * 1000.0 / v[2], 3) if v[2] else None}
+                    for k, v in self._values.items()}
+
+
+class _Timer:
+    __slots__ = ('hist', 'key', 't0')
+
+    def __init__(self, hist, key):
+        self.hist = hist
+        self.key = key
+
+    def __enter__(self):
+        self.t0 = _perf()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist._observe(self.key, _perf() - self.t0)
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopTimer()
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool = True):
+        self.enabled = bool(enabled)
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _get(self, cls, name, **kwargs):
+        m = self._metrics.get(name)
+        if m is None:
+            with self._lock:
+                m = self._metrics.get(name)
+                if m is None:
+                    m = self._metrics[name] = cls(self, name, **kwargs)
+        return m
+
+    def counter(self, name: str, help: str = '', labelnames=()) -> Counter:
+        return self._get(Counter, name, help=help, labelnames=labelnames)
+
+    def gauge(self, name: str, help: str = '', labelnames=(), fn=None) -> Gauge:
+        return self._get(Gauge, name, help=help, labelnames=labelnames, fn=fn)
+
+    def histogram(self, name: str, help: str = '', labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help=help, labelnames=labelnames, buckets=buckets)
+
+    def timer(self, name: str, help: str = '', **labels):
+        """with timer('x_seconds', stage='load'): ...  - no-op when disabled."""
+        if not self.enabled:
+            return _NOOP
+        hist = self.histogram(name, help, labelnames=tuple(labels))
+        return _Timer(hist, _label_key(hist.labelnames, labels))
+
+    def timed(self, name: str, help: str = '', **labels):
+        """Decorator recording the wrapped call's duration into histogram `name`."""
+        def deco(fn):
+            hist = self.histogram(name, help or f'{fn.__name__} duration (seconds)', labelnames=tuple(labels))
+            key = _label_key(hist.labelnames, labels)
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                t0 = _perf()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    hist._observe(key, _perf() - t0)
+            wrapper.__wrapped__ = fn
+            return wrapper
+        return deco
+
+    def render(self, **const_labels) -> str:
+        """Exposition text; const_labels (e.g. process='1234') are added to every sample."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        extra = ','.join(f'{k}="{_escape(v)}"' for k, v in const_labels.items())
+        lines = []
+        for m in metrics:
+            lines.extend(m.render(extra))
+        return '\n'.join(lines) + '\n'
+
+
+def merge_expositions(texts) -> str:
+    """Merge exposition texts from several processes: one HELP/TYPE header per family.
+
+    Samples must already be told apart by a const label (render(process=...)).
+    """
+    families = {}
+    for text in texts:
+        name = None
+        for line in (text or '').splitlines():
+            if line.startswith('# HELP ') or line.startswith('# TYPE '):
+                name = line.split(' ', 3)[2]
+                headers = families.setdefault(name, ([], []))[0]
+                if len(headers) < 2 and line[:6] not in (h[:6] for h in headers):
+                    headers.append(line)
+            elif line and name is not None:
+                families[name][1].append(line)
+    lines = []
+    for name in sorted(families):
+        headers, samples = families[name]
+        lines.extend(headers)
+        lines.extend(samples)
+    return '\n'.join(lines) + '\n'
+
+
+_registry = None
+
+
+def get_registry() -> MetricsRegistry:
+    """전역 MetricsRegistry 인스턴스"""
+    global _registry
+    if _registry is None:
+        _registry = MetricsRegistry(enabled=os.getenv('METRICS_ENABLED', 'true').lower() == 'true')
+    return _registry
+
+
+def timed(name: str, help: str = '', **labels):
+    return get_registry().timed(name, help, **labels)
+
+
+def timer(name: str, help: str = '', **labels):
+    return get_registry().timer(name, help, **labels)
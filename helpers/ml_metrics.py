@@ -0,0 +1,115 @@
+"""Background ML metrics service.
+
+모델 pack 에 metrics 가 없을 때 요청 스레드에서 계산하지 않고 백그라운드에서 계산해
+pack 버전별로 캐시한다. 계산 중에는 이전(stale) 값과 computing 플래그를 돌려준다.
+모델 파일은 건드리지 않고 결과는 별도 JSON 캐시에만 저장한다.
+"""
+
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class MetricsService:
+    def __init__(self, cache_path: str = 'data/ml_metrics_cache.json', max_workers: int = 1,
+                 retry_after_sec: float = 60.0):
+        self.cache_path = cache_path
+        self.retry_after_sec = retry_after_sec
+        self._lock = threading.Lock()
+        self._cache = {}      # key -> {'version', 'metrics', 'computed_at', 'elapsed_ms'}
+        self._inflight = {}   # key -> version being computed
+        self._errors = {}     # key -> (version, error string, failed_at)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ml-metrics')
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._cache = data
+        except Exception:
+            self._cache = {}
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+            tmp = self.cache_path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._cache, f, ensure_ascii=False)
+            os.replace(tmp, self.cache_path)
+        except Exception as e:
+            print(f"⚠️ ML metrics cache save failed: {e}")
+
+    def put(self, key: str, version: str, metrics: dict, elapsed_ms: float = 0.0):
+        """Store metrics computed elsewhere (e.g. at train time) for key@version."""
+        with self._lock:
+            self._cache[key] = {'version': version, 'metrics': metrics,
+                                'computed_at': int(time.time() * 1000), 'elapsed_ms': float(elapsed_ms)}
+            self._errors.pop(key, None)
+            self._save()
+
+    def get(self, key: str, version: str, compute=None) -> dict:
+        """Cached metrics for key. Never blocks on computation.
+
+        Returns {'metrics', 'version', 'stale', 'computing', 'computed_at', 'error'}.
+        When the cached entry is missing or belongs to another version and compute
+        is given, compute() is scheduled in the background (once per version).
+        """
+        with self._lock:
+            entry = self._cache.get(key)
+            fresh = entry is not None and entry.get('version') == version
+            computing = self._inflight.get(key) == version
+            err = self._errors.get(key)
+            backoff = err is not None and err[0] == version and time.time() - err[2] < self.retry_after_sec
+            if not fresh and not computing and not backoff and compute is not None:
+                self._inflight[key] = version
+                computing = True
+                self._executor.submit(self._run, key, version, compute)
+            return {
+                'metrics': (entry or {}).get('metrics'),
+                'version': (entry or {}).get('version'),
+                'stale': not fresh,
+                'computing': computing,
+                'computed_at': (entry or {}).get('computed_at'),
+                'error': err[1] if err else None,
+            }
+
+    def _run(self, key: str, version: str, compute):
+        t0 = time.perf_counter()
+        try:
+            metrics = compute()
+            if not metrics:
+                raise ValueError('empty metrics')
+            self.put(key, version, metrics, (time.perf_counter() - t0) * 1000.0)
+        except Exception as e:
+            with self._lock:
+                self._errors[key] = (version, str(e), time.time())
+            print(f"⚠️ ML metrics compute failed ({key}): {e}")
+        finally:
+            with self._lock:
+                if self._inflight.get(key) == version:
+                    self._inflight.pop(key, None)
+
+
+def pack_version(path: str, pack: dict | None = None) -> str:
+    """Version tag for a saved model pack: file mtime plus trained_at when present."""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = 0
+    trained_at = (pack or {}).get('trained_at') if isinstance(pack, dict) else None
+    return f"{mtime}:{trained_at or ''}"
+
+
+_metrics_service = None
+
+
+def get_metrics_service() -> MetricsService:
+    """전역 MetricsService 인스턴스"""
+    global _metrics_service
+    if _metrics_service is None:
+        _metrics_service = MetricsService()
+    return _metrics_service
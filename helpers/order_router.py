@@ -0,0 +1,544 @@
+"""Order router: idempotent submission, off-thread execution, async fill tracking.
+
+주문 경로(수동 매수/매도 API, trade_loop, 멀티 인스턴스 엔진)가 공유하는 라우터.
+- 인증된 거래소 클라이언트 하나를 소유하고 market 별로 주문을 직렬화한다
+- idempotency key(버킷 + side + 인스턴스)로 같은 주문의 중복 제출을 막는다
+- 거래소 호출은 라우터 워커에서, 체결 확인(get_order)은 추적 스레드에서 수행한다
+- 후속 기록(카드, NB 코인, 로그)은 호출자가 티켓에 on_placed / on_fill 콜백으로 건다
+  (대기 시간을 넘긴 주문도 거래소 응답이 오면 그때 기록된다). 콜백은 별도 콜백 풀에서 실행되어
+  느린 파일 I/O 가 다른 티켓의 주문 제출 / 체결 추적을 막지 않는다
+PaperExchange 는 pyupbit 호환 모의 거래소로, 키 없이 전체 경로를 부하 테스트할 때 쓴다.
+"""
+
+import os
+import threading
+import time
+import uuid as uuidlib
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from trade import Trader, TradeConfig
+from helpers.metrics import timed
+
+
+# Counted per router (status()['events']); terminal ticket states are the last five
+ORDER_EVENTS = ('order.submitted', 'order.duplicate', 'order.filled', 'order.timeout',
+                'order.cancelled', 'order.rejected', 'order.failed')
+
+
+def idempotency_key(bucket, side: str, instance: str) -> str:
+    """Key for 'one order per (instance, side, bar bucket)'."""
+    return f"{instance}:{str(side).upper()}:{bucket}"
+
+
+@dataclass
+class OrderRequest:
+    market: str
+    side: str
+    price: float
+    krw: int | None = None           # BUY notional (falls back to 5,000)
+    size: float | None = None        # explicit SELL volume; None → Trader sizing
+    pnl_ratio: float = 0.0
+    pnl_profit_ratio: float = 0.0
+    pnl_loss_ratio: float = 0.0
+    paper: bool = True
+    key: str | None = None           # idempotency key; None → never deduplicated
+    source: str = 'api'              # api | trade_loop | <engine instance id>
+    meta: dict = field(default_factory=dict)
+
+
+class OrderTicket:
+    """Handle for one submitted order.
+
+    status: queued → placed → filled | timeout | cancelled, or queued → rejected | failed | cancelled.
+    """
+
+    def __init__(self, req: OrderRequest):
+        self.req = req
+        self.key = req.key or f"anon:{uuidlib.uuid4().hex}"
+        self.status = 'queued'
+        self.result = None           # raw Trader / exchange response
+        self.fill = None             # {'uuid', 'state', 'executed_volume', 'avg_price', 'paid_fee', 'confirmed'}
+        self.error = None
+        self.duplicates = 0
+        self.created_at = time.time()
+        self.placed_at = None
+        self.filled_at = None
+        self._placed = threading.Event()
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._started = False
+        self._placed_callbacks = []
+        self._fill_callbacks = []
+        self._dispatch = None        # router's callback pool submit; None → run inline
+
+    def wait(self, timeout: float | None = None, until: str = 'placed') -> bool:
+        """Block until the exchange call returned ('placed') or the order is terminal ('done')."""
+        return (self._done if until == 'done' else self._placed).wait(timeout)
+
+    def cancel(self) -> bool:
+        """Withdraw a ticket that has not reached the exchange yet; False once the call is in flight."""
+        with self._lock:
+            if self._started or self.status != 'queued':
+                return False
+            self.status = 'cancelled'
+            self.error = 'cancelled before submission'
+            callbacks, self._placed_callbacks, self._fill_callbacks = self._placed_callbacks, [], []
+        self._placed.set()
+        self._done.set()
+        self._call((callbacks, 'placed'))  # caller's thread, not a router worker
+        return True
+
+    def on_placed(self, fn):
+        """Call fn(ticket) once the exchange call returned (any outcome); immediately when it already has."""
+        with self._lock:
+            if not self._placed.is_set():
+                self._placed_callbacks.append(fn)
+                return
+        fn(self)
+
+    def on_fill(self, fn):
+        """Call fn(ticket) once an execution is confirmed; never for timeouts, cancels or 0 volume."""
+        with self._lock:
+            if self.status != 'filled':
+                if not self._done.is_set():
+                    self._fill_callbacks.append(fn)
+                return
+        fn(self)
+
+    def _claim(self) -> bool:
+        """Router worker takes the ticket; False when it was cancelled while queued."""
+        with self._lock:
+            if self.status != 'queued':
+                return False
+            self._started = True
+            return True
+
+    def _mark_placed(self):
+        with self._lock:
+            self.status = 'placed'
+            callbacks, self._placed_callbacks = self._placed_callbacks, []
+            self._placed.set()
+        self._run((callbacks, 'placed'))
+
+    def _finish(self, status: str):
+        with self._lock:
+            self.status = status
+            placed, self._placed_callbacks = self._placed_callbacks, []
+            filled, self._fill_callbacks = (self._fill_callbacks, []) if status == 'filled' else ([], [])
+            self._placed.set()
+            self._done.set()
+        self._run((placed, 'placed'), (filled, 'fill'))  # one job: placed bookkeeping before fills
+
+    def _run(self, *groups):
+        """Hand callbacks off the router worker / fill tracker to the callback pool."""
+        if not any(callbacks for callbacks, _ in groups):
+            return
+        if self._dispatch is None:
+            self._call(*groups)
+        else:
+            self._dispatch(self._call, *groups)
+
+    def _call(self, *groups):
+        for callbacks, kind in groups:
+            for fn in callbacks:
+                try:
+                    fn(self)
+                except Exception as e:
+                    print(f"⚠️ Order {kind} callback failed ({self.key}): {e}")
+
+    def to_dict(self) -> dict:
+        r = self.req
+        return {
+            'key': self.key, 'status': self.status, 'market': r.market, 'side': r.side,
+            'price': r.price, 'krw': r.krw, 'size': r.size, 'paper': r.paper, 'source': r.source,
+            'fill': self.fill, 'error': self.error, 'duplicates': self.duplicates,
+            'created_at': self.created_at, 'placed_at': self.placed_at, 'filled_at': self.filled_at,
+        }
+
+
+class PaperExchange:
+    """pyupbit.Upbit-compatible simulated account (market orders only).
+
+    price_fn(market) supplies the fill price; fills become 'done' after fill_delay_sec
+    so the async tracking path is exercised like a real exchange.
+    """
+
+    def __init__(self, price_fn, krw: float = 1_000_000.0, fee_rate: float = 0.0005,
+                 latency_sec: float = 0.0, fill_delay_sec: float = 0.0, slippage_bp: float = 0.0):
+        self.price_fn = price_fn
+        self.fee_rate = float(fee_rate)
+        self.latency_sec = float(latency_sec)
+        self.fill_delay_sec = float(fill_delay_sec)
+        self.slippage_bp = float(slippage_bp)
+        self._lock = threading.Lock()
+        self._balances = {'KRW': float(krw)}
+        self._avg = {}
+        self._orders = {}
+
+    def _sleep(self):
+        if self.latency_sec > 0:
+            time.sleep(self.latency_sec)
+
+    def get_balances(self, contain_req=False):
+        self._sleep()
+        with self._lock:
+            out = [{'currency': c, 'balance': f'{b:.8f}', 'locked': '0',
+                    'avg_buy_price': str(self._avg.get(c, 0.0)), 'avg_buy_price_modified': False,
+                    'unit_currency': 'KRW'} for c, b in self._balances.items()]
+        return (out, None) if contain_req else out
+
+    def get_balance(self, ticker='KRW', verbose=False, contain_req=False):
+        currency = ticker.split('-')[-1]
+        with self._lock:
+            bal = float(self._balances.get(currency, 0.0))
+        return (bal, None) if contain_req else bal
+
+    def _book(self, market, side, price, volume, funds):
+        currency = market.split('-')[-1]
+        fee = funds * self.fee_rate
+        with self._lock:
+            if side == 'bid':
+                if self._balances.get('KRW', 0.0) < funds + fee:
+                    return {'error': {'name': 'insufficient_funds_bid', 'message': 'paper: insufficient KRW'}}
+                held = self._balances.get(currency, 0.0)
+                self._avg[currency] = (self._avg.get(currency, 0.0) * held + funds) / (held + volume)
+                self._balances['KRW'] -= funds + fee
+                self._balances[currency] = held + volume
+            else:
+                if self._balances.get(currency, 0.0) + 1e-12 < volume:
+                    return {'error': {'name': 'insufficient_funds_ask', 'message': f'paper: insufficient {currency}'}}
+                self._balances[currency] -= volume
+                self._balances['KRW'] = self._balances.get('KRW', 0.0) + funds - fee
+            oid = f"paper-{uuidlib.uuid4().hex}"
+            self._orders[oid] = {'uuid': oid, 'side': side, 'ord_type': 'price' if side == 'bid' else 'market',
+                                 'market': market, 'created_at': time.time(), 'executed_volume': str(volume),
+                                 'avg_price': str(price), 'paid_fee': str(fee),
+                                 'trades': [{'price': str(price), 'volume': str(volume), 'funds': str(funds)}]}
+        return {'uuid': oid, 'side': side, 'market': market, 'state': 'wait'}
+
+    def _fill_price(self, market, side):
+        p = float(self.price_fn(market) or 0.0)
+        slip = self.slippage_bp / 10000.0
+        return p * (1.0 + slip) if side == 'bid' else p * (1.0 - slip)
+
+    def buy_market_order(self, ticker, price, *args, **kwargs):
+        self._sleep()
+        px = self._fill_price(ticker, 'bid')
+        if px <= 0:
+            return None
+        return self._book(ticker, 'bid', px, float(price) / px, float(price))
+
+    def sell_market_order(self, ticker, volume, *args, **kwargs):
+        self._sleep()
+        px = self._fill_price(ticker, 'ask')
+        if px <= 0:
+            return None
+        return self._book(ticker, 'ask', px, float(volume), float(volume) * px)
+
+    def get_order(self, ticker_or_uuid, *args, **kwargs):
+        self._sleep()
+        with self._lock:
+            o = self._orders.get(ticker_or_uuid)
+            if o is None:
+                return None
+            done = time.time() - o['created_at'] >= self.fill_delay_sec
+            return {**o, 'state': 'done' if done else 'wait',
+                    'executed_volume': o['executed_volume'] if done else '0'}
+
+
+def _fill_from_detail(detail: dict) -> dict:
+    """Upbit get_order() detail → executed volume / average price / fee."""
+    try:
+        ex_vol = float(detail.get('executed_volume') or 0.0)
+    except (TypeError, ValueError):
+        ex_vol = 0.0
+    try:
+        avg_price = float(detail.get('avg_price') or 0.0)
+    except (TypeError, ValueError):
+        avg_price = 0.0
+    trades = detail.get('trades') if isinstance(detail.get('trades'), list) else []
+    if avg_price <= 0.0 and trades:
+        funds = vol = 0.0
+        for t in trades:
+            try:
+                p, v = float(t.get('price') or 0.0), float(t.get('volume') or 0.0)
+            except (TypeError, ValueError):
+                continue
+            funds += p * v
+            vol += v
+        if vol > 0:
+            avg_price = funds / vol
+            ex_vol = ex_vol or vol
+    try:
+        fee = float(detail.get('paid_fee') or 0.0)
+    except (TypeError, ValueError):
+        fee = 0.0
+    return {'uuid': detail.get('uuid'), 'state': detail.get('state'), 'executed_volume': ex_vol,
+            'avg_price': avg_price, 'paid_fee': fee}
+
+
+class OrderRouter:
+    def __init__(self, make_client, paper_client=None, workers: int = 2, dedupe_ttl_sec: float = 6 * 3600,
+                 fill_poll_sec: float = 0.3, fill_timeout_sec: float = 30.0, max_tickets: int = 5000,
+                 callback_workers: int = 2):
+        self._make_client = make_client
+        self.paper_client = paper_client
+        self.dedupe_ttl_sec = float(dedupe_ttl_sec)
+        self.fill_poll_sec = float(fill_poll_sec)
+        self.fill_timeout_sec = float(fill_timeout_sec)
+        self.max_tickets = int(max_tickets)
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._market_locks = {}
+        self._traders = {}
+        self._tickets = OrderedDict()   # key -> OrderTicket (insertion = submission order)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix='order-router')
+        # on_placed / on_fill bookkeeping (cards, NB coins, journals) - never on the order workers
+        self._callbacks = ThreadPoolExecutor(max_workers=max(1, int(callback_workers)),
+                                             thread_name_prefix='order-callbacks')
+        self._tracking = []              # (ticket, client, uuid, deadline)
+        self._track_cond = threading.Condition()
+        self._tracker = None
+        self.counters = Counter()
+
+    # ----- client -----
+    def client(self):
+        """The router's authenticated client (created once via make_client)."""
+        with self._client_lock:
+            if self._client is None:
+                try:
+                    self._client = self._make_client()
+                except Exception as e:
+                    print(f"⚠️ Order router exchange client unavailable: {e}")
+            return self._client
+
+    def reset_client(self):
+        """Drop the cached client (e.g. after API keys change)."""
+        with self._client_lock:
+            self._client = None
+        with self._lock:
+            self._traders.clear()
+
+    def _count(self, event: str):
+        self.counters[event] += 1
+
+    # ----- submission -----
+    def _evict(self, now: float):
+        while self._tickets:
+            t = next(iter(self._tickets.values()))
+            expired = now - t.created_at >= self.dedupe_ttl_sec
+            if len(self._tickets) > self.max_tickets or (expired and t._done.is_set()):
+                self._tickets.popitem(last=False)
+            else:
+                break
+
+    def submit(self, req: OrderRequest) -> OrderTicket:
+        """Queue an order; a pending/placed/filled ticket with the same key is returned instead.
+
+        Failed, rejected and cancelled tickets do not block a retry under the same key; a timed-out
+        one does (the exchange may still execute it).
+        """
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            prev = self._tickets.get(req.key) if req.key else None
+            if prev is not None and prev.status not in ('failed', 'rejected', 'cancelled'):
+                prev.duplicates += 1
+                dup = True
+            else:
+                ticket = OrderTicket(req)
+                ticket._dispatch = self._callbacks.submit
+                self._tickets[ticket.key] = ticket
+                dup = False
+        if dup:
+            self._count('order.duplicate')
+            return prev
+        self._executor.submit(self._execute, ticket)
+        return ticket
+
+    def place(self, req: OrderRequest, timeout: float = 15.0):
+        """Synchronous convenience: submit and wait for the exchange response (Trader.place result).
+
+        A ticket still queued after timeout is cancelled (None); one already in flight keeps its result.
+        """
+        ticket = self.submit(req)
+        if not ticket.wait(timeout) and self.cancel(ticket):
+            return None
+        ticket.wait()
+        return ticket.result
+
+    def cancel(self, ticket: OrderTicket) -> bool:
+        """Cancel a ticket that has not reached the exchange; see OrderTicket.cancel."""
+        if ticket.cancel():
+            self._count('order.cancelled')
+            return True
+        return False
+
+    def get(self, key: str) -> OrderTicket | None:
+        with self._lock:
+            return self._tickets.get(key)
+
+    def forget(self, source: str):
+        """Drop cached Traders (position estimates) for a source."""
+        with self._lock:
+            for k in [k for k in self._traders if k[0] == source]:
+                self._traders.pop(k, None)
+
+    def _client_for(self, req: OrderRequest):
+        if req.paper:
+            return self.paper_client
+        return self.client()
+
+    def _trader_for(self, req: OrderRequest, client) -> Trader:
+        k = (req.source, req.market)
+        with self._lock:
+            tr = self._traders.get(k)
+            paper = client is None
+            if tr is None or tr.upbit is not client:
+                tr = self._traders[k] = Trader(client, TradeConfig(market=req.market, order_krw=int(req.krw or 5000), paper=paper))
+        tr.cfg.order_krw = int(req.krw or tr.cfg.order_krw)
+        tr.cfg.paper = paper
+        tr.cfg.pnl_ratio = float(req.pnl_ratio or 0.0)
+        tr.cfg.pnl_profit_ratio = float(req.pnl_profit_ratio or 0.0)
+        tr.cfg.pnl_loss_ratio = float(req.pnl_loss_ratio or 0.0)
+        return tr
+
+    @timed('order_execute_seconds')
+    def _execute(self, ticket: OrderTicket):
+        if not ticket._claim():
+            return
+        req = ticket.req
+        with self._lock:
+            lock = self._market_locks.setdefault(req.market, threading.Lock())
+        try:
+            client = self._client_for(req)
+            if not req.paper and client is None:
+                raise RuntimeError('exchange client unavailable')
+            with lock:
+                if req.side.upper() == 'SELL' and req.size:
+                    if client is None:
+                        o = {'side': 'SELL', 'price': req.price, 'size': float(req.size), 'paper': True, 'market': req.market}
+                    else:
+                        o = client.sell_market_order(req.market, float(req.size))
+                        if isinstance(o, dict) and not o.get('error'):
+                            o['live_ok'] = True
+                else:
+                    o = self._trader_for(req, client).place(req.side.upper(), float(req.price))
+        except Exception as e:
+            ticket.error = str(e)
+            ticket.placed_at = time.time()
+            ticket._finish('failed')
+            self._count('order.failed')
+            return
+        ticket.result = o
+        ticket.placed_at = time.time()
+        if not isinstance(o, dict) or o.get('error'):
+            ticket.error = str(o.get('error')) if isinstance(o, dict) else 'not placed (min notional / balance)'
+            ticket._finish('rejected')
+            self._count('order.rejected')
+            return
+        oid = o.get('uuid')
+        if client is None or not oid:
+            # Trader paper path: filled at the requested price
+            ticket.fill = {'uuid': oid, 'state': 'done', 'executed_volume': float(o.get('size') or 0.0),
+                           'avg_price': float(o.get('price') or req.price or 0.0), 'paid_fee': 0.0, 'confirmed': True}
+            ticket._mark_placed()
+            self._count('order.submitted')
+            ticket.filled_at = time.time()
+            self._settle(ticket, 'filled' if ticket.fill['executed_volume'] > 0 else 'cancelled')
+            return
+        ticket._mark_placed()
+        self._count('order.submitted')
+        self._track(ticket, client, oid)
+
+    # ----- fill tracking -----
+    def _track(self, ticket, client, oid):
+        with self._track_cond:
+            self._tracking.append((ticket, client, oid, time.time() + self.fill_timeout_sec))
+            if self._tracker is None:
+                self._tracker = threading.Thread(target=self._track_loop, name='order-fills', daemon=True)
+                self._tracker.start()
+            self._track_cond.notify_all()
+
+    def _track_loop(self):
+        while True:
+            with self._track_cond:
+                while not self._tracking:
+                    self._track_cond.wait()
+                pending, self._tracking = self._tracking, []
+            still = []
+            now = time.time()
+            for ticket, client, oid, deadline in pending:
+                try:
+                    detail = client.get_order(oid)
+                except Exception:
+                    detail = None
+                fill = _fill_from_detail(detail) if isinstance(detail, dict) else None
+                done = fill is not None and (fill['state'] in ('done', 'cancel') or
+                                             (fill['state'] != 'wait' and fill['executed_volume'] > 0))
+                if done or now >= deadline:
+                    ticket.fill = {**(fill or {'uuid': oid, 'state': None, 'executed_volume': 0.0,
+                                                'avg_price': 0.0, 'paid_fee': 0.0}), 'confirmed': bool(done)}
+                    ticket.filled_at = time.time()
+                    if not done:
+                        status = 'timeout'
+                    else:
+                        # Upbit market buys end as 'cancel' with the executed part, so volume decides
+                        status = 'filled' if ticket.fill['executed_volume'] > 0 else 'cancelled'
+                    self._settle(ticket, status)
+                else:
+                    still.append((ticket, client, oid, deadline))
+            with self._track_cond:
+                self._tracking.extend(still)
+                if self._tracking:
+                    self._track_cond.wait(self.fill_poll_sec)
+
+    def _settle(self, ticket: OrderTicket, status: str):
+        if status == 'cancelled' and not ticket.error:
+            ticket.error = 'cancelled without execution'
+        ticket._finish(status)
+        self._count(f'order.{status}')
+
+    def status(self, limit: int = 50) -> dict:
+        with self._lock:
+            total = len(self._tickets)
+            recent = list(self._tickets.values())[-max(0, int(limit)):]
+            states = Counter(t.status for t in self._tickets.values())
+        with self._track_cond:
+            tracking = len(self._tracking)
+        return {
+            'tickets': total,
+            'by_status': dict(states),
+            'tracking': tracking,
+            'events': dict(self.counters),
+            'paper_exchange': self.paper_client is not None,
+            'recent': [t.to_dict() for t in reversed(recent)],
+        }
+
+
+_order_router = None
+_order_router_lock = threading.Lock()
+
+
+def get_order_router(make_client=None, price_fn=None) -> OrderRouter:
+    """전역 OrderRouter 인스턴스
+
+    ORDER_PAPER_EXCHANGE=sim routes paper orders through PaperExchange (price_fn required).
+    """
+    global _order_router
+    with _order_router_lock:
+        if _order_router is None:
+            paper = None
+            if os.getenv('ORDER_PAPER_EXCHANGE', 'off').lower() == 'sim' and price_fn is not None:
+                paper = PaperExchange(price_fn,
+                                      krw=float(os.getenv('ORDER_PAPER_KRW', '1000000')),
+                                      latency_sec=float(os.getenv('ORDER_PAPER_LATENCY_SEC', '0')),
+                                      fill_delay_sec=float(os.getenv('ORDER_PAPER_FILL_DELAY_SEC', '0')))
+            _order_router = OrderRouter(make_client or (lambda: None), paper_client=paper,
+                                        workers=int(os.getenv('ORDER_ROUTER_WORKERS', '2')),
+                                        callback_workers=int(os.getenv('ORDER_CALLBACK_WORKERS', '2')),
+                                        fill_timeout_sec=float(os.getenv('ORDER_FILL_TIMEOUT_SEC', '30')))
+        return _order_router
@@ -0,0 +1,194 @@
+"""Opt-in sampling profiler (pure Python, sys._current_frames).
+
+대시보드가 멈출 때 trade_loop / updater / auto_scheduler_loop / nb_auto_opt_loop /
+auto_cleanup_worker / 요청 스레드 중 어느 쪽이 CPU 를 쓰는지 보기 위한 샘플러.
+- start() 하면 샘플링 스레드 하나가 interval 마다 모든 스레드의 스택을 읽어 스레드 이름별로 집계
+- collapsed(): flamegraph.pl / speedscope 에 그대로 넣을 수 있는 collapsed-stack 텍스트
+- cpu_only=True: psutil 의 스레드별 CPU 시간이 직전 샘플 이후 늘어난 스레드만 집계 (sleep/wait 제외)
+- 꺼져 있을 때는 스레드도 훅도 없으므로 비용이 0. duration (0 < duration ≤ MAX_DURATION_SEC) 이 지나면 스스로 멈춘다
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+MAX_DURATION_SEC = 600.0
+
+
+def _frame_label(code) -> str:
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+class SamplingProfiler:
+    def __init__(self, max_depth: int = 64, max_stacks: int = 20000):
+        self.max_depth = int(max_depth)
+        self.max_stacks = int(max_stacks)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stacks = Counter()          # (thread_name, frames...) -> samples
+        self._per_thread = Counter()      # thread_name -> samples
+        self._labels = {}                 # code object -> label (cached, codes are long-lived)
+        self.interval = 0.01
+        self.samples = 0
+        self.dropped = 0
+        self.sample_cost = 0.0
+        self.started_at = None
+        self.stopped_at = None
+        self.deadline = None
+        self.thread_filter = None
+        self.cpu_only = False
+        self._cpu_prev = {}               # native thread id -> user+system seconds
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval_ms: float = 10.0, duration_sec: float = 30.0, threads=None,
+              reset: bool = True, cpu_only: bool = False) -> bool:
+        """Begin sampling; returns False if already running. threads: substrings of thread names to keep.
+
+        Every run is bounded: ValueError unless 0 < duration_sec <= MAX_DURATION_SEC and interval_ms > 0.
+        """
+        duration_sec = float(duration_sec) if duration_sec is not None else 0.0
+        if not 0.0 < duration_sec <= MAX_DURATION_SEC:
+            raise ValueError(f'duration_sec must be > 0 and <= {MAX_DURATION_SEC:g}')
+        if not float(interval_ms) > 0.0:
+            raise ValueError('interval_ms must be > 0')
+        with self._lock:
+            if self.running:
+                return False
+            if reset:
+                self._stacks.clear()
+                self._per_thread.clear()
+                self.samples = self.dropped = 0
+                self.sample_cost = 0.0
+            self.interval = max(0.001, float(interval_ms) / 1000.0)
+            self.thread_filter = [t for t in (threads or []) if t] or None
+            self.cpu_only = bool(cpu_only) and PSUTIL_AVAILABLE
+            self._cpu_prev = {}
+            self.started_at = time.time()
+            self.stopped_at = None
+            self.deadline = time.monotonic() + duration_sec
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self) -> bool:
+        if not self.running:
+            return False
+        self._stop.set()
+        self._thread.join(timeout=2.0)
+        return True
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = _frame_label(code)
+        return label
+
+    def _run(self):
+        me = threading.get_ident()
+        try:
+            while not self._stop.wait(self.interval):
+                if time.monotonic() >= self.deadline:
+                    break
+                t0 = time.perf_counter()
+                live = threading.enumerate()
+                names = {t.ident: t.name for t in live}
+                busy = self._busy_threads(live) if self.cpu_only else None
+                frames = sys._current_frames()
+                with self._lock:
+                    for ident, frame in frames.items():
+                        if ident == me:
+                            continue
+                        name = names.get(ident, f'thread-{ident}')
+                        if self.thread_filter and not any(f in name for f in self.thread_filter):
+                            continue
+                        if busy is not None and ident not in busy:
+                            continue
+                        stack = []
+                        depth = 0
+                        while frame is not None and depth < self.max_depth:
+                            stack.append(self._label(frame.f_code))
+                            frame = frame.f_back
+                            depth += 1
+                        stack.append(name)
+                        key = tuple(reversed(stack))
+                        if key not in self._stacks and len(self._stacks) >= self.max_stacks:
+                            self.dropped += 1
+                            continue
+                        self._stacks[key] += 1
+                        self._per_thread[name] += 1
+                    self.samples += 1
+                    self.sample_cost += time.perf_counter() - t0
+                del frames
+        finally:
+            self.stopped_at = time.time()
+
+    def _busy_threads(self, live) -> set | None:
+        """idents whose CPU time advanced since the previous sample (None if unavailable)."""
+        try:
+            cpu = {t.id: t.user_time + t.system_time for t in psutil.Process().threads()}
+        except Exception:
+            return None
+        prev, self._cpu_prev = self._cpu_prev, cpu
+        return {t.ident for t in live if cpu.get(t.native_id, 0.0) > prev.get(t.native_id, float('inf'))}
+
+    def collapsed(self, thread: str | None = None) -> str:
+        """'thread;outer;...;inner count' lines (Brendan Gregg collapsed format)."""
+        with self._lock:
+            items = list(self._stacks.items())
+        lines = [';'.join(k).replace(' ', '_') + f' {v}' for k, v in items if thread is None or thread in k[0]]
+        lines.sort()
+        return '\n'.join(lines) + ('\n' if lines else '')
+
+    def top(self, n: int = 15) -> dict:
+        """Per thread: sample share and the hottest leaf frames (self time)."""
+        with self._lock:
+            items = list(self._stacks.items())
+            per_thread = dict(self._per_thread)
+        leaves = {}
+        for key, v in items:
+            leaves.setdefault(key[0], Counter())[key[-1]] += v
+        total = sum(per_thread.values()) or 1
+        return {name: {'samples': cnt, 'share_pct': round(100.0 * cnt / total, 2),
+                       'top_frames': leaves.get(name, Counter()).most_common(n)}
+                for name, cnt in sorted(per_thread.items(), key=lambda kv: -kv[1])}
+
+    def status(self) -> dict:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round((self.stopped_at or time.time()) - self.started_at, 3)
+        return {
+            'running': self.running,
+            'interval_ms': round(self.interval * 1000.0, 3),
+            'started_at': self.started_at,
+            'elapsed_sec': elapsed,
+            'samples': self.samples,
+            'unique_stacks': len(self._stacks),
+            'dropped': self.dropped,
+            'avg_sample_ms': round(self.sample_cost * 1000.0 / self.samples, 4) if self.samples else None,
+            'threads': self.thread_filter,
+            'cpu_only': self.cpu_only,
+        }
+
+
+_profiler = None
+
+
+def get_profiler() -> SamplingProfiler:
+    """전역 SamplingProfiler 인스턴스"""
+    global _profiler
+    if _profiler is None:
+        _profiler = SamplingProfiler(max_depth=int(os.getenv('PROFILER_MAX_DEPTH', '64')))
+    return _profiler
@@ -0,0 +1,204 @@
+"""Request-level response cache for derived market endpoints (per-bar keys, single-flight, LRU).
+
+/api/nb/zone, /api/nb-wave, /api/nb/group 같은 엔드포인트는 다음 봉이 열릴 때까지 모든 클라이언트에게
+같은 결과를 매번 다시 계산한다. cached_response() 데코레이터로 응답을 한 번만 계산해 공유한다.
+- 키: 라우트 + 정규화된 query (+ JSON body) + (market, interval, 현재 봉 시작 시각)
+  새 봉이 열리면 키가 바뀌므로 별도 무효화 없이 다시 계산된다
+- 진행 중인 봉의 종가는 계속 움직이므로 max_age(RESPONSE_CACHE_MAX_AGE_SEC, 기본 15초)가 지나도 만료
+- single-flight: 같은 키로 동시에 들어온 N 개 요청 중 하나만 계산하고 나머지는 그 결과를 받는다
+- LRU: RESPONSE_CACHE_MAX_ENTRIES (기본 512) 개, 메모리 예산(MemoryManager)에도 등록
+- 2xx 이고 JSON 의 ok 가 false 가 아닌 응답만 저장한다 (오류 / 데이터 없음은 매번 다시 시도)
+- 라우트별 hit / miss / coalesced 카운터 (response_cache_requests_total) 와 report()
+- 상태를 바꾸는 뷰에는 쓰지 않는다 (hit 이면 뷰가 실행되지 않으므로): /api/trainer/suggest 는 캐시하지 않고
+  /api/nbverse/card 는 save=true 일 때 when= 으로 우회
+RESPONSE_CACHE_ENABLED=false 이면 데코레이터는 원래 함수를 그대로 호출한다.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from helpers.utils import bucket_ts_interval
+
+HIT = 'hit'
+MISS = 'miss'
+COALESCED = 'coalesced'
+
+
+class _Flight:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ResponseCache:
+    """LRU of computed responses with per-key single-flight."""
+
+    def __init__(self, max_entries: int = 512, max_age: float = 15.0, wait_timeout: float = 30.0):
+        self.max_entries = max(1, int(max_entries))
+        self.max_age = float(max_age)
+        self.wait_timeout = float(wait_timeout)
+        self.entries = OrderedDict()    # key -> {'ts': computed at, 'used': last hit, 'value'}
+        self._inflight = {}             # key -> _Flight
+        self._lock = threading.Lock()
+        self.stats = {}                 # route -> {'hit', 'miss', 'coalesced', 'uncached', 'evicted'}
+        self._counter = None
+
+    def _count(self, route: str, result: str):
+        row = self.stats.get(route)
+        if row is None:
+            row = self.stats.setdefault(route, {HIT: 0, MISS: 0, COALESCED: 0, 'uncached': 0, 'evicted': 0})
+        row[result] = row.get(result, 0) + 1
+        if self._counter is not None and result in (HIT, MISS, COALESCED):
+            self._counter.inc(route=route, result=result)
+
+    def bind_metrics(self, registry):
+        self._counter = registry.counter('response_cache_requests_total',
+                                         'Cached endpoint requests by route and result (hit / miss / coalesced)',
+                                         labelnames=('route', 'result'))
+        registry.gauge('response_cache_entries', 'Responses held by the response cache',
+                       fn=lambda: len(self.entries))
+
+    def get_or_compute(self, route: str, key, compute, cacheable=None, max_age: float | None = None):
+        """(value, result) for key; compute() runs once per key at a time, followers share its value."""
+        max_age = self.max_age if max_age is None else float(max_age)
+        now = time.time()
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and now - entry['ts'] < max_age:
+                self.entries.move_to_end(key)
+                entry['used'] = now
+                self._count(route, HIT)
+                return entry['value'], HIT
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+        if not leader:
+            if flight.done.wait(self.wait_timeout) and flight.error is None:
+                with self._lock:
+                    self._count(route, COALESCED)
+                return flight.result, COALESCED
+            # leader failed or is stuck: compute for this request without caching
+            with self._lock:
+                self._count(route, 'uncached')
+            return compute(), MISS
+        try:
+            value = compute()
+            flight.result = value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                if flight.error is None:
+                    self._count(route, MISS)
+                    if cacheable is None or cacheable(value):
+                        ts = time.time()
+                        self.entries[key] = {'ts': ts, 'used': ts, 'value': value}
+                        self.entries.move_to_end(key)
+                        while len(self.entries) > self.max_entries:
+                            old_key, _ = self.entries.popitem(last=False)
+                            self._count(old_key[0], 'evicted')
+                    else:
+                        self._count(route, 'uncached')
+            flight.done.set()
+        return value, MISS
+
+    def discard(self, key):
+        with self._lock:
+            self.entries.pop(key, None)
+
+    def invalidate(self, route: str | None = None) -> int:
+        """Drop cached responses of one route (or all); in-flight computations are unaffected."""
+        with self._lock:
+            keys = [k for k in self.entries if route is None or k[0] == route]
+            for k in keys:
+                del self.entries[k]
+        return len(keys)
+
+    def report(self) -> dict:
+        with self._lock:
+            routes = {}
+            for route, row in self.stats.items():
+                served = row[HIT] + row[MISS] + row[COALESCED]
+                routes[route] = {**row, 'entries': sum(1 for k in self.entries if k[0] == route),
+                                 'hit_rate': round((row[HIT] + row[COALESCED]) / served, 4) if served else None}
+            return {'enabled': _enabled(), 'entries': len(self.entries), 'max_entries': self.max_entries,
+                    'max_age_sec': self.max_age, 'in_flight': len(self._inflight), 'routes': routes}
+
+
+def _enabled() -> bool:
+    return os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+
+
+def _normalized_query(args, ignore) -> tuple:
+    return tuple(sorted((k, tuple(sorted(v))) for k, v in args.lists() if k not in ignore))
+
+
+def _normalized_body(request) -> str:
+    if not request.is_json:
+        return ''
+    body = request.get_json(silent=True)
+    return json.dumps(body, sort_keys=True, separators=(',', ':'), default=str) if body is not None else ''
+
+
+def _ok_json(resp) -> bool:
+    if not 200 <= resp.status_code < 300:
+        return False
+    if resp.is_json:
+        body = resp.get_json(silent=True)
+        if isinstance(body, dict) and body.get('ok') is False:
+            return False
+    return True
+
+
+def cached_response(bar, when=None, max_age: float | None = None, ignore=('_', 't'), cache=None):
+    """Cache a Flask view per (route, query, body, market, interval, bar start).
+
+    bar: () -> (market, interval) for the current request (defaults already resolved).
+    when: () -> bool, skip the cache for this request when False (e.g. historical ts queries, or requests
+          whose view persists / updates state: a hit would skip that side effect).
+    ignore: query parameters that never change the result (cache busters).
+    """
+    def deco(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            from flask import Response, current_app, request
+            if not _enabled() or (when is not None and not when()):
+                return view(*args, **kwargs)
+            rc = cache or get_response_cache()
+            route = request.url_rule.rule if request.url_rule is not None else request.path
+            market, interval = bar()
+            key = (route, request.method, _normalized_query(request.args, ignore), _normalized_body(request),
+                   str(market), str(interval), bucket_ts_interval(None, str(interval)))
+
+            def compute():
+                resp = current_app.make_response(view(*args, **kwargs))
+                # stored as plain parts: every request gets its own Response (after_request hooks mutate it)
+                return resp.get_data(), resp.status_code, list(resp.headers.items()), _ok_json(resp)
+
+            body, status, headers, _ = rc.get_or_compute(route, key, compute, cacheable=lambda v: v[3],
+                                                         max_age=max_age)[0]
+            return Response(body, status=status, headers=headers)
+        return wrapper
+    return deco
+
+
+_cache = None
+
+
+def get_response_cache() -> ResponseCache:
+    """전역 ResponseCache 인스턴스"""
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache(max_entries=int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '512')),
+                               max_age=float(os.getenv('RESPONSE_CACHE_MAX_AGE_SEC', '15')))
+    return _cache
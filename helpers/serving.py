@@ -0,0 +1,333 @@
+"""Multi-process serving: leader process + API workers.
+
+개발 서버(app.run) 한 프로세스가 API 와 모든 백그라운드 루프를 같이 돌리던 구조를 나눈다.
+- leader: trade_loop / updater / nb_auto_opt_loop / auto_scheduler_loop 를 혼자 실행하고,
+  공유 상태(SharedDict) 스냅샷을 공유 메모리 파일(/dev/shm)로 주기적으로 게시한다.
+  내부 루프백 포트로 같은 Flask 앱을 띄워 워커가 넘긴 요청을 처리한다.
+- worker: gunicorn / uvicorn 워커. 읽기 요청은 미러링된 상태로 직접 처리하고,
+  상태를 바꾸는 요청(POST 등)과 루프 소유 경로는 leader 로 전달한다.
+- metrics: 워커는 자기 레지스트리를 process 라벨을 붙여 주기적으로 파일(MetricsSpool)에 쓰고,
+  /metrics 는 leader 로 전달되어 leader + 살아있는 워커 전체를 한 번에 내보낸다.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+
+ROLE_SINGLE = 'single'
+ROLE_LEADER = 'leader'
+ROLE_WORKER = 'worker'
+
+# GET routes that read state owned by the leader's loops (or stream from it), or that touch
+# persisted stores: NB coins (/api/nb/ creates coins through the journal), signals, ml_state,
+# village / council and item files. Workers only mirror the SharedDicts in shared_stores().
+# /metrics and /api/config/status describe the leader (hot-path timers, config reloads).
+# Exchange-backed GETs (candles, assets, connection checks, NB wave / card charts, NBverse) go to
+# the leader too: the gateway's token buckets are per process, so N workers would spend the
+# Upbit per-IP quota N times over.
+DEFAULT_LEADER_PREFIXES = (
+    '/metrics', '/api/config/status',
+    '/api/ohlcv', '/api/assets', '/api/upbit', '/api/nb-wave', '/api/cards', '/api/trainer/suggest',
+    '/api/nbverse', '/api/trust',
+    '/api/stream', '/api/bot', '/api/engine', '/api/orders', '/api/order', '/api/trade',
+    '/api/market-data', '/api/balance', '/api/exchange', '/api/auto-buy', '/api/auto-sell',
+    '/api/state/locks', '/api/memory', '/api/admin/profiler', '/api/admin/memory',
+    '/api/nb/', '/api/signal', '/api/ml', '/api/village', '/api/council', '/api/items',
+)
+
+_HOP_HEADERS = {'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'te',
+                'trailers', 'transfer-encoding', 'upgrade', 'content-length', 'content-encoding', 'host'}
+
+
+def role() -> str:
+    return os.getenv('SERVE_ROLE', ROLE_SINGLE).strip().lower() or ROLE_SINGLE
+
+
+def default_state_path() -> str:
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    port = os.getenv('UI_PORT', '5057')
+    return os.path.join(base, f'nb_trading_state_{port}.json')
+
+
+class StateChannel:
+    """Shared-memory snapshot file: the leader publishes, workers pull when it changes."""
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.getenv('SERVE_STATE_PATH') or default_state_path()
+        self._published = {}       # name -> snapshot object last written (identity check)
+        self._seen_mtime = None
+        self._lock = threading.Lock()
+        self.stats = {'published': 0, 'pulled': 0, 'errors': 0, 'last_error': None}
+
+    # ----- leader -----
+    def publish(self, stores: dict, force: bool = False) -> bool:
+        """Write snapshots of stores (name -> SharedDict) when any of them changed."""
+        snaps = {name: store.snapshot() for name, store in stores.items()}
+        if not force and all(self._published.get(n) is s for n, s in snaps.items()):
+            return False  # snapshot() is copy-on-write: same object means no write since last time
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'ts': time.time(), 'pid': os.getpid(), 'stores': snaps}, f,
+                          ensure_ascii=False, separators=(',', ':'), default=str)
+            os.replace(tmp, self.path)
+            self._published = snaps
+            self.stats['published'] += 1
+            return True
+        except Exception as e:
+            self.stats['errors'] += 1
+            self.stats['last_error'] = str(e)
+            return False
+
+    # ----- worker -----
+    def pull(self, stores: dict) -> bool:
+        """Apply the latest published snapshot into local stores (no-op when unchanged)."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._seen_mtime:
+            return False
+        with self._lock:
+            if mtime == self._seen_mtime:
+                return False
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    payload = json.load(f)
+            except Exception as e:
+                self.stats['errors'] += 1
+                self.stats['last_error'] = str(e)
+                return False
+            for name, data in (payload.get('stores') or {}).items():
+                if name in stores and isinstance(data, dict):
+                    _apply(stores[name], data)
+            self._seen_mtime = mtime
+            self.stats['pulled'] += 1
+            return True
+
+    def status(self) -> dict:
+        try:
+            age = round(time.time() - os.stat(self.path).st_mtime, 3)
+        except OSError:
+            age = None
+        return {'path': self.path, 'age_sec': age, **self.stats}
+
+
+def _apply(target, data: dict):
+    """Replace target's contents with data, keeping deque types/maxlen of existing values."""
+    with target.locked():
+        for k in [k for k in target.keys() if k not in data]:
+            del target[k]
+        for k, v in data.items():
+            cur = dict.get(target, k)
+            if isinstance(cur, deque):
+                v = deque(v, maxlen=cur.maxlen)
+            target[k] = v
+
+
+class StatePublisher:
+    """Leader thread publishing shared state every interval seconds."""
+
+    def __init__(self, channel: StateChannel, stores: dict, interval: float = 0.5):
+        self.channel = channel
+        self.stores = stores
+        self.interval = max(0.05, float(interval))
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self.channel.publish(self.stores, force=True)
+            self._thread = threading.Thread(target=self._run, name='state-publisher', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.channel.publish(self.stores)
+            except Exception as e:
+                print(f"⚠️ state publish failed: {e}")
+
+    def stop(self):
+        self._stop.set()
+
+
+class MetricsSpool:
+    """Per-worker metrics files next to the state file; the leader merges them into /metrics."""
+
+    def __init__(self, state_path: str | None = None):
+        self.prefix = (state_path or os.getenv('SERVE_STATE_PATH') or default_state_path()) + '.metrics.'
+
+    def publish(self, text: str) -> bool:
+        path = f'{self.prefix}{os.getpid()}'
+        try:
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(path + '.tmp', path)
+            return True
+        except Exception as e:
+            print(f"⚠️ metrics publish failed: {e}")
+            return False
+
+    def collect(self, max_age: float) -> list:
+        """Exposition texts of workers that published within max_age seconds (dead workers drop out)."""
+        import glob
+        now = time.time()
+        out = []
+        for path in glob.glob(glob.escape(self.prefix) + '*'):
+            if path.endswith('.tmp'):
+                continue
+            try:
+                if now - os.stat(path).st_mtime > max_age:
+                    continue
+                with open(path, 'r', encoding='utf-8') as f:
+                    out.append(f.read())
+            except OSError:
+                continue
+        return out
+
+
+def render_metrics(registry, info: dict | None = None) -> str:
+    """/metrics body: this process alone, or (on the leader) leader + live workers with a process label."""
+    info = info or {}
+    spool = info.get('metrics_spool')
+    if info.get('role') != ROLE_LEADER or spool is None:
+        return registry.render()
+    from helpers.metrics import merge_expositions
+    max_age = 3.0 * float(os.getenv('SERVE_METRICS_PUBLISH_SEC', '5')) + 1.0
+    return merge_expositions([registry.render(process='leader')] + spool.collect(max_age))
+
+
+class MetricsPublisher:
+    """Worker thread writing this process's registry (process="worker-<pid>") every interval seconds."""
+
+    def __init__(self, spool: MetricsSpool, registry, interval: float = 5.0):
+        self.spool = spool
+        self.registry = registry
+        self.interval = max(0.5, float(interval))
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='metrics-publisher', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        label = f'worker-{os.getpid()}'
+        while True:
+            try:
+                self.spool.publish(self.registry.render(process=label))
+            except Exception as e:
+                print(f"⚠️ metrics publish failed: {e}")
+            if self._stop.wait(self.interval):
+                return
+
+    def stop(self):
+        self._stop.set()
+
+
+class LeaderProxy:
+    """Forward a Flask request to the leader's loopback server and relay the response."""
+
+    def __init__(self, base_url: str, timeout: float = 30.0):
+        import requests
+        self.base_url = base_url.rstrip('/')
+        self.timeout = float(timeout)
+        self._session = requests.Session()
+        self.stats = {'forwarded': 0, 'errors': 0}
+
+    def forward(self, req):
+        from flask import Response, jsonify
+        headers = {k: v for k, v in req.headers.items() if k.lower() not in _HOP_HEADERS}
+        stream = req.path.startswith('/api/stream') or 'text/event-stream' in req.headers.get('Accept', '')
+        try:
+            upstream = self._session.request(
+                req.method, self.base_url + req.full_path.rstrip('?'), headers=headers,
+                data=req.get_data(), stream=stream, allow_redirects=False,
+                timeout=None if stream else self.timeout)
+        except Exception as e:
+            self.stats['errors'] += 1
+            return jsonify({'ok': False, 'error': f'leader unavailable: {e}'}), 503
+        self.stats['forwarded'] += 1
+        out_headers = [(k, v) for k, v in upstream.headers.items() if k.lower() not in _HOP_HEADERS]
+        if stream:
+            return Response(upstream.iter_content(chunk_size=None), status=upstream.status_code,
+                            headers=out_headers)
+        return Response(upstream.content, status=upstream.status_code, headers=out_headers)
+
+
+def install_worker(app, stores: dict, channel: StateChannel | None = None, leader_url: str | None = None,
+                   leader_prefixes=None, pull_sec: float | None = None):
+    """Mirror leader state and forward writes / leader-owned routes (called once per worker)."""
+    from flask import request
+
+    channel = channel or StateChannel()
+    leader_url = leader_url or os.getenv('SERVE_LEADER_URL', 'http://127.0.0.1:5058')
+    env_prefixes = os.getenv('SERVE_LEADER_PREFIXES')
+    if leader_prefixes is None:
+        leader_prefixes = tuple(p.strip() for p in env_prefixes.split(',') if p.strip()) \
+            if env_prefixes else DEFAULT_LEADER_PREFIXES
+    pull_sec = float(os.getenv('SERVE_STATE_PULL_SEC', '0.2')) if pull_sec is None else float(pull_sec)
+    proxy = LeaderProxy(leader_url, timeout=float(os.getenv('SERVE_PROXY_TIMEOUT_SEC', '30')))
+    last_pull = [0.0]
+
+    @app.before_request
+    def _serving_worker_hook():
+        # url_rule is None for blueprints this worker does not register (trading-only workers)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') or request.path.startswith(leader_prefixes) \
+                or request.url_rule is None:
+            return proxy.forward(request)
+        now = time.monotonic()
+        if now - last_pull[0] >= pull_sec:
+            last_pull[0] = now
+            channel.pull(stores)
+        return None
+
+    from helpers.metrics import get_registry
+    metrics_publisher = MetricsPublisher(MetricsSpool(channel.path), get_registry(),
+                                         interval=float(os.getenv('SERVE_METRICS_PUBLISH_SEC', '5'))).start()
+
+    app.extensions['serving'] = {'role': ROLE_WORKER, 'channel': channel, 'proxy': proxy,
+                                 'leader_url': leader_url, 'leader_prefixes': list(leader_prefixes),
+                                 'metrics_publisher': metrics_publisher}
+    channel.pull(stores)
+    return channel
+
+
+def start_leader_server(app, host: str = '127.0.0.1', port: int = 5058):
+    """Serve app on the loopback port for requests forwarded by workers (threaded, daemon)."""
+    from werkzeug.serving import make_server
+    srv = make_server(host, int(port), app, threaded=True)
+    threading.Thread(target=srv.serve_forever, name='leader-http', daemon=True).start()
+    return srv
+
+
+def worker_command(server: str, workers: int, host: str, port: int, threads: int = 4) -> list:
+    """argv for the worker server (gunicorn on POSIX, uvicorn via an ASGI adapter elsewhere)."""
+    import sys
+    if server == 'gunicorn':
+        return [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-k', 'gthread', '--threads', str(threads),
+                '-b', f'{host}:{port}', '--timeout', os.getenv('SERVE_WORKER_TIMEOUT', '120'), 'serve:app']
+    if server == 'uvicorn':
+        return [sys.executable, '-m', 'uvicorn', 'serve:asgi_app', '--workers', str(workers),
+                '--host', host, '--port', str(port), '--no-access-log']
+    raise ValueError(f'unknown server: {server}')
+
+
+def pick_server(preferred: str | None = None) -> str | None:
+    """Requested server if installed, else gunicorn (POSIX) / uvicorn; None when neither exists."""
+    import importlib.util
+    order = [preferred] if preferred else []
+    order += ['uvicorn'] if os.name == 'nt' else ['gunicorn', 'uvicorn']
+    for name in order:
+        if name == 'gunicorn' and os.name == 'nt':
+            continue
+        if name and importlib.util.find_spec(name) is not None:
+            return name
+    return None
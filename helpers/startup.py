@@ -0,0 +1,212 @@
+"""Staged startup: per-subsystem readiness and a startup timeline.
+
+server.py 를 import 하면 마을 / NBverse / 평가 ML / 아이템 초기화까지 한 번에 실행되던 것을 단계로 나눈다.
+- critical: 거래에 꼭 필요한 것 (라우트, 저장소, 신뢰도 설정) - init_app 에서 바로 실행
+- warm: 나머지 (마을, NBverse 카드, 평가 ML, 아이템) - 백그라운드 warm-up 스레드가 순서대로 실행
+- lazy: warm-up 에서도 건너뛰고 처음 쓰일 때 ensure() 로 초기화 (LSTM 등)
+어느 단계든 ensure(name) 은 한 번만 실행되고, 진행 중이면 끝날 때까지 기다린다.
+실패하면 FAILED 로 남고 백오프 (RETRY_BASE_SEC 부터 두 배씩, RETRY_MAX_SEC 까지) 가 지난 뒤 호출에서만 다시 시도한다.
+/api/health/ready 는 report() 로 서브시스템별 상태와 소요 시간, timeline 을 보여준다.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+PENDING = 'pending'
+RUNNING = 'running'
+READY = 'ready'
+FAILED = 'failed'
+
+RETRY_BASE_SEC = 5.0
+RETRY_MAX_SEC = 300.0
+
+
+def _process_start() -> float:
+    if PSUTIL_AVAILABLE:
+        try:
+            return psutil.Process().create_time()
+        except Exception:
+            pass
+    return time.time()
+
+
+class _Subsystem:
+    __slots__ = ('name', 'init', 'critical', 'warm', 'state', 'started', 'finished', 'error', 'result', 'done',
+                 'failures', 'retry_at')
+
+    def __init__(self, name, init, critical, warm):
+        self.name = name
+        self.init = init
+        self.critical = critical
+        self.warm = warm
+        self.state = PENDING
+        self.started = None
+        self.finished = None
+        self.error = None
+        self.result = None
+        self.done = threading.Event()
+        self.failures = 0
+        self.retry_at = 0.0
+
+
+class Startup:
+    def __init__(self):
+        self.process_start = _process_start()
+        self.t0 = time.time()
+        self._lock = threading.Lock()
+        self._subsystems = {}
+        self._timeline = []                 # [{'event', 't_ms', 'dur_ms'?, ...}]
+        self._warm_thread = None
+
+    def _t_ms(self, ts: float) -> float:
+        return round((ts - self.process_start) * 1000.0, 1)
+
+    # ----- timeline -----
+    def mark(self, event: str, **info):
+        """Record a point in the startup timeline (ms since the process started)."""
+        with self._lock:
+            self._timeline.append({'event': event, 't_ms': self._t_ms(time.time()), **info})
+
+    @contextmanager
+    def phase(self, event: str):
+        """Record the duration of a block in the startup timeline."""
+        t = time.time()
+        err = None
+        try:
+            yield
+        except Exception as e:
+            err = str(e)
+            raise
+        finally:
+            entry = {'event': event, 't_ms': self._t_ms(t), 'dur_ms': round((time.time() - t) * 1000.0, 1)}
+            if err:
+                entry['error'] = err
+            with self._lock:
+                self._timeline.append(entry)
+
+    # ----- subsystems -----
+    def register(self, name: str, init, critical: bool = False, warm: bool = True):
+        """init() runs once via ensure(); critical in run_critical(), warm in warm_up(), else lazily."""
+        with self._lock:
+            if name not in self._subsystems:
+                self._subsystems[name] = _Subsystem(name, init, bool(critical), bool(warm))
+
+    def is_ready(self, name: str) -> bool:
+        sub = self._subsystems.get(name)
+        return sub is not None and sub.state == READY
+
+    def ensure(self, name: str, timeout: float | None = None):
+        """Initialise name if needed (once) and return its init() result; None if it failed.
+
+        A failed init is not retried until its backoff has passed, so a broken subsystem
+        costs one init attempt per backoff window instead of one per request.
+        """
+        sub = self._subsystems[name]
+        if sub.state == READY:
+            return sub.result
+        with self._lock:
+            owner = sub.state == PENDING or (sub.state == FAILED and time.time() >= sub.retry_at)
+            if owner:
+                sub.state = RUNNING
+                sub.done.clear()
+                sub.started = time.time()
+                sub.finished = None
+        if not owner:
+            sub.done.wait(timeout)
+            return sub.result
+        try:
+            sub.result = sub.init()
+            sub.error = None
+            sub.failures = 0
+            sub.state = READY
+        except Exception as e:
+            sub.error = str(e)
+            sub.failures += 1
+            backoff = min(RETRY_MAX_SEC, RETRY_BASE_SEC * 2 ** (sub.failures - 1))
+            sub.retry_at = time.time() + backoff
+            sub.state = FAILED
+            print(f"⚠️ startup: {name} init failed ({sub.failures}x, retry in {backoff:.0f}s): {e}")
+        finally:
+            sub.finished = time.time()
+            sub.done.set()
+            self.mark(f'{name}:{sub.state}', dur_ms=round((sub.finished - sub.started) * 1000.0, 1))
+        return sub.result
+
+    def get(self, name: str):
+        """ensure(name) for accessor functions: the init() result, like the old get_xxx() singletons.
+
+        Where those raised from their constructor, this raises RuntimeError with the init error
+        (also while a failed init waits for its retry); callers already handle exceptions.
+        """
+        result = self.ensure(name)
+        sub = self._subsystems[name]
+        if sub.state != READY:
+            raise RuntimeError(f'{name} unavailable: {sub.error or sub.state}')
+        return result
+
+    def run_critical(self):
+        for sub in list(self._subsystems.values()):
+            if sub.critical:
+                self.ensure(sub.name)
+
+    def warm_up(self, background: bool = True, after=None):
+        """Initialise the remaining warm subsystems in registration order, then call after()."""
+        names = [s.name for s in self._subsystems.values() if s.warm and not s.critical]
+
+        def _run():
+            with self.phase('warm_up'):
+                for name in names:
+                    self.ensure(name)
+            if after is not None:
+                try:
+                    after()
+                except Exception as e:
+                    print(f"⚠️ startup: post warm-up step failed: {e}")
+
+        if not background:
+            _run()
+        elif self._warm_thread is None:
+            self._warm_thread = threading.Thread(target=_run, name='startup-warmup', daemon=True)
+            self._warm_thread.start()
+
+    # ----- report -----
+    def report(self) -> dict:
+        now = time.time()
+        subs = {}
+        for s in list(self._subsystems.values()):
+            dur = None
+            if s.started is not None:
+                dur = round(((s.finished or now) - s.started) * 1000.0, 1)
+            subs[s.name] = {'state': s.state, 'critical': s.critical,
+                            'mode': 'critical' if s.critical else ('warm' if s.warm else 'lazy'),
+                            'duration_ms': dur, 'ready_at_ms': self._t_ms(s.finished) if s.state == READY else None,
+                            'error': s.error, 'failures': s.failures,
+                            'retry_in_sec': round(max(0.0, s.retry_at - now), 1) if s.state == FAILED else None}
+        critical_ok = all(v['state'] == READY for v in subs.values() if v['critical'])
+        with self._lock:
+            timeline = list(self._timeline)
+        return {
+            'ready': critical_ok,
+            'fully_ready': all(v['state'] == READY for v in subs.values() if v['mode'] != 'lazy'),
+            'uptime_sec': round(now - self.process_start, 1),
+            'subsystems': subs,
+            'timeline': timeline,
+        }
+
+
+_startup = None
+
+
+def get_startup() -> Startup:
+    """전역 Startup 인스턴스"""
+    global _startup
+    if _startup is None:
+        _startup = Startup()
+    return _startup
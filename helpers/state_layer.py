@@ -0,0 +1,250 @@
+"""Thread-safe shared state: per-domain RLocks and copy-on-write snapshots.
+
+trade_loop / updater / nb_auto_opt_loop / auto_scheduler_loop 와 Flask 워커가 같은 dict 를
+동시에 바꾸면서 생기는 'dictionary changed size during iteration' 과 부분 갱신 읽기를 막는다.
+- SharedDict: dict 호환. 최상위 변경/순회는 도메인 RLock 안에서 수행, 중첩 dict 도 같은 락을 공유
+- snapshot(): 버전이 바뀔 때만 다시 만드는 불변 뷰(FrozenDict). 읽는 쪽은 락 없이 공유한다
+- InstrumentedRLock: 획득 횟수, 경합 횟수, 대기/보유 시간 (lock_report)
+"""
+
+import threading
+import time
+from collections import deque
+
+
+class InstrumentedRLock:
+    """RLock that records acquisitions, contention and wait / hold times."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.hold_total = 0.0
+        self.hold_max = 0.0
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        waited = None
+        if not self._lock.acquire(blocking=False):
+            if not blocking:
+                return False
+            t0 = time.perf_counter()
+            if not self._lock.acquire(True, timeout):
+                return False
+            waited = time.perf_counter() - t0
+        # counters are updated while holding the lock
+        if waited is not None:
+            self.contended += 1
+            self.wait_total += waited
+            if waited > self.wait_max:
+                self.wait_max = waited
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0:
+            self._local.t0 = time.perf_counter()
+        self._local.depth = depth + 1
+        self.acquisitions += 1
+        return True
+
+    def release(self):
+        depth = getattr(self._local, 'depth', 1) - 1
+        self._local.depth = depth
+        if depth == 0:
+            held = time.perf_counter() - self._local.t0
+            self.hold_total += held
+            if held > self.hold_max:
+                self.hold_max = held
+        self._lock.release()
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def stats(self) -> dict:
+        n = self.acquisitions or 1
+        return {
+            'acquisitions': self.acquisitions,
+            'contended': self.contended,
+            'contention_pct': round(100.0 * self.contended / n, 3),
+            'wait_ms_total': round(self.wait_total * 1000.0, 3),
+            'wait_ms_max': round(self.wait_max * 1000.0, 3),
+            'hold_ms_avg': round(self.hold_total * 1000.0 / n, 4),
+            'hold_ms_max': round(self.hold_max * 1000.0, 3),
+        }
+
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def get_lock(name: str) -> InstrumentedRLock:
+    """Per-domain lock (created once per name)."""
+    with _locks_guard:
+        lock = _locks.get(name)
+        if lock is None:
+            lock = _locks[name] = InstrumentedRLock(name)
+        return lock
+
+
+def lock_report() -> dict:
+    with _locks_guard:
+        locks = list(_locks.items())
+    return {name: lock.stats() for name, lock in locks}
+
+
+class FrozenDict(dict):
+    """Read-only dict used for snapshots (JSON-serializable, raises on mutation)."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError('state snapshot is read-only')
+
+    __setitem__ = __delitem__ = update = pop = popitem = setdefault = clear = __ior__ = _readonly
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return FrozenDict((k, _freeze(v)) for k, v in dict.items(value))
+    if isinstance(value, (list, tuple, deque)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+
+def _plain(value):
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in dict.items(value)}
+    if isinstance(value, list):
+        return [_plain(v) for v in value]
+    return value
+
+
+class SharedDict(dict):
+    """dict whose top-level writes and iteration run under a domain lock.
+
+    Nested plain dicts are wrapped on insert and share the root lock, so writes anywhere
+    in the tree invalidate the cached snapshot. Lists/deques mutated in place should use
+    append() (or run under locked() and call touch()).
+    """
+
+    def __init__(self, data=None, name: str | None = None, lock: InstrumentedRLock | None = None,
+                 parent: 'SharedDict | None' = None):
+        dict.__init__(self)
+        self._lock = lock or get_lock(name or 'state')
+        self._parent = parent
+        self._view = None
+        for k, v in (data or {}).items():
+            dict.__setitem__(self, k, self._wrap(v))
+
+    def _wrap(self, value):
+        if type(value) is dict:
+            return SharedDict(value, lock=self._lock, parent=self)
+        return value
+
+    def touch(self):
+        """Invalidate cached snapshots up to the root (after an in-place nested edit)."""
+        node = self
+        while node is not None:
+            node._view = None
+            node = node._parent
+
+    def locked(self) -> InstrumentedRLock:
+        """Domain lock for compound read-modify-write sections."""
+        return self._lock
+
+    # ----- writes -----
+    def __setitem__(self, key, value):
+        with self._lock:
+            dict.__setitem__(self, key, self._wrap(value))
+            self.touch()
+
+    def __delitem__(self, key):
+        with self._lock:
+            dict.__delitem__(self, key)
+            self.touch()
+
+    def update(self, *args, **kwargs):
+        with self._lock:
+            for k, v in dict(*args, **kwargs).items():
+                dict.__setitem__(self, k, self._wrap(v))
+            self.touch()
+
+    def setdefault(self, key, default=None):
+        with self._lock:
+            if key not in self:
+                dict.__setitem__(self, key, self._wrap(default))
+                self.touch()
+            return dict.__getitem__(self, key)
+
+    def pop(self, key, *default):
+        with self._lock:
+            had = key in self
+            value = dict.pop(self, key, *default)
+            if had:
+                self.touch()
+            return value
+
+    def popitem(self):
+        with self._lock:
+            item = dict.popitem(self)
+            self.touch()
+            return item
+
+    def clear(self):
+        with self._lock:
+            dict.clear(self)
+            self.touch()
+
+    def append(self, key, item):
+        """Append to the list/deque stored at key under the domain lock."""
+        with self._lock:
+            dict.__getitem__(self, key).append(item)
+            self.touch()
+
+    # ----- reads (iteration copies under the lock) -----
+    def __iter__(self):
+        with self._lock:
+            return iter(list(dict.keys(self)))
+
+    def keys(self):
+        with self._lock:
+            return list(dict.keys(self))
+
+    def values(self):
+        with self._lock:
+            return list(dict.values(self))
+
+    def items(self):
+        with self._lock:
+            return list(dict.items(self))
+
+    def copy(self) -> dict:
+        with self._lock:
+            return _plain(self)
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        import copy
+        with self._lock:
+            return copy.deepcopy(_plain(self), memo)
+
+    def __reduce__(self):
+        return (dict, (self.copy(),))
+
+    def snapshot(self) -> FrozenDict:
+        """Consistent immutable view; rebuilt only after a write (copy-on-write)."""
+        view = self._view
+        if view is None:
+            with self._lock:
+                view = self._view
+                if view is None:
+                    view = self._view = _freeze(self)
+        return view
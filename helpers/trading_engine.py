@@ -0,0 +1,436 @@
+"""Multi-market / multi-interval NB zone trading engine.
+
+하나의 프로세스에서 (market, interval) 전략 인스턴스 N개를 돌린다.
+인스턴스마다 r/zone 상태, 쿨다운, 포지션 잠금, 지표가 분리되어 있고
+캔들 저장소(get_candles 캐시)와 주문 라우터(helpers.order_router, 거래소 클라이언트 포함)는 공유한다.
+
+server.py 의존성(get_candles, r 계산, 주문 기록 등)은 register 시 주입한다
+(trade_routes.register_trade_routes 와 같은 방식).
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, fields
+
+from helpers.bar_scheduler import next_bar_close
+from helpers.order_router import OrderRequest, OrderRouter, idempotency_key
+
+
+ENGINE_CONFIG_FILE = 'data/engine_instances.json'
+
+# get_candles intervals (pyupbit get_ohlcv)
+ENGINE_INTERVALS = ('minute1', 'minute3', 'minute5', 'minute10', 'minute15', 'minute30', 'minute60',
+                    'minute240', 'day', 'week', 'month')
+_MARKET_RE = re.compile(r'^(KRW|BTC|USDT)-[A-Z0-9]{1,15}$')
+
+
+def _parse_bool(name: str, value) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in ('true', '1', 'yes', 'on', 'false', '0', 'no', 'off'):
+        return value.strip().lower() in ('true', '1', 'yes', 'on')
+    raise ValueError(f'{name} must be a boolean, got {value!r}')
+
+
+def _parse_int(name: str, value, minimum: int) -> int:
+    if isinstance(value, bool):
+        raise ValueError(f'{name} must be an integer, got {value!r}')
+    try:
+        num = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be an integer, got {value!r}') from None
+    if not num.is_integer() or num < minimum:
+        raise ValueError(f'{name} must be an integer >= {minimum}, got {value!r}')
+    return int(num)
+
+
+def _parse_threshold(name: str, value) -> float | None:
+    if value is None:
+        return None
+    try:
+        num = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be a number in [0, 1], got {value!r}') from None
+    if not 0.0 <= num <= 1.0:
+        raise ValueError(f'{name} must be a number in [0, 1], got {value!r}')
+    return num
+
+
+@dataclass
+class InstanceConfig:
+    market: str
+    interval: str
+    window: int | None = None          # None → load_nb_params()['window']
+    order_krw: int = 5000
+    paper: bool = True
+    min_order_gap_sec: int = 10
+    high: float | None = None          # None → engine-wide thresholds (ML trust)
+    low: float | None = None
+    enabled: bool = True
+
+    @property
+    def id(self) -> str:
+        return f"{self.market}:{self.interval}"
+
+    @classmethod
+    def from_dict(cls, d: dict) -> 'InstanceConfig':
+        """Coerce and validate request / file JSON; raises ValueError on a bad field."""
+        names = {f.name for f in fields(cls)}
+        d = {k: v for k, v in d.items() if k in names}
+        market = str(d.get('market') or '').strip().upper()
+        if not _MARKET_RE.match(market):
+            raise ValueError(f"market must look like KRW-BTC, got {d.get('market')!r}")
+        interval = str(d.get('interval') or '').strip()
+        if interval not in ENGINE_INTERVALS:
+            raise ValueError(f"interval must be one of {', '.join(ENGINE_INTERVALS)}, got {d.get('interval')!r}")
+        out = {'market': market, 'interval': interval}
+        if d.get('window') is not None:
+            out['window'] = _parse_int('window', d['window'], 1)
+        if 'order_krw' in d:
+            out['order_krw'] = _parse_int('order_krw', d['order_krw'], 1)
+        if 'min_order_gap_sec' in d:
+            out['min_order_gap_sec'] = _parse_int('min_order_gap_sec', d['min_order_gap_sec'], 0)
+        for name in ('paper', 'enabled'):
+            if name in d:
+                out[name] = _parse_bool(name, d[name])
+        for name in ('high', 'low'):
+            if name in d:
+                out[name] = _parse_threshold(name, d[name])
+        if out.get('high') is not None and out.get('low') is not None and out['low'] >= out['high']:
+            raise ValueError('low must be below high')
+        return cls(**out)
+
+
+# InstanceState fields saved with the instance config (a restarted LONG instance stays LONG)
+PERSISTED_STATE = ('position', 'last_order_ts', 'last_order_bar_ts')
+
+
+@dataclass
+class InstanceState:
+    zone: str | None = None
+    last_signal: str = 'HOLD'
+    position: str = 'FLAT'
+    last_order_ts: int = 0
+    last_order_bar_ts: int = 0
+    r: float | None = None
+    price: float | None = None
+    bar_ts: int | None = None
+    last_order: dict | None = None
+
+
+@dataclass
+class InstanceMetrics:
+    evaluations: int = 0
+    signals: int = 0
+    orders: int = 0
+    errors: int = 0
+    blocked: Counter = field(default_factory=Counter)
+    last_eval_ms: float = 0.0
+    total_eval_ms: float = 0.0
+    last_eval_at: int | None = None
+    last_error: str | None = None
+
+    def to_dict(self) -> dict:
+        d = asdict(self)
+        d['blocked'] = dict(self.blocked)
+        d['avg_eval_ms'] = round(self.total_eval_ms / self.evaluations, 2) if self.evaluations else 0.0
+        return d
+
+
+class StrategyInstance:
+    def __init__(self, cfg: InstanceConfig):
+        self.cfg = cfg
+        self.state = InstanceState()
+        self.metrics = InstanceMetrics()
+        self.next_due = 0.0
+        self._pending = None   # ticket still at the exchange after order_wait_sec
+        self._lock = threading.Lock()
+
+    def _block(self, reason: str):
+        self.metrics.blocked[reason] += 1
+
+    def evaluate(self, engine: 'TradingEngine'):
+        """One NB zone step: fetch bars, update r/zone, emit at most one order per bar."""
+        if not self._lock.acquire(blocking=False):
+            return  # previous evaluation still running
+        t0 = time.perf_counter()
+        try:
+            cfg, st, deps = self.cfg, self.state, engine.deps
+            window = int(cfg.window or deps['default_window']())
+            df = deps['get_candles'](cfg.market, cfg.interval, max(120, window + 5))
+            if df is None or len(df) == 0:
+                raise RuntimeError('no candles')
+            price = float(df['close'].iloc[-1])
+            r = deps['compute_r'](df, window)
+            r_last = float(r.iloc[-1]) if len(r) else 0.5
+            try:
+                bar_ts = int(df.index[-1].timestamp() * 1000)
+            except Exception:
+                bar_ts = int(time.time() * 1000)
+            if cfg.high is not None and cfg.low is not None:
+                high, low = float(cfg.high), float(cfg.low)
+            else:
+                high, low = deps['thresholds']()
+            st.r, st.price, st.bar_ts = r_last, price, bar_ts
+            if st.zone not in ('BLUE', 'ORANGE'):
+                st.zone = 'ORANGE' if r_last >= 0.5 else 'BLUE'
+            sig = 'HOLD'
+            if st.zone == 'BLUE' and r_last >= high:
+                st.zone, sig = 'ORANGE', 'SELL'
+            elif st.zone == 'ORANGE' and r_last <= low:
+                st.zone, sig = 'BLUE', 'BUY'
+            if sig != 'HOLD':
+                self.metrics.signals += 1
+            if sig in ('BUY', 'SELL') and sig != st.last_signal:
+                self._maybe_order(engine, sig, price, bar_ts, window, r_last)
+            st.last_signal = sig
+        except Exception as e:
+            self.metrics.errors += 1
+            self.metrics.last_error = str(e)
+        finally:
+            ms = (time.perf_counter() - t0) * 1000.0
+            self.metrics.evaluations += 1
+            self.metrics.last_eval_ms = round(ms, 2)
+            self.metrics.total_eval_ms += ms
+            self.metrics.last_eval_at = int(time.time() * 1000)
+            self._lock.release()
+
+    def _maybe_order(self, engine, sig, price, bar_ts, window, r_last):
+        cfg, st = self.cfg, self.state
+        now_ms = int(time.time() * 1000)
+        if st.last_order_bar_ts and bar_ts == st.last_order_bar_ts:
+            return self._block('already_ordered_this_bar')
+        if st.last_order_ts and (now_ms - st.last_order_ts) < max(0, int(cfg.min_order_gap_sec)) * 1000:
+            return self._block('cooldown')
+        if sig == 'BUY' and st.position == 'LONG':
+            return self._block('already_long')
+        if sig == 'SELL' and st.position != 'LONG':
+            return self._block('not_long')
+        if self._pending is not None and not self._pending.wait(0):
+            return self._block('order_pending')
+        ticket = engine.router.submit(OrderRequest(
+            market=cfg.market, side=sig, price=price, krw=int(cfg.order_krw), paper=bool(cfg.paper),
+            key=idempotency_key(bar_ts, sig, cfg.id), source=cfg.id))
+        if ticket.duplicates:
+            return self._block('duplicate_order')
+        # Not sent within the wait → withdraw it; already at the exchange → book it when it returns
+        if not ticket.wait(engine.order_wait_sec) and not engine.router.cancel(ticket):
+            self._pending = ticket
+        ticket.on_placed(lambda t: self._book(engine, t, sig, price, bar_ts, window, r_last, now_ms))
+
+    def _book(self, engine, ticket, sig, price, bar_ts, window, r_last, now_ms):
+        cfg, st = self.cfg, self.state
+        o = ticket.result
+        if ticket.error or not isinstance(o, dict):
+            # rejected / failed / cancelled: no order, no position flip (paper included)
+            if ticket.error:
+                self.metrics.last_error = ticket.error
+            return self._block('order_failed' if cfg.paper else 'live_min_notional_or_balance')
+        order = {
+            'ts': now_ms,
+            'side': sig,
+            'price': price,
+            'size': (o.get('size') if isinstance(o, dict) else None) or 0,
+            'paper': bool(cfg.paper or (isinstance(o, dict) and o.get('paper'))),
+            'market': cfg.market,
+            'interval': cfg.interval,
+            'live_ok': bool(o.get('live_ok')) if isinstance(o, dict) else False,
+            'nb_signal': sig,
+            'nb_window': int(window),
+            'nb_r': float(r_last),
+            'instance': cfg.id,
+        }
+        st.last_order_ts = now_ms
+        st.last_order_bar_ts = int(bar_ts)
+        st.last_order = order
+        if not cfg.paper and 'apply_fill' in engine.deps:
+            ticket.on_fill(lambda t, order=order: engine.deps['apply_fill'](order, t.fill))
+        st.position = 'LONG' if sig == 'BUY' else 'FLAT'
+        self.metrics.orders += 1
+        engine.persist()
+        try:
+            engine.deps['on_order'](order)
+        except Exception:
+            pass
+
+    def snapshot(self) -> dict:
+        return {
+            'id': self.cfg.id,
+            'config': asdict(self.cfg),
+            'state': asdict(self.state),
+            'metrics': self.metrics.to_dict(),
+            'next_due': self.next_due,
+        }
+
+
+class TradingEngine:
+    """Runs StrategyInstances on their bar-close schedule from a single scheduler thread."""
+
+    def __init__(self, deps: dict, config_path: str = ENGINE_CONFIG_FILE):
+        self.deps = deps
+        self.config_path = config_path
+        self.router = deps.get('router') or OrderRouter(deps['make_client'])
+        self.order_wait_sec = float(os.getenv('ENGINE_ORDER_WAIT_SEC', '15'))
+        self.settle_sec = float(os.getenv('ENGINE_SETTLE_SEC', os.getenv('TRADE_BAR_SETTLE_SEC', '1.5')))
+        self.max_wait_sec = float(os.getenv('ENGINE_MAX_WAIT_SEC', '60'))
+        # Optional intrabar re-evaluation (0 = bar close only)
+        self.poll_sec = float(os.getenv('ENGINE_POLL_SEC', '0'))
+        self.running = False
+        self._instances = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stop_event = threading.Event()   # per run: a stopped scheduler never resumes
+        self._pool = ThreadPoolExecutor(max_workers=int(os.getenv('ENGINE_WORKERS', '4')),
+                                        thread_name_prefix='engine')
+        self._load()
+
+    # ----- config -----
+    def _load(self):
+        try:
+            with open(self.config_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for d in data.get('instances', []):
+                try:
+                    cfg = InstanceConfig.from_dict(d)
+                except ValueError as e:
+                    print(f"⚠️ Engine instance skipped ({d.get('market')}:{d.get('interval')}): {e}")
+                    continue
+                inst = self._instances[cfg.id] = StrategyInstance(cfg)
+                saved = d.get('state') if isinstance(d.get('state'), dict) else {}
+                for name in PERSISTED_STATE:
+                    if name in saved:
+                        setattr(inst.state, name, saved[name])
+            self._autostart = bool(data.get('running'))
+        except FileNotFoundError:
+            self._autostart = False
+        except Exception as e:
+            print(f"⚠️ Engine config load failed: {e}")
+            self._autostart = False
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.config_path) or '.', exist_ok=True)
+            data = {'running': self.running,
+                    'instances': [dict(asdict(i.cfg), state={n: getattr(i.state, n) for n in PERSISTED_STATE})
+                                  for i in self._instances.values()]}
+            tmp = self.config_path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp, self.config_path)
+        except Exception as e:
+            print(f"⚠️ Engine config save failed: {e}")
+
+    # ----- instances -----
+    def add(self, cfg: InstanceConfig) -> StrategyInstance:
+        with self._cond:
+            inst = self._instances.get(cfg.id)
+            if inst is not None:
+                inst.cfg = cfg  # update in place, keep state/metrics
+            else:
+                inst = self._instances[cfg.id] = StrategyInstance(cfg)
+            inst.next_due = 0.0  # evaluate on the next scheduler pass
+            self._save()
+            self._cond.notify_all()
+            return inst
+
+    def remove(self, instance_id: str) -> bool:
+        with self._cond:
+            inst = self._instances.pop(instance_id, None)
+            if inst is None:
+                return False
+            self.router.forget(instance_id)
+            self._save()
+            self._cond.notify_all()
+            return True
+
+    def persist(self):
+        """Save configs + persisted instance state (after an order flips a position)."""
+        with self._cond:
+            self._save()
+
+    def get(self, instance_id: str) -> StrategyInstance | None:
+        return self._instances.get(instance_id)
+
+    def instances(self) -> list:
+        with self._cond:
+            return list(self._instances.values())
+
+    # ----- lifecycle -----
+    def start(self):
+        with self._cond:
+            if self.running:
+                return
+            old = self._thread
+        if old is not None and old is not threading.current_thread():
+            old.join(timeout=self.max_wait_sec + 5)  # previous run finishes its pass first
+        with self._cond:
+            if self.running:
+                return
+            self.running = True
+            self._stop_event = stop = threading.Event()
+            self._save()
+            self._thread = threading.Thread(target=self._run, args=(stop,), name='trading-engine', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self.running = False
+            self._stop_event.set()
+            self._save()
+            self._cond.notify_all()
+
+    def resume_if_configured(self):
+        if self._autostart and self._instances:
+            self.start()
+
+    def _run(self, stop: threading.Event):
+        while not stop.is_set():
+            now = time.time()
+            due = []
+            with self._cond:
+                for inst in self._instances.values():
+                    if not inst.cfg.enabled:
+                        continue
+                    if inst.next_due <= now:
+                        due.append(inst)
+                        sec = int(self.deps['interval_sec'](inst.cfg.interval))
+                        inst.next_due = next_bar_close(now, sec) + self.settle_sec
+                        if self.poll_sec > 0:
+                            inst.next_due = min(inst.next_due, now + self.poll_sec)
+            for inst in due:
+                self._pool.submit(inst.evaluate, self)
+            with self._cond:
+                if stop.is_set():
+                    break
+                pending = [i.next_due for i in self._instances.values() if i.cfg.enabled]
+                wait = (min(pending) - time.time()) if pending else self.max_wait_sec
+                wait = max(0.05, min(wait, self.max_wait_sec))
+                self._cond.wait(wait)
+
+    def status(self) -> dict:
+        insts = self.instances()
+        return {
+            'running': self.running,
+            'count': len(insts),
+            'settle_sec': self.settle_sec,
+            'poll_sec': self.poll_sec,
+            'instances': [i.snapshot() for i in insts],
+        }
+
+
+_engine = None
+
+
+def get_trading_engine(deps: dict | None = None) -> TradingEngine | None:
+    """전역 TradingEngine 인스턴스 (첫 호출 시 deps 필요)"""
+    global _engine
+    if _engine is None and deps is not None:
+        _engine = TradingEngine(deps)
+    return _engine
@@ -0,0 +1,442 @@
+"""Incremental training-sample store for the card rating models.
+
+nbverse 스냅샷(this_pocket_card.json)과 trainer_storage 의 BUY→SELL 쌍을 매번
+전부 다시 읽지 않도록, 파싱된 샘플을 .npz shard + manifest 로 저장하고
+마지막 watermark 이후에 변경된 것만 반영한다.
+
+Shard 하나는 keys / intervals / values(N x len(COLUMNS)) 배열을 가지며, 같은 key 가
+여러 shard 에 있으면 나중 shard 가 우선한다. 죽은 행이 많아지면 compaction 한다.
+"""
+
+import os
+import json
+import time
+import threading
+
+import numpy as np
+
+
+COLUMNS = ('p_max', 'p_min', 'v_max', 'v_min', 't_max', 't_min', 'current_price', 'zone_flag', 'profit_rate')
+SOURCES = ('nbverse', 'trades')
+SNAPSHOT_NAME = 'this_pocket_card.json'
+
+# trainer_storage 거래에는 N/B 정보가 없으므로 기존과 같은 기본 카드 값을 사용
+_TRADE_NB_DEFAULT = (50.0, 0.0, 50.0, 0.0, 50.0, 0.0)
+
+
+def _num(value) -> float:
+    """float 변환; None/변환 불가는 NaN (샘플 복원 시 None 으로 돌려놓음)."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+def _opt(v: float):
+    return None if np.isnan(v) else float(v)
+
+
+def match_buy_sell(buys: np.ndarray, sells: np.ndarray, tol: float = 0.01) -> list:
+    """Match each BUY with the first later SELL of the same size (±tol).
+
+    buys / sells: (N, 3) arrays of [ts, price, size] (+ sells[:, 3] = profit_percent).
+    sells must be sorted by ts. Returns a list of (buy_index, sell_index).
+    Sweep over buys from the newest: sells later than the buy are inserted into a
+    min segment tree laid out by size, and the size window [size*(1-tol), size*(1+tol)]
+    is one range-min query for the earliest sell index -> O((B + S) log S).
+    """
+    pairs = []
+    if len(buys) == 0 or len(sells) == 0:
+        return pairs
+    n = len(sells)
+    by_size = np.argsort(sells[:, 2], kind='stable')
+    sizes = sells[by_size, 2]
+    slot = np.empty(n, dtype=np.int64)
+    slot[by_size] = np.arange(n)
+    buy_size = buys[:, 2]
+    lo = np.searchsorted(sizes, buy_size - buy_size * tol, side='left').tolist()
+    hi = np.searchsorted(sizes, buy_size + buy_size * tol, side='right').tolist()
+    sell_ts = sells[:, 0].tolist()
+    slot = slot.tolist()
+    none = n
+    tree = [none] * (2 * n)
+    j = n - 1
+    for bi in np.argsort(-buys[:, 0], kind='stable').tolist():
+        buy_ts = buys[bi, 0]
+        while j >= 0 and sell_ts[j] > buy_ts:
+            p = slot[j] + n
+            tree[p] = j
+            p >>= 1
+            while p and tree[p] > j:
+                tree[p] = j
+                p >>= 1
+            j -= 1
+        best = none
+        left, right = lo[bi] + n, hi[bi] + n
+        while left < right:
+            if left & 1:
+                best = min(best, tree[left])
+                left += 1
+            if right & 1:
+                right -= 1
+                best = min(best, tree[right])
+            left >>= 1
+            right >>= 1
+        if best < none:
+            pairs.append((bi, best))
+    pairs.sort()
+    return pairs
+
+
+class TrainingSampleStore:
+    """Persisted, incrementally updated training samples (nbverse + trades)."""
+
+    def __init__(self, root: str = 'data/training_store', nbverse_dir: str = 'data/nbverse',
+                 trainer_storage_path: str = 'data/trainer_storage.json', min_scan_interval: float | None = None):
+        self.root = root
+        self.nbverse_dir = nbverse_dir
+        self.trainer_storage_path = trainer_storage_path
+        if min_scan_interval is None:
+            min_scan_interval = float(os.getenv('TRAINING_STORE_SCAN_SEC', '30'))
+        self.min_scan_interval = float(min_scan_interval)
+        self.manifest_path = os.path.join(root, 'manifest.json')
+        self._lock = threading.RLock()
+        self._rows = {src: {} for src in SOURCES}  # source -> key -> (interval, values)
+        self._stored_rows = {src: 0 for src in SOURCES}  # rows on disk incl. superseded ones
+        self._last_scan = 0.0
+        self.manifest = self._default_manifest()
+        self._load()
+
+    # ----- persistence -----
+    @staticmethod
+    def _default_manifest() -> dict:
+        return {
+            'version': 1,
+            'columns': list(COLUMNS),
+            'shards': {src: [] for src in SOURCES},
+            'nbverse': {'watermark': 0.0, 'skipped': {}},
+            'trades': {'source_mtime': 0.0, 'watermarks': {}, 'firsts': {}, 'pending': {}},
+        }
+
+    def _load(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') != 1 or list(manifest.get('columns', [])) != list(COLUMNS):
+                return  # schema changed: rebuild from sources
+        except Exception:
+            return
+        try:
+            for src in SOURCES:
+                for name in manifest['shards'].get(src, []):
+                    with np.load(os.path.join(self.root, name), allow_pickle=False) as z:
+                        keys, intervals, values = z['keys'], z['intervals'], z['values']
+                    rows = self._rows[src]
+                    for k, iv, v in zip(keys.tolist(), intervals.tolist(), values):
+                        rows[k] = (iv, v)
+                    self._stored_rows[src] += len(keys)
+            self.manifest = manifest
+        except Exception as e:
+            print(f"⚠️ training store 로드 실패, 재구축합니다: {e}")
+            self._rows = {src: {} for src in SOURCES}
+            self._stored_rows = {src: 0 for src in SOURCES}
+            self.manifest = self._default_manifest()
+
+    def _save_manifest(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.manifest_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False)
+        os.replace(tmp, self.manifest_path)
+
+    def _write_shard(self, src: str, entries: list) -> str | None:
+        """entries: [(key, interval, values)] -> new shard file name."""
+        if not entries:
+            return None
+        os.makedirs(self.root, exist_ok=True)
+        name = f"{src}_{int(time.time() * 1000)}_{len(self.manifest['shards'][src])}.npz"
+        keys = np.array([e[0] for e in entries], dtype=str)
+        intervals = np.array([e[1] for e in entries], dtype=str)
+        values = np.vstack([e[2] for e in entries]).astype(np.float64)
+        path = os.path.join(self.root, name)
+        with open(path + '.tmp', 'wb') as f:
+            np.savez(f, keys=keys, intervals=intervals, values=values)
+        os.replace(path + '.tmp', path)
+        self.manifest['shards'][src].append(name)
+        self._stored_rows[src] += len(entries)
+        return name
+
+    def _compact(self, src: str):
+        """Rewrite a source into a single shard holding only the live rows."""
+        old = list(self.manifest['shards'][src])
+        self.manifest['shards'][src] = []
+        self._stored_rows[src] = 0
+        new = self._write_shard(src, [(k, iv, v) for k, (iv, v) in self._rows[src].items()])
+        self._save_manifest()
+        for name in old:
+            if name == new:
+                continue
+            try:
+                os.remove(os.path.join(self.root, name))
+            except OSError:
+                pass
+
+    def _maybe_compact(self, src: str):
+        live = len(self._rows[src])
+        if len(self.manifest['shards'][src]) > 32 or self._stored_rows[src] > 2 * max(live, 1000):
+            self._compact(src)
+
+    # ----- nbverse snapshots -----
+    def _iter_snapshot_files(self):
+        stack = [self.nbverse_dir]
+        while stack:
+            d = stack.pop()
+            try:
+                with os.scandir(d) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.name == SNAPSHOT_NAME:
+                            try:
+                                yield entry.path, entry.stat().st_mtime
+                            except OSError:
+                                continue
+            except OSError:
+                continue
+
+    @staticmethod
+    def _snapshot_row(snapshot: dict):
+        card_rating = snapshot.get('card_rating', {})
+        nb_data = snapshot.get('nb', {})
+        if not card_rating or not nb_data:
+            return None
+        insight = snapshot.get('insight', {}) or {}
+        enhancement = float(card_rating.get('enhancement', 50))
+        # enhancement(1-99) → profit_rate(-1~1), 50 = 0%
+        profit_rate = (enhancement - 50) / 50.0
+        price, volume, turnover = (nb_data.get(k, {}) or {} for k in ('price', 'volume', 'turnover'))
+        values = np.array([
+            _num(price.get('max', 0)), _num(price.get('min', 0)),
+            _num(volume.get('max', 0)), _num(volume.get('min', 0)),
+            _num(turnover.get('max', 0)), _num(turnover.get('min', 0)),
+            _num(snapshot.get('current_price', 0)), float(insight.get('zone_flag', 0)),
+            profit_rate,
+        ], dtype=np.float64)
+        return str(snapshot.get('interval', 'minute30')), values
+
+    def ingest_nbverse(self, force: bool = False) -> int:
+        """Parse snapshots modified since the watermark. Returns number of (re)ingested files."""
+        with self._lock:
+            now = time.time()
+            if not force and now - self._last_scan < self.min_scan_interval:
+                return 0
+            self._last_scan = now
+            if not os.path.isdir(self.nbverse_dir):
+                return 0
+            watermark = float(self.manifest['nbverse'].get('watermark', 0.0))
+            # snapshots without card_rating / nb (or unreadable): key -> mtime, reopened only when rewritten
+            skipped = self.manifest['nbverse'].setdefault('skipped', {})
+            rows = self._rows['nbverse']
+            seen = set()
+            new_entries = []
+            dropped = False
+            max_mtime = watermark
+            for path, mtime in self._iter_snapshot_files():
+                key = os.path.relpath(path, self.nbverse_dir).replace('\\', '/')
+                seen.add(key)
+                if (mtime <= watermark and key in rows) or skipped.get(key) == mtime:
+                    continue
+                max_mtime = max(max_mtime, mtime)
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        parsed = self._snapshot_row(json.load(f))
+                except Exception:
+                    parsed = None
+                if parsed is None:
+                    skipped[key] = mtime
+                    dropped = rows.pop(key, None) is not None or dropped
+                    continue
+                skipped.pop(key, None)
+                prev = rows.get(key)
+                if prev is not None and prev[0] == parsed[0] and np.array_equal(prev[1], parsed[1], equal_nan=True):
+                    continue
+                rows[key] = parsed
+                new_entries.append((key,) + parsed)
+            for k in [k for k in skipped if k not in seen]:
+                del skipped[k]
+            removed = [k for k in rows if k not in seen]
+            for k in removed:
+                del rows[k]
+            # 같은 초에 쓰여지는 파일을 놓치지 않도록 watermark 는 스캔 시작보다 약간 뒤에 둔다
+            self.manifest['nbverse']['watermark'] = min(max_mtime, now - 2.0)
+            self._write_shard('nbverse', new_entries)
+            if removed or dropped:
+                self._compact('nbverse')
+            else:
+                self._save_manifest()
+                self._maybe_compact('nbverse')
+            return len(new_entries)
+
+    # ----- trainer_storage trades -----
+    @staticmethod
+    def _split_trades(trades_list: list):
+        """Return (buys, sells) as {ts: row}; later duplicates of a ts win, as before."""
+        buys, sells = {}, {}
+        for trade in trades_list:
+            if not isinstance(trade, dict):
+                continue
+            tm = trade.get('trade_match', {})
+            if not isinstance(tm, dict):
+                continue
+            action = tm.get('system_action')
+            ts = int(trade.get('ts', 0))
+            if action == 'BUY':
+                buys[ts] = [ts, float(tm.get('upbit_price', 0)), float(tm.get('upbit_size', 0))]
+            elif action == 'SELL':
+                sells[ts] = [ts, float(tm.get('upbit_price', 0)), float(tm.get('upbit_size', 0)),
+                             float(tm.get('profit_percent', 0))]
+        return buys, sells
+
+    def ingest_trades(self, force: bool = False) -> int:
+        """Match BUY→SELL pairs for trades newer than each trainer's watermark.
+
+        Front-trimmed history (trades[-N:]) drops that trainer's samples and pending BUYs
+        older than its new first trade; a reset (latest < watermark), older trades showing
+        up or a removed trainer rebuilds everything.
+        """
+        with self._lock:
+            try:
+                mtime = os.path.getmtime(self.trainer_storage_path)
+            except OSError:
+                return 0
+            meta = self.manifest['trades']
+            if not force and mtime == meta.get('source_mtime'):
+                return 0
+            try:
+                with open(self.trainer_storage_path, 'r', encoding='utf-8') as f:
+                    trainer_data = json.load(f)
+            except Exception:
+                return 0
+            if not isinstance(trainer_data, dict):
+                return 0
+
+            watermarks = meta.setdefault('watermarks', {})
+            firsts = meta.setdefault('firsts', {})
+            pending = meta.setdefault('pending', {})
+            rows = self._rows['trades']
+            new_entries = []
+            rebuild = False
+            trimmed = {}
+            parsed = {}
+            for trainer, info in trainer_data.items():
+                trades_list = info.get('trades', []) if isinstance(info, dict) else []
+                if not isinstance(trades_list, list):
+                    continue
+                buys, sells = self._split_trades(trades_list)
+                parsed[trainer] = (buys, sells)
+                stamps = list(buys) + list(sells)
+                latest, first = max(stamps, default=0), min(stamps, default=0)
+                if latest < int(watermarks.get(trainer, 0)):
+                    rebuild = True  # history was reset
+                elif trainer in firsts and stamps:
+                    if first < int(firsts[trainer]):
+                        rebuild = True  # older trades appeared
+                    elif first > int(firsts[trainer]):
+                        trimmed[trainer] = first  # oldest trades were dropped
+            if rebuild or set(watermarks) - set(parsed):
+                rebuild = True
+                rows.clear()
+                watermarks.clear()
+                firsts.clear()
+                pending.clear()
+            elif trimmed:
+                for key in [k for k in rows if k.rpartition('|')[0] in trimmed]:
+                    trainer, _, buy_ts = key.rpartition('|')
+                    if int(buy_ts) < trimmed[trainer]:
+                        del rows[key]
+                for trainer, first in trimmed.items():
+                    pending[trainer] = [b for b in pending.get(trainer, []) if b[0] >= first]
+
+            for trainer, (buys, sells) in parsed.items():
+                wm = int(watermarks.get(trainer, 0))
+                new_buys = [b for ts, b in buys.items() if ts > wm]
+                cand = np.array(pending.get(trainer, []) + new_buys, dtype=np.float64).reshape(-1, 3)
+                # 과거 SELL 은 이미 pending BUY 와 비교되었고, 새 BUY 보다 앞서므로 새 SELL 만 본다
+                new_sells = np.array(sorted(s for ts, s in sells.items() if ts > wm), dtype=np.float64).reshape(-1, 4)
+                matched = set()
+                for bi, si in match_buy_sell(cand, new_sells):
+                    buy_ts, buy_price, _ = cand[bi]
+                    profit_percent = new_sells[si, 3]
+                    profit_rate = profit_percent / 100.0 if abs(profit_percent) > 1 else profit_percent
+                    values = np.array(_TRADE_NB_DEFAULT + (buy_price, 0.0, profit_rate), dtype=np.float64)
+                    key = f"{trainer}|{int(buy_ts)}"
+                    rows[key] = ('1m', values)
+                    new_entries.append((key, '1m', values))
+                    matched.add(bi)
+                pending[trainer] = [cand[i].tolist() for i in range(len(cand)) if i not in matched]
+                latest = max(list(buys) + list(sells), default=wm)
+                watermarks[trainer] = max(wm, int(latest))
+                if buys or sells:
+                    firsts[trainer] = int(min(list(buys) + list(sells)))
+            meta['source_mtime'] = mtime
+            if rebuild or trimmed:
+                self._compact('trades')
+            else:
+                self._write_shard('trades', new_entries)
+                self._save_manifest()
+                self._maybe_compact('trades')
+            return len(new_entries)
+
+    # ----- readers -----
+    def _samples(self, src: str) -> list[dict]:
+        out = []
+        for interval, v in list(self._rows[src].values()):
+            out.append({
+                'card': {
+                    'nb': {
+                        'price': {'max': _opt(v[0]), 'min': _opt(v[1])},
+                        'volume': {'max': _opt(v[2]), 'min': _opt(v[3])},
+                        'turnover': {'max': _opt(v[4]), 'min': _opt(v[5])},
+                    },
+                    'current_price': _opt(v[6]),
+                    'interval': interval,
+                    'insight': {'zone_flag': float(v[7])},
+                },
+                'profit_rate': float(v[8]),
+            })
+        return out
+
+    def nbverse_samples(self) -> list[dict]:
+        self.ingest_nbverse()
+        return self._samples('nbverse')
+
+    def trade_samples(self) -> list[dict]:
+        self.ingest_trades()
+        return self._samples('trades')
+
+    def arrays(self, src: str) -> tuple[np.ndarray, np.ndarray]:
+        """(values (N x len(COLUMNS)), intervals) for numeric consumers."""
+        items = list(self._rows[src].values())
+        if not items:
+            return np.empty((0, len(COLUMNS))), np.empty(0, dtype=str)
+        return np.vstack([v for _, v in items]), np.array([iv for iv, _ in items], dtype=str)
+
+    def stats(self) -> dict:
+        return {
+            src: {
+                'rows': len(self._rows[src]),
+                'stored_rows': self._stored_rows[src],
+                'shards': len(self.manifest['shards'][src]),
+            } for src in SOURCES
+        }
+
+
+_training_store = None
+
+
+def get_training_store() -> TrainingSampleStore:
+    """전역 TrainingSampleStore 인스턴스"""
+    global _training_store
+    if _training_store is None:
+        _training_store = TrainingSampleStore()
+    return _training_store
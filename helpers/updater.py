@@ -3,7 +3,7 @@
 def create_updater(state, load_config, get_candles, decide_signal, _prefill_nb_coins, _load_nb_coins, _load_npc_hashes):
     """Factory function to create updater with dependencies."""
     import time
-    import pyupbit
+    from helpers.exchange_gateway import get_exchange_gateway
     import os
     
     def updater():
@@ -32,7 +32,7 @@ def create_updater(state, load_config, get_candles, decide_signal, _prefill_nb_c
             sig = decide_signal(df, cfg.ema_fast, cfg.ema_slow)
             tail = df.tail(60)
             for t, p in zip(tail.index, tail["close"].astype(float)):
-                state["history"].append((int(t.timestamp()*1000), float(p)))
+                state.append("history", (int(t.timestamp()*1000), float(p)))
             state["price"] = float(tail["close"].iloc[-1])
             state["signal"] = sig
         except Exception:
@@ -44,11 +44,11 @@ def create_updater(state, load_config, get_candles, decide_signal, _prefill_nb_c
         while True:
             try:
                 # Live price via ticker
-                cp = pyupbit.get_current_price(cfg.market)
+                cp = get_exchange_gateway().get_current_price(cfg.market)
                 if cp:
                     now_ms = int(time.time() * 1000)
                     state["price"] = float(cp)
-                    state["history"].append((now_ms, float(cp)))
+                    state.append("history", (now_ms, float(cp)))
                 # Periodic recalc of signal from candles
                 if tick % max(recalc_every, 1) == 0:
                     df = get_candles(cfg.market, cfg.candle, count=max(cfg.ema_slow + 5, 60))
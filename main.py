@@ -1,13 +1,19 @@
 import os
+import threading
 import time
 import math
+from concurrent.futures import Future, ThreadPoolExecutor
 import numpy as np
 import pandas as pd
-from dataclasses import dataclass
-from dotenv import load_dotenv
+from dataclasses import dataclass, replace
 import pyupbit
 from strategy import decide_signal
 from trade import Trader, TradeConfig
+from helpers.exchange_gateway import get_exchange_gateway
+from helpers.config_service import ConfigService
+from helpers.metrics import get_registry, timed
+from helpers.memory_manager import get_memory_manager
+from helpers.utils import interval_to_sec
 import requests
 
 
@@ -24,17 +30,7 @@ class Config:
     order_krw: int
 
 
-def load_config() -> Config:
-    # Load .env first, then optional env.local (non-dotfile fallback)
-    load_dotenv()
-    load_dotenv("env.local", override=False)
-    # Also load from this module's directory so running from project root still picks up bot/.env
-    base_dir = os.path.dirname(__file__)
-    try:
-        load_dotenv(os.path.join(base_dir, ".env"), override=False)
-        load_dotenv(os.path.join(base_dir, "env.local"), override=False)
-    except Exception:
-        pass
+def _build_config() -> Config:
     return Config(
         access_key=os.getenv("UPBIT_ACCESS_KEY"),
         secret_key=os.getenv("UPBIT_SECRET_KEY"),
@@ -48,21 +44,129 @@ def load_config() -> Config:
     )
 
 
+_config_service = None
+
+
+def get_config_service() -> ConfigService:
+    """전역 ConfigService 인스턴스"""
+    global _config_service
+    if _config_service is None:
+        # .env first, then optional env.local (non-dotfile fallback); cwd before this module's directory
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        files = [".env", "env.local", os.path.join(base_dir, ".env"), os.path.join(base_dir, "env.local")]
+        _config_service = ConfigService(files, _build_config, poll_sec=float(os.getenv("CONFIG_POLL_SEC", "1.0")))
+    return _config_service
+
+
+def load_config() -> Config:
+    """Config from the cached snapshot (env files are re-parsed only when they change)."""
+    return replace(get_config_service().config())
+
+
 # Global cache for OHLCV data
 _candles_cache = {}
 _candles_cache_time = {}
 
+# Single-flight: one exchange fetch per cache key at a time, concurrent callers share its Future.
+# A frame past CANDLES_TTL_SEC but inside CANDLES_STALE_SEC (and still in the same bar) is returned
+# immediately while one background refresh runs (stale-while-revalidate).
+CANDLES_TTL_SEC = float(os.getenv('CANDLES_TTL_SEC', '5'))
+CANDLES_STALE_SEC = float(os.getenv('CANDLES_STALE_SEC', '30'))
+_candles_inflight = {}
+_candles_lock = threading.Lock()
+_candles_refresher = None
+_candles_requests = get_registry().counter(
+    'candles_requests_total', 'get_candles calls by result (hit / stale / miss / coalesced / refresh)',
+    labelnames=('result',))
+
+
+def _evict_candles(cache_key):
+    _candles_cache.pop(cache_key, None)
+    _candles_cache_time.pop(cache_key, None)
+
+
+_memory = get_memory_manager()
+_memory.register('candles', _candles_cache, on_evict=_evict_candles)
+
+
+def _same_bar(candle: str, fetched_at: float, now: float) -> bool:
+    """True while no bar boundary passed since the frame was fetched (a stale frame would miss a new bar)."""
+    sec = interval_to_sec(candle)
+    return int(fetched_at) // sec == int(now) // sec
+
+
+def _join_fetch(cache_key: str):
+    """(future, leader): the in-flight fetch for cache_key, creating it when none runs."""
+    with _candles_lock:
+        fut = _candles_inflight.get(cache_key)
+        if fut is not None:
+            return fut, False
+        fut = _candles_inflight[cache_key] = Future()
+        return fut, True
+
+
+def _run_fetch(fut: Future, cache_key: str, market: str, candle: str, count: int):
+    try:
+        data = _fetch_candles(cache_key, market, candle, count)
+    except BaseException as e:
+        with _candles_lock:
+            _candles_inflight.pop(cache_key, None)
+        fut.set_exception(e)
+        return
+    with _candles_lock:
+        _candles_inflight.pop(cache_key, None)
+    fut.set_result(data)
+
+
+def _refresh_async(cache_key: str, market: str, candle: str, count: int):
+    global _candles_refresher
+    fut, leader = _join_fetch(cache_key)
+    if not leader:
+        return
+    if _candles_refresher is None:
+        with _candles_lock:
+            if _candles_refresher is None:
+                _candles_refresher = ThreadPoolExecutor(max_workers=int(os.getenv('CANDLES_REFRESH_WORKERS', '4')),
+                                                        thread_name_prefix='candles-refresh')
+    _candles_requests.inc(result='refresh')
+    _candles_refresher.submit(_run_fetch, fut, cache_key, market, candle, count)
+
+
+@timed('candles_get_seconds')
 def get_candles(market: str, candle: str, count: int = 200) -> pd.DataFrame:
-    """Fetch OHLCV data from pyupbit with retry logic, caching, and better error handling."""
-    import time
-    
+    """Fetch OHLCV data from pyupbit with retry logic, caching, and better error handling.
+
+    Concurrent misses for the same key share one fetch; a recently expired frame is served
+    while a background refresh runs.
+    """
     cache_key = f"{market}_{candle}_{count}"
     now = time.time()
     
-    # Check cache (valid for 5 seconds)
-    if cache_key in _candles_cache and (now - _candles_cache_time.get(cache_key, 0)) < 5:
-        return _candles_cache[cache_key]
+    cached = _candles_cache.get(cache_key)  # .get: the memory manager may evict concurrently
+    if cached is not None:
+        fetched_at = _candles_cache_time.get(cache_key, 0)
+        age = now - fetched_at
+        if age < CANDLES_TTL_SEC:
+            _memory.touch('candles', cache_key)
+            _candles_requests.inc(result='hit')
+            return cached
+        if age < CANDLES_STALE_SEC and _same_bar(candle, fetched_at, now):
+            _memory.touch('candles', cache_key)
+            _candles_requests.inc(result='stale')
+            _refresh_async(cache_key, market, candle, count)
+            return cached
     
+    fut, leader = _join_fetch(cache_key)
+    if leader:
+        _candles_requests.inc(result='miss')
+        _run_fetch(fut, cache_key, market, candle, count)
+    else:
+        _candles_requests.inc(result='coalesced')
+    return fut.result()
+
+
+def _fetch_candles(cache_key: str, market: str, candle: str, count: int) -> pd.DataFrame:
+    """One exchange fetch with retries; stores the frame in the cache (runs once per key at a time)."""
     max_retries = 5
     retry_delay = 2.0  # Start with 2 seconds
     
@@ -72,10 +176,10 @@ def get_candles(market: str, candle: str, count: int = 200) -> pd.DataFrame:
             if candle.startswith("minute"):
                 unit = int(candle.replace("minute", ""))
                 interval_str = f"minute{unit}"
-                data = pyupbit.get_ohlcv(ticker=market, interval=interval_str, count=count)
+                data = get_exchange_gateway().get_ohlcv(market, interval=interval_str, count=count)
             else:
                 interval_str = candle
-                data = pyupbit.get_ohlcv(ticker=market, interval=candle, count=count)
+                data = get_exchange_gateway().get_ohlcv(market, interval=candle, count=count)
             
             if data is None or data.empty:
                 if attempt < max_retries - 1:
@@ -85,14 +189,16 @@ def get_candles(market: str, candle: str, count: int = 200) -> pd.DataFrame:
                     continue
                 else:
                     # Return cached data if available, even if stale
-                    if cache_key in _candles_cache:
+                    stale = _candles_cache.get(cache_key)
+                    if stale is not None:
                         print(f"⚠️ Using stale cache for {market} {candle}")
-                        return _candles_cache[cache_key]
+                        return stale
                     raise RuntimeError(f"Failed to fetch OHLCV data for {market} {candle} after {max_retries} attempts")
             
             # Cache the successful result
             _candles_cache[cache_key] = data
-            _candles_cache_time[cache_key] = now
+            _candles_cache_time[cache_key] = time.time()
+            _memory.touch('candles', cache_key)
             return data
             
         except Exception as e:
@@ -102,15 +208,65 @@ def get_candles(market: str, candle: str, count: int = 200) -> pd.DataFrame:
                 retry_delay *= 1.5  # exponential backoff
             else:
                 # Return cached data if available, even if stale
-                if cache_key in _candles_cache:
+                stale = _candles_cache.get(cache_key)
+                if stale is not None:
                     print(f"⚠️ Using stale cache for {market} {candle} due to error")
-                    return _candles_cache[cache_key]
+                    return stale
                 raise RuntimeError(f"Failed to fetch OHLCV: {str(e)}")
     
     raise RuntimeError("Failed to fetch OHLCV data")
 
 
 
+def ingest_bar(market: str, candle: str, bar: dict) -> int:
+    """Merge a locally built bar (market-data feed) into cached candle frames.
+
+    bar: {'ts': bar start ms (UTC), 'open','high','low','close','volume'}. Frames are
+    KST-indexed like pyupbit. The open row is updated in place; the next bar is appended
+    and the oldest row dropped so each cached frame keeps its requested count. A bar past
+    last + interval (bars missed, e.g. across a websocket reconnect) drops the cached frame
+    and refetches it from REST instead of appending over the gap.
+    Returns the number of cached frames updated.
+    """
+    ts = pd.Timestamp(int(bar['ts']), unit='ms') + pd.Timedelta(hours=9)
+    # months are 28-31 days long; interval_to_sec('month') is 30
+    step = pd.Timedelta(seconds=interval_to_sec(candle) + (86400 if candle == 'month' else 0))
+    prefix = f"{market}_{candle}_"
+    now = time.time()
+    updated = 0
+    for key in [k for k in list(_candles_cache.keys()) if k.startswith(prefix)]:
+        df = _candles_cache.get(key)
+        if df is None or len(df) == 0:
+            continue
+        last = df.index[-1]
+        if ts < last:
+            continue
+        if ts - last > step:
+            _evict_candles(key)
+            _refresh_async(key, market, candle, int(key.rsplit('_', 1)[1]))
+            continue
+        if ts == last:
+            df = df.copy()
+            i = len(df) - 1
+            cols = df.columns
+            df.iloc[i, cols.get_loc('high')] = max(float(df['high'].iloc[i]), float(bar['high']))
+            df.iloc[i, cols.get_loc('low')] = min(float(df['low'].iloc[i]), float(bar['low']))
+            df.iloc[i, cols.get_loc('close')] = float(bar['close'])
+            if 'volume' in cols:
+                df.iloc[i, cols.get_loc('volume')] = max(float(df['volume'].iloc[i]), float(bar.get('volume') or 0.0))
+        else:
+            row = {c: float('nan') for c in df.columns}
+            row.update({k: float(bar[k]) for k in ('open', 'high', 'low', 'close') if k in df.columns})
+            if 'volume' in df.columns:
+                row['volume'] = float(bar.get('volume') or 0.0)
+            if 'value' in df.columns:
+                row['value'] = float(bar.get('volume') or 0.0) * float(bar['close'])
+            df = pd.concat([df.iloc[1:], pd.DataFrame([row], index=[ts])])
+        _candles_cache[key] = df
+        _candles_cache_time[key] = now
+        updated += 1
+    return updated
+
 
 def get_balance(upbit: pyupbit.Upbit, currency: str) -> float:
     bal = upbit.get_balance(currency)
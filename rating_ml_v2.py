@@ -15,6 +15,7 @@ from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 from datetime import datetime
 from utils.logger import setup_logger
+from helpers.compiled_models import export_sklearn, load_compiled
 
 # Logger 설정
 logger = setup_logger('ml_v2', log_dir='logs')
@@ -26,6 +27,7 @@ logger.info("=" * 60)
 try:
     from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
     from sklearn.preprocessing import StandardScaler
+    from sklearn.pipeline import make_pipeline
     from sklearn.model_selection import train_test_split
     from sklearn.metrics import accuracy_score, f1_score, mean_absolute_error, r2_score
     SKLEARN_AVAILABLE = True
@@ -48,6 +50,9 @@ class ZonePredictionModel:
         self.model_path = self.model_dir / "zone_model.pkl"
         self.scaler_path = self.model_dir / "zone_scaler.pkl"
         self.meta_path = self.model_dir / "zone_meta.json"
+        # scaler + model 을 묶은 ONNX 아티팩트 (있으면 예측에 우선 사용)
+        self.compiled_path = self.model_dir / "zone_model.onnx"
+        self.compiled = None
         
         self.load()
     
@@ -201,9 +206,13 @@ class ZonePredictionModel:
             return {"ok": False, "error": "invalid features"}
         
         try:
-            feats_scaled = self.scaler.transform(feats)
-            zone_class = int(self.model.predict(feats_scaled)[0])
-            zone_proba = self.model.predict_proba(feats_scaled)[0]
+            if self.compiled is not None:
+                zone_class = int(self.compiled.predict(feats)[0])
+                zone_proba = self.compiled.predict_proba(feats)[0]
+            else:
+                feats_scaled = self.scaler.transform(feats)
+                zone_class = int(self.model.predict(feats_scaled)[0])
+                zone_proba = self.model.predict_proba(feats_scaled)[0]
             
             zone_name = "BLUE" if zone_class == 1 else "ORANGE"
             confidence = float(zone_proba[zone_class])
@@ -243,6 +252,12 @@ class ZonePredictionModel:
                     size = self.meta_path.stat().st_size
                     saved_files.append(f"{self.meta_path.name} ({size} bytes)")
             
+            if self.model and self.scaler:
+                n_features = int(getattr(self.scaler, 'n_features_in_', 0) or self.meta.get('feature_count', 0))
+                if export_sklearn(make_pipeline(self.scaler, self.model), n_features, self.compiled_path):
+                    saved_files.append(f"{self.compiled_path.name} ({self.compiled_path.stat().st_size} bytes)")
+                    self.compiled = load_compiled(self.compiled_path)
+            
             logger.info(f"[ZoneModel] 저장 완료: {', '.join(saved_files)}")
         except Exception as e:
             logger.error(f"[ZoneModel] 저장 실패: {e}")
@@ -260,7 +275,9 @@ class ZonePredictionModel:
                 with open(self.meta_path, 'r', encoding='utf-8') as f:
                     self.meta = json.load(f)
             if self.model:
-                logger.info(f"[ZoneModel] 로드 완료: {self.meta.get('trained_at', 'unknown')}")
+                self.compiled = load_compiled(self.compiled_path, source_path=self.model_path)
+                logger.info(f"[ZoneModel] 로드 완료: {self.meta.get('trained_at', 'unknown')} "
+                            f"(compiled={self.compiled is not None})")
         except Exception as e:
             logger.error(f"[ZoneModel] 로드 실패: {e}")
 
@@ -279,6 +296,9 @@ class ProfitPredictionModel:
         self.model_path = self.model_dir / "profit_model.pkl"
         self.scaler_path = self.model_dir / "profit_scaler.pkl"
         self.meta_path = self.model_dir / "profit_meta.json"
+        # scaler + model 을 묶은 ONNX 아티팩트 (있으면 예측에 우선 사용)
+        self.compiled_path = self.model_dir / "profit_model.onnx"
+        self.compiled = None
         
         self.load()
     
@@ -437,8 +457,11 @@ class ProfitPredictionModel:
             return {"ok": False, "error": "invalid features"}
         
         try:
-            feats_scaled = self.scaler.transform(feats)
-            profit_rate = float(self.model.predict(feats_scaled)[0])
+            if self.compiled is not None:
+                profit_rate = float(self.compiled.predict(feats)[0])
+            else:
+                feats_scaled = self.scaler.transform(feats)
+                profit_rate = float(self.model.predict(feats_scaled)[0])
             
             # Convert to 1~99 score
             score = max(1, min(99, int((profit_rate + 1.0) * 49.5)))
@@ -477,6 +500,12 @@ class ProfitPredictionModel:
                     size = self.meta_path.stat().st_size
                     saved_files.append(f"{self.meta_path.name} ({size} bytes)")
             
+            if self.model and self.scaler:
+                n_features = int(getattr(self.scaler, 'n_features_in_', 0) or self.meta.get('feature_count', 0))
+                if export_sklearn(make_pipeline(self.scaler, self.model), n_features, self.compiled_path):
+                    saved_files.append(f"{self.compiled_path.name} ({self.compiled_path.stat().st_size} bytes)")
+                    self.compiled = load_compiled(self.compiled_path)
+            
             logger.info(f"[ProfitModel] 저장 완료: {', '.join(saved_files)}")
         except Exception as e:
             logger.error(f"[ProfitModel] 저장 실패: {e}")
@@ -494,7 +523,9 @@ class ProfitPredictionModel:
                 with open(self.meta_path, 'r', encoding='utf-8') as f:
                     self.meta = json.load(f)
             if self.model:
-                logger.info(f"[ProfitModel] 로드 완료: {self.meta.get('trained_at', 'unknown')}")
+                self.compiled = load_compiled(self.compiled_path, source_path=self.model_path)
+                logger.info(f"[ProfitModel] 로드 완료: {self.meta.get('trained_at', 'unknown')} "
+                            f"(compiled={self.compiled is not None})")
         except Exception as e:
             logger.error(f"[ProfitModel] 로드 실패: {e}")
 
@@ -16,6 +16,7 @@ from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 from datetime import datetime
 from utils.logger import setup_logger
+from helpers.compiled_models import export_keras, load_compiled
 
 # Logger 설정
 logger = setup_logger('ml_v3', log_dir='logs')
@@ -84,61 +85,96 @@ class LSTMPredictionModel:
         self.scaler_x_path = self.model_dir / "lstm_scaler_x.pkl"
         self.scaler_y_path = self.model_dir / "lstm_scaler_y.pkl"
         self.meta_path = self.model_dir / "lstm_meta.json"
+        # ONNX 아티팩트 (있으면 Keras 대신 예측에 사용)
+        self.compiled_path = self.model_dir / "lstm_model.onnx"
+        self.compiled = None
         
         self.load()
     
+    # 카드 → 입력 feature 컬럼 순서 (prepare_sequences / predict 공용)
+    FEATURE_COLUMNS = ('p_max', 'p_min', 'v_max', 'v_min', 't_max', 't_min', 'current_price', 'zone_flag')
+    # 출력 컬럼: (zone_flag, current_price) 의 feature 인덱스
+    TARGET_COLUMNS = (7, 6)
+
+    @staticmethod
+    def _card_features(item: Dict) -> Tuple[float, ...]:
+        """카드 1개에서 8개 feature 추출"""
+        card = item.get('card', {})
+        nb = card.get('nb', {})
+        price = nb.get('price', {})
+        volume = nb.get('volume', {})
+        turnover = nb.get('turnover', {})
+        return (
+            float(price.get('max', 0)), float(price.get('min', 0)),
+            float(volume.get('max', 0)), float(volume.get('min', 0)),
+            float(turnover.get('max', 0)), float(turnover.get('min', 0)),
+            float(card.get('current_price', 0)),
+            float(card.get('insight', {}).get('zone_flag', 0)),
+        )
+
+    def extract_feature_matrix(self, data: List[Dict]) -> np.ndarray:
+        """카드 리스트를 (N, 8) float32 행렬로 변환 (단일 패스)"""
+        n_features = len(self.FEATURE_COLUMNS)
+        if not data:
+            return np.empty((0, n_features), dtype=np.float32)
+        flat = np.fromiter(
+            (v for item in data for v in self._card_features(item)),
+            dtype=np.float32,
+            count=len(data) * n_features,
+        )
+        return flat.reshape(len(data), n_features)
+
+    def sequence_views(self, feats: np.ndarray) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """feature 행렬에서 X/Y 윈도우를 strided view 로 생성 (복사 없음)
+
+        X: (n, sequence_length, 8), Y: (n, prediction_horizon, 2)
+        """
+        L, H = self.sequence_length, self.prediction_horizon
+        n = len(feats) - L - H + 1
+        if n <= 0:
+            return None, None
+        # sliding_window_view 는 윈도우 축을 마지막에 붙이므로 (n, 8, L) → (n, L, 8)
+        X = np.lib.stride_tricks.sliding_window_view(feats[:n + L - 1], L, axis=0).transpose(0, 2, 1)
+        targets = feats[L:, list(self.TARGET_COLUMNS)]
+        Y = np.lib.stride_tricks.sliding_window_view(targets, H, axis=0).transpose(0, 2, 1)
+        return X, Y
+
     def prepare_sequences(self, data: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
-        """시계열 시퀀스 준비 (GPU 가속)"""
+        """시계열 시퀀스 준비
+
+        입력: 과거 30개 시점의 NB Wave + 가격, 출력: 미래 10개 시점의 zone + 가격.
+        반환값은 feature 행렬 위의 읽기 전용 view 이므로 수정하려면 복사해야 한다.
+        """
         if len(data) < self.sequence_length + self.prediction_horizon:
             return None, None
-        
-        # 데이터를 NumPy 배열로 변환하여 GPU에서 처리 가능하게
-        sequences_x = []
-        sequences_y = []
-        
-        for i in range(len(data) - self.sequence_length - self.prediction_horizon + 1):
-            # 입력: 과거 30개 시점의 NB Wave + 가격
-            seq_x = []
-            for j in range(i, i + self.sequence_length):
-                card = data[j].get('card', {})
-                nb = card.get('nb', {})
-                
-                # Feature 추출 (빠른 계산)
-                p_max = float(nb.get('price', {}).get('max', 0))
-                p_min = float(nb.get('price', {}).get('min', 0))
-                v_max = float(nb.get('volume', {}).get('max', 0))
-                v_min = float(nb.get('volume', {}).get('min', 0))
-                t_max = float(nb.get('turnover', {}).get('max', 0))
-                t_min = float(nb.get('turnover', {}).get('min', 0))
-                
-                current_price = float(card.get('current_price', 0))
-                zone_flag = float(card.get('insight', {}).get('zone_flag', 0))
-                
-                seq_x.append([p_max, p_min, v_max, v_min, t_max, t_min, current_price, zone_flag])
-            
-            sequences_x.append(seq_x)
-            
-            # 출력: 미래 10개 시점의 zone + 가격
-            seq_y = []
-            for j in range(i + self.sequence_length, i + self.sequence_length + self.prediction_horizon):
-                if j < len(data):
-                    card = data[j].get('card', {})
-                    future_price = float(card.get('current_price', 0))
-                    future_zone = float(card.get('insight', {}).get('zone_flag', 0))
-                    seq_y.append([future_zone, future_price])
-                else:
-                    break
-            
-            if len(seq_y) == self.prediction_horizon:
-                sequences_y.append(seq_y)
-            else:
-                sequences_x.pop()  # 불완전한 시퀀스 제거
-        
-        if not sequences_x or not sequences_y:
-            return None, None
-        
-        return np.array(sequences_x), np.array(sequences_y)
-    
+        return self.sequence_views(self.extract_feature_matrix(data))
+
+    def iter_sequence_batches(self, X: np.ndarray, Y: np.ndarray, indices: np.ndarray,
+                              batch_size: int, scale_x, scale_y):
+        """윈도우 인덱스 배치 단위로 스케일된 (x, y) 를 생성 (배치만 메모리에 올림)"""
+        for start in range(0, len(indices), batch_size):
+            idx = indices[start:start + batch_size]
+            xb = scale_x(X[idx])
+            yb = scale_y(Y[idx]).reshape(len(idx), -1)
+            yield xb.astype(np.float32, copy=False), yb.astype(np.float32, copy=False)
+
+    def make_dataset(self, X: np.ndarray, Y: np.ndarray, indices: np.ndarray,
+                     batch_size: int, scale_x, scale_y, shuffle: bool = False, seed: int = 42):
+        """iter_sequence_batches 를 감싼 tf.data.Dataset (epoch 마다 재생성)"""
+        rng = np.random.default_rng(seed)
+        n_timesteps, n_features = X.shape[1], X.shape[2]
+        signature = (
+            tf.TensorSpec(shape=(None, n_timesteps, n_features), dtype=tf.float32),
+            tf.TensorSpec(shape=(None, self.prediction_horizon * 2), dtype=tf.float32),
+        )
+        ds = tf.data.Dataset.from_generator(
+            lambda: self.iter_sequence_batches(
+                X, Y, rng.permutation(indices) if shuffle else indices, batch_size, scale_x, scale_y
+            ),
+            output_signature=signature,
+        )
+        return ds.prefetch(tf.data.AUTOTUNE)
+
     def build_model(self, input_shape):
         """LSTM 모델 구축 (GPU 최적화)"""
         # GPU 있을 경우 더 큰 모델 사용
@@ -183,16 +219,23 @@ class LSTMPredictionModel:
         
         return model
     
-    def train(self, training_data: List[Dict]) -> Dict:
-        """LSTM 모델 훈련"""
-        logger.info("[LSTM] 훈련 시작")
+    def train(self, training_data: List[Dict], stream: bool = False) -> Dict:
+        """LSTM 모델 훈련
+
+        stream=True 이면 전체 시퀀스를 메모리에 만들지 않고 tf.data 배치 스트림으로 학습한다.
+        """
+        logger.info(f"[LSTM] 훈련 시작 (stream={stream})")
         
         if not TF_AVAILABLE:
             logger.error("[LSTM] TensorFlow 없음")
             return {"ok": False, "error": "TensorFlow not available"}
         
-        # 시퀀스 준비
-        X, y = self.prepare_sequences(training_data)
+        # 시퀀스 준비 (feature 행렬 1회 추출 + strided view)
+        feats = None
+        X, y = None, None
+        if len(training_data) >= self.sequence_length + self.prediction_horizon:
+            feats = self.extract_feature_matrix(training_data)
+            X, y = self.sequence_views(feats)
         
         if X is None or y is None:
             logger.warning(f"[LSTM] 시퀀스 생성 실패: 데이터 {len(training_data)}개")
@@ -204,6 +247,9 @@ class LSTMPredictionModel:
         
         logger.info(f"[LSTM] 시퀀스: {len(X)}개 (입력 shape: {X.shape}, 출력 shape: {y.shape})")
         
+        if stream:
+            return self._train_streaming(feats, X, y)
+        
         # GPU 가속 스케일링 (TensorFlow ops 사용)
         n_samples, n_timesteps, n_features = X.shape
         
@@ -284,70 +330,88 @@ class LSTMPredictionModel:
             verbose=0
         )
         
-        # 평가
-        train_loss = history.history['loss'][-1]
-        test_loss = history.history['val_loss'][-1]
-        train_mae = history.history['mae'][-1]
-        test_mae = history.history['val_mae'][-1]
+        return self._finish_training(history, len(X), epochs, batch_size)
+    
+    def _finish_training(self, history, train_count: int, epochs: int, batch_size: int,
+                         streaming: bool = False) -> Dict:
+        """평가 지표 → meta 기록, 저장, 로그, 결과 반환 (train / _train_streaming 공통)"""
+        metrics = {
+            "train_loss": float(history.history['loss'][-1]),
+            "test_loss": float(history.history['val_loss'][-1]),
+            "train_mae": float(history.history['mae'][-1]),
+            "test_mae": float(history.history['val_mae'][-1]),
+        }
+        extra = {"streaming": True} if streaming else {}
         
         self.meta = {
             "trained_at": datetime.now().isoformat(),
-            "train_count": len(X),
-            "train_loss": float(train_loss),
-            "test_loss": float(test_loss),
-            "train_mae": float(train_mae),
-            "test_mae": float(test_mae),
+            "train_count": train_count,
+            **metrics,
             "sequence_length": self.sequence_length,
             "prediction_horizon": self.prediction_horizon,
             "gpu_enabled": USE_GPU,
             "epochs": epochs,
-            "batch_size": batch_size
+            "batch_size": batch_size,
+            **extra
         }
         
         self.save()
         
-        logger.info(f"[LSTM] ✓ 훈련 완료")
-        logger.info(f"[LSTM]   Train Loss: {train_loss:.4f}, MAE: {train_mae:.4f}")
-        logger.info(f"[LSTM]   Test Loss: {test_loss:.4f}, MAE: {test_mae:.4f}")
+        logger.info(f"[LSTM] ✓ {'스트리밍 ' if streaming else ''}훈련 완료")
+        logger.info(f"[LSTM]   Train Loss: {metrics['train_loss']:.4f}, MAE: {metrics['train_mae']:.4f}")
+        logger.info(f"[LSTM]   Test Loss: {metrics['test_loss']:.4f}, MAE: {metrics['test_mae']:.4f}")
         
-        return {
-            "ok": True,
-            "train_loss": float(train_loss),
-            "test_loss": float(test_loss),
-            "train_mae": float(train_mae),
-            "test_mae": float(test_mae),
-            "train_count": len(X)
-        }
+        return {"ok": True, **metrics, "train_count": train_count, **extra}
+    
+    def _train_streaming(self, feats: np.ndarray, X: np.ndarray, y: np.ndarray) -> Dict:
+        """배치 스트리밍 훈련 (시퀀스 전체를 materialize 하지 않음)"""
+        n_samples, n_timesteps, n_features = X.shape
+        
+        # 모든 X 윈도우는 feats[:n+L-1] 행을, Y 윈도우는 feats[L:] 행을 정확히 덮으므로
+        # 행 단위로 fit 한 스케일러는 윈도우 전체로 fit 한 것과 동일하다.
+        x_rows = feats[:n_samples + n_timesteps - 1]
+        y_rows = feats[n_timesteps:, list(self.TARGET_COLUMNS)]
+        
+        if USE_GPU:
+            self.scaler_x_min = x_rows.min(axis=0)
+            self.scaler_x_range = x_rows.max(axis=0) - self.scaler_x_min + 1e-8
+            self.scaler_y_min = y_rows.min(axis=0)
+            self.scaler_y_range = y_rows.max(axis=0) - self.scaler_y_min + 1e-8
+            scale_x = lambda xb: (xb - self.scaler_x_min) / self.scaler_x_range
+            scale_y = lambda yb: (yb - self.scaler_y_min) / self.scaler_y_range
+            epochs, batch_size = 100, 64
+        else:
+            self.scaler_x = MinMaxScaler().fit(x_rows)
+            self.scaler_y = MinMaxScaler().fit(y_rows)
+            scale_x = lambda xb: self.scaler_x.transform(xb.reshape(-1, n_features)).reshape(xb.shape)
+            scale_y = lambda yb: self.scaler_y.transform(yb.reshape(-1, 2)).reshape(yb.shape)
+            epochs, batch_size = 50, 16
+        
+        # Train/Test split (train_test_split 과 동일하게 seed=42, 20% 검증)
+        perm = np.random.default_rng(42).permutation(n_samples)
+        n_test = max(1, int(round(n_samples * 0.2)))
+        test_idx, train_idx = np.sort(perm[:n_test]), perm[n_test:]
+        
+        train_ds = self.make_dataset(X, y, train_idx, batch_size, scale_x, scale_y, shuffle=True)
+        val_ds = self.make_dataset(X, y, test_idx, batch_size, scale_x, scale_y)
+        
+        self.model = self.build_model((n_timesteps, n_features))
+        logger.info(f"[LSTM] 스트리밍 훈련: train={len(train_idx)}, val={len(test_idx)}, "
+                    f"epochs={epochs}, batch_size={batch_size}")
+        
+        history = self.model.fit(train_ds, validation_data=val_ds, epochs=epochs, verbose=0)
+        return self._finish_training(history, n_samples, epochs, batch_size, streaming=True)
     
     def predict(self, sequence_data: List[Dict]) -> Dict:
         """미래 Zone + 가격 예측"""
-        if not TF_AVAILABLE or self.model is None:
+        if (not TF_AVAILABLE or self.model is None) and self.compiled is None:
             return {"ok": False, "error": "model not available"}
         
         if len(sequence_data) < self.sequence_length:
             return {"ok": False, "error": f"need {self.sequence_length} sequence points"}
         
         # 최근 30개 시퀀스 준비
-        seq_x = []
-        recent = sequence_data[-self.sequence_length:]
-        
-        for data in recent:
-            card = data.get('card', {})
-            nb = card.get('nb', {})
-            
-            p_max = float(nb.get('price', {}).get('max', 0))
-            p_min = float(nb.get('price', {}).get('min', 0))
-            v_max = float(nb.get('volume', {}).get('max', 0))
-            v_min = float(nb.get('volume', {}).get('min', 0))
-            t_max = float(nb.get('turnover', {}).get('max', 0))
-            t_min = float(nb.get('turnover', {}).get('min', 0))
-            
-            current_price = float(card.get('current_price', 0))
-            zone_flag = float(card.get('insight', {}).get('zone_flag', 0))
-            
-            seq_x.append([p_max, p_min, v_max, v_min, t_max, t_min, current_price, zone_flag])
-        
-        X = np.array([seq_x])
+        X = self.extract_feature_matrix(sequence_data[-self.sequence_length:])[np.newaxis]
         
         # GPU 가속 스케일링 및 예측
         if USE_GPU and TF_AVAILABLE and hasattr(self, 'scaler_x_min'):
@@ -360,7 +424,7 @@ class LSTMPredictionModel:
             X_scaled = tf.reshape(X_scaled, [1, self.sequence_length, -1])
             
             # 예측 (GPU에서 수행)
-            y_pred = self.model.predict(X_scaled, verbose=0)
+            y_pred = self._infer(X_scaled)
             
             # GPU에서 역정규화
             y_pred_tf = tf.constant(y_pred, dtype=tf.float32)
@@ -378,7 +442,7 @@ class LSTMPredictionModel:
             X_scaled = X_scaled.reshape(1, self.sequence_length, -1)
             
             # 예측
-            y_pred = self.model.predict(X_scaled, verbose=0)
+            y_pred = self._infer(X_scaled)
             
             # 역스케일링
             y_pred_reshaped = y_pred.reshape(-1, 2)
@@ -416,6 +480,15 @@ class LSTMPredictionModel:
             "count": len(predictions)
         }
     
+    def _infer(self, X_scaled) -> np.ndarray:
+        """ONNX 아티팩트 우선, 없으면 Keras 로 예측"""
+        if self.compiled is not None:
+            try:
+                return self.compiled.run(np.asarray(X_scaled, dtype=np.float32))
+            except Exception as e:
+                logger.warning(f"[LSTM] ONNX 예측 실패, Keras 로 폴백: {e}")
+        return self.model.predict(X_scaled, verbose=0)
+    
     def save(self):
         """모델 저장"""
         try:
@@ -426,6 +499,9 @@ class LSTMPredictionModel:
                 if self.model_path.exists():
                     size = self.model_path.stat().st_size
                     saved_files.append(f"{self.model_path.name} ({size} bytes)")
+                if export_keras(self.model, (self.sequence_length, len(self.FEATURE_COLUMNS)), self.compiled_path):
+                    saved_files.append(f"{self.compiled_path.name} ({self.compiled_path.stat().st_size} bytes)")
+                    self.compiled = load_compiled(self.compiled_path)
             
             if self.scaler_x:
                 with open(self.scaler_x_path, 'wb') as f:
@@ -470,8 +546,11 @@ class LSTMPredictionModel:
                 with open(self.meta_path, 'r', encoding='utf-8') as f:
                     self.meta = json.load(f)
             
-            if self.model:
-                logger.info(f"[LSTM] 로드 완료: {self.meta.get('trained_at', 'unknown')}")
+            self.compiled = load_compiled(self.compiled_path, source_path=self.model_path)
+            
+            if self.model or self.compiled:
+                logger.info(f"[LSTM] 로드 완료: {self.meta.get('trained_at', 'unknown')} "
+                            f"(compiled={self.compiled is not None})")
         except Exception as e:
             logger.error(f"[LSTM] 로드 실패: {e}")
 
@@ -0,0 +1,81 @@
+"""Single-row / batch inference latency: Python model vs compiled ONNX artifact.
+
+Usage: python scripts/bench_inference.py [--export] [--repeat 200]
+  --export  (re)compile models/*.pkl packs to ONNX before benchmarking
+"""
+import argparse
+import glob
+import os
+import sys
+
+import joblib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from helpers.compiled_models import (
+    benchmark_latency, compiled_path_for, export_pack, export_sklearn, load_compiled,
+)
+
+
+def _report(label, python_model, compiled, n_features, repeat, method):
+    print(f"\n=== {label} ({n_features} features, {method}) ===")
+    rows = [('python', python_model)]
+    if compiled is not None:
+        rows.append(('onnx', compiled))
+    else:
+        print('  (no compiled artifact - run with --export)')
+    for name, m in rows:
+        try:
+            res = benchmark_latency(m, n_features, repeat=repeat, method=method)
+        except Exception as e:
+            print(f"  {name:6s} failed: {e}")
+            continue
+        for bs, r in res.items():
+            print(f"  {name:6s} batch={bs:<4d} p50={r['p50_us']:9.1f}us  p95={r['p95_us']:9.1f}us  "
+                  f"per_row={r['per_row_us']:8.2f}us")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--export', action='store_true')
+    ap.add_argument('--repeat', type=int, default=200)
+    args = ap.parse_args()
+
+    # nb_ml_<interval>.pkl packs (GradientBoosting)
+    for path in sorted(glob.glob(os.path.join('models', 'nb_ml_*.pkl'))):
+        try:
+            pack = joblib.load(path)
+        except Exception as e:
+            print(f"skip {path}: {e}")
+            continue
+        if not isinstance(pack, dict):
+            pack = {'model': pack}
+        model = pack.get('model')
+        n_features = int(getattr(model, 'n_features_in_', 0) or len(pack.get('feature_names') or []))
+        if args.export:
+            export_pack(pack, path)
+        compiled = load_compiled(compiled_path_for(path), source_path=path)
+        method = 'predict_proba' if hasattr(model, 'predict_proba') else 'predict'
+        _report(os.path.basename(path), model, compiled, n_features, args.repeat, method)
+
+    # rating_ml_v2 RandomForest models (scaler + model pipeline)
+    try:
+        from sklearn.pipeline import make_pipeline
+        from rating_ml_v2 import get_ml_system_v2
+        system = get_ml_system_v2()
+        for label, m in (('zone_model', system.zone_model), ('profit_model', system.profit_model)):
+            if m.model is None or m.scaler is None:
+                continue
+            pipe = make_pipeline(m.scaler, m.model)
+            n_features = int(m.scaler.n_features_in_)
+            if args.export:
+                export_sklearn(pipe, n_features, m.compiled_path)
+            compiled = load_compiled(m.compiled_path)
+            method = 'predict_proba' if hasattr(m.model, 'predict_proba') else 'predict'
+            _report(label, pipe, compiled, n_features, args.repeat, method)
+    except Exception as e:
+        print(f"rating_ml_v2 benchmark skipped: {e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+"""Benchmark suite: NB/BIT math, feature building, backtests, NBverse search and API handlers.
+
+Usage: python scripts/bench_suite.py [--quick | --full] [--only PATTERN] [--save] [--tolerance 0.25]
+  --quick      skip the 50,000-bar cases
+  --full       also run pure-Python loops (BIT / NB wave) on 50,000 bars (minutes per case)
+  --only       run benchmarks whose name contains PATTERN (comma separated)
+  --save       write the results as the new baseline (scripts/bench_baseline.json)
+  --tolerance  median slowdown ratio flagged as a regression (default 0.25 = 25%)
+
+모든 입력은 고정 시드의 합성 데이터(300 / 1,800 / 50,000 봉 OHLCV, 합성 NBverse 트리)이며
+임시 작업 디렉터리에서 실행되므로 data/ 를 건드리지 않는다. API 벤치마크는 Flask test client 로
+호출하고 거래소 OHLCV 조회는 합성 캔들로 대체한다. 기준값보다 느려진 항목이 있거나
+실패한 벤치마크(예외, API 2xx 아닌 응답)가 있으면 종료 코드 1 이며, 실패가 있으면 --save 도 하지 않는다.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BASELINE_PATH = os.path.join(ROOT, 'scripts', 'bench_baseline.json')
+SIZES = (300, 1800, 50000)
+INTERVAL_MINUTES = {'minute1': 1, 'minute3': 3, 'minute5': 5, 'minute10': 10, 'minute15': 15,
+                    'minute30': 30, 'minute60': 60, 'day': 1440}
+
+
+# ---------------- fixtures ----------------
+def synthetic_ohlcv(n: int, seed: int = 7, interval: str = 'minute10', start_price: float = 50_000_000.0) -> pd.DataFrame:
+    """Deterministic geometric random walk with regime switches (pyupbit get_ohlcv layout)."""
+    rng = np.random.default_rng(seed)
+    vol = np.where(rng.random(n) < 0.1, 0.004, 0.0015)
+    drift = np.repeat(rng.normal(0, 0.0004, n // 200 + 1), 200)[:n]
+    close = start_price * np.exp(np.cumsum(drift + rng.normal(0, 1, n) * vol))
+    open_ = np.concatenate([[start_price], close[:-1]])
+    spread = np.abs(rng.normal(0, 1, n)) * vol * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.gamma(2.0, 5.0, n)
+    step = pd.Timedelta(minutes=INTERVAL_MINUTES.get(interval, 10))
+    index = pd.date_range(end=pd.Timestamp('2026-01-01 09:00:00'), periods=n, freq=step)
+    return pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close,
+                         'volume': volume, 'value': volume * close}, index=index)
+
+
+def ohlcv_rows(df: pd.DataFrame) -> list:
+    """Rows for compute_nb_wave_from_ohlcv (time in seconds)."""
+    times = (df.index.view('int64') // 10**9).tolist()
+    cols = [df[c].tolist() for c in ('open', 'high', 'low', 'close', 'volume')]
+    return [{'time': t, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+            for t, o, h, l, c, v in zip(times, *cols)]
+
+
+def synthetic_nbverse(root: str, n_cards: int = 2000, seed: int = 11) -> str:
+    """NBverse tree (<root>/{max,min}/<digit path>/this_pocket_card.json) with n_cards cards per type."""
+    rng = np.random.default_rng(seed)
+    intervals = ['minute1', 'minute3', 'minute5', 'minute10', 'minute30', 'minute60']
+    for nb_type in ('max', 'min'):
+        for i in range(n_cards):
+            nb = float(rng.uniform(0, 100))
+            digits = f'{nb:.10f}'.replace('.', '')[:8]
+            path = os.path.join(root, nb_type, *digits[:6], digits)
+            os.makedirs(path, exist_ok=True)
+            ts = 1_760_000_000_000 + i * 600_000
+            card = {
+                'interval': intervals[i % len(intervals)],
+                'timestamp': ts,
+                'saved_at': ts + 1000,
+                'current_price': float(rng.uniform(4e7, 6e7)),
+                'current_volume': float(rng.gamma(2.0, 5.0)),
+                'nb': {'price': {'max': nb if nb_type == 'max' else 100 - nb,
+                                 'min': 100 - nb if nb_type == 'max' else nb}},
+            }
+            with open(os.path.join(path, 'this_pocket_card.json'), 'w', encoding='utf-8') as f:
+                json.dump(card, f)
+    return root
+
+
+def synthetic_order_cards(data_dir: str, n_buy: int = 300, n_sell: int = 100, seed: int = 13):
+    rng = np.random.default_rng(seed)
+    for kind, n in (('buy_cards', n_buy), ('sell_cards', n_sell)):
+        d = os.path.join(data_dir, kind)
+        os.makedirs(d, exist_ok=True)
+        for i in range(n):
+            ts = 1_760_000_000_000 + i * 600_000
+            card = {'market': 'KRW-BTC', 'interval': 'minute10', 'ts': ts, 'price': float(rng.uniform(4e7, 6e7)),
+                    'size': 0.0001, 'nb_price': float(rng.uniform(0, 100)),
+                    'card_rating': {'grade': 'B', 'score': float(rng.uniform(0, 100))}}
+            with open(os.path.join(d, f'{ts}.json'), 'w', encoding='utf-8') as f:
+                json.dump([card] if kind == 'sell_cards' else card, f)
+
+
+# ---------------- runner ----------------
+# tier -> (repeat, max calls per sample, warm-up)
+TIERS = {'fast': (5, 10_000, True), 'big': (3, 1, True), 'slow': (1, 1, False)}
+
+
+def measure(fn, min_sample_sec: float = 0.05, repeat: int = 5, max_number: int = 10_000, warmup: bool = True) -> dict:
+    """timeit-style: calibrate calls per sample, then take `repeat` samples (per-call µs)."""
+    if warmup:
+        fn()
+    number = 1
+    while number < max_number:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - t0 >= min_sample_sec:
+            break
+        number *= 2
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - t0) / number * 1e6)
+    return {'median_us': round(statistics.median(samples), 3), 'min_us': round(min(samples), 3),
+            'number': number, 'repeat': repeat}
+
+
+def build_benchmarks(workdir: str, quick: bool, full: bool = False) -> list:
+    """(name, callable, tier) triples; server is imported here so fixtures can patch its data sources."""
+    import server
+    from helpers.exchange_gateway import get_exchange_gateway
+    from helpers.features import _compute_zone_features
+    from helpers.nb_wave import compute_nb_wave_from_ohlcv
+
+    sizes = [n for n in SIZES if not (quick and n > 10_000)]
+    frames = {n: synthetic_ohlcv(n) for n in sizes}
+    benches = []
+
+    changes = frames[sizes[0]]['close'].pct_change().dropna().mul(100).tolist()
+    benches.append(('calculate_bit[w50]', lambda: server.calculate_bit(changes[-50:]), 'big'))
+    benches.append(('calculate_bit[300]', lambda: server.calculate_bit(changes), 'slow'))
+
+    for n, df in frames.items():
+        rows = ohlcv_rows(df)
+        r = server._compute_r_from_ohlcv(df, 50)
+        close = df['close']
+        tier = 'big' if n > 10_000 else 'fast'
+        # NB wave runs BIT per bar in pure Python: seconds at 300 bars, minutes at 50,000
+        if n <= 1800 or full:
+            benches.append((f'compute_nb_wave_from_ohlcv[{n}]',
+                            lambda rows=rows: compute_nb_wave_from_ohlcv(rows, 50), 'slow'))
+        benches.append((f'_compute_r_from_ohlcv[{n}]', lambda df=df: server._compute_r_from_ohlcv(df, 50), tier))
+        benches.append((f'_build_features[{n}]', lambda df=df: server._build_features(df, 50), tier))
+        benches.append((f'_compute_zone_features[{n}]',
+                        lambda r=r, close=close: _compute_zone_features(r, close, 50, 0.55, 0.45, 0.10), tier))
+        benches.append((f'_simulate_pnl_from_r[{n}]',
+                        lambda r=r, close=close: server._simulate_pnl_from_r(close, r, 0.70, 0.30, 2, 5.0), tier))
+
+    from api.nbverse import _search_nbverse_cards
+    nbverse = synthetic_nbverse(os.path.join(workdir, 'data', 'nbverse'))
+    params = {'type': None, 'interval': 'minute10', 'price_min': None, 'price_max': None,
+              'current_price_min': None, 'current_price_max': None, 'limit': 100, 'offset': 0,
+              'sort': 'timestamp', 'order': 'desc'}
+    benches.append(('_search_nbverse_cards[2x2000]', lambda: _search_nbverse_cards(nbverse, params)))
+
+    # API handlers: synthetic candles instead of exchange round trips, fresh caches per call
+    synthetic_order_cards(os.path.join(workdir, 'data'))
+    gateway = get_exchange_gateway()
+    gateway.get_ohlcv = lambda market, interval='day', count=200, to=None: \
+        synthetic_ohlcv(max(int(count), 60), interval=interval).tail(int(count))
+    client = server.app.test_client()
+
+    def api(path, clear=None):
+        def call():
+            if clear is not None:
+                clear()
+            resp = client.get(path)
+            if not 200 <= resp.status_code < 300:
+                raise RuntimeError(f'{path} -> {resp.status_code}: {resp.get_data(as_text=True)[:200]}')
+        return call
+
+    import main
+    clear_candles = lambda: (main._candles_cache.clear(), main._candles_cache_time.clear())
+    benches.append(('api:/api/nb-wave?bars=300', api('/api/nb-wave?bars=300', clear_candles), 'slow'))
+    benches.append(('api:/api/ml/predict', api('/api/ml/predict?interval=minute10',
+                                               lambda: (clear_candles(), server._ml_predict_cache.clear()))))
+    benches.append(('api:/api/cards/buy[cold]', api('/api/cards/buy', lambda: server.ORDER_CARDS_CACHE.clear())))
+    benches.append(('api:/api/cards/buy[warm]', api('/api/cards/buy')))
+    benches.append(('api:/api/cards/sell[cold]', api('/api/cards/sell', lambda: server.ORDER_CARDS_CACHE.clear())))
+    benches.append(('api:/api/cards/chart', api('/api/cards/chart?interval=minute10&count=120', clear_candles), 'big'))
+    return [(b[0], b[1], b[2] if len(b) > 2 else 'fast') for b in benches]
+
+
+def environment() -> dict:
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'machine': platform.machine(),
+            'cpu_count': os.cpu_count(), 'numpy': np.__version__, 'pandas': pd.__version__}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for name, res in results.items():
+        base = (baseline.get('results') or {}).get(name)
+        if not base or 'error' in res:
+            res['vs_baseline'] = None
+            continue
+        ratio = res['median_us'] / max(base['median_us'], 1e-9)
+        res['vs_baseline'] = round(ratio, 3)
+        if ratio > 1.0 + tolerance:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--quick', action='store_true')
+    ap.add_argument('--full', action='store_true')
+    ap.add_argument('--only', default='')
+    ap.add_argument('--save', action='store_true')
+    ap.add_argument('--baseline', default=BASELINE_PATH)
+    ap.add_argument('--tolerance', type=float, default=0.25)
+    args = ap.parse_args()
+
+    os.environ.setdefault('METRICS_ENABLED', 'false')
+    workdir = tempfile.mkdtemp(prefix='nb_bench_')
+    cwd = os.getcwd()
+    os.chdir(workdir)  # relative data/ paths (cards, caches) resolve inside the scratch dir
+    try:
+        benches = build_benchmarks(workdir, args.quick, args.full)
+        only = [p for p in args.only.split(',') if p]
+        results = {}
+        for name, fn, tier in benches:
+            if only and not any(p in name for p in only):
+                continue
+            repeat, max_number, warmup = TIERS[tier]
+            try:
+                res = measure(fn, repeat=repeat, max_number=max_number, warmup=warmup)
+            except Exception as e:
+                res = {'error': str(e)}
+            results[name] = res
+            line = f"{name:40s} " + (f"median={res['median_us']:12.1f}us  min={res['min_us']:12.1f}us  x{res['number']}"
+                                     if 'error' not in res else f"ERROR {res['error']}")
+            print(line, flush=True)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if baseline:
+        print(f"\n=== vs baseline ({baseline.get('env', {}).get('platform', '?')}) ===")
+        for name, res in results.items():
+            if res.get('vs_baseline') is not None:
+                flag = 'REGRESSION' if res['vs_baseline'] > 1.0 + args.tolerance else \
+                    ('faster' if res['vs_baseline'] < 1.0 - args.tolerance else '')
+                print(f"  {name:40s} x{res['vs_baseline']:<6} {flag}")
+        if baseline.get('env', {}).get('platform') != environment()['platform']:
+            print("  (baseline was recorded on a different machine - ratios are indicative only)")
+
+    errors = [n for n, res in results.items() if 'error' in res]
+    if errors:
+        print(f"\n{len(errors)} benchmark(s) failed: {', '.join(errors)}" +
+              (" - baseline not saved" if args.save else ''))
+        return 1
+    if args.save:
+        merged = dict(baseline.get('results') or {}) if only else {}
+        merged.update({k: {kk: v[kk] for kk in ('median_us', 'min_us', 'number')} for k, v in results.items()})
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'env': environment(), 'saved_at': int(time.time()), 'results': merged}, f, indent=2)
+        print(f"\nbaseline saved: {args.baseline}")
+        return 0
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.tolerance:.0%}: " +
+              ', '.join(f'{n} x{r:.2f}' for n, r in regressions))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
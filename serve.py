@@ -0,0 +1,97 @@
+"""Production entry point: leader process + gunicorn/uvicorn API workers.
+
+    python serve.py                         # SERVE_WORKERS (기본 CPU 수, 최대 8) 개 워커
+    python serve.py --server uvicorn -w 4   # Windows 에서는 uvicorn (gunicorn 미지원)
+
+이 프로세스가 leader 가 되어 매매/업데이트/스케줄러 루프를 실행하고, 상태 스냅샷을 공유 메모리로
+게시하며, 127.0.0.1:SERVE_LEADER_PORT 에서 워커가 전달한 쓰기 요청을 처리한다.
+워커는 SERVE_ROLE=worker 로 이 모듈을 import 해서 `app`(WSGI) / `asgi_app`(ASGI) 을 사용한다.
+개발용 단일 프로세스 실행은 기존대로 `python server.py`.
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+
+from helpers import serving
+
+
+def _build_worker_app():
+    # Trading-only, no warm-up: blueprint routes (village, ML, NBverse, ...) are proxied to the leader
+    import server
+    server.init_app(profile='trading', blueprints='', warm_up=False)
+    serving.install_worker(server.app, server.shared_stores())
+    return server.app
+
+
+def _asgi(wsgi_app):
+    try:
+        from asgiref.wsgi import WsgiToAsgi
+        return WsgiToAsgi(wsgi_app)
+    except ImportError:
+        from a2wsgi import WSGIMiddleware
+        return WSGIMiddleware(wsgi_app)
+
+
+app = asgi_app = None
+if serving.role() == serving.ROLE_WORKER:
+    app = _build_worker_app()
+    asgi_app = _asgi(app)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the trading bot with multiple API workers')
+    parser.add_argument('--server', choices=['gunicorn', 'uvicorn'], default=os.getenv('SERVE_SERVER') or None)
+    parser.add_argument('-w', '--workers', type=int,
+                        default=int(os.getenv('SERVE_WORKERS', str(min(8, os.cpu_count() or 2)))))
+    parser.add_argument('--host', default=os.getenv('UI_HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('UI_PORT', '5057')))
+    parser.add_argument('--leader-port', type=int, default=int(os.getenv('SERVE_LEADER_PORT', '5058')))
+    args = parser.parse_args(argv)
+
+    kind = serving.pick_server(args.server)
+    if kind is None:
+        print("⚠️ gunicorn / uvicorn not installed - falling back to the single-process server")
+        import server
+        server.run()
+        return 0
+
+    os.environ['SERVE_ROLE'] = serving.ROLE_LEADER
+    import server
+    server.init_app()
+    server.app.extensions['serving'] = {'role': serving.ROLE_LEADER}
+    channel = serving.StateChannel()
+    publisher = serving.StatePublisher(channel, server.shared_stores(),
+                                       interval=float(os.getenv('SERVE_STATE_PUBLISH_SEC', '0.5'))).start()
+    server.app.extensions['serving']['channel'] = channel
+    server.app.extensions['serving']['metrics_spool'] = serving.MetricsSpool(channel.path)
+    leader_http = serving.start_leader_server(server.app, '127.0.0.1', args.leader_port)
+    server.start_background()
+
+    env = dict(os.environ, SERVE_ROLE=serving.ROLE_WORKER, SERVE_STATE_PATH=channel.path,
+               SERVE_LEADER_URL=f'http://127.0.0.1:{args.leader_port}', AUTO_ENABLED='false')
+    cmd = serving.worker_command(kind, max(1, args.workers), args.host, args.port)
+    print(f"[SERVE] leader pid={os.getpid()} loops running, {args.workers} {kind} workers on "
+          f"{args.host}:{args.port}, leader on 127.0.0.1:{args.leader_port}")
+    proc = subprocess.Popen(cmd, env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    def _shutdown(signum, frame):
+        proc.terminate()
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            signal.signal(sig, _shutdown)
+        except (ValueError, OSError):
+            pass
+    try:
+        code = proc.wait()
+    finally:
+        publisher.stop()
+        leader_http.shutdown()
+    return code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,40 @@
+"""
+ingest_bar 테스트: 열린 봉 갱신, 다음 봉 추가, 빠진 봉이 있으면 캐시를 버리고 REST 재조회
+"""
+import pandas as pd
+
+import main
+
+
+def _frame(last_kst: str, n: int = 3) -> pd.DataFrame:
+    idx = pd.date_range(end=pd.Timestamp(last_kst), periods=n, freq='10min')
+    return pd.DataFrame({'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 1.5, 'volume': 1.0}, index=idx)
+
+
+def _bar(kst: str, close: float = 3.0) -> dict:
+    ts_ms = int((pd.Timestamp(kst) - pd.Timedelta(hours=9)).value // 1_000_000)
+    return {'ts': ts_ms, 'open': 1.0, 'high': 3.0, 'low': 1.0, 'close': close, 'volume': 2.0}
+
+
+def _seed(monkeypatch, last_kst: str):
+    refreshed = []
+    monkeypatch.setattr(main, '_refresh_async', lambda *args: refreshed.append(args))
+    key = 'KRW-BTC_minute10_3'
+    main._candles_cache[key] = _frame(last_kst)
+    main._candles_cache_time[key] = 100.0
+    return key, refreshed
+
+
+def test_next_bar_is_appended(monkeypatch):
+    key, refreshed = _seed(monkeypatch, '2026-01-01 09:00')
+    assert main.ingest_bar('KRW-BTC', 'minute10', _bar('2026-01-01 09:10')) == 1
+    df = main._candles_cache.pop(key)
+    assert len(df) == 3 and df.index[-1] == pd.Timestamp('2026-01-01 09:10')
+    assert refreshed == []
+
+
+def test_gap_drops_the_frame_and_refetches(monkeypatch):
+    key, refreshed = _seed(monkeypatch, '2026-01-01 09:00')
+    assert main.ingest_bar('KRW-BTC', 'minute10', _bar('2026-01-01 09:30')) == 0
+    assert key not in main._candles_cache and key not in main._candles_cache_time
+    assert refreshed == [(key, 'KRW-BTC', 'minute10', 3)]
@@ -0,0 +1,19 @@
+"""
+CoinJournal 테스트: max_coins + trim_slack 을 넘을 때만 가장 오래된 버킷부터 max_coins 개로 잘라냄
+"""
+from helpers.coin_journal import CoinJournal
+
+
+def test_trim_keeps_hysteresis_and_drops_oldest_buckets(tmp_path):
+    store = {}
+    journal = CoinJournal(store, str(tmp_path / 'nb_coins_store.json'), max_coins=5, trim_slack=3)
+    for b in [3, 4, 5, 6, 7, 1, 2, 8]:                  # 1, 2 are backfilled out of order
+        journal.add(f'KRW-BTC|minute10|{b}', {'bucket': b})
+    assert len(store) == 8                              # at max_coins + trim_slack: no trim yet
+    journal.add('KRW-BTC|minute10|9', {'bucket': 9})
+    assert sorted(c['bucket'] for c in store.values()) == [5, 6, 7, 8, 9]
+    assert journal.stats['trimmed'] == 4
+
+    reloaded = {}
+    assert CoinJournal(reloaded, journal.snapshot_path, max_coins=5, trim_slack=3).load() == 5
+    assert reloaded.keys() == store.keys()
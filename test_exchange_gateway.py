@@ -0,0 +1,20 @@
+"""
+ExchangeGateway.get_ohlcv 테스트: pyupbit 처럼 naive `to` 는 KST 로 보고 Upbit 에는 UTC 로 보냄
+"""
+import pytest
+
+from helpers.exchange_gateway import ExchangeGateway
+
+_ROW = {'candle_date_time_kst': '2026-01-01T08:50:00', 'candle_date_time_utc': '2025-12-31T23:50:00',
+        'opening_price': 1.0, 'high_price': 1.0, 'low_price': 1.0, 'trade_price': 1.0,
+        'candle_acc_trade_volume': 1.0, 'candle_acc_trade_price': 1.0}
+
+
+@pytest.mark.parametrize('to', ['2026-01-01 09:00:00', '2026-01-01T00:00:00+00:00'])
+def test_explicit_to_is_sent_as_utc(to):
+    sent = []
+    gw = ExchangeGateway.__new__(ExchangeGateway)
+    gw.public_get = lambda path, params, group=None: sent.append(params['to']) or [_ROW]
+    df = gw.get_ohlcv('KRW-BTC', 'minute10', count=1, to=to)
+    assert sent == ['2026-01-01 00:00:00']
+    assert str(df.index[-1]) == '2026-01-01 08:50:00'
@@ -0,0 +1,25 @@
+"""
+setup_logger 테스트: 큐를 거친 JSON 로그도 traceback 을 msg 가 아닌 exc 필드에 남김
+"""
+import json
+import time
+
+from utils.logger import flush_logs, setup_logger
+
+
+def test_queued_json_record_keeps_exc_separate(tmp_path, monkeypatch):
+    monkeypatch.setenv('LOG_QUEUE', 'true')
+    monkeypatch.setenv('LOG_FILE_FORMAT', 'json')
+    logger = setup_logger('test_logger_exc', log_dir=str(tmp_path))
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        logger.exception('order %s failed', 42)
+    flush_logs()
+    path = tmp_path / 'bot.log'
+    deadline = time.monotonic() + 2.0
+    while not path.read_text(encoding='utf-8').strip() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    rec = json.loads(path.read_text(encoding='utf-8').splitlines()[-1])
+    assert rec['msg'] == 'order 42 failed'
+    assert rec['exc'].startswith('Traceback') and 'ValueError: boom' in rec['exc']
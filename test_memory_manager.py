@@ -0,0 +1,35 @@
+"""
+MemoryManager 테스트: RSS 초과 시 캐시 바이트 기준으로, check 당 제한된 양만 제거
+"""
+from helpers import memory_manager
+from helpers.memory_manager import MemoryManager
+
+_MB = 1024 * 1024
+
+
+def _manager(monkeypatch, rss_mb):
+    monkeypatch.setattr(memory_manager, 'rss_bytes', lambda: int(rss_mb * _MB))
+    mm = MemoryManager(budget_mb=None, rss_limit_mb=100, low_water=0.8, rss_evict_max=0.25)
+    cache = {i: b'' for i in range(8)}
+    mm.register('c', cache, sizeof=lambda k, v: 10 * _MB, last_used=lambda k, v: k)   # 80 MB, key = age
+    return mm, cache
+
+
+def test_rss_mostly_libraries_evicts_nothing(monkeypatch):
+    mm, cache = _manager(monkeypatch, rss_mb=400)    # 320 MB over, only 80 MB of it is cache
+    assert mm.check() == {} and len(cache) == 8
+    assert mm.stats['rss_unreclaimable'] is True
+
+
+def test_rss_eviction_is_capped_per_check(monkeypatch):
+    mm, cache = _manager(monkeypatch, rss_mb=150)    # 70 MB over the 80 MB low-water mark
+    assert mm.check() == {'c': 2}                    # capped at 25% of the 80 MB of cache
+    assert sorted(cache) == [2, 3, 4, 5, 6, 7]
+    monkeypatch.setattr(memory_manager, 'rss_bytes', lambda: 101 * _MB)
+    assert mm.check() == {'c': 2}                    # 21 MB over, capped at 15 MB
+    assert sorted(cache) == [4, 5, 6, 7]
+
+
+def test_under_limit_is_a_noop(monkeypatch):
+    mm, cache = _manager(monkeypatch, rss_mb=90)
+    assert mm.check() == {} and len(cache) == 8
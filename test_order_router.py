@@ -0,0 +1,160 @@
+"""
+OrderRouter 테스트: idempotency, 중복 제출, 체결 추적 종료 상태, 대기 중 취소
+"""
+import threading
+
+from helpers.order_router import OrderRequest, OrderRouter, PaperExchange, idempotency_key
+
+
+class FakeExchange:
+    """sell_market_order → uuid, get_order → the scripted detail (state / executed_volume)."""
+
+    def __init__(self, detail=None, gate=None):
+        self.detail = detail or {'state': 'done', 'executed_volume': '0.01', 'avg_price': '100000000'}
+        self.gate = gate
+        self.calls = 0
+
+    def sell_market_order(self, market, volume):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        return {'uuid': f'o-{self.calls}', 'side': 'ask', 'market': market}
+
+    def get_order(self, oid):
+        return {'uuid': oid, **self.detail}
+
+
+def _router(client, **kw):
+    kw.setdefault('fill_poll_sec', 0.01)
+    return OrderRouter(lambda: client, **kw)
+
+
+def _collect(fn=lambda t: t):
+    """Callback appending fn(ticket) to a list, and an Event set on the first call."""
+    got, called = [], threading.Event()
+
+    def cb(t):
+        got.append(fn(t))
+        called.set()
+    return got, called, cb
+
+
+def _sell(key=None, paper=False):
+    return OrderRequest(market='KRW-BTC', side='SELL', price=100_000_000, size=0.01, paper=paper, key=key)
+
+
+def test_same_key_returns_first_ticket():
+    router = _router(FakeExchange())
+    key = idempotency_key(1_700_000_000_000, 'SELL', 'api:KRW-BTC')
+    first = router.submit(_sell(key))
+    second = router.submit(_sell(key))
+    assert second is first
+    assert first.duplicates == 1
+    assert first.wait(2, until='done')
+    assert router.status()['events']['order.duplicate'] == 1
+
+
+def test_rejected_ticket_allows_retry():
+    client = FakeExchange()
+    client.sell_market_order = lambda market, volume: {'error': {'name': 'insufficient_funds_ask'}}
+    router = _router(client)
+    first = router.submit(_sell('k'))
+    assert first.wait(2, until='done')
+    assert first.status == 'rejected'
+    assert router.submit(_sell('k')) is not first
+
+
+def test_done_order_is_filled_and_runs_fill_callback():
+    router = _router(FakeExchange())
+    ticket = router.submit(_sell('k'))
+    fills, called, cb = _collect(lambda t: t.fill['executed_volume'])
+    ticket.on_fill(cb)
+    assert ticket.wait(2, until='done')
+    assert ticket.status == 'filled'
+    assert called.wait(2)
+    assert fills == [0.01]
+
+
+def test_cancel_with_execution_counts_as_filled():
+    router = _router(FakeExchange({'state': 'cancel', 'executed_volume': '0.004', 'avg_price': '100000000'}))
+    ticket = router.submit(_sell('k'))
+    assert ticket.wait(2, until='done')
+    assert ticket.status == 'filled'
+    assert ticket.fill['executed_volume'] == 0.004
+
+
+def test_cancel_without_execution_skips_fill_callbacks():
+    router = _router(FakeExchange({'state': 'cancel', 'executed_volume': '0'}))
+    ticket = router.submit(_sell('k'))
+    fills = []
+    ticket.on_fill(lambda t: fills.append(t))
+    assert ticket.wait(2, until='done')
+    assert ticket.status == 'cancelled'
+    assert fills == []
+    assert router.submit(_sell('k')) is not ticket  # nothing executed → retry allowed
+
+
+def test_unconfirmed_fill_times_out_without_fill_callbacks():
+    router = _router(FakeExchange({'state': 'wait', 'executed_volume': '0'}), fill_timeout_sec=0.05)
+    ticket = router.submit(_sell('k'))
+    fills = []
+    ticket.on_fill(lambda t: fills.append(t))
+    assert ticket.wait(2, until='done')
+    assert ticket.status == 'timeout'
+    assert ticket.fill['confirmed'] is False
+    assert fills == []
+    assert router.submit(_sell('k')) is ticket  # may still execute → not retried
+    assert router.status()['events']['order.timeout'] == 1
+
+
+def test_queued_ticket_can_be_cancelled_before_submission():
+    gate = threading.Event()
+    client = FakeExchange(gate=gate)
+    router = _router(client, workers=1)
+    busy = router.submit(_sell('a'))
+    queued = router.submit(_sell('b'))
+    assert not queued.wait(0.05)
+    placed = []
+    queued.on_placed(lambda t: placed.append(t.status))
+    assert router.cancel(queued)
+    assert placed == ['cancelled']
+    gate.set()
+    assert busy.wait(2, until='done')
+    assert client.calls == 1
+    assert not router.cancel(busy)
+
+
+def test_in_flight_ticket_is_booked_when_the_exchange_answers():
+    gate = threading.Event()
+    router = _router(FakeExchange(gate=gate))
+    ticket = router.submit(_sell('k'))
+    assert not ticket.wait(0.05)
+    assert not router.cancel(ticket)  # the exchange call already started
+    booked, called, cb = _collect(lambda t: t.result['uuid'])
+    ticket.on_placed(cb)
+    gate.set()
+    assert called.wait(2)
+    assert booked == ['o-1']
+
+
+def test_slow_callbacks_do_not_block_order_placement():
+    gate, release = threading.Event(), threading.Event()
+    router = _router(FakeExchange(gate=gate), workers=1)
+    threads, called, cb = _collect(lambda t: threading.current_thread().name)
+    slow = router.submit(_sell('b'))
+    slow.on_placed(lambda t: (cb(t), release.wait(5)))  # attached while the exchange call is held
+    gate.set()
+    assert called.wait(2)
+    assert threads[0].startswith('order-callbacks')
+    other = router.submit(_sell('c'))
+    assert other.wait(2)  # the single order worker is free while the callback blocks
+    release.set()
+
+
+def test_paper_exchange_fill_is_tracked():
+    paper = PaperExchange(lambda market: 100_000_000.0, fill_delay_sec=0.05)
+    router = OrderRouter(lambda: None, paper_client=paper, fill_poll_sec=0.01)
+    ticket = router.submit(OrderRequest(market='KRW-BTC', side='BUY', price=100_000_000, krw=10_000, paper=True))
+    assert ticket.wait(2, until='done')
+    assert ticket.status == 'filled'
+    assert abs(ticket.fill['executed_volume'] - 0.0001) < 1e-12
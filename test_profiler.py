@@ -0,0 +1,21 @@
+"""
+SamplingProfiler 테스트: duration 없이 / 0 / 상한 초과로는 시작하지 않음 (항상 끝나는 실행만)
+"""
+import pytest
+
+from helpers.profiler import MAX_DURATION_SEC, SamplingProfiler
+
+
+@pytest.mark.parametrize('duration', [None, 0, -1, float('nan'), float('inf'), MAX_DURATION_SEC + 1])
+def test_unbounded_or_invalid_duration_is_rejected(duration):
+    prof = SamplingProfiler()
+    with pytest.raises(ValueError):
+        prof.start(duration_sec=duration)
+    assert not prof.running
+
+
+def test_run_stops_at_its_deadline():
+    prof = SamplingProfiler()
+    assert prof.start(interval_ms=1, duration_sec=0.05)
+    prof._thread.join(timeout=2.0)
+    assert not prof.running and prof.samples > 0
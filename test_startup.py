@@ -0,0 +1,36 @@
+"""
+Startup 테스트: 실패한 init 은 백오프가 지나기 전에는 다시 실행되지 않음
+"""
+import pytest
+
+from helpers import startup as startup_mod
+from helpers.startup import FAILED, READY, Startup
+
+
+def test_failed_init_waits_for_backoff_before_retrying(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(startup_mod.time, 'time', lambda: now[0])
+    calls = []
+
+    def init():
+        calls.append(now[0])
+        if len(calls) < 3:
+            raise OSError('model file missing')
+        return 'model'
+
+    s = Startup()
+    s.register('ml', init)
+    assert s.ensure('ml') is None and s.report()['subsystems']['ml']['state'] == FAILED
+    for _ in range(5):
+        with pytest.raises(RuntimeError, match='model file missing'):
+            s.get('ml')
+    assert len(calls) == 1
+
+    now[0] += startup_mod.RETRY_BASE_SEC
+    with pytest.raises(RuntimeError):
+        s.get('ml')
+    assert len(calls) == 2 and s.report()['subsystems']['ml']['retry_in_sec'] == 2 * startup_mod.RETRY_BASE_SEC
+
+    now[0] += 2 * startup_mod.RETRY_BASE_SEC
+    assert s.get('ml') == 'model' and s.get('ml') == 'model'
+    assert len(calls) == 3 and s.report()['subsystems']['ml']['state'] == READY
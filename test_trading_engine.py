@@ -0,0 +1,28 @@
+"""
+InstanceConfig.from_dict 테스트: 요청 JSON 형 변환과 검증
+"""
+import pytest
+
+from helpers.trading_engine import InstanceConfig
+
+
+def test_request_strings_are_coerced():
+    cfg = InstanceConfig.from_dict({'market': 'krw-btc', 'interval': 'minute10', 'paper': 'false',
+                                    'order_krw': '10000', 'window': 50.0, 'enabled': 1, 'unknown': 'x'})
+    assert (cfg.market, cfg.paper, cfg.order_krw, cfg.window, cfg.enabled) == ('KRW-BTC', False, 10000, 50, True)
+    assert InstanceConfig.from_dict({'market': 'KRW-ETH', 'interval': 'day'}).paper is True
+
+
+@pytest.mark.parametrize('payload', [
+    {'market': 'BTC', 'interval': 'minute10'},
+    {'market': 'KRW-BTC', 'interval': 'minute7'},
+    {'market': 'KRW-BTC', 'interval': 'minute10', 'paper': 'maybe'},
+    {'market': 'KRW-BTC', 'interval': 'minute10', 'order_krw': '0'},
+    {'market': 'KRW-BTC', 'interval': 'minute10', 'order_krw': 'abc'},
+    {'market': 'KRW-BTC', 'interval': 'minute10', 'window': 12.5},
+    {'market': 'KRW-BTC', 'interval': 'minute10', 'window': True},
+    {'market': 'KRW-BTC', 'interval': 'minute10', 'high': 0.3, 'low': 0.7},
+])
+def test_invalid_fields_raise(payload):
+    with pytest.raises(ValueError):
+        InstanceConfig.from_dict(payload)
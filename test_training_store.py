@@ -0,0 +1,82 @@
+"""
+TrainingSampleStore 테스트: BUY→SELL 매칭, 파싱 불가 스냅샷 재스캔 방지, 앞쪽이 잘린 거래 기록
+"""
+import json
+import os
+
+import numpy as np
+
+from helpers.training_store import TrainingSampleStore, match_buy_sell
+
+
+def _brute_match(buys, sells, tol=0.01):
+    pairs = []
+    for bi, (ts, _, size) in enumerate(buys):
+        for si in range(len(sells)):
+            if sells[si, 0] > ts and abs(sells[si, 2] - size) <= size * tol:
+                pairs.append((bi, si))
+                break
+    return pairs
+
+
+def test_match_buy_sell_matches_first_later_sell_of_same_size():
+    rng = np.random.default_rng(7)
+    sizes = np.array([0.001, 0.002, 0.0101, 0.01, 0.5])
+    buys = np.column_stack([rng.integers(0, 1000, 300), rng.random(300), rng.choice(sizes, 300)]).astype(float)
+    sell_ts = np.sort(rng.integers(0, 1000, 200))
+    sells = np.column_stack([sell_ts, rng.random(200), rng.choice(sizes, 200), rng.random(200)]).astype(float)
+    assert match_buy_sell(buys, sells) == _brute_match(buys, sells)
+    assert match_buy_sell(buys, sells[:0]) == []
+
+
+def _store(tmp_path):
+    return TrainingSampleStore(root=str(tmp_path / 'store'), nbverse_dir=str(tmp_path / 'nbverse'),
+                               trainer_storage_path=str(tmp_path / 'trainer_storage.json'), min_scan_interval=0)
+
+
+def _write_snapshot(path, snapshot, mtime=1000):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f)
+    os.utime(path, (mtime, mtime))  # older than the watermark's 2 s lag
+
+
+def test_unparseable_snapshots_are_not_reopened(tmp_path, monkeypatch):
+    good = {'card_rating': {'enhancement': 75}, 'nb': {'price': {'max': 60, 'min': 40}}, 'interval': 'minute10'}
+    _write_snapshot(str(tmp_path / 'nbverse' / 'a' / 'this_pocket_card.json'), good)
+    _write_snapshot(str(tmp_path / 'nbverse' / 'b' / 'this_pocket_card.json'), {'nb': {}})
+    store = _store(tmp_path)
+    assert store.ingest_nbverse(force=True) == 1
+
+    parsed = []
+    original = TrainingSampleStore._snapshot_row
+    monkeypatch.setattr(TrainingSampleStore, '_snapshot_row',
+                        staticmethod(lambda snap: parsed.append(snap) or original(snap)))
+    store.ingest_nbverse(force=True)
+    assert parsed == []
+    assert len(_store(tmp_path).nbverse_samples()) == 1
+
+
+def _trade(ts, action, size, profit=0.0):
+    return {'ts': ts, 'trade_match': {'system_action': action, 'upbit_price': 100.0, 'upbit_size': size,
+                                      'profit_percent': profit}}
+
+
+def _write_trades(tmp_path, trades, mtime):
+    path = tmp_path / 'trainer_storage.json'
+    path.write_text(json.dumps({'t1': {'trades': trades}}), encoding='utf-8')
+    os.utime(path, (mtime, mtime))
+
+
+def test_front_trimmed_trades_drop_their_samples(tmp_path):
+    trades = [_trade(1, 'BUY', 0.1), _trade(2, 'SELL', 0.1, 5.0),
+              _trade(3, 'BUY', 0.2), _trade(4, 'SELL', 0.2, -2.0), _trade(5, 'BUY', 0.3)]
+    _write_trades(tmp_path, trades, 1000)
+    store = _store(tmp_path)
+    assert store.ingest_trades() == 2
+    assert sorted(s['profit_rate'] for s in store.trade_samples()) == [-0.02, 0.05]
+
+    _write_trades(tmp_path, trades[2:] + [_trade(6, 'SELL', 0.3, 1.5)], 1001)  # trades[-N:] dropped ts 1-2
+    assert store.ingest_trades() == 1
+    assert sorted(s['profit_rate'] for s in store.trade_samples()) == [-0.02, 0.015]
+    assert sorted(s['profit_rate'] for s in _store(tmp_path).trade_samples()) == [-0.02, 0.015]
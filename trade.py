@@ -26,6 +26,13 @@ class Trader:
         # Track estimated open position size to avoid full-balance liquidation on SELL
         self._position_size_estimate = 0.0
 
+    def _live_balance(self, ticker: str) -> float:
+        """Balance for order sizing; cached clients (GatewayUpbit) are force-refreshed first."""
+        svc = getattr(self.upbit, 'balances', None)
+        if svc is not None:
+            return float(svc.balance(ticker, force=True) or 0.0)
+        return float(self.upbit.get_balance(ticker) or 0.0)
+
     def place(self, side: str, price: float):
         if self.cfg.paper or self.upbit is None:
             size = self.cfg.order_krw / price if price > 0 else 0
@@ -53,7 +60,7 @@ class Trader:
             spend = None
             if ratio > 0:
                 try:
-                    avail_krw = float(self.upbit.get_balance("KRW") or 0.0)
+                    avail_krw = self._live_balance("KRW")
                 except Exception:
                     avail_krw = 0.0
                 # raw proportional spend
@@ -81,7 +88,7 @@ class Trader:
             return o
         ticker = self.cfg.market.split("-")[-1]
         # Live balance
-        balance_size = float(self.upbit.get_balance(ticker) or 0)
+        balance_size = self._live_balance(ticker)
         size = balance_size
         # If pnl_ratio given, sell only that fraction of holdings
         try:
@@ -6,6 +6,7 @@ from __future__ import annotations
 from typing import Dict, Any
 import os
 import time
+import functools
 import math
 import random
 import json
@@ -13,6 +14,7 @@ from datetime import datetime
 
 from flask import request, jsonify
 import pyupbit
+from helpers.exchange_gateway import get_exchange_gateway, gateway_upbit
 
 
 def register_trade_routes(app, env: Dict[str, Any]):
@@ -42,8 +44,10 @@ def register_trade_routes(app, env: Dict[str, Any]):
     orders = env.get('orders')
     logger = env.get('logger')
     state = env.get('state')
-    Trader = env.get('Trader')
-    TradeConfig = env.get('TradeConfig')
+    _order_router = env.get('_order_router')
+    _apply_order_fill = env.get('_apply_order_fill')
+    OrderRequest = env.get('OrderRequest')
+    idempotency_key = env.get('idempotency_key')
     AUTO_BUY_CONFIG = env.get('AUTO_BUY_CONFIG')
     AUTO_SELL_CONFIG = env.get('AUTO_SELL_CONFIG')
 
@@ -221,7 +225,7 @@ def register_trade_routes(app, env: Dict[str, Any]):
             }
             price = 0.0
             try:
-                price = float(pyupbit.get_current_price(cfg.market) or 0.0)
+                price = float(get_exchange_gateway().get_current_price(cfg.market) or 0.0)
                 if price > 0:
                     resp['price_source'] = 'ticker'
             except Exception:
@@ -238,7 +242,7 @@ def register_trade_routes(app, env: Dict[str, Any]):
             avail_krw = 0.0; coin_bal = 0.0
             if not cfg.paper and std_ak and std_sk:
                 try:
-                    up = pyupbit.Upbit(cfg.access_key, cfg.secret_key)
+                    up = gateway_upbit(cfg.access_key, cfg.secret_key)
                     avail_krw = float(up.get_balance('KRW') or 0.0)
                     coin = cfg.market.split('-')[-1]
                     coin_bal = float(up.get_balance(coin) or 0.0)
@@ -365,10 +369,8 @@ def register_trade_routes(app, env: Dict[str, Any]):
             bucket_ts_ms = None
         upbit = None
         if not paper and cfg.access_key and cfg.secret_key:
-            upbit = pyupbit.Upbit(cfg.access_key, cfg.secret_key)
-        trader = Trader(upbit, TradeConfig(market=market, order_krw=krw, paper=paper, pnl_ratio=pnl_ratio,
-                                           pnl_profit_ratio=float(getattr(cfg, 'pnl_profit_ratio', 0.0)),
-                                           pnl_loss_ratio=float(getattr(cfg, 'pnl_loss_ratio', 0.0))))
+            upbit = gateway_upbit(cfg.access_key, cfg.secret_key)
+        router = _order_router()
         try:
             df = get_candles(market, cfg.candle, count=max(60, cfg.ema_slow+5))
             price = float(df['close'].iloc[-1]) if len(df) else 0.0
@@ -433,7 +435,40 @@ def register_trade_routes(app, env: Dict[str, Any]):
         except Exception:
             attempt_krw = int(krw)
             attempt_size = 0.0
-        o = trader.place('BUY', price)
+        # Same bucket + side from the UI is one order (retries / double clicks return the first ticket)
+        ticket = router.submit(OrderRequest(
+            market=market, side='BUY', price=price, krw=krw, paper=paper, pnl_ratio=pnl_ratio,
+            pnl_profit_ratio=float(getattr(cfg, 'pnl_profit_ratio', 0.0)),
+            pnl_loss_ratio=float(getattr(cfg, 'pnl_loss_ratio', 0.0)),
+            key=(payload.get('idempotency_key') or
+                 (idempotency_key(bucket_ts_ms, 'BUY', f"api:{market}") if bucket_ts_ms else None)),
+            source='api'))
+        if ticket.duplicates:
+            return jsonify({'ok': False, 'error': 'duplicate_order', 'ticket': ticket.to_dict()})
+        book = functools.partial(_book_buy,
+                                 payload=payload, meta=meta, cfg=cfg, market=market, price=price,
+                                 paper=paper, ins=ins, attempt_krw=attempt_krw, attempt_size=attempt_size,
+                                 bucket_ts_ms=bucket_ts_ms, nb_price_max=nb_price_max,
+                                 nb_price_min=nb_price_min, nb_price=nb_price,
+                                 nb_price_values=nb_price_values, nb_volume_max=nb_volume_max,
+                                 nb_volume_min=nb_volume_min, nb_volume_values=nb_volume_values,
+                                 nb_turnover_max=nb_turnover_max, nb_turnover_min=nb_turnover_min,
+                                 nb_turnover_values=nb_turnover_values, nb_zone=nb_zone,
+                                 nb_r_value=nb_r_value, nb_w_value=nb_w_value,
+                                 nbverse_interval=nbverse_interval, nbverse_timestamp=nbverse_timestamp)
+        # Not sent within the wait → withdrawn (booked as a failed order); already at the exchange →
+        # booked from the router's callback pool when the response arrives instead of dropping it
+        if not ticket.wait(15.0) and not router.cancel(ticket):
+            ticket.on_placed(book)
+            return jsonify({'ok': True, 'pending': True, 'ticket': ticket.to_dict()})
+        return jsonify(book(ticket))
+
+    def _book_buy(ticket, payload, meta, cfg, market, price, paper, ins, attempt_krw, attempt_size, bucket_ts_ms,
+                  nb_price_max, nb_price_min, nb_price, nb_price_values, nb_volume_max, nb_volume_min,
+                  nb_volume_values, nb_turnover_max, nb_turnover_min, nb_turnover_values, nb_zone,
+                  nb_r_value, nb_w_value, nbverse_interval, nbverse_timestamp):
+        """Buy bookkeeping (orders, NB coin, cards, trainer, BTC item) for a placed ticket."""
+        o = ticket.result
         
         # NBverse 파일을 buy_cards에 복사 (매수 시점의 전체 카드 정보 보관)
         nbverse_buy_order = None
@@ -516,7 +551,7 @@ def register_trade_routes(app, env: Dict[str, Any]):
                 _record_nb_attempt(str(cfg.candle), str(cfg.market), 'BUY', ok=False, error='buy_failed_fallback_paper', ts_ms=(bucket_ts_ms or order.get('ts')), meta={'price': price})
             except Exception:
                 pass
-            return jsonify({'ok': True, 'order': order})
+            return {'ok': True, 'order': order}
         order = {
             'ts': int(time.time()*1000),
             'side': 'BUY',
@@ -548,54 +583,15 @@ def register_trade_routes(app, env: Dict[str, Any]):
         # NBverse 데이터가 있으면 그걸 사용
         if nbverse_buy_order:
             order = nbverse_buy_order
-        try:
-            if (not paper) and isinstance(o, dict) and o.get('uuid') and upbit:
-                uuid = o.get('uuid')
-                detail = None
-                for _ in range(6):
-                    try:
-                        detail = upbit.get_order(uuid)
-                    except Exception:
-                        detail = None
-                    if detail and (detail.get('executed_volume') or detail.get('state') in ('done','cancel')):
-                        break
-                    time.sleep(0.3)
-                if isinstance(detail, dict):
-                    try:
-                        ex_vol = float(detail.get('executed_volume') or 0.0)
-                    except Exception:
-                        ex_vol = 0.0
-                    avg_price = 0.0
-                    try:
-                        avg_price = float(detail.get('avg_price') or 0.0)
-                    except Exception:
-                        avg_price = 0.0
-                    if avg_price <= 0.0 and isinstance(detail.get('trades'), list) and len(detail['trades']) > 0:
-                        try:
-                            total_funds = 0.0
-                            total_vol = 0.0
-                            for t in detail['trades']:
-                                p = float(t.get('price') or 0.0)
-                                v = float(t.get('volume') or 0.0)
-                                total_funds += p * v
-                                total_vol += v
-                            if total_vol > 0:
-                                avg_price = total_funds / total_vol
-                                ex_vol = total_vol if ex_vol <= 0 else ex_vol
-                        except Exception:
-                            pass
-                    if ex_vol > 0:
-                        order['size'] = float(ex_vol)
-                    if avg_price > 0:
-                        order['price'] = float(avg_price)
-                    try:
-                        order['uuid'] = uuid
-                        order['paid_fee'] = float(detail.get('paid_fee') or 0.0)
-                        order['avg_price'] = float(avg_price)
-                    except Exception:
-                        pass
-        except Exception:
-            pass
+        # Fill detail (avg price / executed volume / fee) comes from the router's fill tracker;
+        # wait briefly so the card records the real fill, later fills patch the order in place.
+        if (not paper) and isinstance(o, dict) and o.get('uuid'):
+            try:
+                fill_wait = float(os.getenv('ORDER_FILL_WAIT_SEC', '2.0'))
+            except Exception:
+                fill_wait = 2.0
+            ticket.wait(fill_wait, until='done')
+            ticket.on_fill(lambda t, order=order: _apply_order_fill(order, t.fill))
         try:
             orders.append(order)
         except Exception:
@@ -675,7 +671,7 @@ def register_trade_routes(app, env: Dict[str, Any]):
             _save_order_card(order, 'BUY')
         except Exception as e:
             logger.warning(f"매수 카드 자동 저장 실패: {e}")
-        return jsonify({'ok': True, 'order': order})
+        return {'ok': True, 'order': order}
 
     # ---- Trade Sell ----
     @app.route('/api/trade/sell', methods=['POST'])
@@ -703,12 +699,7 @@ def register_trade_routes(app, env: Dict[str, Any]):
             bucket_ts_ms = int(bucket_override)*1000 if bucket_override is not None else None
         except Exception:
             bucket_ts_ms = None
-        upbit = None
-        if not paper and cfg.access_key and cfg.secret_key:
-            upbit = pyupbit.Upbit(cfg.access_key, cfg.secret_key)
-        trader = Trader(upbit, TradeConfig(market=market, order_krw=int(cfg.order_krw), paper=paper, pnl_ratio=pnl_ratio,
-                                           pnl_profit_ratio=float(getattr(cfg, 'pnl_profit_ratio', 0.0)),
-                                           pnl_loss_ratio=float(getattr(cfg, 'pnl_loss_ratio', 0.0))))
+        router = _order_router()
         try:
             df = get_candles(market, cfg.candle, count=max(60, cfg.ema_slow+5))
             price = float(df['close'].iloc[-1]) if len(df) else 0.0
@@ -766,16 +757,26 @@ def register_trade_routes(app, env: Dict[str, Any]):
         attempt_size = size_override
         logger.info(f"📊 매도 준비: 수량={attempt_size} BTC, 가격={price:.0f} KRW, 금액={order_amount:.0f} KRW")
         
-        # 실제 매도 실행
-        if not paper:
-            try:
-                o = upbit.sell_market_order(market, attempt_size)
-                if isinstance(o, dict): o['live_ok'] = True
-                logger.info(f"✅ 실매도 실행: {o}")
-            except Exception as e:
-                logger.error(f"❌ 실매도 실행 실패: {e}")
-                o = None
-        else:
+        # 실제 매도 실행 (router: 같은 bucket/카드의 중복 매도 방지, 거래소 호출은 라우터 워커에서)
+        sell_key = payload.get('idempotency_key') or payload.get('card_uuid') or payload.get('card_timestamp')
+        if not sell_key and bucket_ts_ms:
+            sell_key = idempotency_key(bucket_ts_ms, 'SELL', f"api:{market}")
+        ticket = router.submit(OrderRequest(market=market, side='SELL', price=price, size=attempt_size,
+                                            paper=paper, key=(f"api:SELL:{sell_key}" if sell_key else None), source='api'))
+        if ticket.duplicates:
+            return jsonify({'ok': False, 'error': 'duplicate_order', 'ticket': ticket.to_dict()})
+        book = functools.partial(_book_sell,
+                                 payload=payload, cfg=cfg, market=market, df=df, price=price, paper=paper,
+                                 attempt_size=attempt_size, bucket_ts_ms=bucket_ts_ms)
+        if not ticket.wait(15.0) and not router.cancel(ticket):
+            ticket.on_placed(book)
+            return jsonify({'ok': True, 'pending': True, 'ticket': ticket.to_dict()})
+        return jsonify(book(ticket))
+
+    def _book_sell(ticket, payload, cfg, market, df, price, paper, attempt_size, bucket_ts_ms):
+        """Sell bookkeeping (orders, NB coin, trainer, buy→sell card move) for a placed ticket."""
+        o = ticket.result
+        if isinstance(o, dict) and o.get('paper'):
             # Paper trade: 모의거래
             o = {
                 'uuid': f'paper-{int(time.time()*1000)}',
@@ -783,6 +784,11 @@ def register_trade_routes(app, env: Dict[str, Any]):
                 'live_ok': True
             }
             logger.info(f"📝 모의매도 실행: {o}")
+        elif ticket.status in ('placed', 'filled', 'timeout'):
+            logger.info(f"✅ 실매도 실행: {o}")
+        else:
+            logger.error(f"❌ 실매도 실행 실패: {ticket.error}")
+            o = None
         
         # ✅ 매도 실행 결과 검증
         if o is None or (not paper and not (isinstance(o, dict) and o.get('live_ok'))):
@@ -791,7 +797,7 @@ def register_trade_routes(app, env: Dict[str, Any]):
                 _record_nb_attempt(str(cfg.candle), str(cfg.market), 'SELL', ok=False, error='sell_order_failed', ts_ms=(bucket_ts_ms or int(time.time()*1000)), meta={'price': price, 'size': float(attempt_size or 0.0)})
             except Exception:
                 pass
-            return jsonify({'ok': False, 'error': 'sell_order_failed'})
+            return {'ok': False, 'error': 'sell_order_failed'}
         try:
             window = int(load_nb_params().get('window', 50))
         except Exception:
@@ -816,6 +822,8 @@ def register_trade_routes(app, env: Dict[str, Any]):
             'nb_price_max': float(payload.get('nb_price_max') or 0.0),  # 카드 n/b max
             'nb_price_min': float(payload.get('nb_price_min') or 0.0),  # 카드 n/b min
         }
+        if not paper:
+            ticket.on_fill(lambda t, order=order: _apply_order_fill(order, t.fill))
         logger.info(f"✅ 매도 주문 생성: ts={order['ts']}, price={order['price']:.0f}, size={order['size']}, amount={order['price']*order['size']:.0f}")
         try:
             orders.append(order)
@@ -1046,6 +1054,6 @@ def register_trade_routes(app, env: Dict[str, Any]):
             except Exception as e2:
                 logger.warning(f"⚠️ 오류 시 매도 카드 자동 저장 실패: {e2}")
         
-        return jsonify({'ok': True, 'order': order})
+        return {'ok': True, 'order': order}
 
     return app
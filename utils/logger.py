@@ -1,8 +1,16 @@
 """로깅 시스템 설정"""
 import os
+import re
 import sys
+import json
+import time
+import queue
+import copy
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import threading
+from datetime import datetime
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from pathlib import Path
 
 # Windows 콘솔 인코딩 문제 해결
@@ -15,10 +23,128 @@ if sys.platform == 'win32':
         pass
 
 
+class JsonFormatter(logging.Formatter):
+    """한 줄 JSON 레코드 (ts, level, logger, thread, msg + extra 필드)"""
+
+    _RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+    def format(self, record):
+        out = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'msg': record.getMessage(),
+        }
+        for k, v in record.__dict__.items():
+            if k not in self._RESERVED and not k.startswith('_'):
+                out[k] = v if isinstance(v, (str, int, float, bool, type(None))) else str(v)
+        exc = record.exc_text or (self.formatException(record.exc_info) if record.exc_info else None)
+        if exc:
+            out['exc'] = exc
+        return json.dumps(out, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """기존 텍스트 형식 + 억제된 반복 메시지 수 표시"""
+
+    def format(self, record):
+        text = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        return f'{text} (+{suppressed} similar suppressed)' if suppressed else text
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    반복 메시지 샘플링 (숫자만 다른 메시지는 같은 메시지로 취급)
+
+    window 초마다 같은 메시지는 burst 개까지 통과, 이후에는 sample 개 중 1개만 통과시키고
+    다음 창의 첫 레코드에 억제된 개수(suppressed)를 붙인다. ERROR 이상은 항상 통과.
+    """
+
+    _DIGITS = re.compile(r'\d+(?:[.,]\d+)*')
+
+    def __init__(self, window: float = 10.0, burst: int = 5, sample: int = 50, max_keys: int = 5000):
+        super().__init__()
+        self.window = float(window)
+        self.burst = int(burst)
+        self.sample = max(0, int(sample))
+        self.max_keys = int(max_keys)
+        self._state = {}               # key -> [window_start, count, suppressed]
+        self._lock = threading.Lock()
+        self.suppressed_total = 0
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR or self.window <= 0:
+            return True
+        msg = record.msg if isinstance(record.msg, str) else str(record.msg)
+        key = (record.name, record.levelno, self._DIGITS.sub('#', msg[:200]))
+        now = record.created
+        with self._lock:
+            st = self._state.get(key)
+            if st is None or now - st[0] >= self.window:
+                if len(self._state) >= self.max_keys:
+                    self._state.clear()
+                if st is not None and st[2]:
+                    record.suppressed = st[2]
+                self._state[key] = [now, 1, 0]
+                return True
+            st[1] += 1
+            if st[1] <= self.burst or (self.sample and (st[1] - self.burst) % self.sample == 0):
+                if st[2]:
+                    record.suppressed = st[2]
+                    st[2] = 0
+                return True
+            st[2] += 1
+            self.suppressed_total += 1
+            return False
+
+
+class RecordQueueHandler(QueueHandler):
+    """
+    QueueHandler 의 prepare() 는 traceback 을 msg 에 합쳐 버려 JSON 의 exc 필드가 비게 된다.
+    msg 는 인자만 채운 메시지로 두고, traceback 은 exc_text 로 따로 넘긴다
+    (TextFormatter 는 exc_text 를 그대로 붙이고, JsonFormatter 는 exc 필드로 쓴다).
+    """
+
+    _exc_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or self._exc_formatter.formatException(record.exc_info)
+            record.exc_info = None      # traceback frames stay on the calling thread
+        return record
+
+
+_listeners = {}
+_listeners_lock = threading.Lock()
+
+
+def _stop_listeners():
+    with _listeners_lock:
+        for listener in _listeners.values():
+            try:
+                listener.stop()
+            except Exception:
+                pass
+        _listeners.clear()
+
+
+atexit.register(_stop_listeners)
+
+
 def setup_logger(name: str = '8bit_bot', log_dir: str = 'logs', level: str = None):
     """
     로거 설정
     
+    호출 스레드는 QueueHandler 로 레코드를 큐에 넣기만 하고, 파일(JSON 줄) / 콘솔 출력은
+    로거별 QueueListener 스레드가 처리한다. 반복 메시지는 RateLimitFilter 로 샘플링된다.
+    LOG_QUEUE=false 이면 예전처럼 핸들러를 직접 붙이고, LOG_FILE_FORMAT=text 이면 파일도 텍스트로 남긴다.
+    
     Args:
         name: 로거 이름
         log_dir: 로그 파일 저장 디렉토리
@@ -46,10 +172,11 @@ def setup_logger(name: str = '8bit_bot', log_dir: str = 'logs', level: str = Non
     log_path.mkdir(exist_ok=True)
     
     # 포맷터 설정
-    formatter = logging.Formatter(
+    text_formatter = TextFormatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
     )
+    file_formatter = text_formatter if os.getenv('LOG_FILE_FORMAT', 'json').lower() == 'text' else JsonFormatter()
     
     # 로그 파일명 결정 (name에 따라 다른 파일)
     if name == 'ml_v2':
@@ -65,24 +192,49 @@ def setup_logger(name: str = '8bit_bot', log_dir: str = 'logs', level: str = Non
         encoding='utf-8'
     )
     file_handler.setLevel(log_level)
-    file_handler.setFormatter(formatter)
+    file_handler.setFormatter(file_formatter)
     
     # 콘솔 핸들러
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(log_level)
-    console_handler.setFormatter(formatter)
+    console_handler.setFormatter(text_formatter)
+    
+    rate_filter = RateLimitFilter(
+        window=float(os.getenv('LOG_RATE_WINDOW_SEC', '10')),
+        burst=int(os.getenv('LOG_RATE_BURST', '5')),
+        sample=int(os.getenv('LOG_RATE_SAMPLE', '50')),
+    )
     
-    # 핸들러 추가
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    if os.getenv('LOG_QUEUE', 'true').lower() == 'true':
+        # 핸들러는 리스너 스레드에서만 실행 → 요청/루프 스레드는 파일 I/O 를 기다리지 않음
+        log_queue = queue.SimpleQueue()
+        queue_handler = RecordQueueHandler(log_queue)
+        queue_handler.addFilter(rate_filter)
+        listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+        listener.start()
+        with _listeners_lock:
+            _listeners[name] = listener
+        logger.addHandler(queue_handler)
+    else:
+        file_handler.addFilter(rate_filter)
+        console_handler.addFilter(rate_filter)
+        logger.addHandler(file_handler)
+        logger.addHandler(console_handler)
     
     # 즉시 flush 설정
     logger.propagate = False
     
     return logger
-    logger.addHandler(console_handler)
-    
-    return logger
+
+
+def flush_logs(timeout: float = 2.0):
+    """큐에 쌓인 레코드가 모두 기록될 때까지 대기 (종료 직전 / 테스트용)"""
+    deadline = time.monotonic() + timeout
+    with _listeners_lock:
+        queues = [listener.queue for listener in _listeners.values()]
+    for q in queues:
+        while not q.empty() and time.monotonic() < deadline:
+            time.sleep(0.01)
 
 
 def get_logger(name: str = None):
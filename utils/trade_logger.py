@@ -3,10 +3,14 @@
 매수/매도 및 자동 구매 이벤트를 파일에 기록
 """
 import os
+import atexit
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, Dict, Any
 
+from utils.logger import get_logger
+
 
 class TradeLogger:
     """거래 로그 관리 클래스"""
@@ -22,6 +26,11 @@ class TradeLogger:
         self.trade_log_path = self.log_dir / 'trade.log'
         self.auto_buy_log_path = self.log_dir / 'auto_buy.log'
         
+        # 파일 핸들은 한 번 열어 재사용 (줄 단위 버퍼링, 한 줄마다 open/close 하지 않음)
+        self._files = {}
+        self._lock = threading.Lock()
+        self._logger = get_logger()
+        
         # 로그 파일 초기화 (헤더가 없으면 추가)
         self._init_log_file(self.trade_log_path, '# 매수/매도 거래 로그\n# 형식: [타임스탬프] [액션] [마켓] [가격] [수량] [금액] [상태]\n')
         self._init_log_file(self.auto_buy_log_path, '# 자동 구매 로그\n# 형식: [타임스탬프] [액션] [리그] [등급] [가격대%] [금액] [상태] [사유]\n')
@@ -35,10 +44,23 @@ class TradeLogger:
     def _write_log(self, path: Path, message: str):
         """로그 파일에 메시지 기록"""
         try:
-            with open(path, 'a', encoding='utf-8') as f:
+            with self._lock:
+                f = self._files.get(path)
+                if f is None or f.closed:
+                    f = self._files[path] = open(path, 'a', encoding='utf-8', buffering=1)
                 f.write(message + '\n')
         except Exception as e:
-            print(f"⚠️ 로그 기록 실패: {e}")
+            self._logger.warning(f"⚠️ 로그 기록 실패: {e}")
+    
+    def close(self):
+        """열어 둔 로그 파일 핸들 닫기"""
+        with self._lock:
+            for f in self._files.values():
+                try:
+                    f.close()
+                except Exception:
+                    pass
+            self._files.clear()
     
     def log_trade(self, 
                   action: str, 
@@ -69,7 +91,9 @@ class TradeLogger:
         log_message = f'[{timestamp}] {action:5s} {market:10s} {price:12.0f} {size:12.8f} {amount:10.0f} {status:7s}{extra_str}'
         
         self._write_log(self.trade_log_path, log_message)
-        print(f'📝 Trade Log: {log_message}')
+        self._logger.info(f'📝 Trade Log: {log_message}',
+                          extra={'event': 'trade', 'action': action, 'market': market, 'price': price,
+                                 'size': size, 'amount': amount, 'status': status})
     
     def log_auto_buy(self,
                      league: str,
@@ -94,7 +118,9 @@ class TradeLogger:
         log_message = f'[{timestamp}] AUTO_BUY {league:12s} {grade:5s} {percent:6s} {amount:12.0f} {status:8s} {reason}'
         
         self._write_log(self.auto_buy_log_path, log_message)
-        print(f'📝 AutoBuy Log: {log_message}')
+        self._logger.info(f'📝 AutoBuy Log: {log_message}',
+                          extra={'event': 'auto_buy', 'league': league, 'grade': grade, 'percent': percent,
+                                 'amount': amount, 'status': status, 'reason': reason})
     
     def log_auto_buy_check(self,
                           league: str,
@@ -118,7 +144,9 @@ class TradeLogger:
         log_message = f'[{timestamp}] CHECK    {league:12s} {grade:5s} {percent:6s} {"":12s} {status:8s} {reason}'
         
         self._write_log(self.auto_buy_log_path, log_message)
-        print(f'🔍 AutoBuy Check: {log_message}')
+        self._logger.info(f'🔍 AutoBuy Check: {log_message}',
+                          extra={'event': 'auto_buy_check', 'league': league, 'grade': grade, 'percent': percent,
+                                 'status': status, 'reason': reason})
     
     def get_recent_trades(self, count: int = 50) -> list:
         """최근 거래 로그 조회"""
@@ -160,4 +188,5 @@ def get_trade_logger(log_dir: str = 'logs') -> TradeLogger:
     global _trade_logger_instance
     if _trade_logger_instance is None:
         _trade_logger_instance = TradeLogger(log_dir)
+        atexit.register(_trade_logger_instance.close)
     return _trade_logger_instance